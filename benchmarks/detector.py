@@ -0,0 +1,55 @@
+"""Throughput benchmark for input type detection.
+
+Classifies a synthetic indicator list (domains, emails, usernames, phone
+numbers, IPs, crypto addresses) with detect_many and with one
+detect_input_type call per line, and prints lines per second.
+
+Usage:
+    python benchmarks/detector.py
+    python benchmarks/detector.py --lines 1000000
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from cybertrace.detector import detect_input_type, detect_many  # noqa: E402
+
+
+def make_corpus(lines: int):
+    shapes = [
+        lambda i: f'host{i}.example{i % 97}.com',
+        lambda i: f'user{i}@mail{i % 13}.org',
+        lambda i: f'handle_{i}',
+        lambda i: f'98{i % 100000000:08d}',
+        lambda i: f'10.{i % 256}.{i // 256 % 256}.{i % 7}',
+        lambda i: f'1A1zP1eP5QGefi2DMPTfTL5SLmv7Di{i % 10000:04d}',
+        lambda i: f'https://site{i}.example.net/page',
+    ]
+    return [shapes[i % len(shapes)](i) for i in range(lines)]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--lines', type=int, default=500000)
+    args = parser.parse_args()
+
+    corpus = make_corpus(args.lines)
+
+    for name, run in [
+        ('detect_many', lambda: list(detect_many(corpus))),
+        ('detect_input_type', lambda: [detect_input_type(line) for line in corpus]),
+    ]:
+        start = time.perf_counter()
+        run()
+        elapsed = time.perf_counter() - start
+        print(f'{name:18} {len(corpus) / elapsed:12,.0f} lines/s')
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
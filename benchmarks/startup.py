@@ -0,0 +1,233 @@
+"""Startup benchmark for the CyberTrace CLI.
+
+Measures, in fresh interpreters:
+
+- import time of ``cybertrace.cli``, and of everything a username search
+  loads (``python -X importtime``), broken down by top-level package
+  (click, aiohttp, rich, dns, whois, ...)
+- wall time of ``cybertrace --help``, ``cybertrace modules`` and
+  ``cybertrace search --type username`` against a local HTTP stub
+
+Each figure is the median of ``--runs`` runs. Results are compared with the
+budget file (``budget.json`` next to this script); the exit status is 1 if
+any budget is exceeded, so the script can gate CI. The near-zero package
+budgets for ``import_ms`` catch heavy dependencies creeping back into the
+plain CLI import.
+
+Usage:
+    python benchmarks/startup.py
+    python benchmarks/startup.py --runs 10 --json
+"""
+
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, List, Optional
+
+ROOT = Path(__file__).resolve().parent.parent
+DEFAULT_BUDGET = Path(__file__).resolve().parent / 'budget.json'
+
+# Packages reported individually; everything else is grouped as stdlib/other
+TRACKED_PACKAGES = ('cybertrace', 'click', 'aiohttp', 'rich', 'dns', 'whois', 'dotenv')
+
+IMPORTTIME_LINE = re.compile(r'import time:\s+(\d+) \|\s+(\d+) \|(\s*)(\S+)')
+
+# Everything `cybertrace search --type username` imports before searching
+SEARCH_IMPORTS = (
+    'import cybertrace.cli, cybertrace.runner, cybertrace.output, '
+    'cybertrace.modules.username_module'
+)
+
+# Runs `cybertrace search` with the username module pointed at the stub:
+# the key platforms and a site manifest of stub URLs (USERNAME_SITES), so
+# nothing leaves the machine. External tools are disabled so the run
+# measures only our own code path.
+SEARCH_DRIVER = """
+import json, os, sys, tempfile
+stub = sys.argv[1]
+workdir = tempfile.TemporaryDirectory()
+manifest = os.path.join(workdir.name, 'sites.json')
+with open(manifest, 'w') as f:
+    json.dump({'sites': {
+        f'site{i}': {'url': stub + f'/site{i}/{{username}}'} for i in range(20)
+    }}, f)
+os.environ['USERNAME_SITES'] = manifest
+# The stub sites all share one host; real ones would not
+os.environ['USERNAME_HOST_RATE'] = '0'
+from cybertrace.modules.username_module import UsernameModule
+UsernameModule.KEY_PLATFORMS = {
+    name: stub + '/' + name + '/{username}'
+    for name in ('github', 'reddit', 'twitter', 'youtube', 'telegram')
+}
+UsernameModule._tool_available = lambda self, tool: False
+from cybertrace.cli import main
+sys.argv = ['cybertrace', 'search', '--type', 'username', '--output', 'json', 'benchuser']
+try:
+    main()
+finally:
+    workdir.cleanup()
+"""
+
+
+def _env() -> Dict[str, str]:
+    env = dict(os.environ)
+    env['PYTHONPATH'] = os.pathsep.join(filter(None, [str(ROOT), env.get('PYTHONPATH')]))
+    return env
+
+
+def parse_importtime(stderr: str) -> Dict[str, float]:
+    """Sum self import time (ms) per top-level package from -X importtime output."""
+    totals: Dict[str, float] = dict.fromkeys(TRACKED_PACKAGES + ('other',), 0.0)
+    for line in stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if not match:
+            continue
+        package = match.group(4).split('.')[0]
+        if package not in TRACKED_PACKAGES:
+            package = 'other'
+        totals[package] += int(match.group(1)) / 1000
+    totals['total'] = sum(totals.values())
+    return dict(totals)
+
+
+def measure_imports(statement: str, runs: int) -> Dict[str, float]:
+    """Median per-package import time of an import statement."""
+    samples: Dict[str, List[float]] = defaultdict(list)
+    for _ in range(runs):
+        proc = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', statement],
+            env=_env(), capture_output=True, text=True, check=True,
+        )
+        for package, ms in parse_importtime(proc.stderr).items():
+            samples[package].append(ms)
+    return {package: statistics.median(values) for package, values in samples.items()}
+
+
+def _wall(args: List[str], runs: int) -> float:
+    """Median wall time (ms) of running a command."""
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run(args, env=_env(), stdout=subprocess.DEVNULL,
+                       stderr=subprocess.DEVNULL, check=True)
+        times.append((time.perf_counter() - start) * 1000)
+    return statistics.median(times)
+
+
+class StubServer:
+    """Local HTTP server that answers every request like an existing profile."""
+
+    def __init__(self):
+        self.url: Optional[str] = None
+        self._ready = threading.Event()
+        self._loop = None
+        self._runner = None
+
+    def __enter__(self):
+        threading.Thread(target=self._serve, daemon=True).start()
+        self._ready.wait(10)
+        return self
+
+    def __exit__(self, *args):
+        import asyncio
+        if self._loop is not None:
+            asyncio.run_coroutine_threadsafe(self._runner.cleanup(), self._loop).result(5)
+            self._loop.call_soon_threadsafe(self._loop.stop)
+
+    def _serve(self):
+        import asyncio
+        from aiohttp import web
+
+        async def handle(request):
+            return web.json_response({'followers': 1, 'data': {'total_karma': 1}})
+
+        async def start():
+            app = web.Application()
+            app.router.add_route('*', '/{tail:.*}', handle)
+            self._runner = web.AppRunner(app)
+            await self._runner.setup()
+            site = web.TCPSite(self._runner, '127.0.0.1', 0)
+            await site.start()
+            port = site._server.sockets[0].getsockname()[1]
+            self.url = f'http://127.0.0.1:{port}'
+
+        self._loop = asyncio.new_event_loop()
+        self._loop.run_until_complete(start())
+        self._ready.set()
+        self._loop.run_forever()
+
+
+def measure_commands(runs: int) -> Dict[str, float]:
+    """Median wall time of the benchmarked CLI invocations."""
+    cli = [sys.executable, '-m', 'cybertrace']
+    results = {
+        'help': _wall(cli + ['--help'], runs),
+        'modules': _wall(cli + ['modules'], runs),
+    }
+    with StubServer() as stub:
+        results['search_username'] = _wall(
+            [sys.executable, '-c', SEARCH_DRIVER, stub.url], runs
+        )
+    return results
+
+
+def check_budget(report: Dict[str, Dict[str, float]], budget: Dict[str, Dict[str, float]]) -> List[str]:
+    """Return a message for every measurement over its budget."""
+    failures = []
+    for section, limits in budget.items():
+        for name, limit in limits.items():
+            value = report.get(section, {}).get(name)
+            if value is not None and value > limit:
+                failures.append(f'{section}.{name}: {value:.1f}ms > {limit}ms budget')
+    return failures
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=5, help='Runs per measurement (median is reported)')
+    parser.add_argument('--budget', type=Path, default=DEFAULT_BUDGET, help='Budget file (JSON)')
+    parser.add_argument('--no-budget', action='store_true', help='Report only, never fail')
+    parser.add_argument('--json', action='store_true', help='Print the report as JSON')
+    args = parser.parse_args(argv)
+
+    report = {
+        'import_ms': measure_imports('import cybertrace.cli', args.runs),
+        'search_import_ms': measure_imports(SEARCH_IMPORTS, args.runs),
+        'wall_ms': measure_commands(args.runs),
+    }
+
+    if args.json:
+        print(json.dumps(report, indent=2, sort_keys=True))
+    else:
+        titles = {
+            'import_ms': 'Import time, cybertrace.cli',
+            'search_import_ms': 'Import time, cybertrace.cli + username search',
+        }
+        for section, title in titles.items():
+            print(f'{title} (median of {args.runs}):')
+            for package, ms in sorted(report[section].items(), key=lambda item: -item[1]):
+                print(f'  {package:12} {ms:8.1f} ms')
+            print()
+        print(f'Command wall time (median of {args.runs}):')
+        for name, ms in report['wall_ms'].items():
+            print(f'  {name:16} {ms:8.1f} ms')
+
+    if args.no_budget:
+        return 0
+
+    failures = check_budget(report, json.loads(args.budget.read_text()))
+    for failure in failures:
+        print(f'[!] Over budget: {failure}', file=sys.stderr)
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
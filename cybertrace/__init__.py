@@ -8,16 +8,27 @@ to build comprehensive profiles from minimal input.
 __version__ = "1.0.0"
 __author__ = "Anubhav Mohandas"
 
-from .cli import main
 from .detector import detect_input_type, normalize_input
-from .config import config
+from .config import get_config
 from .modules import get_module, list_modules
 
+
+def __getattr__(name):
+    # The CLI pulls in click; only load it when asked for
+    if name == 'main':
+        from .cli import main
+        return main
+    if name == 'config':
+        return get_config()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
 __all__ = [
     'main',
     'detect_input_type',
     'normalize_input',
     'config',
+    'get_config',
     'get_module',
     'list_modules',
 ]
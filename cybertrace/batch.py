@@ -0,0 +1,294 @@
+"""Journaled batch runs over large target lists.
+
+A batch writes one JSON result per line to an output file and keeps a
+SQLite journal next to it recording each target's state. Before a target
+runs it is marked ``running``; once its result is written, the target is
+marked ``done`` in the same transaction that records the output file's new
+committed length.
+
+After a crash, ``resume`` truncates the output back to the last committed
+length (dropping a half-written or uncommitted line) and reruns only the
+targets that are not ``done``. Store writes are keyed by batch id and
+sequence number, so a rerun replaces rather than duplicates them. Each
+result therefore appears exactly once in both the output and the store.
+
+Targets are planned a window at a time: those a module can investigate
+together (see BaseModule.group_key, e.g. hosts and URLs of one registrable
+domain) run as one unit, so shared lookups happen once per group rather
+than once per line.
+"""
+
+import asyncio
+import json
+import os
+import sqlite3
+import uuid
+from itertools import islice
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+from .runner import Engine, resolve_target
+from .scheduler import BULK
+from .store import ResultStore
+
+
+class JournalError(Exception):
+    """Raised when a journal is missing, or already exists for a new run."""
+
+
+class BatchJournal:
+    """Durable record of which targets in a batch have finished."""
+
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS meta (
+        key TEXT PRIMARY KEY,
+        value TEXT NOT NULL
+    );
+    CREATE TABLE IF NOT EXISTS targets (
+        seq INTEGER PRIMARY KEY,
+        target TEXT NOT NULL,
+        status TEXT NOT NULL DEFAULT 'pending',
+        attempts INTEGER NOT NULL DEFAULT 0,
+        error TEXT
+    );
+    CREATE INDEX IF NOT EXISTS targets_status ON targets(status);
+    """
+
+    def __init__(self, path: Union[str, Path]):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(str(self.path), isolation_level=None)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=FULL')
+        self.conn.executescript(self.SCHEMA)
+
+    def get_meta(self, key: str) -> Optional[str]:
+        row = self.conn.execute('SELECT value FROM meta WHERE key = ?', (key,)).fetchone()
+        return row[0] if row else None
+
+    def set_meta(self, key: str, value: str) -> None:
+        self.conn.execute('INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)', (key, value))
+
+    def add_targets(self, targets: Iterable[str], chunk_size: int = 10000) -> int:
+        """Record targets in order. Returns the number added."""
+        count = 0
+        chunk = []
+        for target in targets:
+            chunk.append((target,))
+            if len(chunk) >= chunk_size:
+                count += self._insert(chunk)
+                chunk = []
+        if chunk:
+            count += self._insert(chunk)
+        return count
+
+    def _insert(self, rows) -> int:
+        self.conn.execute('BEGIN')
+        self.conn.executemany('INSERT INTO targets (target) VALUES (?)', rows)
+        self.conn.execute('COMMIT')
+        return len(rows)
+
+    def incomplete(self) -> Iterator[Tuple[int, str]]:
+        """Yield (seq, target) for every target without a committed result."""
+        last = 0
+        while True:
+            rows = self.conn.execute(
+                "SELECT seq, target FROM targets WHERE status != 'done' AND seq > ? "
+                "ORDER BY seq LIMIT 1000",
+                (last,),
+            ).fetchall()
+            if not rows:
+                return
+            yield from rows
+            last = rows[-1][0]
+
+    def mark_running(self, seq: int) -> None:
+        self.conn.execute(
+            "UPDATE targets SET status = 'running', attempts = attempts + 1 WHERE seq = ?",
+            (seq,),
+        )
+
+    def mark_done(self, seq: int, output_offset: int) -> None:
+        """Commit a finished target together with the output length that includes it."""
+        self.conn.execute('BEGIN IMMEDIATE')
+        self.conn.execute(
+            "UPDATE targets SET status = 'done', error = NULL WHERE seq = ?", (seq,)
+        )
+        self.set_meta('output_offset', str(output_offset))
+        self.conn.execute('COMMIT')
+
+    def mark_failed(self, seq: int, error: str) -> None:
+        self.conn.execute(
+            "UPDATE targets SET status = 'failed', error = ? WHERE seq = ?", (error, seq)
+        )
+
+    def stats(self) -> Dict[str, int]:
+        rows = self.conn.execute('SELECT status, COUNT(*) FROM targets GROUP BY status')
+        return {status: count for status, count in rows}
+
+    def close(self) -> None:
+        self.conn.close()
+
+
+class BatchRunner:
+    """
+    Run a journaled batch.
+
+    Args:
+        output: Path of the JSON-lines result file
+        journal: Path of the journal (default: <output>.journal)
+        store: Optional ResultStore to also write results to
+        concurrency: Units of work run at once: a single target, or the
+            targets of one group, which the module runs a few at a time
+            (DomainModule.MAX_GROUP_CONCURRENCY)
+        input_type: Target type for every line (default: auto-detect)
+        options: Module options (deep, tor, timeout)
+        on_progress: Called with (seq, target, status) after each target
+        plan_window: Pending targets read at a time when grouping targets
+            that share work
+    """
+
+    def __init__(
+        self,
+        output: Union[str, Path],
+        journal: Optional[Union[str, Path]] = None,
+        store: Optional[ResultStore] = None,
+        concurrency: int = 4,
+        input_type: str = 'auto',
+        options: Optional[dict] = None,
+        on_progress: Optional[Callable[[int, str, str], None]] = None,
+        plan_window: int = 1000,
+    ):
+        self.output = Path(output)
+        self.journal_path = Path(journal) if journal else self.output.with_name(
+            self.output.name + '.journal'
+        )
+        self.store = store
+        self.concurrency = concurrency
+        self.input_type = input_type
+        self.options = options or {}
+        self.on_progress = on_progress
+        self.plan_window = plan_window
+        self.journal: Optional[BatchJournal] = None
+
+    def start(self, targets: Iterable[str]) -> int:
+        """Create the journal for a new batch. Returns the target count."""
+        if self.journal_path.exists():
+            raise JournalError(
+                f"Journal {self.journal_path} already exists. Use resume, or delete it to start over."
+            )
+        self.journal = BatchJournal(self.journal_path)
+        self.journal.set_meta('batch_id', uuid.uuid4().hex)
+        self.journal.set_meta('output_offset', '0')
+        self.output.parent.mkdir(parents=True, exist_ok=True)
+        self.output.write_bytes(b'')
+        return self.journal.add_targets(targets)
+
+    def resume(self) -> Dict[str, int]:
+        """Reopen an existing journal and roll the output back to its last commit."""
+        if not self.journal_path.exists():
+            raise JournalError(f"No journal at {self.journal_path}")
+        self.journal = BatchJournal(self.journal_path)
+
+        committed = int(self.journal.get_meta('output_offset') or 0)
+        if self.output.exists():
+            if self.output.stat().st_size > committed:
+                os.truncate(self.output, committed)
+        elif committed:
+            raise JournalError(f"Output {self.output} is missing but the journal has results")
+        else:
+            self.output.write_bytes(b'')
+        return self.journal.stats()
+
+    async def run(self) -> Dict[str, int]:
+        """Investigate every incomplete target. Returns final status counts."""
+        if self.journal is None:
+            raise JournalError("Call start() or resume() first")
+
+        batch_id = self.journal.get_meta('batch_id')
+        write_lock = asyncio.Lock()
+
+        with open(self.output, 'ab') as out:
+            async with Engine() as engine:
+                units = self._plan(engine, self.journal.incomplete())
+
+                async def worker():
+                    for unit in units:
+                        await self._run_unit(engine, out, write_lock, batch_id, unit)
+
+                await asyncio.gather(*(worker() for _ in range(self.concurrency)))
+
+        return self.journal.stats()
+
+    def _plan(self, engine: Engine, rows: Iterator[Tuple[int, str]]) -> Iterator[List[Tuple[int, str]]]:
+        """
+        Split pending (seq, target) rows into units of work.
+
+        Within each window of plan_window rows, targets with the same
+        module and group key form one unit; everything else runs alone.
+        """
+        while True:
+            window = list(islice(rows, self.plan_window))
+            if not window:
+                return
+            units: Dict[tuple, List[Tuple[int, str]]] = {}
+            for seq, target in window:
+                key: tuple = (seq,)
+                try:
+                    normalized, _, module_type = resolve_target(target, self.input_type)
+                    module = engine.get_module(module_type)
+                    group = module.group_key(normalized) if module else None
+                    if group is not None:
+                        key = (module.name, group)
+                except Exception:
+                    pass  # Reported when the target runs
+                units.setdefault(key, []).append((seq, target))
+            yield from units.values()
+
+    async def _run_unit(self, engine: Engine, out, write_lock: asyncio.Lock,
+                        batch_id: str, unit: List[Tuple[int, str]]) -> None:
+        for seq, _ in unit:
+            self.journal.mark_running(seq)
+        if len(unit) == 1:
+            try:
+                results = [await engine.investigate(
+                    unit[0][1], self.input_type, priority=BULK, **self.options
+                )]
+            except Exception as e:
+                results = [e]
+        else:
+            try:
+                results = await engine.investigate_many(
+                    [target for _, target in unit], self.input_type, priority=BULK, **self.options
+                )
+            except Exception as e:
+                # A plugin's search_many raised instead of returning errors
+                results = [e] * len(unit)
+
+        for (seq, target), result in zip(unit, results):
+            if isinstance(result, BaseException):
+                self.journal.mark_failed(seq, f'{type(result).__name__}: {result}')
+                self._progress(seq, target, 'failed')
+                continue
+
+            data = result.to_dict()
+            line = json.dumps({'seq': seq, 'input': target, **data}, default=str) + '\n'
+
+            async with write_lock:
+                if self.store is not None:
+                    self.store.save(f'batch:{batch_id}:{seq}', data)
+                out.write(line.encode())
+                out.flush()
+                os.fsync(out.fileno())
+                self.journal.mark_done(seq, out.tell())
+
+            self._progress(seq, target, 'done')
+
+    def _progress(self, seq: int, target: str, status: str) -> None:
+        if self.on_progress:
+            self.on_progress(seq, target, status)
+
+    def close(self) -> None:
+        if self.journal is not None:
+            self.journal.close()
+            self.journal = None
@@ -6,10 +6,9 @@ from typing import Optional
 
 import click
 
-from .config import config
-from .detector import detect_input_type, normalize_input
+from .config import get_config
+from .detector import InvalidInputError, detect_input_type, normalize_input
 from .modules import get_module, list_modules, TYPE_TO_MODULE
-from .output import print_result, save_result
 
 
 @click.group()
@@ -42,18 +41,35 @@ def cli():
               help='Output format')
 @click.option('--save', '-s', 'save_path', default=None,
               help='Save results to file')
-@click.option('--deep', is_flag=True, help='Enable deep scan (more sources)')
+@click.option('--deep', is_flag=True, help='Enable deep scan (more sources; connects to the target)')
+@click.option('--permutations', is_flag=True,
+              help='For domains, also find registered lookalike domains')
 @click.option('--tor', is_flag=True, help='Include direct Tor searches')
 @click.option('--timeout', default=30, help='Timeout per source in seconds')
 @click.option('--quiet', '-q', is_flag=True, help='Suppress progress output')
+@click.option('--priority', default='interactive',
+              type=click.Choice(['interactive', 'normal', 'bulk']),
+              help='Scheduling class for outbound requests')
+@click.option('--no-validate', is_flag=True, help='Search even if the target fails its checksum')
+@click.option('--fanout', default=1, show_default=True,
+              help='For ambiguous targets, run up to this many likely types concurrently')
+@click.option('--min-confidence', default=0.25, show_default=True,
+              help='With --fanout, skip types scoring below this (0-1)')
 def search(target: str, input_type: str, output_format: str, save_path: Optional[str],
-           deep: bool, tor: bool, timeout: int, quiet: bool):
+           deep: bool, permutations: bool, tor: bool, timeout: int, quiet: bool, priority: str,
+           no_validate: bool, fanout: int, min_confidence: float):
     """
     Search for TARGET across all available sources.
     
     TARGET can be an email, phone, username, domain, Bitcoin address, etc.
     The type is auto-detected if not specified.
     """
+    if fanout > 1 and input_type == 'auto':
+        _search_fanout(target, fanout, min_confidence, output_format, save_path, quiet,
+                       priority=priority, deep=deep, permutations=permutations, tor=tor,
+                       timeout=timeout)
+        return
+    
     # Detect input type
     if input_type == 'auto':
         specific_type, module_type = detect_input_type(target)
@@ -63,8 +79,13 @@ def search(target: str, input_type: str, output_format: str, save_path: Optional
         module_type = input_type
         specific_type = input_type
     
-    # Normalize input
-    normalized = normalize_input(target, module_type)
+    # Normalize input (and reject typos before any request is made)
+    try:
+        normalized = normalize_input(target, module_type, strict=not no_validate)
+    except InvalidInputError as e:
+        click.echo(f"[!] {e}", err=True)
+        click.echo("[!] Use --no-validate to search anyway", err=True)
+        sys.exit(1)
     if normalized != target and not quiet:
         click.echo(f"[*] Normalized: {target} → {normalized}")
     
@@ -81,7 +102,8 @@ def search(target: str, input_type: str, output_format: str, save_path: Optional
     
     # Run search
     try:
-        result = asyncio.run(_run_search(module, normalized, deep=deep, tor=tor, timeout=timeout))
+        result = asyncio.run(_run_search(module, normalized, priority, deep=deep,
+                                         permutations=permutations, tor=tor, timeout=timeout))
     except KeyboardInterrupt:
         click.echo("\n[!] Search interrupted")
         sys.exit(1)
@@ -89,6 +111,8 @@ def search(target: str, input_type: str, output_format: str, save_path: Optional
         click.echo(f"[!] Error during search: {e}", err=True)
         sys.exit(1)
     
+    from .output import print_result, save_result
+
     # Output results
     print_result(result, format=output_format)
     
@@ -98,10 +122,58 @@ def search(target: str, input_type: str, output_format: str, save_path: Optional
         click.echo(f"\n[+] Results saved to: {save_path}")
 
 
-async def _run_search(module, target: str, **options):
+def _search_fanout(target: str, top: int, min_confidence: float, output_format: str,
+                   save_path: Optional[str], quiet: bool, **options):
+    """Search the most likely readings of TARGET at once."""
+    from .detector import detect_candidates
+    from .runner import Engine
+
+    if not quiet:
+        for candidate in detect_candidates(target):
+            click.echo(f"[*] Candidate: {candidate.specific_type} → module: "
+                       f"{candidate.module_type} ({candidate.confidence:.2f})")
+        click.echo(f"[*] Searching up to {top} candidates...")
+
+    async def run():
+        async with Engine() as engine:
+            return await engine.investigate_candidates(
+                target, top=top, min_confidence=min_confidence, **options
+            )
+
+    try:
+        ranked = asyncio.run(run())
+    except KeyboardInterrupt:
+        click.echo("\n[!] Search interrupted")
+        sys.exit(1)
+    except Exception as e:
+        click.echo(f"[!] Error during search: {e}", err=True)
+        sys.exit(1)
+
+    if not ranked:
+        click.echo(f"[!] No candidate type scored {min_confidence} or more", err=True)
+        sys.exit(1)
+
+    from .output import print_result
+
+    for candidate, result in ranked:
+        if not quiet:
+            click.echo(f"\n[*] {candidate.module_type} ({candidate.confidence:.2f})")
+        print_result(result, format=output_format)
+
+    if save_path:
+        import json
+        with open(save_path, 'w') as f:
+            json.dump([result.to_dict() for _, result in ranked], f, indent=2, default=str)
+        click.echo(f"\n[+] Results saved to: {save_path}")
+
+
+async def _run_search(module, target: str, priority: str = 'interactive', **options):
     """Run module search in async context."""
-    async with module:
-        return await module.search(target, **options)
+    from .scheduler import priority as run_at
+
+    with run_at(priority):
+        async with module:
+            return await module.search(target, **options)
 
 
 @cli.command('config')
@@ -110,7 +182,7 @@ async def _run_search(module, target: str, **options):
 def config_cmd(check: bool, show: bool):
     """Check and display configuration status."""
     if check or show:
-        config.print_status()
+        get_config().print_status()
     else:
         click.echo("Use --check or --show to view configuration")
 
@@ -136,6 +208,361 @@ def modules_cmd():
         click.echo(f"  {module_name}: {', '.join(inputs)}")
 
 
+def _default_queue() -> str:
+    return str(get_config().data_dir / 'queue.db')
+
+
+def _default_store() -> str:
+    config = get_config()
+    return str(config.result_store or config.data_dir / 'results.db')
+
+
+def _read_targets(targets, targets_file) -> list:
+    """Collect targets from arguments and an optional file (one per line, - for stdin)."""
+    collected = list(targets)
+    if targets_file:
+        collected.extend(_iter_targets(targets_file))
+    return collected
+
+
+@cli.command()
+@click.argument('targets', nargs=-1)
+@click.option('--file', '-f', 'targets_file', type=click.File('r'), default=None,
+              help='Read targets from file (one per line, - for stdin)')
+@click.option('--type', '-t', 'input_type', default='auto', help='Target type (default: auto)')
+@click.option('--queue', 'queue_url', envvar='CYBERTRACE_QUEUE', default=None,
+              help='Queue URL (sqlite path or redis://...)')
+@click.option('--deep', is_flag=True, help='Enable deep scan (more sources; connects to the target)')
+@click.option('--tor', is_flag=True, help='Include direct Tor searches')
+@click.option('--timeout', default=30, help='Timeout per source in seconds')
+@click.option('--max-attempts', default=3, help='Attempts before a job is marked failed')
+@click.option('--priority', default='normal',
+              type=click.Choice(['interactive', 'normal', 'bulk']),
+              help='Jobs with a more urgent class are leased and scheduled first')
+@click.option('--no-validate', is_flag=True, help='Queue targets even if they fail their checksum')
+def submit(targets, targets_file, input_type: str, queue_url: Optional[str],
+           deep: bool, tor: bool, timeout: int, max_attempts: int, priority: str,
+           no_validate: bool):
+    """Queue TARGETS for investigation by workers."""
+    from .queue import Job, open_queue
+    from .scheduler import parse_priority
+
+    collected = _read_targets(targets, targets_file)
+    if not collected:
+        click.echo("[!] No targets given", err=True)
+        sys.exit(1)
+
+    queue = open_queue(queue_url or _default_queue())
+    try:
+        for target in collected:
+            if not no_validate:
+                module_type = detect_input_type(target)[1] if input_type == 'auto' else input_type
+                try:
+                    normalize_input(target, module_type, strict=True)
+                except InvalidInputError as e:
+                    click.echo(f"[!] Skipped: {e}", err=True)
+                    continue
+            job = Job(
+                target=target,
+                input_type=input_type,
+                options={'deep': deep, 'tor': tor, 'timeout': timeout,
+                         'validate': not no_validate},
+                max_attempts=max_attempts,
+                priority=parse_priority(priority),
+            )
+            queue.put(job)
+            click.echo(f"{job.id}\t{target}")
+    finally:
+        queue.close()
+
+
+@cli.command()
+@click.option('--queue', 'queue_url', envvar='CYBERTRACE_QUEUE', default=None,
+              help='Queue URL (sqlite path or redis://...)')
+@click.option('--store', 'store_path', envvar='CYBERTRACE_STORE', default=None,
+              help='Result store path')
+@click.option('--concurrency', '-c', default=4, help='Jobs to run at once')
+@click.option('--visibility-timeout', default=300.0,
+              help='Seconds before an unacknowledged job is handed to another worker')
+@click.option('--burst', is_flag=True, help='Exit when the queue is empty')
+@click.option('--max-jobs', default=None, type=int, help='Exit after this many jobs')
+@click.option('--quiet', '-q', is_flag=True, help='Suppress progress output')
+def worker(queue_url: Optional[str], store_path: Optional[str], concurrency: int,
+           visibility_timeout: float, burst: bool, max_jobs: Optional[int], quiet: bool):
+    """Run queued investigations and write results to the store."""
+    import logging
+    from .queue import open_queue
+    from .store import ResultStore
+    from .worker import Worker
+
+    if not quiet:
+        logging.basicConfig(level=logging.INFO, format='[*] %(message)s')
+
+    queue = open_queue(queue_url or _default_queue())
+    store = ResultStore(store_path or _default_store())
+    runner = Worker(queue, store, concurrency=concurrency,
+                    visibility_timeout=visibility_timeout)
+
+    try:
+        asyncio.run(runner.run(burst=burst, max_jobs=max_jobs))
+    except KeyboardInterrupt:
+        click.echo("\n[!] Worker interrupted")
+    finally:
+        queue.close()
+        store.close()
+
+    if not quiet:
+        click.echo(f"[+] Processed {runner.processed} jobs, {runner.failed} failures")
+
+
+@cli.command()
+@click.argument('job_id', required=False)
+@click.option('--queue', 'queue_url', envvar='CYBERTRACE_QUEUE', default=None,
+              help='Queue URL (sqlite path or redis://...)')
+@click.option('--store', 'store_path', envvar='CYBERTRACE_STORE', default=None,
+              help='Result store path')
+def jobs(job_id: Optional[str], queue_url: Optional[str], store_path: Optional[str]):
+    """Show queue status, or the status and result of JOB_ID."""
+    import json
+    from .queue import open_queue
+    from .store import ResultStore
+
+    queue = open_queue(queue_url or _default_queue())
+    try:
+        if not job_id:
+            stats = queue.stats()
+            for status in ('queued', 'leased', 'done', 'failed'):
+                click.echo(f"  {status:8} {stats.get(status, 0)}")
+            return
+
+        job = queue.get(job_id)
+        if job is None:
+            click.echo(f"[!] Unknown job: {job_id}", err=True)
+            sys.exit(1)
+        click.echo(json.dumps(job.to_dict(), indent=2))
+
+        if job.status == 'done':
+            store = ResultStore(store_path or _default_store())
+            try:
+                result = store.get(job_id)
+            finally:
+                store.close()
+            if result:
+                click.echo(json.dumps(result, indent=2, default=str))
+    finally:
+        queue.close()
+
+
+def _iter_targets(lines):
+    for line in lines:
+        line = line.strip()
+        if line and not line.startswith('#'):
+            yield line
+
+
+@cli.command()
+@click.argument('targets_file', type=click.File('r'), required=False)
+@click.option('--output', '-o', 'output_path', required=True,
+              help='JSON-lines file to write results to')
+@click.option('--resume', is_flag=True, help='Continue an interrupted batch from its journal')
+@click.option('--journal', 'journal_path', default=None,
+              help='Journal path (default: OUTPUT.journal)')
+@click.option('--store', 'store_path', envvar='CYBERTRACE_STORE', default=None,
+              help='Also write results to this result store')
+@click.option('--concurrency', '-c', default=4, help='Targets to investigate at once')
+@click.option('--type', '-t', 'input_type', default='auto', help='Target type (default: auto)')
+@click.option('--deep', is_flag=True, help='Enable deep scan (more sources; connects to the target)')
+@click.option('--tor', is_flag=True, help='Include direct Tor searches')
+@click.option('--timeout', default=30, help='Timeout per source in seconds')
+@click.option('--quiet', '-q', is_flag=True, help='Suppress progress output')
+@click.option('--no-validate', is_flag=True,
+              help='Investigate targets that fail their checksum instead of marking them failed')
+def batch(targets_file, output_path: str, resume: bool, journal_path: Optional[str],
+          store_path: Optional[str], concurrency: int, input_type: str,
+          deep: bool, tor: bool, timeout: int, quiet: bool, no_validate: bool):
+    """
+    Investigate every target in TARGETS_FILE (one per line, - for stdin).
+
+    Progress is journaled, so an interrupted run can be continued with
+    --resume without repeating finished targets.
+    """
+    from .batch import BatchRunner, JournalError
+    from .store import ResultStore
+
+    store = ResultStore(store_path) if store_path else None
+    runner = BatchRunner(
+        output_path,
+        journal=journal_path,
+        store=store,
+        concurrency=concurrency,
+        input_type=input_type,
+        options={'deep': deep, 'tor': tor, 'timeout': timeout, 'validate': not no_validate},
+        on_progress=_batch_progress(quiet),
+    )
+
+    try:
+        if resume:
+            stats = runner.resume()
+            if not quiet:
+                click.echo(f"[*] Resuming: {stats.get('done', 0)} done, "
+                           f"{sum(stats.values()) - stats.get('done', 0)} remaining")
+        else:
+            if targets_file is None:
+                click.echo("[!] TARGETS_FILE is required unless --resume is given", err=True)
+                sys.exit(1)
+            count = runner.start(_iter_targets(targets_file))
+            if not quiet:
+                click.echo(f"[*] Journaled {count} targets")
+
+        stats = _run_batch(runner)
+    except JournalError as e:
+        click.echo(f"[!] {e}", err=True)
+        sys.exit(1)
+    finally:
+        runner.close()
+        if store:
+            store.close()
+
+    click.echo(f"[+] Batch finished: {stats.get('done', 0)} done, {stats.get('failed', 0)} failed")
+
+
+def _batch_progress(quiet: bool):
+    def progress(seq: int, target: str, status: str):
+        if not quiet:
+            icon = '+' if status == 'done' else '!'
+            click.echo(f"[{icon}] #{seq} {target}: {status}")
+    return progress
+
+
+def _run_batch(runner) -> dict:
+    try:
+        return asyncio.run(runner.run())
+    except KeyboardInterrupt:
+        click.echo("\n[!] Batch interrupted - continue with `cybertrace batch --resume`")
+        sys.exit(1)
+
+
+@cli.command()
+@click.argument('files', nargs=-1, type=click.Path(allow_dash=True, dir_okay=False))
+@click.option('--type', '-t', 'types', multiple=True,
+              type=click.Choice(['email', 'phone', 'bitcoin', 'ethereum', 'darkweb', 'domain', 'ip', 'indian']),
+              help='Only extract these module types (repeatable)')
+@click.option('--output', '-o', 'output_format', default='table',
+              type=click.Choice(['table', 'json']), help='Output format (json: one object per line)')
+@click.option('--no-validate', is_flag=True, help='Keep addresses and IDs that fail their checksum')
+@click.option('--no-dedupe', is_flag=True, help='Report every occurrence, not just the first')
+@click.option('--batch', 'batch_output', default=None,
+              help='Investigate the indicators as a batch, writing results to this JSON-lines file')
+@click.option('--store', 'store_path', envvar='CYBERTRACE_STORE', default=None,
+              help='With --batch, also write results to this result store')
+@click.option('--concurrency', '-c', default=4, help='With --batch, targets to investigate at once')
+@click.option('--deep', is_flag=True, help='With --batch, enable deep scan (connects to the targets)')
+@click.option('--tor', is_flag=True, help='With --batch, include direct Tor searches')
+@click.option('--timeout', default=30, help='With --batch, timeout per source in seconds')
+@click.option('--quiet', '-q', is_flag=True, help='Suppress progress output')
+def extract(files, types, output_format: str, no_validate: bool, no_dedupe: bool,
+            batch_output: Optional[str], store_path: Optional[str], concurrency: int,
+            deep: bool, tor: bool, timeout: int, quiet: bool):
+    """
+    Extract indicators from FILES (text, logs, dumps; - for stdin).
+
+    Files are memory-mapped and scanned in chunks, so inputs of any size
+    are handled in bounded memory. With --batch, indicators are journaled
+    as they are found and then investigated like `cybertrace batch`; an
+    interrupted run is continued with `cybertrace batch --resume -o OUTPUT`.
+    """
+    import json
+    from .extractor import extract_files
+
+    indicators = extract_files(files or ['-'], validate=not no_validate, dedupe=not no_dedupe)
+    if types:
+        indicators = (i for i in indicators if i.module_type in types)
+
+    if batch_output is None:
+        for indicator in indicators:
+            if output_format == 'json':
+                click.echo(json.dumps(indicator._asdict()))
+            else:
+                click.echo(f"{indicator.specific_type}\t{indicator.value}")
+        return
+
+    from .batch import BatchRunner, JournalError
+    from .store import ResultStore
+
+    store = ResultStore(store_path) if store_path else None
+    runner = BatchRunner(
+        batch_output,
+        store=store,
+        concurrency=concurrency,
+        options={'deep': deep, 'tor': tor, 'timeout': timeout, 'validate': not no_validate},
+        on_progress=_batch_progress(quiet),
+    )
+    try:
+        count = runner.start(indicator.value for indicator in indicators)
+        if not quiet:
+            click.echo(f"[*] Journaled {count} indicators")
+        stats = _run_batch(runner)
+    except JournalError as e:
+        click.echo(f"[!] {e}", err=True)
+        sys.exit(1)
+    finally:
+        runner.close()
+        if store:
+            store.close()
+
+    click.echo(f"[+] Batch finished: {stats.get('done', 0)} done, {stats.get('failed', 0)} failed")
+
+
+@cli.command()
+@click.option('--host', default='127.0.0.1', help='Interface to bind')
+@click.option('--port', '-p', default=8080, help='Port to listen on')
+def serve(host: str, port: int):
+    """Run the JSON HTTP API with warm sessions and caches."""
+    from .server import run_server
+
+    click.echo(f"[*] CyberTrace API listening on http://{host}:{port}")
+    run_server(host=host, port=port)
+
+
+@cli.group()
+def ipdb():
+    """Build and query the offline IP-to-ASN database."""
+
+
+@ipdb.command('compile')
+@click.argument('sources', nargs=-1, required=True, type=click.Path(exists=True, dir_okay=False))
+@click.option('--output', '-o', 'output_path', default=None,
+              help='Database file to write (default: IPASN_DB or data/ipasn.db)')
+def ipdb_compile(sources, output_path: Optional[str]):
+    """Compile iptoasn-style TSV SOURCES (plain or .gz) into a lookup table."""
+    from .ipasn import compile_database, database_path
+
+    output_path = output_path or str(database_path())
+    counts = compile_database(sources, output_path)
+    click.echo(
+        f"[+] Wrote {output_path}: {counts['ipv4_ranges']} IPv4 and "
+        f"{counts['ipv6_ranges']} IPv6 ranges, {counts['as_records']} AS records"
+    )
+
+
+@ipdb.command('lookup')
+@click.argument('ips', nargs=-1, required=True)
+def ipdb_lookup(ips):
+    """Look up the ASN and country of IPS."""
+    from .ipasn import database_path, get_ipasn_db
+
+    db = get_ipasn_db()
+    if db is None:
+        click.echo(f"[!] No database at {database_path()}. Run: cybertrace ipdb compile <tsv>", err=True)
+        sys.exit(1)
+    for ip in ips:
+        info = db.lookup(ip)
+        if info is None:
+            click.echo(f"{ip}\t-")
+        else:
+            click.echo(f"{ip}\tAS{info['asn']}\t{info['country'] or '-'}\t{info['as_name']}")
+
+
 # Shortcut commands for specific modules
 
 @cli.command()
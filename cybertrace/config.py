@@ -1,13 +1,25 @@
-"""Configuration management for CyberTrace."""
+"""Configuration management for CyberTrace.
+
+Nothing is read at import time. The shared config is built from the
+environment (and .env) the first time it is used; libraries embedding
+CyberTrace can instead pass a Config of their own to modules and engines.
+"""
 
 import os
 from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Optional, Dict, Any
-from dotenv import load_dotenv
+from typing import Optional, Dict, Any, List
+
+_dotenv_loaded = False
+
 
-# Load .env from project root
-load_dotenv()
+def _load_dotenv() -> None:
+    """Load .env from the working directory, once."""
+    global _dotenv_loaded
+    if not _dotenv_loaded:
+        from dotenv import load_dotenv
+        load_dotenv()
+        _dotenv_loaded = True
 
 
 @dataclass
@@ -107,22 +119,87 @@ class Config:
     cache_ttl_hours: int = 24
     request_timeout: int = 30
     max_concurrent: int = 10
+    host_rate_limit: float = 0.0  # requests/second per host, 0 = unlimited
+    host_rate_burst: int = 1
     user_agent: str = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
     
-    def __post_init__(self):
-        # Create directories
-        self.data_dir.mkdir(parents=True, exist_ok=True)
+    # DNS (empty nameservers = system resolver configuration)
+    dns_nameservers: List[str] = field(default_factory=list)
+    dns_timeout: float = 5.0   # seconds per nameserver attempt
+    dns_lifetime: float = 10.0  # seconds per query, across nameservers
+    dns_tcp: bool = False
+    dns_concurrency: int = 100  # lookups in flight during bulk resolution (process-wide)
+    dns_qps: float = 1000.0     # queries/second during bulk resolution (process-wide), 0 = unlimited
+    dns_cache: bool = True      # keep answers for their TTL, process-wide
+    dns_cache_size: int = 100000  # cached answers kept at most
+    dns_cache_persist: bool = False  # save the cache to cache_dir between runs
+    
+    whois_rate_limit: float = 1.0  # port-43 queries/second per WHOIS server
+    
+    tls_concurrency: int = 50  # certificate handshakes in flight
+    tls_timeout: float = 5.0   # seconds per handshake
+    
+    fingerprint_concurrency: int = 100  # HTTP fingerprint requests in flight
+    fingerprint_host_rate: float = 2.0  # requests/second to any one host
+    fingerprint_max_bytes: int = 8192   # page bytes read per host, at most
+    fingerprint_timeout: float = 10.0   # seconds per request
+    
+    username_sites: Optional[Path] = None  # site manifest (default: the bundled one)
+    username_concurrency: int = 100  # profile checks in flight
+    username_host_rate: float = 2.0  # requests/second to any one site
+    username_timeout: float = 10.0   # seconds per check
+    
+    public_suffix_list: Optional[Path] = None  # newer list than the bundled copy
+    ipasn_db: Optional[Path] = None  # compiled IP-to-ASN table (default: data_dir/ipasn.db)
+    result_store: Optional[Path] = None  # result store (default: data_dir/results.db)
+    
+    def cache_path(self, name: str) -> Path:
+        """Path of a cache file, creating the cache directory on first use."""
         self.cache_dir.mkdir(parents=True, exist_ok=True)
+        return self.cache_dir / name
+    
+    def data_path(self, name: str) -> Path:
+        """Path of a data file, creating the data directory on first use."""
+        self.data_dir.mkdir(parents=True, exist_ok=True)
+        return self.data_dir / name
     
     @classmethod
     def load(cls) -> 'Config':
         """Load configuration from environment."""
+        _load_dotenv()
         return cls(
             api_keys=APIKeys.from_env(),
             tor=TorConfig.from_env(),
             cache_ttl_hours=int(os.getenv('CACHE_TTL_HOURS', '24')),
             request_timeout=int(os.getenv('REQUEST_TIMEOUT', '30')),
             max_concurrent=int(os.getenv('MAX_CONCURRENT', '10')),
+            host_rate_limit=float(os.getenv('HOST_RATE_LIMIT', '0')),
+            host_rate_burst=int(os.getenv('HOST_RATE_BURST', '1')),
+            dns_nameservers=[
+                ns.strip() for ns in os.getenv('DNS_NAMESERVERS', '').split(',') if ns.strip()
+            ],
+            dns_timeout=float(os.getenv('DNS_TIMEOUT', '5')),
+            dns_lifetime=float(os.getenv('DNS_LIFETIME', '10')),
+            dns_tcp=os.getenv('DNS_TCP', 'false').lower() == 'true',
+            dns_concurrency=int(os.getenv('DNS_CONCURRENCY', '100')),
+            dns_qps=float(os.getenv('DNS_QPS', '1000')),
+            dns_cache=os.getenv('DNS_CACHE', 'true').lower() == 'true',
+            dns_cache_size=int(os.getenv('DNS_CACHE_SIZE', '100000')),
+            dns_cache_persist=os.getenv('DNS_CACHE_PERSIST', 'false').lower() == 'true',
+            whois_rate_limit=float(os.getenv('WHOIS_RATE_LIMIT', '1')),
+            tls_concurrency=int(os.getenv('TLS_CONCURRENCY', '50')),
+            tls_timeout=float(os.getenv('TLS_TIMEOUT', '5')),
+            fingerprint_concurrency=int(os.getenv('FINGERPRINT_CONCURRENCY', '100')),
+            fingerprint_host_rate=float(os.getenv('FINGERPRINT_HOST_RATE', '2')),
+            fingerprint_max_bytes=int(os.getenv('FINGERPRINT_MAX_BYTES', '8192')),
+            fingerprint_timeout=float(os.getenv('FINGERPRINT_TIMEOUT', '10')),
+            username_sites=Path(os.environ['USERNAME_SITES']) if os.getenv('USERNAME_SITES') else None,
+            username_concurrency=int(os.getenv('USERNAME_CONCURRENCY', '100')),
+            username_host_rate=float(os.getenv('USERNAME_HOST_RATE', '2')),
+            username_timeout=float(os.getenv('USERNAME_TIMEOUT', '10')),
+            public_suffix_list=Path(os.environ['PUBLIC_SUFFIX_LIST']) if os.getenv('PUBLIC_SUFFIX_LIST') else None,
+            ipasn_db=Path(os.environ['IPASN_DB']) if os.getenv('IPASN_DB') else None,
+            result_store=Path(os.environ['CYBERTRACE_STORE']) if os.getenv('CYBERTRACE_STORE') else None,
         )
     
     def print_status(self):
@@ -139,5 +216,25 @@ class Config:
         print(f"Timeout: {self.request_timeout}s")
 
 
-# Global config instance
-config = Config.load()
+_config: Optional[Config] = None
+
+
+def get_config() -> Config:
+    """Return the shared config, loading it from the environment on first use."""
+    global _config
+    if _config is None:
+        _config = Config.load()
+    return _config
+
+
+def set_config(cfg: Config) -> None:
+    """Replace the shared config (e.g. with one built by an embedding app)."""
+    global _config
+    _config = cfg
+
+
+def __getattr__(name: str):
+    # `from cybertrace.config import config` keeps working, loaded on demand
+    if name == 'config':
+        return get_config()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
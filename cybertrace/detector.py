@@ -1,7 +1,25 @@
 """Input type detection using regex patterns."""
 
+import ipaddress
 import re
-from typing import Tuple
+from typing import Iterable, Iterator, List, NamedTuple, Tuple
+
+_H = '[0-9a-fA-F]{1,4}'
+
+# IPv6 in full or compressed form (RFC 4291 2.2): one alternative per
+# number of groups on each side of the ::, at most 7 groups around it.
+# Shared with the extractor so both accept the same addresses.
+IPV6 = '|'.join([
+    f'(?:{_H}:){{7}}{_H}',
+    f'(?:{_H}:){{1,7}}:',
+    f'(?:{_H}:){{1,6}}:{_H}',
+    f'(?:{_H}:){{1,5}}(?::{_H}){{1,2}}',
+    f'(?:{_H}:){{1,4}}(?::{_H}){{1,3}}',
+    f'(?:{_H}:){{1,3}}(?::{_H}){{1,4}}',
+    f'(?:{_H}:){{1,2}}(?::{_H}){{1,5}}',
+    f'{_H}:(?::{_H}){{1,6}}',
+    f':(?:(?::{_H}){{1,7}}|:)',
+])
 
 PATTERNS = {
     # Email - standard format
@@ -29,7 +47,7 @@ PATTERNS = {
     
     # Network
     'ipv4': re.compile(r'^(?:(?:25[0-5]|2[0-4]\d|[01]?\d\d?)\.){3}(?:25[0-5]|2[0-4]\d|[01]?\d\d?)$'),
-    'ipv6': re.compile(r'^(?:[0-9a-fA-F]{1,4}:){7}[0-9a-fA-F]{1,4}$'),
+    'ipv6': re.compile(f'^(?:{IPV6})$'),
 }
 
 # Detection priority - checked in order
@@ -45,47 +63,341 @@ DETECTION_ORDER = [
     ('pan_indian', 'indian'),
     ('vehicle_indian', 'indian'),
     ('aadhaar', 'indian'),
-    ('ipv4', 'domain'),
-    ('ipv6', 'domain'),
+    ('ipv4', 'ip'),
+    ('ipv6', 'ip'),
     ('url', 'domain'),
     ('domain', 'domain'),
 ]
 
 
-def detect_input_type(input_str: str) -> Tuple[str, str]:
+# Cheap pre-filter for each non-phone pattern: characters the input can
+# start with and the (min, max) length it can have. Must stay in sync with
+# PATTERNS.
+_DIGITS = '0123456789'
+_LETTERS = 'abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ'
+_UNBOUNDED = 1 << 30
+
+SHAPES = {
+    'email': (_LETTERS + _DIGITS + '._%+-', 6, _UNBOUNDED),
+    'btc_bech32': ('b', 42, 62),
+    'btc_legacy': ('13', 26, 35),
+    'ethereum': ('0', 42, 42),
+    'onion': ('abcdefghijklmnopqrstuvwxyz234567', 22, 62),
+    'gstin': (_DIGITS, 15, 15),
+    'pan_indian': (_LETTERS, 10, 10),
+    'vehicle_indian': (_LETTERS, 7, 11),
+    'aadhaar': (_DIGITS, 12, 14),
+    'ipv4': (_DIGITS, 7, 15),
+    'ipv6': (_DIGITS + 'abcdefABCDEF:', 2, 39),
+    'url': ('h', 8, _UNBOUNDED),
+    'domain': (_LETTERS + _DIGITS, 4, _UNBOUNDED),
+}
+
+_MODULE_TYPE = dict(DETECTION_ORDER)
+
+# Formatting characters dropped before matching phone patterns (whitespace
+# as matched by \s, plus - . ( and ))
+_PHONE_JUNK = dict.fromkeys(
+    [i for i in range(0x3001) if chr(i).isspace()] + [ord(c) for c in '-.()']
+)
+_PHONE_START = frozenset('+0123456789-.()')
+_PHONE_LENGTHS = (8, 16)
+
+# Inputs longer than this share one dispatch bucket (no bounded shape is this long)
+_LONG = 64
+
+
+def _combine(names) -> 're.Pattern':
+    """One alternation of named groups, tried in detection order."""
+    parts = []
+    for name in names:
+        pattern = PATTERNS[name]
+        body = pattern.pattern[1:-1]  # Drop ^ and $; fullmatch anchors instead
+        if pattern.flags & re.IGNORECASE:
+            body = f'(?i:{body})'
+        parts.append(f'(?P<{name}>{body})')
+    return re.compile('|'.join(parts))
+
+
+_PHONE_PATTERN = _combine([name for name, _ in DETECTION_ORDER if name.startswith('phone')])
+
+# (first char, length bucket) -> fullmatch of the combined candidate
+# pattern, or None when no pattern can match. Filled on demand.
+_dispatch: dict = {}
+
+
+def _candidates(first: str, length: int):
+    """Combined pattern for inputs with this first character and length."""
+    key = (first, length if length < _LONG else _LONG)
+    try:
+        return _dispatch[key]
+    except KeyError:
+        pass
+    names = [
+        name for name, _ in DETECTION_ORDER
+        if name in SHAPES
+        # Non-ASCII first characters can still match \d or case-insensitive
+        # classes, so they skip the first-character filter
+        and (first >= '\x80' or first in SHAPES[name][0])
+        and SHAPES[name][1] <= length <= SHAPES[name][2]
+    ]
+    _dispatch[key] = matcher = _combine(names).fullmatch if names else None
+    return matcher
+
+
+class InvalidInputError(ValueError):
+    """Raised when a target matches a type's shape but fails its checksum."""
+
+    def __init__(self, value: str, input_type: str, reason: str):
+        super().__init__(f"Invalid {input_type}: {value} ({reason})")
+        self.value = value
+        self.input_type = input_type
+        self.reason = reason
+
+
+def detect_input_type(input_str: str, validate: bool = False) -> Tuple[str, str]:
     """
     Detect the type of input string.
     
+    Patterns are tried in DETECTION_ORDER, but only those whose first
+    character and length fit the input, as a single combined regex.
+    
+    Args:
+        input_str: The raw target
+        validate: Check the checksum of types that carry one (Bitcoin,
+            Ethereum, onion, GSTIN, PAN, Aadhaar). A match that fails is
+            down-ranked: detection continues with the next pattern.
+    
     Returns:
         Tuple of (specific_type, module_type)
         e.g., ('btc_legacy', 'bitcoin') or ('email', 'email')
     """
+    detected = _detect(input_str)
+    if validate and detected[0] in _checked_types():
+        return _detect_valid(input_str.strip(), detected)
+    return detected
+
+
+def _checked_types():
+    from .validators import VALIDATORS
+    return VALIDATORS
+
+
+def _detect_valid(cleaned: str, detected: Tuple[str, str]) -> Tuple[str, str]:
+    """Skip matches whose checksum fails, trying the remaining patterns in order."""
+    from .validators import validate_input
+    
+    names = [name for name, _ in DETECTION_ORDER]
+    while detected[0] != 'username' and not validate_input(cleaned, detected[0]):
+        # Phone patterns come first and carry no checksum, so every pattern
+        # after a failed match is tested against the plain cleaned input
+        following = DETECTION_ORDER[names.index(detected[0]) + 1:]
+        detected = next(
+            ((name, module_type) for name, module_type in following
+             if PATTERNS[name].match(cleaned)),
+            ('username', 'username'),
+        )
+    return detected
+
+
+def _detect(input_str: str) -> Tuple[str, str]:
     cleaned = input_str.strip()
+    if not cleaned:
+        return ('username', 'username')
     
-    # Remove common prefixes for phone detection
-    phone_cleaned = re.sub(r'^[\s\-\.\(\)]+', '', cleaned)
-    phone_cleaned = re.sub(r'[\s\-\.\(\)]+', '', phone_cleaned)
+    # Phone patterns see the input without formatting characters
+    if cleaned[0] in _PHONE_START:
+        phone_cleaned = cleaned.translate(_PHONE_JUNK)
+        if _PHONE_LENGTHS[0] <= len(phone_cleaned) <= _PHONE_LENGTHS[1]:
+            match = _PHONE_PATTERN.fullmatch(phone_cleaned)
+            if match:
+                return (match.lastgroup, 'phone')
     
-    for pattern_name, module_type in DETECTION_ORDER:
-        pattern = PATTERNS[pattern_name]
-        
-        # Use phone-cleaned version for phone patterns
-        test_str = phone_cleaned if 'phone' in pattern_name else cleaned
-        
-        if pattern.match(test_str):
-            return (pattern_name, module_type)
+    matcher = _candidates(cleaned[0], len(cleaned))
+    if matcher is not None:
+        match = matcher(cleaned)
+        if match:
+            return (match.lastgroup, _MODULE_TYPE[match.lastgroup])
     
     # Default: treat as username
     return ('username', 'username')
 
 
-def normalize_input(input_str: str, input_type: str) -> str:
-    """Normalize input based on detected type."""
+def detect_many(inputs: Iterable[str]) -> Iterator[Tuple[str, str]]:
+    """
+    Detect the type of every input, in order.
+    
+    Equivalent to mapping detect_input_type, with the per-call overhead
+    hoisted out of the loop. Intended for classifying large target lists.
+    """
+    dispatch = _dispatch
+    candidates = _candidates
+    phone_start = _PHONE_START
+    phone_junk = _PHONE_JUNK
+    phone_min, phone_max = _PHONE_LENGTHS
+    phone_match = _PHONE_PATTERN.fullmatch
+    module_type = _MODULE_TYPE
+    username = ('username', 'username')
+    long = _LONG
+    missing = object()
+    
+    for input_str in inputs:
+        cleaned = input_str.strip()
+        if not cleaned:
+            yield username
+            continue
+        
+        first = cleaned[0]
+        if first in phone_start:
+            phone_cleaned = cleaned.translate(phone_junk)
+            if phone_min <= len(phone_cleaned) <= phone_max:
+                match = phone_match(phone_cleaned)
+                if match:
+                    yield (match.lastgroup, 'phone')
+                    continue
+        
+        length = len(cleaned)
+        matcher = dispatch.get((first, length if length < long else long), missing)
+        if matcher is missing:
+            matcher = candidates(first, length)
+        if matcher is not None:
+            match = matcher(cleaned)
+            if match:
+                name = match.lastgroup
+                yield (name, module_type[name])
+                continue
+        yield username
+
+
+class Candidate(NamedTuple):
+    """One plausible reading of an input."""
+    specific_type: str
+    module_type: str
+    confidence: float  # 0..1, how likely this reading is the right one
+
+
+# How distinctive each pattern's shape is on its own. Checksums and TLDs
+# adjust these in detect_candidates.
+CONFIDENCE = {
+    'email': 0.95,
+    'phone_indian': 0.7,
+    'phone_intl': 0.6,
+    'btc_bech32': 0.8,
+    'btc_legacy': 0.6,
+    'ethereum': 0.9,
+    'onion': 0.9,
+    'gstin': 0.7,
+    'pan_indian': 0.5,
+    'vehicle_indian': 0.5,
+    'aadhaar': 0.4,
+    'ipv4': 0.95,
+    'ipv6': 0.95,
+    'url': 0.95,
+    'domain': 0.6,
+}
+
+# Types whose checksum makes a random match unlikely, and the confidence a
+# passing checksum earns. Failing any checksum scales confidence down.
+VERIFIED_CONFIDENCE = {
+    'btc_bech32': 0.99,
+    'btc_legacy': 0.99,
+    'ethereum': 0.99,
+    'onion': 0.99,
+    'gstin': 0.95,
+    'aadhaar': 0.75,  # One check digit: 1 in 10 random numbers pass
+}
+FAILED_CHECKSUM_FACTOR = 0.1
+
+# TLDs common enough that "name.tld" is far more likely a domain than a handle
+COMMON_TLDS = frozenset({
+    'com', 'net', 'org', 'io', 'co', 'in', 'info', 'biz', 'dev', 'app', 'me',
+    'ai', 'uk', 'us', 'de', 'ru', 'cn', 'fr', 'jp', 'br', 'au', 'ca', 'nl',
+    'edu', 'gov', 'mil', 'xyz', 'online', 'site', 'tech', 'store', 'ly', 'tv',
+})
+KNOWN_TLD_CONFIDENCE = 0.85
+
+USERNAME_PATTERN = re.compile(r'^[A-Za-z0-9_.-]{2,64}$')
+
+
+def detect_candidates(input_str: str, validate: bool = True,
+                      min_confidence: float = 0.0) -> List[Candidate]:
+    """
+    Rank every plausible type for an input.
+    
+    Unlike detect_input_type, which returns the first match in
+    DETECTION_ORDER, every pattern is tried. Scores start from how
+    distinctive the shape is, rise for passing checksums and well-known
+    TLDs, and drop for failing checksums. A username reading is always
+    included when the input looks like a handle.
+    
+    Args:
+        input_str: The raw target
+        validate: Use checksums to adjust scores
+        min_confidence: Drop candidates scoring below this
+    
+    Returns:
+        Candidates, most likely first (ties keep DETECTION_ORDER)
+    """
+    cleaned = input_str.strip()
+    phone_cleaned = cleaned.translate(_PHONE_JUNK)
+    candidates = []
+    
+    for name, module_type in DETECTION_ORDER:
+        test_str = phone_cleaned if name.startswith('phone') else cleaned
+        if not PATTERNS[name].match(test_str):
+            continue
+        confidence = CONFIDENCE[name]
+        if validate and name in VERIFIED_CONFIDENCE:
+            from .validators import validate_input
+            verdict = validate_input(cleaned, name)
+            if verdict.valid:
+                confidence = VERIFIED_CONFIDENCE[name]
+            elif verdict.valid is False:
+                confidence *= FAILED_CHECKSUM_FACTOR
+        if name == 'domain' and cleaned.rsplit('.', 1)[-1].lower() in COMMON_TLDS:
+            confidence = KNOWN_TLD_CONFIDENCE
+        candidates.append(Candidate(name, module_type, confidence))
+    
+    if not candidates:
+        candidates.append(Candidate('username', 'username', 0.9))
+    elif USERNAME_PATTERN.match(cleaned):
+        # A handle can look like anything; letters make it more plausible
+        has_letters = any(c.isalpha() for c in cleaned)
+        candidates.append(Candidate('username', 'username', 0.3 if has_letters else 0.1))
+    
+    candidates.sort(key=lambda c: -c.confidence)
+    return [c for c in candidates if c.confidence >= min_confidence]
+
+
+_NON_PHONE_CHARS = re.compile(r'[^\d+]')
+_URL_SCHEME = re.compile(r'^https?://')
+
+
+def normalize_input(input_str: str, input_type: str, strict: bool = False) -> str:
+    """
+    Normalize input based on detected type.
+    
+    Args:
+        strict: Also verify the checksum of types that carry one
+    
+    Raises:
+        InvalidInputError: if strict and the normalized input fails its checksum
+    """
+    normalized = _normalize(input_str, input_type)
+    if strict:
+        from .validators import validate_input
+        verdict = validate_input(normalized, input_type)
+        if verdict.valid is False:
+            raise InvalidInputError(normalized, input_type, verdict.reason)
+    return normalized
+
+
+def _normalize(input_str: str, input_type: str) -> str:
     cleaned = input_str.strip()
     
     if input_type == 'phone':
         # Remove formatting, ensure proper prefix
-        digits = re.sub(r'[^\d+]', '', cleaned)
+        digits = _NON_PHONE_CHARS.sub('', cleaned)
         if digits.startswith('91') and len(digits) == 12:
             return '+' + digits
         if digits.startswith('0') and len(digits) == 11:
@@ -98,10 +410,17 @@ def normalize_input(input_str: str, input_type: str) -> str:
     
     if input_type == 'domain':
         # Remove protocol if present
-        cleaned = re.sub(r'^https?://', '', cleaned)
+        cleaned = _URL_SCHEME.sub('', cleaned)
         cleaned = cleaned.rstrip('/')
         return cleaned.lower()
     
+    if input_type == 'ip':
+        # Canonical (compressed, lower-case) form, so one address has one key
+        try:
+            return str(ipaddress.ip_address(cleaned.strip('[]')))
+        except ValueError:
+            return cleaned
+    
     if input_type in ('indian',):
         # Uppercase for Indian identifiers
         return cleaned.upper().replace(' ', '').replace('-', '')
@@ -0,0 +1,239 @@
+"""Indicator extraction from free text.
+
+Finds every email, phone number, crypto address, onion, URL, domain, IP and
+Indian identifier in logs, paste dumps or chat exports, so each one can be
+investigated. Files are memory-mapped and scanned in place; streams (stdin,
+pipes) are read in fixed-size chunks, so the input itself is never held in
+memory whatever its size. Deduplication does keep two 16-byte digests per
+distinct indicator, so memory grows with the number of distinct indicators
+(about 180 MB per million); pass ``dedupe=False`` (``--no-dedupe``) to keep
+it flat on inputs with tens of millions of them.
+
+The patterns are the detector's, unanchored and wrapped in token
+boundaries, with a few changes that free text needs: quantifiers are
+bounded, Indian identifiers must be upper case, phone numbers may contain
+spaces or dashes, and domains must end in a well-known TLD. Checksum
+types are validated (see validators.py) and duplicates are dropped by
+normalized form.
+
+Usage:
+    for indicator in extract_file('dump.txt'):
+        print(indicator.specific_type, indicator.value)
+"""
+
+import hashlib
+import mmap
+import os
+import re
+import sys
+from typing import BinaryIO, Iterable, Iterator, NamedTuple, Optional, Set, Union
+
+from .detector import COMMON_TLDS, IPV6, normalize_input
+
+# Upper bound on the length of any match; chunk overlap must exceed it
+MAX_TOKEN = 2048
+CHUNK_SIZE = 8 * 1024 * 1024
+
+# Indian RTO state/UT codes, to tell vehicle numbers from random tokens
+INDIAN_STATE_CODES = frozenset(
+    'AN AP AR AS BR CG CH DD DL DN GA GJ HP HR JH JK KA KL LA LD MH ML MN MP '
+    'MZ NL OD OR PB PY RJ SK TN TR TS UK UP WB'.split()
+)
+
+_B = r'(?<![A-Za-z0-9])'   # token start
+_E = r'(?![A-Za-z0-9])'    # token end
+
+# Tried in order at each position; earlier entries win for overlapping text
+EXTRACTION_PATTERNS = [
+    ('email', 'email',
+     r'(?<![\w.%+-])[a-zA-Z0-9._%+-]{1,64}@(?:[a-zA-Z0-9-]{1,63}\.){1,8}[a-zA-Z]{2,24}(?![\w-])'),
+    ('url', 'domain', r'(?<![\w])https?://[^\s<>"\'`()\[\]{}]{0,1999}[^\s<>"\'`()\[\]{}.,;:!?]'),
+    ('onion', 'darkweb', _B + r'(?:[a-z2-7]{56}|[a-z2-7]{16})\.onion' + _E),
+    ('btc_bech32', 'bitcoin', _B + r'bc1[a-z0-9]{39,59}' + _E),
+    ('btc_legacy', 'bitcoin', _B + r'[13][a-km-zA-HJ-NP-Z1-9]{25,34}' + _E),
+    ('ethereum', 'ethereum', _B + r'0x[a-fA-F0-9]{40}' + _E),
+    ('gstin', 'indian', _B + r'\d{2}[A-Z]{5}\d{4}[A-Z][A-Z\d]Z[A-Z\d]' + _E),
+    ('pan_indian', 'indian', _B + r'[A-Z]{5}[0-9]{4}[A-Z]' + _E),
+    ('vehicle_indian', 'indian', _B + r'[A-Z]{2}[0-9]{1,2}[A-Z]{0,3}[0-9]{4}' + _E),
+    ('aadhaar', 'indian', _B + r'[2-9]\d{3} ?\d{4} ?\d{4}(?![\d-])'),
+    ('phone_intl', 'phone', r'(?<![\w+])\+(?!91)[1-9]\d{6,14}(?!\d)'),
+    ('phone_indian', 'phone', r'(?<![\w+])(?:\+91[ -]?|0)?[6-9]\d{4}[ -]?\d{5}(?!\d)'),
+    ('ipv4', 'ip',
+     r'(?<![\d.])(?:(?:25[0-5]|2[0-4]\d|1\d\d|[1-9]?\d)\.){3}(?:25[0-5]|2[0-4]\d|1\d\d|[1-9]?\d)(?!\.?\d)'),
+    ('ipv6', 'ip', r'(?<![:\w])(?:' + IPV6 + r')(?![:\w])'),
+    ('domain', 'domain',
+     r'(?<![\w.@-])(?:[a-zA-Z0-9](?:[a-zA-Z0-9-]{0,61}[a-zA-Z0-9])?\.){1,8}[a-zA-Z]{2,24}(?![\w-])'),
+]
+
+# Every indicator starts a token and has a digit or one of @.:+ within its
+# first 65 characters. Checking that once up front lets plain words fail
+# after a single cheap test instead of being tried against every pattern,
+# which makes scanning prose about ten times faster.
+_GATE = r'(?<![A-Za-z0-9])(?=[A-Za-z0-9._%+-]{0,64}[0-9@.:+])'
+
+_MODULE_TYPE = {name: module_type for name, module_type, _ in EXTRACTION_PATTERNS}
+_PATTERN = re.compile(
+    (_GATE + '(?:' + '|'.join(f'(?P<{name}>{body})' for name, _, body in EXTRACTION_PATTERNS) + ')').encode()
+)
+
+# Types checked by validators.py when validation is on
+_VALIDATED = frozenset({'btc_legacy', 'btc_bech32', 'ethereum', 'onion', 'gstin', 'pan_indian', 'aadhaar'})
+
+
+class Indicator(NamedTuple):
+    """An indicator found in text."""
+    value: str          # As found (phones and Aadhaar keep their spacing)
+    specific_type: str  # Detector type, e.g. 'btc_legacy'
+    module_type: str    # Module that investigates it
+    offset: int         # Byte offset of the first occurrence
+
+
+def _accept(specific_type: str, value: str, validate: bool) -> bool:
+    if specific_type == 'domain' and value.rsplit('.', 1)[-1].lower() not in COMMON_TLDS:
+        return False
+    if specific_type == 'vehicle_indian' and value[:2] not in INDIAN_STATE_CODES:
+        return False
+    if validate and specific_type in _VALIDATED:
+        from .validators import validate_input
+        return validate_input(value, specific_type).valid is not False
+    return True
+
+
+class _Scanner:
+    """Scan state shared across the chunks or windows of one extraction."""
+
+    def __init__(self, validate: bool, dedupe: bool):
+        self.validate = validate
+        self._seen: Optional[Set[bytes]] = set() if dedupe else None
+        self.resume = 0  # Absolute offset where the last match ended
+
+    def _first_time(self, module_type: str, value: str) -> bool:
+        key = f'{module_type}\0{normalize_input(value, module_type)}'
+        if module_type in ('domain', 'email', 'darkweb'):
+            key = key.lower()
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        if digest in self._seen:
+            return False
+        self._seen.add(digest)
+        return True
+
+    def scan(self, buf, base: int, pos: int, endpos: int) -> Iterator[Indicator]:
+        """
+        Yield indicators starting in buf[pos:endpos].
+
+        buf starts at absolute offset base. Matches may run up to MAX_TOKEN
+        bytes past endpos, and scanning skips text already consumed by a
+        match from the previous window, exactly as a single pass would.
+        """
+        pos = max(pos, self.resume - base)
+        for match in _PATTERN.finditer(buf, pos, min(len(buf), endpos + MAX_TOKEN + 1)):
+            if match.start() >= endpos:
+                return
+            self.resume = base + match.end()
+            specific_type = match.lastgroup
+            raw = match.group()
+            if self._seen is not None:
+                # Repeats of the exact same text skip validation and
+                # normalization entirely
+                digest = hashlib.blake2b(raw, digest_size=16, person=b'raw').digest()
+                if digest in self._seen:
+                    continue
+                self._seen.add(digest)
+            try:
+                # Only URLs can hold non-ASCII bytes (IDN hosts, UTF-8 paths)
+                value = raw.decode('utf-8')
+            except UnicodeDecodeError:
+                continue
+            if not _accept(specific_type, value, self.validate):
+                continue
+            module_type = _MODULE_TYPE[specific_type]
+            if self._seen is not None and not self._first_time(module_type, value):
+                continue
+            yield Indicator(value, specific_type, module_type, base + match.start())
+
+
+def extract_text(text: Union[str, bytes], validate: bool = True,
+                 dedupe: bool = True) -> Iterator[Indicator]:
+    """Extract indicators from an in-memory string."""
+    data = text.encode('utf-8', 'replace') if isinstance(text, str) else text
+    yield from _Scanner(validate, dedupe).scan(data, 0, 0, len(data))
+
+
+def _scan_stream(scanner: _Scanner, stream: BinaryIO, chunk_size: int) -> Iterator[Indicator]:
+    context = 16  # Bytes kept before the scan position for lookbehinds
+    buf = b''
+    base = 0  # Stream offset of buf[0]
+    pos = 0   # Scan position in buf
+
+    while True:
+        chunk = stream.read(chunk_size)
+        buf += chunk
+        if not chunk:
+            yield from scanner.scan(buf, base, pos, len(buf))
+            return
+        # Leave the last MAX_TOKEN bytes for the next round, where matches
+        # starting there can see their full length
+        cut = len(buf) - MAX_TOKEN - 1
+        if cut <= pos:
+            continue
+        yield from scanner.scan(buf, base, pos, cut)
+        # Near the start of the stream there may be less context than that
+        keep = max(0, cut - context)
+        buf = buf[keep:]
+        base += keep
+        pos = cut - keep
+
+
+def _scan_file(scanner: _Scanner, path, chunk_size: int) -> Iterator[Indicator]:
+    if str(path) == '-':
+        yield from _scan_stream(scanner, sys.stdin.buffer, chunk_size)
+        return
+
+    with open(path, 'rb') as f:
+        try:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (ValueError, OSError):
+            # Empty files and non-seekable inputs cannot be mapped
+            yield from _scan_stream(scanner, f, chunk_size)
+            return
+        with mapped:
+            if hasattr(mapped, 'madvise') and hasattr(mmap, 'MADV_SEQUENTIAL'):
+                mapped.madvise(mmap.MADV_SEQUENTIAL)
+            # Scan in windows so the regex never holds more than one window
+            # plus MAX_TOKEN in view; pages behind the scan can be evicted
+            size = len(mapped)
+            scanner.resume = 0
+            for start in range(0, size, chunk_size):
+                yield from scanner.scan(mapped, 0, start, min(start + chunk_size, size))
+
+
+def extract_stream(stream: BinaryIO, validate: bool = True, dedupe: bool = True,
+                   chunk_size: int = CHUNK_SIZE) -> Iterator[Indicator]:
+    """
+    Extract indicators from a binary stream, reading it in chunks.
+
+    Each chunk is scanned together with the start of the next one, so
+    indicators spanning a chunk boundary are still found exactly once.
+    """
+    yield from _scan_stream(_Scanner(validate, dedupe), stream, chunk_size)
+
+
+def extract_files(paths: Iterable[Union[str, os.PathLike]], validate: bool = True,
+                  dedupe: bool = True, chunk_size: int = CHUNK_SIZE) -> Iterator[Indicator]:
+    """
+    Extract indicators from files, deduplicating across all of them.
+
+    Regular files are memory-mapped and scanned in place; anything that
+    cannot be mapped (pipes, empty files, '-' for stdin) is read in chunks.
+    Offsets are relative to the file each indicator was found in.
+    """
+    scanner = _Scanner(validate, dedupe)
+    for path in paths:
+        scanner.resume = 0
+        yield from _scan_file(scanner, path, chunk_size)
+
+
+def extract_file(path: Union[str, os.PathLike], validate: bool = True, dedupe: bool = True,
+                 chunk_size: int = CHUNK_SIZE) -> Iterator[Indicator]:
+    """Extract indicators from one file (see extract_files)."""
+    yield from extract_files([path], validate, dedupe, chunk_size)
@@ -0,0 +1,261 @@
+"""HTTP fingerprinting of live hosts.
+
+For each host: the redirect chain, final status, Server and X-Powered-By
+headers, the page title and the favicon hash, without an URLScan key.
+Only the start of each page is read (``FINGERPRINT_MAX_BYTES``), and
+reading stops as soon as ``</title>`` has arrived; the connection is then
+dropped rather than drained, so a fingerprint costs a few KB however large
+the page is.
+
+Requests go through a scheduler of their own that allows
+``FINGERPRINT_CONCURRENCY`` requests in flight and ``FINGERPRINT_HOST_RATE``
+requests per second to any one host, so thousands of hosts can be
+fingerprinted per minute without hammering shared infrastructure.
+
+Favicon hashes are Shodan's (``http.favicon.hash``): MurmurHash3 (32-bit,
+signed) of the base64-encoded icon. The ``mmh3`` package is used when
+installed, otherwise a pure-Python implementation.
+
+    fingerprints = await HTTPFingerprinter(session).fingerprint_many(['www.example.com'])
+"""
+
+import asyncio
+import base64
+import hashlib
+import html
+import re
+from typing import Any, Dict, Iterable, Optional, Tuple
+from urllib.parse import urljoin, urlparse
+
+import aiohttp
+
+from .config import Config, get_config
+from .scheduler import PriorityScheduler
+
+MAX_REDIRECTS = 5
+MAX_FAVICON_BYTES = 100 * 1024
+CHUNK_SIZE = 2048
+
+_TITLE = re.compile(rb'<title[^>]*>(.*?)</title', re.IGNORECASE | re.DOTALL)
+_TITLE_END = re.compile(rb'</title', re.IGNORECASE)
+_LINK = re.compile(rb'<link\b[^>]*>', re.IGNORECASE)
+_ATTR = re.compile(rb'([a-zA-Z-]+)\s*=\s*(?:"([^"]*)"|\'([^\']*)\'|([^\s>]+))')
+_CHARSET = re.compile(rb'<meta[^>]+charset=["\']?([\w-]+)', re.IGNORECASE)
+
+
+def murmur3_32(data: bytes, seed: int = 0) -> int:
+    """MurmurHash3 x86 32-bit of data, as a signed integer (like mmh3.hash)."""
+    c1, c2 = 0xcc9e2d51, 0x1b873593
+    h = seed & 0xffffffff
+    length = len(data)
+    tail = length & ~3
+
+    for i in range(0, tail, 4):
+        k = int.from_bytes(data[i:i + 4], 'little')
+        k = (k * c1) & 0xffffffff
+        k = ((k << 15) | (k >> 17)) & 0xffffffff
+        k = (k * c2) & 0xffffffff
+        h ^= k
+        h = ((h << 13) | (h >> 19)) & 0xffffffff
+        h = (h * 5 + 0xe6546b64) & 0xffffffff
+
+    k = 0
+    remaining = length & 3
+    if remaining:
+        k = int.from_bytes(data[tail:], 'little')
+        k = (k * c1) & 0xffffffff
+        k = ((k << 15) | (k >> 17)) & 0xffffffff
+        k = (k * c2) & 0xffffffff
+        h ^= k
+
+    h ^= length
+    h ^= h >> 16
+    h = (h * 0x85ebca6b) & 0xffffffff
+    h ^= h >> 13
+    h = (h * 0xc2b2ae35) & 0xffffffff
+    h ^= h >> 16
+    return h - 0x100000000 if h & 0x80000000 else h
+
+
+def favicon_hash(icon: bytes) -> int:
+    """Shodan-style favicon hash: MurmurHash3 of the base64 text (76-column lines)."""
+    encoded = base64.encodebytes(icon)
+    try:
+        import mmh3
+    except ImportError:
+        return murmur3_32(encoded)
+    return mmh3.hash(encoded)
+
+
+def parse_head(head: bytes, charset: Optional[str] = None) -> Dict[str, Optional[str]]:
+    """Title and favicon link of the start of an HTML page."""
+    if charset is None:
+        match = _CHARSET.search(head)
+        charset = match.group(1).decode('ascii') if match else 'utf-8'
+
+    def text(raw: bytes) -> str:
+        try:
+            return raw.decode(charset, 'replace')
+        except LookupError:
+            return raw.decode('utf-8', 'replace')
+
+    title = None
+    match = _TITLE.search(head)
+    if match:
+        title = ' '.join(html.unescape(text(match.group(1))).split())[:300] or None
+
+    icon = None
+    for link in _LINK.finditer(head):
+        attrs = {
+            m.group(1).lower(): m.group(2) if m.group(2) is not None else m.group(3) or m.group(4)
+            for m in _ATTR.finditer(link.group(0))
+        }
+        rel = (attrs.get(b'rel') or b'').lower().split()
+        if b'icon' in rel and attrs.get(b'href'):
+            icon = html.unescape(text(attrs[b'href']).strip())
+            break
+
+    return {'title': title, 'icon': icon}
+
+
+async def read_head(response: aiohttp.ClientResponse, max_bytes: int,
+                    stop_at_title: bool = True) -> bytes:
+    """
+    Read the body up to max_bytes or the end, whichever comes first.
+
+    With stop_at_title, reading also stops once </title> has arrived.
+    """
+    head = b''
+    while len(head) < max_bytes:
+        chunk = await response.content.read(min(CHUNK_SIZE, max_bytes - len(head)))
+        if not chunk:
+            break
+        # Look for the end tag across the chunk boundary too
+        start = max(0, len(head) - 7)
+        head += chunk
+        if stop_at_title and _TITLE_END.search(head, start):
+            break
+    return head
+
+
+_scheduler: Optional[PriorityScheduler] = None
+
+
+def _make_scheduler(config: Config) -> PriorityScheduler:
+    return PriorityScheduler(
+        max_concurrent=config.fingerprint_concurrency,
+        host_rate=config.fingerprint_host_rate,
+    )
+
+
+def get_fingerprint_scheduler(config: Optional[Config] = None) -> PriorityScheduler:
+    """
+    Return the process-wide fingerprinting scheduler (pool size and per-host rate).
+
+    A config other than the shared one gets a scheduler of its own.
+    """
+    global _scheduler
+    if config is not None and config is not get_config():
+        return _make_scheduler(config)
+    if _scheduler is None:
+        _scheduler = _make_scheduler(get_config())
+    return _scheduler
+
+
+class HTTPFingerprinter:
+    """
+    Fingerprint web servers with a small, fixed byte budget per host.
+
+    Args:
+        session: aiohttp session to make requests with
+        config: Configuration to use (default: the shared config)
+    """
+
+    def __init__(self, session: aiohttp.ClientSession, config: Optional[Config] = None):
+        self.session = session
+        self.config = config or get_config()
+        self.timeout = aiohttp.ClientTimeout(total=self.config.fingerprint_timeout)
+        self.scheduler = get_fingerprint_scheduler(self.config)
+
+    async def _get(self, url: str, max_bytes: int, stop_at_title: bool
+                   ) -> Tuple[aiohttp.ClientResponse, bytes]:
+        """GET url (following redirects) and read at most max_bytes of the body."""
+        async with self.scheduler.slot(url):
+            async with self.session.get(url, allow_redirects=True, max_redirects=MAX_REDIRECTS,
+                                        ssl=False, timeout=self.timeout) as resp:
+                if stop_at_title:
+                    body = await read_head(resp, max_bytes)
+                else:
+                    # One byte past the limit tells a body that fits from one that doesn't
+                    body = await read_head(resp, max_bytes + 1, stop_at_title=False)
+                # Drop the connection instead of draining the rest of the body
+                resp.close()
+                return resp, body
+
+    async def fingerprint(self, host: str) -> Dict[str, Any]:
+        """
+        Fingerprint one host over HTTPS, falling back to HTTP.
+
+        Raises aiohttp.ClientError or asyncio.TimeoutError if neither answers.
+        """
+        error: Optional[BaseException] = None
+        for scheme in ('https', 'http'):
+            try:
+                resp, head = await self._get(f'{scheme}://{host}/', self.config.fingerprint_max_bytes, True)
+                break
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                error = e
+        else:
+            raise error
+
+        parsed = parse_head(head, resp.charset)
+        final_url = str(resp.url)
+        data: Dict[str, Any] = {
+            'url': final_url,
+            'status': resp.status,
+            'redirects': [
+                {'url': str(r.url), 'status': r.status} for r in resp.history
+            ],
+            'server': resp.headers.get('Server'),
+            'powered_by': resp.headers.get('X-Powered-By'),
+            'content_type': resp.headers.get('Content-Type'),
+            'title': parsed['title'],
+            'bytes_read': len(head),
+        }
+
+        icon_url = urljoin(final_url, parsed['icon'] or '/favicon.ico')
+        if urlparse(icon_url).scheme in ('http', 'https'):
+            data.update(await self._favicon(icon_url))
+        return {k: v for k, v in data.items() if v not in (None, [])}
+
+    async def _favicon(self, url: str) -> Dict[str, Any]:
+        try:
+            resp, icon = await self._get(url, MAX_FAVICON_BYTES, False)
+        except (aiohttp.ClientError, asyncio.TimeoutError):
+            return {}
+        content_type = resp.headers.get('Content-Type', '')
+        if resp.status != 200 or not icon or len(icon) > MAX_FAVICON_BYTES or 'html' in content_type:
+            return {}
+        return {
+            'favicon_url': url,
+            'favicon_hash': favicon_hash(icon),
+            'favicon_md5': hashlib.md5(icon).hexdigest(),
+        }
+
+    async def fingerprint_many(self, hosts: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        Fingerprint hosts concurrently (bounded by the scheduler).
+
+        Returns {host: fingerprint}; hosts that did not answer get
+        {'error': ...}.
+        """
+        results: Dict[str, Dict[str, Any]] = {}
+
+        async def one(host: str) -> None:
+            try:
+                results[host] = await self.fingerprint(host)
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                results[host] = {'error': str(e) or type(e).__name__}
+
+        await asyncio.gather(*(one(host) for host in dict.fromkeys(hosts)))
+        return results
@@ -0,0 +1,272 @@
+"""Offline IP to ASN and country lookups.
+
+An iptoasn-style TSV (``range_start  range_end  AS_number  country  AS_name``,
+as published at https://iptoasn.com, plain or gzipped, IPv4 and IPv6 mixed)
+is compiled once into a sorted range table:
+
+    cybertrace ipdb compile ip2asn-combined.tsv.gz
+
+The compiled file is memory-mapped rather than loaded, so opening it costs
+nothing and a lookup is a binary search over the start addresses: a few
+microseconds per IP, with no API quota. ``IPASN_DB`` points at the file
+(default: ``data/ipasn.db``).
+
+Layout (little-endian): a header; for IPv4 three uint32 arrays (range
+starts, range ends, info index); padding to 8 bytes; for IPv6 four uint64
+arrays (high and low halves of starts and ends) and a uint32 info index
+array; then fixed-size info records (ASN, country, name offset and length)
+and the AS names as UTF-8. The arrays are read in place through
+memoryviews, so searches run in C via bisect.
+"""
+
+import gzip
+import ipaddress
+import mmap
+import os
+import socket
+import struct
+import sys
+from array import array
+from bisect import bisect_left, bisect_right
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+from .config import Config, get_config
+
+MAGIC = b'CTIPASN1'
+_HEADER = struct.Struct('<8sIIII')  # magic, IPv4 ranges, IPv6 ranges, infos, names bytes
+_INFO = struct.Struct('<I2sIH')     # asn, country, name offset, name length
+_LOW64 = (1 << 64) - 1
+
+
+class IPASNDatabase:
+    """
+    Memory-mapped range table compiled by compile().
+
+    Usage:
+        with IPASNDatabase('data/ipasn.db') as db:
+            db.lookup('1.1.1.1')
+            # {'asn': 13335, 'as_name': 'CLOUDFLARENET', 'country': 'US',
+            #  'range': '1.1.1.0-1.1.1.255'}
+    """
+
+    def __init__(self, path: Union[str, Path]):
+        self.path = Path(path)
+        with open(self.path, 'rb') as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.v4_count, self.v6_count, info_count, names_size = _HEADER.unpack_from(self._mm)
+        if magic != MAGIC:
+            self._mm.close()
+            raise ValueError(f'{self.path} is not a compiled IP-to-ASN database')
+
+        offset = _HEADER.size
+        self._v4_starts, offset = self._array('I', offset, self.v4_count)
+        self._v4_ends, offset = self._array('I', offset, self.v4_count)
+        self._v4_infos, offset = self._array('I', offset, self.v4_count)
+        offset += -offset % 8
+        self._v6_starts_hi, offset = self._array('Q', offset, self.v6_count)
+        self._v6_starts_lo, offset = self._array('Q', offset, self.v6_count)
+        self._v6_ends_hi, offset = self._array('Q', offset, self.v6_count)
+        self._v6_ends_lo, offset = self._array('Q', offset, self.v6_count)
+        self._v6_infos, offset = self._array('I', offset, self.v6_count)
+        self._infos = offset
+        self._names = offset + _INFO.size * info_count
+
+    def _array(self, typecode: str, offset: int, count: int) -> Tuple[object, int]:
+        """An array of count integers at offset (a view of the map where byte order allows)."""
+        end = offset + array(typecode).itemsize * count
+        if sys.byteorder == 'little':
+            return memoryview(self._mm)[offset:end].cast(typecode), end
+        values = array(typecode, self._mm[offset:end])
+        values.byteswap()
+        return values, end
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def __len__(self) -> int:
+        return self.v4_count + self.v6_count
+
+    def close(self) -> None:
+        # Views must be released before the map can close
+        for view in (self._v4_starts, self._v4_ends, self._v4_infos, self._v6_starts_hi,
+                     self._v6_starts_lo, self._v6_ends_hi, self._v6_ends_lo, self._v6_infos):
+            if isinstance(view, memoryview):
+                view.release()
+        self._mm.close()
+
+    def lookup(self, ip: str) -> Optional[Dict[str, object]]:
+        """
+        ASN, AS name, country and range of ip, or None if it is unrouted,
+        not in the table or not an IP address.
+        """
+        ip = ip.strip().strip('[]')
+        try:
+            packed = socket.inet_pton(socket.AF_INET, ip)
+        except OSError:
+            try:
+                packed = socket.inet_pton(socket.AF_INET6, ip)
+            except OSError:
+                return None
+            if packed[:12] == b'\0' * 10 + b'\xff' * 2:
+                packed = packed[12:]  # IPv4-mapped
+
+        if len(packed) == 4:
+            key = int.from_bytes(packed, 'big')
+            i = bisect_right(self._v4_starts, key) - 1
+            if i < 0 or key > self._v4_ends[i]:
+                return None
+            first = socket.inet_ntoa(self._v4_starts[i].to_bytes(4, 'big'))
+            last = socket.inet_ntoa(self._v4_ends[i].to_bytes(4, 'big'))
+            info = self._v4_infos[i]
+        else:
+            high = int.from_bytes(packed[:8], 'big')
+            low = int.from_bytes(packed[8:], 'big')
+            # Ranges starting in the address's /64 are ordered by their low
+            # half; if none start at or below it, the answer is the range
+            # before them
+            block = bisect_left(self._v6_starts_hi, high)
+            block_end = bisect_right(self._v6_starts_hi, high, block)
+            i = bisect_right(self._v6_starts_lo, low, block, block_end) - 1
+            if i < 0 or (high, low) > (self._v6_ends_hi[i], self._v6_ends_lo[i]):
+                return None
+            first = _ntop6(self._v6_starts_hi[i], self._v6_starts_lo[i])
+            last = _ntop6(self._v6_ends_hi[i], self._v6_ends_lo[i])
+            info = self._v6_infos[i]
+
+        asn, country, name_offset, name_length = _INFO.unpack_from(self._mm, self._infos + _INFO.size * info)
+        name_offset += self._names
+        return {
+            'asn': asn,
+            'as_name': self._mm[name_offset:name_offset + name_length].decode('utf-8', 'replace'),
+            'country': country.decode('ascii').rstrip() or None,
+            'range': f'{first}-{last}',
+        }
+
+    def lookup_many(self, ips: Iterable[str]) -> Dict[str, Dict[str, object]]:
+        """{ip: lookup(ip)} for the IPs found in the table."""
+        results = {}
+        for ip in ips:
+            if ip not in results:
+                found = self.lookup(ip)
+                if found is not None:
+                    results[ip] = found
+        return results
+
+
+def _ntop6(high: int, low: int) -> str:
+    return socket.inet_ntop(socket.AF_INET6, high.to_bytes(8, 'big') + low.to_bytes(8, 'big'))
+
+
+def _read_rows(path: Union[str, Path]) -> Iterable[List[str]]:
+    opener = gzip.open if str(path).endswith('.gz') else open
+    with opener(path, 'rt', encoding='utf-8', errors='replace') as f:
+        for line in f:
+            if line.strip() and not line.startswith('#'):
+                yield line.rstrip('\n').split('\t')
+
+
+def _parse_ip(value: str):
+    """An address written as text, or as an integer (ip2asn-v4-u32.tsv)."""
+    if value.isdigit():
+        return ipaddress.IPv4Address(int(value))
+    return ipaddress.ip_address(value)
+
+
+def compile_database(sources: Iterable[Union[str, Path]], output: Union[str, Path]) -> Dict[str, int]:
+    """
+    Compile iptoasn-style TSV files into a database file.
+
+    Rows for AS 0 ("Not routed") are dropped, and adjacent ranges with the
+    same ASN, country and name are merged. Ranges are assumed not to
+    overlap, as in the iptoasn dumps.
+
+    Returns counts of IPv4 and IPv6 ranges and distinct AS records written.
+    """
+    infos: Dict[Tuple[int, str, str], int] = {}
+    ranges: Dict[int, List[Tuple[int, int, int]]] = {4: [], 6: []}
+    for source in sources:
+        for row in _read_rows(source):
+            if len(row) < 4:
+                continue
+            try:
+                first, last = _parse_ip(row[0]), _parse_ip(row[1])
+                asn = int(row[2])
+            except ValueError:
+                continue
+            if asn == 0 or first.version != last.version:
+                continue
+            country = row[3].strip().upper()[:2] if row[3] not in ('None', 'Unknown') else ''
+            name = row[4].strip() if len(row) > 4 else ''
+            info = infos.setdefault((asn, country, name), len(infos))
+            ranges[first.version].append((int(first), int(last), info))
+
+    for version in (4, 6):
+        merged: List[Tuple[int, int, int]] = []
+        for first, last, info in sorted(ranges[version]):
+            if merged and merged[-1][2] == info and merged[-1][1] + 1 == first:
+                merged[-1] = (merged[-1][0], last, info)
+            else:
+                merged.append((first, last, info))
+        ranges[version] = merged
+
+    names = bytearray()
+    info_table = bytearray()
+    for asn, country, name in infos:
+        encoded = name.encode('utf-8')[:0xFFFF]
+        info_table += _INFO.pack(asn, country.encode('ascii', 'replace').ljust(2), len(names), len(encoded))
+        names += encoded
+
+    def packed(typecode: str, values: Iterable[int]) -> bytes:
+        values = array(typecode, values)
+        if sys.byteorder != 'little':
+            values.byteswap()
+        return values.tobytes()
+
+    v4, v6 = ranges[4], ranges[6]
+    output = Path(output)
+    output.parent.mkdir(parents=True, exist_ok=True)
+    tmp = output.with_suffix('.tmp')
+    with open(tmp, 'wb') as f:
+        f.write(_HEADER.pack(MAGIC, len(v4), len(v6), len(infos), len(names)))
+        f.write(packed('I', (r[0] for r in v4)))
+        f.write(packed('I', (r[1] for r in v4)))
+        f.write(packed('I', (r[2] for r in v4)))
+        f.write(b'\0' * (-f.tell() % 8))
+        f.write(packed('Q', (r[0] >> 64 for r in v6)))
+        f.write(packed('Q', (r[0] & _LOW64 for r in v6)))
+        f.write(packed('Q', (r[1] >> 64 for r in v6)))
+        f.write(packed('Q', (r[1] & _LOW64 for r in v6)))
+        f.write(packed('I', (r[2] for r in v6)))
+        f.write(info_table)
+        f.write(names)
+    os.replace(tmp, output)
+    return {'ipv4_ranges': len(v4), 'ipv6_ranges': len(v6), 'as_records': len(infos)}
+
+
+def database_path(config: Optional[Config] = None) -> Path:
+    """Where the compiled database lives (``IPASN_DB``, default data/ipasn.db)."""
+    config = config or get_config()
+    return config.ipasn_db or config.data_dir / 'ipasn.db'
+
+
+_db: Optional[IPASNDatabase] = None
+
+
+def get_ipasn_db(config: Optional[Config] = None) -> Optional[IPASNDatabase]:
+    """
+    Return the process-wide database, opening it on first use.
+
+    Returns None if no database has been compiled, so enrichment is simply
+    skipped.
+    """
+    global _db
+    if _db is None:
+        path = database_path(config)
+        if not path.exists():
+            return None
+        _db = IPASNDatabase(path)
+    return _db
@@ -1,25 +1,82 @@
-"""Module registry - exports all OSINT modules."""
+"""Module registry.
 
-from typing import Dict, Optional, Type
+Modules are registered by metadata (name, description, supported types)
+and imported only when first used, so listing modules or running one of
+them does not pay for importing all of them and their dependencies.
 
-from .base import BaseModule
-from .bitcoin_module import BitcoinModule
-from .domain_module import DomainModule
-from .username_module import UsernameModule
-from .email_module import EmailModule
-from .darkweb_module import DarkwebModule
-from .indian_module import IndianModule
+Third-party modules register through the ``cybertrace.modules`` entry point
+group, pointing at a BaseModule subclass:
 
+    [project.entry-points."cybertrace.modules"]
+    shodan = "cybertrace_shodan:ShodanModule"
 
-# Registry of all available modules
-MODULE_REGISTRY: Dict[str, Type[BaseModule]] = {
-    'bitcoin': BitcoinModule,
-    'ethereum': BitcoinModule,  # Same module handles both
-    'domain': DomainModule,
-    'username': UsernameModule,
-    'email': EmailModule,
-    'darkweb': DarkwebModule,
-    'indian': IndianModule,
+Plugin metadata is read once by importing the plugin, then kept in a
+manifest (``<cache_dir>/module_manifest.json``) keyed by distribution
+version, so later runs list plugins without importing them.
+"""
+
+import importlib
+import json
+import os
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Dict, FrozenSet, Iterator, Mapping, Optional, Type
+
+if TYPE_CHECKING:
+    from .base import BaseModule
+
+ENTRY_POINT_GROUP = 'cybertrace.modules'
+
+
+@dataclass(frozen=True)
+class ModuleSpec:
+    """Module metadata plus where to import its class from."""
+    name: str
+    target: str  # "package.module:ClassName"
+    description: str
+    supported_types: FrozenSet[str] = field(default_factory=frozenset)
+
+    def load(self) -> Type['BaseModule']:
+        """Import and return the module class."""
+        module_path, _, class_name = self.target.partition(':')
+        return getattr(importlib.import_module(module_path), class_name)
+
+
+# Built-in modules. Metadata mirrors the class attributes (kept in sync by tests).
+BUILTIN_MODULES: Dict[str, ModuleSpec] = {
+    'bitcoin': ModuleSpec(
+        'bitcoin', 'cybertrace.modules.bitcoin_module:BitcoinModule',
+        'Cryptocurrency address analysis', frozenset({'bitcoin', 'ethereum'}),
+    ),
+    'ethereum': ModuleSpec(  # Same module handles both
+        'ethereum', 'cybertrace.modules.bitcoin_module:BitcoinModule',
+        'Cryptocurrency address analysis', frozenset({'bitcoin', 'ethereum'}),
+    ),
+    'domain': ModuleSpec(
+        'domain', 'cybertrace.modules.domain_module:DomainModule',
+        'Domain intelligence and reconnaissance', frozenset({'domain'}),
+    ),
+    'ip': ModuleSpec(
+        'ip', 'cybertrace.modules.ip_module:IPModule',
+        'IP address intelligence', frozenset({'ip', 'ipv4', 'ipv6'}),
+    ),
+    'username': ModuleSpec(
+        'username', 'cybertrace.modules.username_module:UsernameModule',
+        'Username enumeration across social platforms', frozenset({'username'}),
+    ),
+    'email': ModuleSpec(
+        'email', 'cybertrace.modules.email_module:EmailModule',
+        'Email address OSINT', frozenset({'email'}),
+    ),
+    'darkweb': ModuleSpec(
+        'darkweb', 'cybertrace.modules.darkweb_module:DarkwebModule',
+        'Dark web OSINT via clearnet gateways',
+        frozenset({'darkweb', 'username', 'email', 'bitcoin'}),
+    ),
+    'indian': ModuleSpec(
+        'indian', 'cybertrace.modules.indian_module:IndianModule',
+        'Indian government and business databases',
+        frozenset({'indian', 'vehicle_indian', 'pan_indian', 'gstin'}),
+    ),
 }
 
 # Input type to module mapping
@@ -31,8 +88,8 @@ TYPE_TO_MODULE: Dict[str, str] = {
     'username': 'username',
     'domain': 'domain',
     'url': 'domain',
-    'ipv4': 'domain',
-    'ipv6': 'domain',
+    'ipv4': 'ip',
+    'ipv6': 'ip',
     'bitcoin': 'bitcoin',
     'btc_legacy': 'bitcoin',
     'btc_bech32': 'bitcoin',
@@ -45,49 +102,220 @@ TYPE_TO_MODULE: Dict[str, str] = {
 }
 
 
-def get_module(input_type: str) -> Optional[BaseModule]:
+# Plugin discovery
+
+_plugins: Optional[Dict[str, ModuleSpec]] = None
+
+
+def _manifest_path():
+    from ..config import get_config
+    return get_config().cache_dir / 'module_manifest.json'
+
+
+def _iter_entry_points():
+    """Yield (entry_point, distribution_key) for the plugin group."""
+    try:
+        from importlib import metadata
+    except ImportError:  # Python < 3.8
+        return
+
+    try:
+        eps = metadata.entry_points()
+        group = eps.select(group=ENTRY_POINT_GROUP) if hasattr(eps, 'select') \
+            else eps.get(ENTRY_POINT_GROUP, [])
+    except Exception:
+        return
+
+    for ep in group:
+        dist = getattr(ep, 'dist', None)
+        dist_key = f'{dist.metadata["Name"]}=={dist.version}' if dist else 'unknown'
+        yield ep, dist_key
+
+
+def _load_manifest() -> Dict[str, dict]:
+    try:
+        with open(_manifest_path()) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_manifest(manifest: Dict[str, dict]) -> None:
+    path = _manifest_path()
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix('.tmp')
+        with open(tmp, 'w') as f:
+            json.dump(manifest, f, indent=2, sort_keys=True)
+        os.replace(tmp, path)
+    except OSError:
+        pass  # A read-only cache only costs us the import next time
+
+
+def discover_plugins(refresh: bool = False) -> Dict[str, ModuleSpec]:
+    """
+    Find modules registered through entry points.
+
+    Args:
+        refresh: Ignore the cached manifest and re-import every plugin
+    """
+    global _plugins
+    if _plugins is not None and not refresh:
+        return _plugins
+
+    manifest = {} if refresh else _load_manifest()
+    fresh: Dict[str, dict] = {}
+    plugins: Dict[str, ModuleSpec] = {}
+
+    for ep, dist_key in _iter_entry_points():
+        if ep.name in BUILTIN_MODULES:
+            continue
+        key = f'{dist_key}:{ep.name}={ep.value}'
+        meta = manifest.get(key)
+        if meta is None:
+            try:
+                cls = ep.load()
+            except Exception:
+                continue  # Broken plugin - skip rather than break the CLI
+            meta = {
+                'description': getattr(cls, 'description', ''),
+                'supported_types': sorted(getattr(cls, 'supported_types', ())),
+            }
+        fresh[key] = meta
+        plugins[ep.name] = ModuleSpec(
+            ep.name, ep.value, meta['description'], frozenset(meta['supported_types'])
+        )
+
+    if fresh != manifest:
+        _save_manifest(fresh)
+
+    _plugins = plugins
+    return plugins
+
+
+def _find_spec(name: str) -> Optional[ModuleSpec]:
+    spec = BUILTIN_MODULES.get(name)
+    if spec is None:
+        spec = discover_plugins().get(name)
+    return spec
+
+
+class ModuleRegistry(Mapping):
+    """Mapping of module name to class that imports classes on first access."""
+
+    def __init__(self):
+        self._classes: Dict[str, Type['BaseModule']] = {}
+
+    def _specs(self) -> Dict[str, ModuleSpec]:
+        return {**BUILTIN_MODULES, **discover_plugins()}
+
+    def __getitem__(self, name: str) -> Type['BaseModule']:
+        cls = self._classes.get(name)
+        if cls is None:
+            spec = _find_spec(name)
+            if spec is None:
+                raise KeyError(name)
+            cls = self._classes[name] = spec.load()
+        return cls
+
+    def __contains__(self, name) -> bool:
+        return _find_spec(name) is not None
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._specs())
+
+    def __len__(self) -> int:
+        return len(self._specs())
+
+    def spec(self, name: str) -> Optional[ModuleSpec]:
+        return _find_spec(name)
+
+
+# Registry of all available modules
+MODULE_REGISTRY = ModuleRegistry()
+
+
+def resolve_module_name(input_type: str) -> str:
+    """Map an input type to the name of the module that handles it."""
+    if input_type in TYPE_TO_MODULE:
+        return TYPE_TO_MODULE[input_type]
+    if input_type in MODULE_REGISTRY:
+        return input_type
+    for name, spec in discover_plugins().items():
+        if input_type in spec.supported_types:
+            return name
+    return input_type
+
+
+def get_module(input_type: str, **kwargs) -> Optional['BaseModule']:
     """
     Get appropriate module instance for input type.
-    
+
     Args:
         input_type: The detected input type (from detector)
-        
+        **kwargs: Passed to the module constructor (e.g. session)
+
     Returns:
         Instantiated module or None if not supported
     """
-    module_name = TYPE_TO_MODULE.get(input_type, input_type)
-    module_class = MODULE_REGISTRY.get(module_name)
-    
+    module_class = MODULE_REGISTRY.get(resolve_module_name(input_type))
+
     if module_class:
-        return module_class()
-    
+        return module_class(**kwargs)
+
     return None
 
 
-def get_all_modules() -> Dict[str, BaseModule]:
+def get_all_modules() -> Dict[str, 'BaseModule']:
     """Get instances of all available modules."""
     return {name: cls() for name, cls in MODULE_REGISTRY.items()}
 
 
 def list_modules() -> Dict[str, str]:
-    """List all modules with descriptions."""
+    """List all modules with descriptions (without importing them)."""
     return {
-        name: cls.description
-        for name, cls in MODULE_REGISTRY.items()
+        name: spec.description
+        for name, spec in {**BUILTIN_MODULES, **discover_plugins()}.items()
     }
 
 
+_LAZY_CLASSES = {
+    'BaseModule': 'cybertrace.modules.base:BaseModule',
+    'BitcoinModule': BUILTIN_MODULES['bitcoin'].target,
+    'DomainModule': BUILTIN_MODULES['domain'].target,
+    'IPModule': BUILTIN_MODULES['ip'].target,
+    'UsernameModule': BUILTIN_MODULES['username'].target,
+    'EmailModule': BUILTIN_MODULES['email'].target,
+    'DarkwebModule': BUILTIN_MODULES['darkweb'].target,
+    'IndianModule': BUILTIN_MODULES['indian'].target,
+}
+
+
+def __getattr__(name: str):
+    # Module classes are importable from here, but only loaded on access
+    target = _LAZY_CLASSES.get(name)
+    if target is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    module_path, _, class_name = target.partition(':')
+    return getattr(importlib.import_module(module_path), class_name)
+
+
 __all__ = [
     'BaseModule',
     'BitcoinModule',
     'DomainModule',
+    'IPModule',
     'UsernameModule',
     'EmailModule',
     'DarkwebModule',
     'IndianModule',
+    'BUILTIN_MODULES',
+    'ModuleSpec',
+    'discover_plugins',
     'get_module',
     'get_all_modules',
     'list_modules',
+    'resolve_module_name',
     'MODULE_REGISTRY',
     'TYPE_TO_MODULE',
 ]
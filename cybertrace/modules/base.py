@@ -2,15 +2,34 @@
 
 import asyncio
 import aiohttp
+import dataclasses
 import hashlib
 import json
 from abc import ABC, abstractmethod
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
 from dataclasses import dataclass, field
 from datetime import datetime
-from typing import Any, Dict, List, Optional, Set
+from typing import Any, Callable, Dict, List, Optional, Set, Union
 from pathlib import Path
 
-from ..config import config
+from ..config import Config, get_config
+from ..scheduler import get_scheduler
+
+
+# Receives (event, payload) for the investigation running in the current
+# context. Module instances are shared between concurrent searches, so the
+# listener travels with the task rather than living on the module.
+event_listener: ContextVar[Optional[Callable[[str, Dict[str, Any]], None]]] = ContextVar(
+    'cybertrace_event_listener', default=None
+)
+
+
+def emit(event: str, **payload) -> None:
+    """Send an event to the current investigation's listener, if any."""
+    listener = event_listener.get()
+    if listener is not None:
+        listener(event, payload)
 
 
 @dataclass
@@ -74,6 +93,16 @@ class ModuleResult:
         }
 
 
+def create_session(cfg=None, **kwargs) -> aiohttp.ClientSession:
+    """Create an aiohttp session with CyberTrace defaults."""
+    cfg = cfg or get_config()
+    return aiohttp.ClientSession(
+        timeout=aiohttp.ClientTimeout(total=cfg.request_timeout),
+        headers={'User-Agent': cfg.user_agent},
+        **kwargs
+    )
+
+
 class BaseModule(ABC):
     """Base class for all OSINT modules."""
     
@@ -81,9 +110,20 @@ class BaseModule(ABC):
     description: str = "Base module"
     supported_types: Set[str] = set()
     
-    def __init__(self):
-        self.config = config
-        self._session: Optional[aiohttp.ClientSession] = None
+    def __init__(
+        self,
+        session: Optional[aiohttp.ClientSession] = None,
+        config: Optional[Config] = None,
+    ):
+        """
+        Args:
+            session: Shared session to use instead of creating one. A shared
+                session is left open when the module exits.
+            config: Configuration to use (default: the shared config)
+        """
+        self.config = config or get_config()
+        self._session: Optional[aiohttp.ClientSession] = session
+        self._owns_session = session is None
     
     async def __aenter__(self):
         await self._create_session()
@@ -94,16 +134,14 @@ class BaseModule(ABC):
     
     async def _create_session(self):
         """Create aiohttp session with default settings."""
+        if not self._owns_session:
+            return
         if self._session is None or self._session.closed:
-            timeout = aiohttp.ClientTimeout(total=self.config.request_timeout)
-            self._session = aiohttp.ClientSession(
-                timeout=timeout,
-                headers={'User-Agent': self.config.user_agent},
-            )
+            self._session = create_session(self.config)
     
     async def _close_session(self):
         """Close aiohttp session."""
-        if self._session and not self._session.closed:
+        if self._owns_session and self._session and not self._session.closed:
             await self._session.close()
     
     @property
@@ -127,12 +165,48 @@ class BaseModule(ABC):
         """
         pass
     
+    def group_key(self, target: str) -> Optional[str]:
+        """
+        Key shared by targets that search_many() investigates together.
+        
+        Targets with the same key share work (e.g. one WHOIS lookup for
+        every host of a domain). None, the default, means the module shares
+        nothing between targets.
+        """
+        return None
+    
+    async def search_many(self, targets: List[str], **options) -> List[Union[ModuleResult, Exception]]:
+        """
+        Search several targets, sharing work between them where possible.
+        
+        Returns one result per target, in order; a target whose search
+        raised gets the exception instead. The default runs search() on
+        each target concurrently; modules with a group_key override this.
+        """
+        return list(await asyncio.gather(
+            *(self.search(target, **options) for target in targets),
+            return_exceptions=True,
+        ))
+    
     def can_handle(self, input_type: str) -> bool:
         """Check if this module can handle the input type."""
         return input_type in self.supported_types
     
     # HTTP utilities
     
+    @asynccontextmanager
+    async def request(self, method: str, url: str, **kwargs):
+        """
+        Make an HTTP request through the shared priority scheduler.
+        
+        All module HTTP traffic should go through here (or the helpers
+        below) so it counts against the concurrency and per-host rate
+        limits, at the priority of the current investigation.
+        """
+        async with get_scheduler().slot(url):
+            async with self.session.request(method, url, **kwargs) as resp:
+                yield resp
+    
     async def fetch(
         self,
         url: str,
@@ -145,7 +219,7 @@ class BaseModule(ABC):
         Returns None on error (doesn't raise).
         """
         try:
-            async with self.session.request(method, url, **kwargs) as resp:
+            async with self.request(method, url, **kwargs) as resp:
                 if resp.status == 200:
                     return await resp.text()
                 return None
@@ -164,7 +238,7 @@ class BaseModule(ABC):
         Returns None on error (doesn't raise).
         """
         try:
-            async with self.session.request(method, url, **kwargs) as resp:
+            async with self.request(method, url, **kwargs) as resp:
                 if resp.status == 200:
                     return await resp.json()
                 return None
@@ -174,7 +248,7 @@ class BaseModule(ABC):
     async def check_exists(self, url: str, **kwargs) -> bool:
         """Check if a URL returns 200 OK."""
         try:
-            async with self.session.head(url, allow_redirects=True, **kwargs) as resp:
+            async with self.request('HEAD', url, allow_redirects=True, **kwargs) as resp:
                 return resp.status == 200
         except Exception:
             return False
@@ -199,6 +273,10 @@ class BaseModule(ABC):
         """
         Run multiple source coroutines concurrently and add to result.
         
+        Emits ``source_start`` and ``source_result`` events as each source
+        begins and finishes, followed by a ``summary`` event with the
+        partial summary so far.
+        
         Args:
             sources: List of (source_name, coroutine) tuples
             result: ModuleResult to update
@@ -206,30 +284,47 @@ class BaseModule(ABC):
         if not sources:
             return
         
-        # Run all sources concurrently
-        tasks = [coro for _, coro in sources]
-        names = [name for name, _ in sources]
+        async def run_one(name: str, coro) -> None:
+            emit('source_start', source=name)
+            try:
+                res = await coro
+            except Exception as e:
+                res = e
+            source_result = self._to_source_result(name, res)
+            result.sources[name] = source_result
+            emit('source_result', source=name, result=source_result.to_dict())
+            self._emit_partial_summary(result)
         
-        results = await asyncio.gather(*tasks, return_exceptions=True)
+        # Run all sources concurrently
+        await asyncio.gather(*(run_one(name, coro) for name, coro in sources))
         
-        for name, res in zip(names, results):
-            if isinstance(res, Exception):
-                result.sources[name] = SourceResult(
-                    source=name,
-                    success=False,
-                    error=str(res),
-                )
-            elif isinstance(res, SourceResult):
-                result.sources[name] = res
-            elif isinstance(res, dict):
-                result.sources[name] = SourceResult(
-                    source=name,
-                    success=bool(res),
-                    data=res,
-                )
-            else:
-                result.sources[name] = SourceResult(
-                    source=name,
-                    success=False,
-                    error="Invalid return type",
-                )
+        # Keep sources in declaration order rather than completion order
+        names = [name for name, _ in sources]
+        for name in names:
+            result.sources[name] = result.sources.pop(name)
+    
+    def _to_source_result(self, name: str, res: Any) -> SourceResult:
+        """Wrap whatever a source coroutine returned in a SourceResult."""
+        if isinstance(res, Exception):
+            return SourceResult(source=name, success=False, error=str(res))
+        if isinstance(res, SourceResult):
+            return res
+        if isinstance(res, dict):
+            return SourceResult(source=name, success=bool(res), data=res)
+        return SourceResult(source=name, success=False, error="Invalid return type")
+    
+    def _build_summary(self, result: ModuleResult) -> Dict[str, Any]:
+        """Build summary from source results. Overridden by modules."""
+        return {}
+    
+    def _emit_partial_summary(self, result: ModuleResult) -> None:
+        """Emit the summary of the sources finished so far."""
+        if event_listener.get() is None:
+            return
+        # _build_summary appends to related, so work on a copy
+        partial = dataclasses.replace(result, sources=dict(result.sources), related=[])
+        try:
+            summary = self._build_summary(partial)
+        except Exception:
+            return
+        emit('summary', summary=summary, related=list(partial.related))
@@ -2,6 +2,7 @@
 
 import asyncio
 import re
+import time
 from datetime import datetime
 from typing import Any, Dict, List, Optional, Tuple
 from urllib.parse import quote_plus, unquote
@@ -50,6 +51,11 @@ class DarkwebModule(BaseModule):
         'haystack': 'https://haystak.io/search?q={query}',  # If available
     }
 
+    # Directory listings don't depend on the target, so long-running
+    # processes share one copy between searches for this many seconds
+    ONION_DIRECTORY_TTL = 3600
+    _directory_cache: Optional[Tuple[float, Dict[str, Any]]] = None
+
     async def search(self, target: str, **options) -> ModuleResult:
         """Search dark web sources for target."""
 
@@ -93,6 +99,10 @@ class DarkwebModule(BaseModule):
         CRITICAL: Onion addresses change frequently. NEVER hardcode them.
         Always fetch current addresses from verified clearnet directories.
         """
+        cached = DarkwebModule._directory_cache
+        if cached and time.monotonic() - cached[0] < self.ONION_DIRECTORY_TTL:
+            return SourceResult(source='onion_directories', success=True, data=dict(cached[1]))
+
         all_services = {}
         directories_checked = []
 
@@ -114,15 +124,19 @@ class DarkwebModule(BaseModule):
         except Exception:
             pass
 
+        data = {
+            'directories_checked': directories_checked,
+            'services_found': len(all_services),
+            'services': dict(list(all_services.items())[:20]),  # Top 20
+            'note': 'Current verified .onion addresses. Use these instead of hardcoded URLs.',
+        }
+        if all_services:
+            DarkwebModule._directory_cache = (time.monotonic(), data)
+
         return SourceResult(
             source='onion_directories',
             success=len(all_services) > 0,
-            data={
-                'directories_checked': directories_checked,
-                'services_found': len(all_services),
-                'services': dict(list(all_services.items())[:20]),  # Top 20
-                'note': 'Current verified .onion addresses. Use these instead of hardcoded URLs.',
-            },
+            data=data,
         )
 
     async def _parse_dark_fail(self) -> Dict[str, str]:
@@ -344,7 +358,7 @@ class DarkwebModule(BaseModule):
         }
 
         try:
-            async with self.session.post(search_url, headers=headers, json=payload) as resp:
+            async with self.request('POST', search_url, headers=headers, json=payload) as resp:
                 if resp.status != 200:
                     return SourceResult(
                         source='intelx',
@@ -367,7 +381,7 @@ class DarkwebModule(BaseModule):
         results_url = f"https://2.intelx.io/phonebook/search/result?id={search_id}&limit=20"
 
         try:
-            async with self.session.get(results_url, headers=headers) as resp:
+            async with self.request('GET', results_url, headers=headers) as resp:
                 if resp.status == 200:
                     results_data = await resp.json()
                 else:
@@ -1,13 +1,126 @@
 """Domain intelligence OSINT module."""
 
+import asyncio
+import heapq
 import re
 import socket
 from datetime import datetime
 from typing import Any, Dict, List, Optional, Set
+from urllib.parse import urlparse
 
+import aiohttp
+
+from ..utils import JSONArrayDecoder
 from .base import BaseModule, ModuleResult, SourceResult
 
 
+def _issuer_name(issuer_dn: str) -> Optional[str]:
+    """Organization (or common name) from an issuer DN like 'C=US, O=Let's Encrypt, CN=R3'."""
+    parts = dict(
+        part.strip().split('=', 1) for part in issuer_dn.split(',') if '=' in part
+    )
+    return parts.get('O') or parts.get('CN') or issuer_dn or None
+
+
+class CertificateStats:
+    """
+    Running aggregate of crt.sh certificate entries for one domain.
+    
+    Names are stored without the domain suffix and once each; issuers are
+    counted, validity is reduced to extremes and counts, and only the ten
+    most recent certificates are kept.
+    """
+    
+    RECENT = 10
+    
+    def __init__(self, domain: str):
+        self.domain = domain
+        self._suffix = '.' + domain
+        self._now = datetime.utcnow().strftime('%Y-%m-%dT%H:%M:%S')
+        self.certificate_count = 0
+        self.names: Set[str] = set()           # Subdomain labels, e.g. 'www' or 'a.dev'
+        self.wildcard_roots: Set[str] = set()  # '*.dev.example.com' -> 'dev'
+        self.issuers: Dict[str, int] = {}
+        self.valid = 0
+        self.expired = 0
+        self.first_issued: Optional[str] = None
+        self.last_expiry: Optional[str] = None
+        self._recent: List[tuple] = []         # Min-heap of (not_before, id, seq, entry)
+    
+    def _label(self, name: str) -> Optional[str]:
+        """Name relative to the domain ('' for the domain itself), or None if outside it."""
+        if name == self.domain:
+            return ''
+        if name.endswith(self._suffix):
+            return name[:-len(self._suffix)]
+        return None
+    
+    def add(self, cert: Dict[str, Any]) -> None:
+        self.certificate_count += 1
+        
+        for name in (cert.get('name_value') or '').split('\n'):
+            name = name.strip().lower().rstrip('.')
+            if not name or '@' in name:
+                continue
+            wildcard = name.startswith('*.')
+            label = self._label(name[2:] if wildcard else name)
+            if label is None or '*' in label:
+                continue
+            if wildcard:
+                self.wildcard_roots.add(label)
+            if label:
+                self.names.add(label)
+        
+        issuer = _issuer_name(cert.get('issuer_name') or '')
+        if issuer:
+            self.issuers[issuer] = self.issuers.get(issuer, 0) + 1
+        
+        not_before = cert.get('not_before') or ''
+        not_after = cert.get('not_after') or ''
+        if not_before and (self.first_issued is None or not_before < self.first_issued):
+            self.first_issued = not_before
+        if not_after:
+            if self.last_expiry is None or not_after > self.last_expiry:
+                self.last_expiry = not_after
+            if not_after > self._now:
+                self.valid += 1
+            else:
+                self.expired += 1
+        
+        key = (not_before, cert.get('id') or 0, self.certificate_count)
+        if len(self._recent) < self.RECENT or key > self._recent[0][:3]:
+            item = key + ({
+                'common_name': cert.get('common_name'),
+                'issuer': issuer,
+                'not_before': not_before,
+                'not_after': not_after,
+            },)
+            if len(self._recent) < self.RECENT:
+                heapq.heappush(self._recent, item)
+            else:
+                heapq.heapreplace(self._recent, item)
+    
+    def _name(self, label: str) -> str:
+        return label + self._suffix if label else self.domain
+    
+    def to_dict(self) -> Dict[str, Any]:
+        subdomains = sorted(label + self._suffix for label in self.names)
+        return {
+            'certificate_count': self.certificate_count,
+            'subdomains': subdomains,
+            'subdomain_count': len(subdomains),
+            'wildcard_roots': sorted(self._name(label) for label in self.wildcard_roots),
+            'issuers': dict(sorted(self.issuers.items(), key=lambda item: -item[1])),
+            'validity': {
+                'first_issued': self.first_issued,
+                'last_expiry': self.last_expiry,
+                'currently_valid': self.valid,
+                'expired': self.expired,
+            },
+            'recent_certs': [entry for *_, entry in sorted(self._recent, reverse=True)],
+        }
+
+
 class DomainModule(BaseModule):
     """
     Domain investigation module.
@@ -15,9 +128,14 @@ class DomainModule(BaseModule):
     SUCCESS RATE: 85% - WHOIS/DNS always work, some APIs may rate limit.
     
     Sources:
-    - WHOIS lookup
+    - RDAP, or WHOIS where the registry has no RDAP
     - DNS records (A, AAAA, MX, NS, TXT, CNAME)
     - crt.sh (SSL certificates, subdomains)
+    - Subdomain resolution with wildcard detection (deep scan)
+    - TLS certificates read from the resolved hosts (SANs, issuer, validity; deep scan)
+    - HTTP fingerprints of the live hosts (title, server, redirects, favicon hash; deep scan)
+    - Registered lookalike domains (permutations option)
+    - ASN and country of every IP, from a local table (if compiled)
     - VirusTotal (if API key)
     - URLScan (if API key)
     """
@@ -26,39 +144,143 @@ class DomainModule(BaseModule):
     description = "Domain intelligence and reconnaissance"
     supported_types = {'domain'}
     
+    CRTSH_URL = "https://crt.sh/?q=%.{domain}&output=json"
+    
+    # Registered lookalikes investigated with the regular sources
+    MAX_PERMUTATION_SEARCHES = 25
+    
+    # Hosts whose certificates are read directly (the domain's own addresses first)
+    MAX_TLS_ENDPOINTS = 200
+    
+    # Live hosts fingerprinted over HTTP
+    MAX_FINGERPRINT_HOSTS = 500
+    
+    # Members of one registrable domain investigated at once (a batch unit
+    # can hold a whole planning window of them)
+    MAX_GROUP_CONCURRENCY = 10
+    
+    def group_key(self, target: str) -> Optional[str]:
+        """Registrable domain of the target's host (the host itself for IPs)."""
+        from ..psl import registrable_domain
+        host = self._clean_domain(target)
+        return registrable_domain(host) or host
+    
     async def search(self, target: str, **options) -> ModuleResult:
         """Search domain across intelligence sources."""
+        results = await self._search_group(self.group_key(target), [target], **options)
+        return results[0]
+    
+    async def search_many(self, targets: List[str], **options) -> List[Any]:
+        """
+        Search many hosts and URLs, once per registrable domain.
         
-        # Clean domain
-        domain = self._clean_domain(target)
-        
-        result = ModuleResult(
-            target=domain,
-            target_type='domain',
-            module=self.name,
-        )
-        
-        # Core sources (always run)
-        sources = [
-            ('dns_records', self._get_dns_records(domain)),
-            ('crtsh', self._check_crtsh(domain)),
-            ('whois', self._get_whois(domain)),
-        ]
+        crt.sh, WHOIS, VirusTotal and URLScan describe the registrable
+        domain, so they run once per group and every member gets the same
+        source results; DNS records are still looked up per host.
+        """
+        groups: Dict[str, List[int]] = {}
+        for index, target in enumerate(targets):
+            groups.setdefault(self.group_key(target), []).append(index)
         
-        # Optional API sources
-        if self.config.api_keys.has('virustotal'):
-            sources.append(('virustotal', self._check_virustotal(domain)))
+        results: List[Any] = [None] * len(targets)
         
-        if self.config.api_keys.has('urlscan'):
-            sources.append(('urlscan', self._check_urlscan(domain)))
+        async def run_group(domain: str, indexes: List[int]) -> None:
+            try:
+                found = await self._search_group(domain, [targets[i] for i in indexes], **options)
+            except Exception as e:
+                found = [e] * len(indexes)
+            for index, result in zip(indexes, found):
+                results[index] = result
+        
+        await asyncio.gather(*(run_group(domain, indexes) for domain, indexes in groups.items()))
+        return results
+    
+    async def _search_group(self, domain: str, targets: List[str], **options) -> List[ModuleResult]:
+        """Search targets that share a registrable domain, running each source once."""
+        tasks: Dict[tuple, asyncio.Future] = {}
+        
+        def shared(key: tuple, make):
+            # Each member awaits its own shield, so one member being
+            # cancelled does not cancel the lookup for the others
+            if key not in tasks:
+                tasks[key] = asyncio.ensure_future(make())
+            return asyncio.shield(tasks[key])
+        
+        async def search_one(target: str) -> ModuleResult:
+            host = self._clean_domain(target)
+            result = ModuleResult(
+                target=host,
+                target_type='domain',
+                module=self.name,
+            )
+            
+            # Core sources (always run)
+            sources = [
+                ('dns_records', shared(('dns_records', host), lambda: self._get_dns_records(host))),
+                ('crtsh', shared(('crtsh',), lambda: self._check_crtsh(domain))),
+                ('whois', shared(('whois',), lambda: self._get_whois(domain))),
+            ]
+            
+            # Optional API sources
+            if self.config.api_keys.has('virustotal'):
+                sources.append(('virustotal', shared(('virustotal',), lambda: self._check_virustotal(domain))))
+            
+            if self.config.api_keys.has('urlscan'):
+                sources.append(('urlscan', shared(('urlscan',), lambda: self._check_urlscan(domain))))
+            
+            # Lookalike domains (brand protection)
+            if options.get('permutations'):
+                sources.append(('permutations', shared(
+                    ('permutations',), lambda: self._check_permutations(domain)
+                )))
+            
+            await self.run_sources(sources, result)
+            
+            # Deep scan: find which certificate-log subdomains are live
+            crtsh = result.sources.get('crtsh')
+            if options.get('deep') and crtsh is not None and crtsh.success:
+                subdomains = crtsh.data.get('subdomains', [])
+                await self.run_sources([
+                    ('subdomain_dns', shared(
+                        ('subdomain_dns',), lambda: self._resolve_subdomains(domain, subdomains)
+                    )),
+                ], result)
+            
+            # Deep scan: certificates and web fingerprints straight from the
+            # live hosts. These connect to the target itself, so a default
+            # search (and each permutation hit) sends it nothing
+            endpoints = self._tls_endpoints(host, result) if options.get('deep') else []
+            web_hosts = list(dict.fromkeys(name for name, _ in endpoints))[:self.MAX_FINGERPRINT_HOSTS]
+            if endpoints:
+                await self.run_sources([
+                    ('tls_certs', shared(('tls_certs', host), lambda: self._harvest_certificates(endpoints))),
+                    ('http_fingerprint', shared(
+                        ('http_fingerprint', host), lambda: self._fingerprint_hosts(web_hosts)
+                    )),
+                ], result)
+            
+            # Offline ASN and country of every IP found, if a table is compiled
+            from ..ipasn import get_ipasn_db
+            if get_ipasn_db(self.config) is not None:
+                await self.run_sources([('ip_asn', self._get_ip_asn(result))], result)
+            
+            # Build summary
+            result.summary = self._build_summary(result)
+            result.end_time = datetime.utcnow()
+            
+            return result
         
-        await self.run_sources(sources, result)
+        limit = asyncio.Semaphore(self.MAX_GROUP_CONCURRENCY)
         
-        # Build summary
-        result.summary = self._build_summary(result)
-        result.end_time = datetime.utcnow()
+        async def search_limited(target: str) -> ModuleResult:
+            async with limit:
+                return await search_one(target)
         
-        return result
+        try:
+            return list(await asyncio.gather(*(search_limited(target) for target in targets)))
+        finally:
+            for task in tasks.values():
+                task.cancel()
     
     def _clean_domain(self, target: str) -> str:
         """Clean and normalize domain."""
@@ -71,9 +293,9 @@ class DomainModule(BaseModule):
         return domain.lower().strip()
     
     async def _get_dns_records(self, domain: str) -> SourceResult:
-        """Get DNS records using dnspython."""
+        """Get DNS records, querying all record types concurrently."""
         try:
-            import dns.resolver
+            import dns.asyncresolver  # noqa: F401
         except ImportError:
             return SourceResult(
                 source='dns_records',
@@ -81,35 +303,33 @@ class DomainModule(BaseModule):
                 error='dnspython not installed. Run: pip install dnspython',
             )
         
-        records = {}
+        from ..resolver import get_resolver
+        
         record_types = ['A', 'AAAA', 'MX', 'NS', 'TXT', 'CNAME', 'SOA']
         
-        resolver = dns.resolver.Resolver()
-        resolver.timeout = 5
-        resolver.lifetime = 10
+        try:
+            answers = await get_resolver(self.config).resolve_many(domain, record_types)
+        except Exception as e:
+            # No usable resolver configuration
+            return SourceResult(source='dns_records', success=False, error=str(e))
         
-        for rtype in record_types:
-            try:
-                answers = resolver.resolve(domain, rtype)
-                records[rtype] = []
-                for rdata in answers:
-                    if rtype == 'MX':
-                        records[rtype].append({
-                            'priority': rdata.preference,
-                            'host': str(rdata.exchange).rstrip('.'),
-                        })
-                    elif rtype == 'SOA':
-                        records[rtype].append({
-                            'mname': str(rdata.mname).rstrip('.'),
-                            'rname': str(rdata.rname).rstrip('.'),
-                            'serial': rdata.serial,
-                        })
-                    else:
-                        records[rtype].append(str(rdata).strip('"').rstrip('.'))
-            except (dns.resolver.NoAnswer, dns.resolver.NXDOMAIN, dns.resolver.NoNameservers):
-                pass
-            except Exception:
-                pass
+        records = {}
+        for rtype, answer in answers.items():
+            records[rtype] = []
+            for rdata in answer:
+                if rtype == 'MX':
+                    records[rtype].append({
+                        'priority': rdata.preference,
+                        'host': str(rdata.exchange).rstrip('.'),
+                    })
+                elif rtype == 'SOA':
+                    records[rtype].append({
+                        'mname': str(rdata.mname).rstrip('.'),
+                        'rname': str(rdata.rname).rstrip('.'),
+                        'serial': rdata.serial,
+                    })
+                else:
+                    records[rtype].append(str(rdata).strip('"').rstrip('.'))
         
         # Get IP info
         if 'A' in records:
@@ -122,102 +342,260 @@ class DomainModule(BaseModule):
         )
     
     async def _get_whois(self, domain: str) -> SourceResult:
-        """Get WHOIS data."""
+        """Get registration data over RDAP, falling back to WHOIS."""
+        from ..whois_client import RDAPClient, WhoisClient, WhoisError
+        
+        data = await RDAPClient(self.fetch_json, self.config).lookup(domain)
+        if data:
+            data['protocol'] = 'rdap'
+            return SourceResult(source='whois', success=True, data=data)
+        
         try:
-            import whois
-        except ImportError:
-            return SourceResult(
-                source='whois',
-                success=False,
-                error='python-whois not installed. Run: pip install python-whois',
-            )
+            data = await WhoisClient(self.config).lookup(domain)
+        except WhoisError as e:
+            return SourceResult(source='whois', success=False, error=str(e))
+        
+        data['protocol'] = 'whois'
+        found = 'domain_name' in data or 'registrar' in data
+        return SourceResult(
+            source='whois',
+            success=found,
+            data=data,
+            error=None if found else 'No WHOIS record',
+        )
+    
+    async def _check_crtsh(self, domain: str) -> SourceResult:
+        """
+        Query crt.sh for SSL certificates (finds subdomains).
+        
+        The JSON response is decoded as it streams in and folded into
+        CertificateStats, so every certificate is counted without holding
+        the (possibly multi-GB) response in memory.
+        """
+        url = self.CRTSH_URL.format(domain=domain)
+        stats = CertificateStats(domain)
+        decoder = JSONArrayDecoder()
+        # Big responses take minutes; only a stalled read is an error
+        timeout = aiohttp.ClientTimeout(total=None, sock_read=self.config.request_timeout)
         
         try:
-            w = whois.whois(domain)
-            
-            # Handle various whois response formats
-            data = {
-                'domain_name': self._first_or_value(w.domain_name),
-                'registrar': w.registrar,
-                'creation_date': self._format_date(self._first_or_value(w.creation_date)),
-                'expiration_date': self._format_date(self._first_or_value(w.expiration_date)),
-                'updated_date': self._format_date(self._first_or_value(w.updated_date)),
-                'name_servers': w.name_servers if isinstance(w.name_servers, list) else [w.name_servers] if w.name_servers else [],
-                'status': w.status if isinstance(w.status, list) else [w.status] if w.status else [],
-                'dnssec': w.dnssec,
-            }
-            
-            # Registrant info (often redacted)
-            if w.registrant_name or w.name:
-                data['registrant'] = {
-                    'name': w.registrant_name or w.name,
-                    'organization': w.org,
-                    'country': w.registrant_country or w.country,
-                    'state': w.registrant_state_province or w.state,
-                }
-            
-            # Clean None values
-            data = {k: v for k, v in data.items() if v is not None}
-            
-            return SourceResult(
-                source='whois',
-                success=True,
-                data=data,
-            )
+            async with self.request('GET', url, timeout=timeout) as resp:
+                if resp.status != 200:
+                    return SourceResult(
+                        source='crtsh',
+                        success=False,
+                        error=f'crt.sh returned HTTP {resp.status}',
+                    )
+                async for chunk in resp.content.iter_chunked(1 << 16):
+                    for cert in decoder.feed(chunk):
+                        if isinstance(cert, dict):
+                            stats.add(cert)
+            decoder.close()
         except Exception as e:
-            return SourceResult(
-                source='whois',
-                success=False,
-                error=str(e),
-            )
+            if not stats.certificate_count:
+                return SourceResult(source='crtsh', success=False, error=f'No response from crt.sh: {e}')
+            # Keep what arrived before the failure
+            data = stats.to_dict()
+            data['partial'] = True
+            return SourceResult(source='crtsh', success=True, data=data, error=str(e) or 'Incomplete response')
+        
+        return SourceResult(
+            source='crtsh',
+            success=True,
+            data=stats.to_dict(),
+        )
     
-    async def _check_crtsh(self, domain: str) -> SourceResult:
-        """Query crt.sh for SSL certificates (finds subdomains)."""
-        url = f"https://crt.sh/?q=%.{domain}&output=json"
+    async def _resolve_subdomains(self, domain: str, subdomains: List[str]) -> SourceResult:
+        """
+        Resolve A/AAAA/CNAME for every subdomain, flagging wildcard answers.
         
-        data = await self.fetch_json(url)
+        Random labels are resolved under each parent zone first; a
+        subdomain whose records are all ones a zone's wildcard returns is
+        marked 'wildcard' and not counted as live.
+        """
+        from ..resolver import get_resolver
         
-        if data is None:
-            return SourceResult(
-                source='crtsh',
-                success=False,
-                error='No response from crt.sh',
-            )
+        resolver = get_resolver(self.config)
+        names = sorted({name for name in subdomains if name.endswith('.' + domain)})
         
-        # Extract unique subdomains
-        subdomains: Set[str] = set()
-        certs = []
+        wildcards = await resolver.wildcard_addresses(name.split('.', 1)[1] for name in names)
+        resolved = await resolver.resolve_hosts(names)
         
-        for cert in data[:100]:  # Limit to 100 certs
-            name_value = cert.get('name_value', '')
-            issuer = cert.get('issuer_name', '')
-            not_before = cert.get('not_before', '')
-            not_after = cert.get('not_after', '')
-            
-            # Parse subdomains from name_value (can be multiline)
-            for name in name_value.split('\n'):
-                name = name.strip().lower()
-                if name and '*' not in name:  # Skip wildcards
-                    subdomains.add(name)
-            
-            certs.append({
-                'common_name': cert.get('common_name'),
-                'issuer': issuer.split(',')[0] if issuer else None,
-                'not_before': not_before,
-                'not_after': not_after,
-            })
+        records = {}
+        live_count = 0
+        for name in names:
+            found = resolved.get(name)
+            if not found:
+                continue
+            values = {value for rdtype in ('A', 'AAAA', 'CNAME') for value in found.get(rdtype, [])}
+            wildcard = wildcards.get(name.split('.', 1)[1])
+            if wildcard and values <= wildcard:
+                found['wildcard'] = True
+            else:
+                live_count += 1
+            records[name] = found
         
         return SourceResult(
-            source='crtsh',
+            source='subdomain_dns',
+            success=True,
+            data={
+                'checked_count': len(names),
+                'live_count': live_count,
+                'wildcard_zones': sorted(wildcards),
+                'subdomains': records,
+            },
+        )
+    
+    async def _check_permutations(self, domain: str) -> SourceResult:
+        """
+        Find registered lookalikes of a domain.
+        
+        Every permutation is resolved in bulk (bounded by DNS_QPS and
+        DNS_CONCURRENCY); names that only answer through a wildcard in
+        their parent zone are dropped. The registered ones, up to
+        MAX_PERMUTATION_SEARCHES, then get the regular domain sources.
+        """
+        from ..permutations import permutations
+        from ..resolver import get_resolver
+        
+        try:
+            candidates = {p.domain: p.fuzzer for p in permutations(domain)}
+        except ValueError as e:
+            return SourceResult(source='permutations', success=False, error=str(e))
+        
+        resolver = get_resolver(self.config)
+        wildcards = await resolver.wildcard_addresses({name.split('.', 1)[1] for name in candidates})
+        resolved = await resolver.resolve_hosts(candidates)
+        
+        registered = {}
+        for name, fuzzer in candidates.items():
+            found = resolved.get(name)
+            if not found:
+                continue
+            values = {value for rdtype in ('A', 'AAAA', 'CNAME') for value in found.get(rdtype, [])}
+            wildcard = wildcards.get(name.split('.', 1)[1])
+            if wildcard and values <= wildcard:
+                continue
+            registered[name] = {'fuzzer': fuzzer, **found}
+        
+        # Only hits are worth the per-domain sources. They are suspected
+        # phishing hosts, so they get no deep scan and are never contacted
+        hits = list(registered)[:self.MAX_PERMUTATION_SEARCHES]
+        for name, found in zip(hits, await self.search_many(hits)):
+            if isinstance(found, ModuleResult):
+                registered[name]['summary'] = found.summary
+        
+        return SourceResult(
+            source='permutations',
             success=True,
             data={
-                'certificate_count': len(data),
-                'subdomains': sorted(subdomains),
-                'subdomain_count': len(subdomains),
-                'recent_certs': certs[:10],  # Last 10 certs
+                'checked_count': len(candidates),
+                'registered_count': len(registered),
+                'wildcard_zones': sorted(wildcards),
+                'registered': registered,
             },
         )
     
+    def _tls_endpoints(self, host: str, result: ModuleResult) -> List[tuple]:
+        """(host, ip) pairs to handshake with: the host's addresses, then live subdomains."""
+        endpoints = []
+        dns_records = result.sources.get('dns_records')
+        if dns_records is not None and dns_records.success:
+            for ip in dns_records.data.get('A', []) + dns_records.data.get('AAAA', []):
+                endpoints.append((host, ip))
+        subdomain_dns = result.sources.get('subdomain_dns')
+        if subdomain_dns is not None and subdomain_dns.success:
+            for name, records in subdomain_dns.data.get('subdomains', {}).items():
+                ips = records.get('A', []) + records.get('AAAA', [])
+                if ips and not records.get('wildcard'):
+                    endpoints.append((name, ips[0]))
+        return endpoints[:self.MAX_TLS_ENDPOINTS]
+    
+    async def _harvest_certificates(self, endpoints: List[tuple]) -> SourceResult:
+        """
+        Read the certificate each endpoint presents, over TLS with SNI.
+        
+        Only the handshake is made (no HTTP), so this is a fast, fresh
+        alternative to certificate logs. Names in the certificates that
+        were not among the endpoints are returned as 'hostnames'.
+        """
+        from ..tls import TLSHarvester
+        
+        harvested = await TLSHarvester.from_config(self.config).harvest(endpoints)
+        certificates = harvested['certificates']
+        
+        known = {host for host, _ in endpoints}
+        hostnames = []
+        for cert in certificates:
+            for name in cert['san'] + [cert['subject_cn'] or '']:
+                name = name[2:] if name.startswith('*.') else name
+                if name and '.' in name and ' ' not in name and name not in known:
+                    known.add(name)
+                    hostnames.append(name)
+        
+        return SourceResult(
+            source='tls_certs',
+            success=bool(certificates),
+            data={
+                'checked_count': len(endpoints),
+                'certificates': certificates,
+                'hostnames': hostnames,
+                'errors': harvested['errors'],
+            },
+            error=None if certificates else 'No certificates retrieved',
+        )
+    
+    async def _fingerprint_hosts(self, hosts: List[str]) -> SourceResult:
+        """Title, server, redirect chain and favicon hash of each live host."""
+        from ..fingerprint import HTTPFingerprinter
+        
+        fingerprints = await HTTPFingerprinter(self.session, self.config).fingerprint_many(hosts)
+        answered = sum(1 for fp in fingerprints.values() if 'error' not in fp)
+        return SourceResult(
+            source='http_fingerprint',
+            success=answered > 0,
+            data={
+                'checked_count': len(hosts),
+                'answered_count': answered,
+                'hosts': fingerprints,
+            },
+            error=None if answered else 'No host answered over HTTP',
+        )
+    
+    async def _get_ip_asn(self, result: ModuleResult) -> SourceResult:
+        """Annotate every IP in the result from the local IP-to-ASN table."""
+        from ..ipasn import get_ipasn_db
+        
+        ips = [result.target]
+        dns_records = result.sources.get('dns_records')
+        if dns_records is not None and dns_records.success:
+            ips += dns_records.data.get('A', []) + dns_records.data.get('AAAA', [])
+        subdomain_dns = result.sources.get('subdomain_dns')
+        if subdomain_dns is not None and subdomain_dns.success:
+            for records in subdomain_dns.data.get('subdomains', {}).values():
+                ips += records.get('A', []) + records.get('AAAA', [])
+        
+        found = get_ipasn_db(self.config).lookup_many(ips)
+        asns: Dict[int, Dict[str, Any]] = {}
+        for info in found.values():
+            entry = asns.setdefault(info['asn'], {
+                'asn': info['asn'],
+                'as_name': info['as_name'],
+                'country': info['country'],
+                'ip_count': 0,
+            })
+            entry['ip_count'] += 1
+        
+        return SourceResult(
+            source='ip_asn',
+            success=bool(found),
+            data={
+                'ips': found,
+                'asns': sorted(asns.values(), key=lambda entry: -entry['ip_count']),
+            },
+            error=None if found else 'No IPs in the local ASN table',
+        )
+    
     async def _check_virustotal(self, domain: str) -> SourceResult:
         """Query VirusTotal API."""
         api_key = self.config.api_keys.get('virustotal')
@@ -308,24 +686,11 @@ class DomainModule(BaseModule):
             data=parsed,
         )
     
-    def _first_or_value(self, val):
-        """Get first element if list, else return value."""
-        if isinstance(val, list):
-            return val[0] if val else None
-        return val
-    
-    def _format_date(self, val) -> Optional[str]:
-        """Format date to ISO string."""
-        if val is None:
-            return None
-        if isinstance(val, datetime):
-            return val.isoformat()
-        return str(val)
-    
     def _build_summary(self, result: ModuleResult) -> Dict[str, Any]:
         """Build summary from all source results."""
         summary = {
             'domain': result.target,
+            'registrable_domain': self.group_key(result.target),
             'ip_addresses': [],
             'name_servers': [],
             'registrar': None,
@@ -368,6 +733,62 @@ class DomainModule(BaseModule):
                 # Add subdomains to related for further investigation
                 result.related.extend(summary['subdomains'][:10])
             
+            # Subdomain resolution (deep scan)
+            if source == 'subdomain_dns':
+                live = [name for name, rec in data.get('subdomains', {}).items() if not rec.get('wildcard')]
+                summary['live_subdomains'] = live[:50]
+                summary['live_subdomain_count'] = data.get('live_count', 0)
+                if data.get('wildcard_zones'):
+                    summary['wildcard_zones'] = data['wildcard_zones']
+            
+            # Certificates read from the hosts
+            if source == 'tls_certs':
+                summary['tls_certificates'] = [
+                    {key: cert[key] for key in ('subject_cn', 'issuer', 'not_after', 'expired')}
+                    for cert in data.get('certificates', [])
+                ][:10]
+                summary['tls_hostnames'] = data.get('hostnames', [])[:50]
+                result.related.extend(
+                    name for name in summary['tls_hostnames'][:10] if name not in result.related
+                )
+            
+            # Web fingerprints
+            if source == 'http_fingerprint':
+                summary['web'] = {
+                    name: {key: fp[key] for key in ('status', 'title', 'server', 'favicon_hash') if key in fp}
+                    for name, fp in list(data.get('hosts', {}).items())[:50]
+                    if 'error' not in fp
+                }
+                # Redirects to another domain point at related infrastructure
+                for fp in data.get('hosts', {}).values():
+                    final = urlparse(fp.get('url', '')).hostname
+                    if (final and final not in result.related
+                            and self.group_key(final) != summary['registrable_domain']):
+                        result.related.append(final)
+            
+            # Lookalike domains
+            if source == 'permutations':
+                lookalikes = [
+                    {
+                        'domain': name,
+                        'fuzzer': rec['fuzzer'],
+                        'ip_addresses': rec.get('A', []) + rec.get('AAAA', []),
+                        'creation_date': rec.get('summary', {}).get('creation_date'),
+                    }
+                    for name, rec in data.get('registered', {}).items()
+                ]
+                summary['lookalikes'] = lookalikes[:50]
+                summary['lookalike_count'] = data.get('registered_count', 0)
+            
+            # Offline IP-to-ASN
+            if source == 'ip_asn':
+                summary['asns'] = [
+                    f"AS{entry['asn']} {entry['as_name']}".rstrip() for entry in data.get('asns', [])
+                ]
+                summary['countries'] = sorted({
+                    info['country'] for info in data.get('ips', {}).values() if info.get('country')
+                })
+            
             # VirusTotal
             if source == 'virustotal':
                 summary['security']['malicious_detections'] = data.get('malicious', 0)
@@ -0,0 +1,204 @@
+"""IP address intelligence OSINT module."""
+
+import asyncio
+import ipaddress
+from datetime import datetime
+from typing import Any, Dict, List
+
+from .base import BaseModule, ModuleResult, SourceResult
+
+
+class IPModule(BaseModule):
+    """
+    IP address investigation.
+
+    SUCCESS RATE: 90% - reverse DNS and RDAP need no API keys.
+
+    Sources:
+    - Reverse DNS (PTR), with forward confirmation of each name
+    - RDAP for the network, from the regional registry that holds it
+    - ASN and country from the local IP-to-ASN table (if compiled)
+    - Earlier results in the result store that mention the address
+    """
+
+    name = "ip"
+    description = "IP address intelligence"
+    supported_types = {'ip', 'ipv4', 'ipv6'}
+
+    # PTR names checked for forward confirmation
+    MAX_PTR_CONFIRM = 5
+
+    async def search(self, target: str, **options) -> ModuleResult:
+        """Search an IP address across intelligence sources."""
+        address = ipaddress.ip_address(target.strip().strip('[]'))
+        ip = str(address)
+
+        result = ModuleResult(
+            target=ip,
+            target_type=f'ipv{address.version}',
+            module=self.name,
+        )
+
+        sources = [('reverse_dns', self._get_reverse_dns(ip))]
+
+        # Private and reserved space is in no registry
+        if address.is_global:
+            sources.append(('rdap', self._get_rdap(ip)))
+
+        from ..ipasn import get_ipasn_db
+        if get_ipasn_db(self.config) is not None:
+            sources.append(('ip_asn', self._get_ip_asn(ip)))
+
+        if self._store_path().exists():
+            sources.append(('stored_results', self._find_stored(ip)))
+
+        await self.run_sources(sources, result)
+
+        result.summary = self._build_summary(result)
+        result.end_time = datetime.utcnow()
+
+        return result
+
+    def _store_path(self):
+        return self.config.result_store or self.config.data_dir / 'results.db'
+
+    async def _get_reverse_dns(self, ip: str) -> SourceResult:
+        """PTR names of the address, and which of them resolve back to it."""
+        try:
+            import dns.asyncresolver  # noqa: F401
+        except ImportError:
+            return SourceResult(
+                source='reverse_dns',
+                success=False,
+                error='dnspython not installed. Run: pip install dnspython',
+            )
+
+        from ..resolver import get_resolver
+
+        resolver = get_resolver(self.config)
+        try:
+            names = await resolver.resolve_ptr(ip)
+        except Exception as e:
+            return SourceResult(source='reverse_dns', success=False, error=str(e))
+        if not names:
+            return SourceResult(source='reverse_dns', success=False, error='No PTR record')
+
+        # A PTR record is set by whoever holds the address and can name
+        # any host; it only counts if the name resolves back
+        async def confirm(name: str) -> bool:
+            try:
+                records = await resolver.resolve_host(name) or {}
+            except Exception:
+                return False
+            return any(
+                str(ipaddress.ip_address(value)) == ip
+                for value in records.get('A', []) + records.get('AAAA', [])
+            )
+
+        checked = names[:self.MAX_PTR_CONFIRM]
+        confirmed = await asyncio.gather(*(confirm(name) for name in checked))
+        return SourceResult(
+            source='reverse_dns',
+            success=True,
+            data={
+                'ptr': names,
+                'forward_confirmed': [name for name, ok in zip(checked, confirmed) if ok],
+            },
+        )
+
+    async def _get_rdap(self, ip: str) -> SourceResult:
+        """Network, owner and abuse contact from the registry's RDAP service."""
+        from ..whois_client import RDAPClient
+
+        data = await RDAPClient(self.fetch_json, self.config).lookup_ip(ip)
+        if not data:
+            return SourceResult(source='rdap', success=False, error='No RDAP record')
+        return SourceResult(source='rdap', success=True, data=data)
+
+    async def _get_ip_asn(self, ip: str) -> SourceResult:
+        """ASN and country from the local IP-to-ASN table."""
+        from ..ipasn import get_ipasn_db
+
+        info = get_ipasn_db(self.config).lookup(ip)
+        return SourceResult(
+            source='ip_asn',
+            success=info is not None,
+            data=info or {},
+            error=None if info else 'Not in the local ASN table',
+        )
+
+    async def _find_stored(self, ip: str) -> SourceResult:
+        """Earlier investigations whose results mention the address."""
+        from ..store import ResultStore
+
+        def find() -> List[Dict[str, Any]]:
+            store = ResultStore(self._store_path())
+            try:
+                return [hit for hit in store.find_ip(ip) if hit['target'] != ip]
+            finally:
+                store.close()
+
+        hits = await asyncio.get_running_loop().run_in_executor(None, find)
+        return SourceResult(
+            source='stored_results',
+            success=bool(hits),
+            data={'results': hits},
+            error=None if hits else 'Not in any stored result',
+        )
+
+    def _build_summary(self, result: ModuleResult) -> Dict[str, Any]:
+        """Build summary from all source results."""
+        address = ipaddress.ip_address(result.target)
+        summary = {
+            'ip': result.target,
+            'version': address.version,
+            'is_private': not address.is_global,
+            'ptr': [],
+            'forward_confirmed': [],
+            'asn': None,
+            'as_name': None,
+            'country': None,
+            'network': None,
+            'organization': None,
+            'abuse_email': None,
+            'seen_in': [],
+        }
+
+        for source, res in result.sources.items():
+            if not res.success:
+                continue
+            data = res.data
+
+            if source == 'reverse_dns':
+                summary['ptr'] = data.get('ptr', [])
+                summary['forward_confirmed'] = data.get('forward_confirmed', [])
+                # Host names lead on to the domain module
+                result.related.extend(summary['ptr'])
+
+            if source == 'rdap':
+                summary['network'] = {
+                    key: data[key]
+                    for key in ('handle', 'name', 'cidr', 'start_address', 'end_address')
+                    if key in data
+                }
+                summary['organization'] = data.get('organization')
+                summary['abuse_email'] = data.get('abuse_email')
+                summary['country'] = summary['country'] or data.get('country')
+
+            if source == 'ip_asn':
+                summary['asn'] = data.get('asn')
+                summary['as_name'] = data.get('as_name')
+                # The table is fresher than registry records for routing
+                summary['country'] = data.get('country') or summary['country']
+
+            if source == 'stored_results':
+                summary['seen_in'] = [
+                    {'target': hit['target'], 'module': hit['module']}
+                    for hit in data.get('results', [])
+                ]
+                result.related.extend(
+                    hit['target'] for hit in data.get('results', [])
+                    if hit['target'] not in result.related
+                )
+
+        return summary
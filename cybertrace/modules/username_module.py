@@ -2,13 +2,18 @@
 
 import asyncio
 import json
+import re
 import shutil
 import tempfile
 from datetime import datetime
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Set
+from typing import Any, Dict, List, Optional, Set, Tuple
 
-from .base import BaseModule, ModuleResult, SourceResult
+from .base import BaseModule, ModuleResult, SourceResult, emit
+
+# How Maigret and Sherlock print a find: "[+] GitHub: https://github.com/user"
+_FOUND_LINE = re.compile(r'^\[\+\]\s*([^:]+?):\s*(https?://\S+)')
+_ANSI_ESCAPE = re.compile(r'\x1b\[[0-9;]*m')
 
 
 class UsernameModule(BaseModule):
@@ -18,8 +23,10 @@ class UsernameModule(BaseModule):
     SUCCESS RATE: 90% - Maigret/Sherlock are mature and reliable.
     
     Tools:
-    - Maigret (primary, 3000+ sites)
-    - Sherlock (backup, 400+ sites)
+    - Site manifest checked in-process (primary; USERNAME_SITES can point
+      to Maigret's 3000+ site data.json)
+    - Maigret (deep scan, 3000+ sites)
+    - Sherlock (deep scan backup, 400+ sites)
     - Manual checks for key platforms
     """
     
@@ -27,20 +34,38 @@ class UsernameModule(BaseModule):
     description = "Username enumeration across social platforms"
     supported_types = {'username'}
     
-    # High-value platforms to always check manually (fast verification)
+    # High-value platforms to always check manually (fast verification).
+    # Manifest sites with the same names are skipped, so each platform is
+    # checked once; YouTube and Telegram are left to the manifest, whose
+    # rules for them are more exact.
     KEY_PLATFORMS = {
         'github': 'https://api.github.com/users/{username}',
         'twitter': 'https://twitter.com/{username}',
         'instagram': 'https://www.instagram.com/{username}/',
         'reddit': 'https://www.reddit.com/user/{username}/about.json',
-        'youtube': 'https://www.youtube.com/@{username}',
         'tiktok': 'https://www.tiktok.com/@{username}',
         'linkedin': 'https://www.linkedin.com/in/{username}',
-        'telegram': 'https://t.me/{username}',
         'medium': 'https://medium.com/@{username}',
         'twitch': 'https://www.twitch.tv/{username}',
     }
     
+    # Manifest tags that name a summary category under another name
+    TAG_CATEGORIES = {
+        'social': 'social_media',
+        'coding': 'developer',
+        'video': 'content',
+        'streaming': 'content',
+        'blog': 'content',
+        'music': 'content',
+        'business': 'professional',
+        'job': 'professional',
+        'games': 'gaming',
+        'messenger': 'messaging',
+    }
+    
+    # Seconds Maigret or Sherlock may run before it is killed
+    TOOL_TIMEOUT = 120
+    
     async def search(self, target: str, **options) -> ModuleResult:
         """Search username across platforms."""
         
@@ -55,19 +80,22 @@ class UsernameModule(BaseModule):
         # Parallel execution
         sources = [
             ('key_platforms', self._check_key_platforms(username)),
+            ('sites', self._check_sites(username)),
         ]
         
-        # Try Maigret first (most comprehensive)
-        if self._tool_available('maigret'):
-            sources.append(('maigret', self._run_maigret(username)))
-        elif self._tool_available('sherlock'):
-            sources.append(('sherlock', self._run_sherlock(username)))
-        else:
-            result.sources['tools'] = SourceResult(
-                source='tools',
-                success=False,
-                error='Neither maigret nor sherlock installed. Run: pip install maigret',
-            )
+        # The external tools cost a process start per lookup; only run
+        # them on a deep scan, Maigret first (most comprehensive)
+        if options.get('deep'):
+            if self._tool_available('maigret'):
+                sources.append(('maigret', self._run_maigret(username)))
+            elif self._tool_available('sherlock'):
+                sources.append(('sherlock', self._run_sherlock(username)))
+            else:
+                result.sources['tools'] = SourceResult(
+                    source='tools',
+                    success=False,
+                    error='Neither maigret nor sherlock installed. Run: pip install maigret',
+                )
         
         await self.run_sources(sources, result)
         
@@ -90,7 +118,7 @@ class UsernameModule(BaseModule):
         async def check_platform(name: str, url_template: str):
             url = url_template.format(username=username)
             try:
-                async with self.session.get(url, allow_redirects=False) as resp:
+                async with self.request('GET', url, allow_redirects=False) as resp:
                     # Different platforms have different "found" indicators
                     if name == 'github':
                         if resp.status == 200:
@@ -137,6 +165,92 @@ class UsernameModule(BaseModule):
             },
         )
     
+    async def _check_sites(self, username: str) -> SourceResult:
+        """Check every site of the manifest concurrently, in-process."""
+        from ..sites import ManifestError, SiteChecker, get_site_manifest
+        
+        try:
+            manifest = get_site_manifest(self.config)
+        except ManifestError as e:
+            return SourceResult(source='sites', success=False, error=str(e))
+        
+        checker = SiteChecker(self.session, manifest, self.config)
+        data = await checker.check_all(username, exclude=self.KEY_PLATFORMS)
+        return SourceResult(
+            source='sites',
+            success=data['sites_checked'] > len(data['errors']),
+            data=data,
+            error=None if data['sites_checked'] > len(data['errors']) else 'No site answered',
+        )
+    
+    async def _stream_tool(self, source: str, cmd: List[str], cwd: Optional[str] = None
+                           ) -> Tuple[List[Dict[str, str]], bool]:
+        """
+        Run a tool, collecting found sites from its output as it arrives.
+        
+        Each new find is emitted as a ``source_partial`` event carrying the
+        SourceResult so far. Past TOOL_TIMEOUT the tool is killed and the
+        sites found until then are kept.
+        
+        Returns (found sites, whether the tool timed out).
+        """
+        proc = await asyncio.create_subprocess_exec(
+            *cmd,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.DEVNULL,
+            cwd=cwd,
+            limit=1024 * 1024,
+        )
+        found: List[Dict[str, str]] = []
+        seen: Set[str] = set()
+        
+        async def read() -> None:
+            async for raw in proc.stdout:
+                site = self._parse_found_line(raw.decode('utf-8', 'replace'))
+                if site is None or site['url'] in seen:
+                    continue
+                seen.add(site['url'])
+                found.append(site)
+                emit('source_partial', source=source, result=SourceResult(
+                    source=source,
+                    success=True,
+                    data={'found_count': len(found), 'found': list(found), 'partial': True},
+                ).to_dict())
+            await proc.wait()
+        
+        try:
+            await asyncio.wait_for(read(), timeout=self.TOOL_TIMEOUT)
+            return found, False
+        except asyncio.TimeoutError:
+            return found, True
+        finally:
+            # Also reached on cancellation: never leave the tool running
+            if proc.returncode is None:
+                proc.kill()
+                await proc.wait()
+    
+    @staticmethod
+    def _parse_found_line(line: str) -> Optional[Dict[str, str]]:
+        """The site and URL of a '[+] Site: URL' line, as both tools print finds."""
+        match = _FOUND_LINE.match(_ANSI_ESCAPE.sub('', line).strip())
+        if not match:
+            return None
+        return {'site': match.group(1).strip(), 'url': match.group(2)}
+    
+    def _tool_result(self, source: str, tool: str, found: List[Dict[str, Any]],
+                     timed_out: bool, **data) -> SourceResult:
+        """SourceResult for a tool run, keeping what it found before a timeout."""
+        if timed_out and not found:
+            return SourceResult(
+                source=source,
+                success=False,
+                error=f'{tool} timed out after {self.TOOL_TIMEOUT}s',
+            )
+        data = {'found_count': len(found), **data, 'found': found[:100]}  # Limit output
+        if timed_out:
+            data['partial'] = True
+        return SourceResult(source=source, success=True, data=data)
+    
     async def _run_maigret(self, username: str) -> SourceResult:
         """Run Maigret tool (3000+ sites)."""
         with tempfile.TemporaryDirectory() as tmpdir:
@@ -152,57 +266,42 @@ class UsernameModule(BaseModule):
             ]
             
             try:
-                proc = await asyncio.create_subprocess_exec(
-                    *cmd,
-                    stdout=asyncio.subprocess.PIPE,
-                    stderr=asyncio.subprocess.PIPE,
-                )
-                stdout, stderr = await asyncio.wait_for(proc.communicate(), timeout=120)
-                
-                if output_file.exists():
-                    with open(output_file) as f:
-                        data = json.load(f)
-                    
-                    # Parse maigret output
-                    found = []
-                    for site, info in data.items():
-                        if isinstance(info, dict) and info.get('status'):
-                            # Status can be 'Claimed', 'Available', etc.
-                            if info.get('status') == 'Claimed':
-                                found.append({
-                                    'site': site,
-                                    'url': info.get('url_user'),
-                                    'status': info.get('status'),
-                                })
-                    
-                    return SourceResult(
-                        source='maigret',
-                        success=True,
-                        data={
-                            'found_count': len(found),
-                            'sites_checked': len(data),
-                            'found': found[:100],  # Limit output
-                        },
-                    )
-                else:
-                    return SourceResult(
-                        source='maigret',
-                        success=False,
-                        error='No output file generated',
-                    )
-                    
-            except asyncio.TimeoutError:
+                found, timed_out = await self._stream_tool('maigret', cmd)
+            except Exception as e:
                 return SourceResult(
                     source='maigret',
                     success=False,
-                    error='Maigret timed out after 120s',
+                    error=str(e),
                 )
-            except Exception as e:
+            
+            # A finished run leaves a report with every site's status
+            if not timed_out and output_file.exists():
+                try:
+                    with open(output_file) as f:
+                        data = json.load(f)
+                except (OSError, ValueError):
+                    data = None
+                if isinstance(data, dict):
+                    found = [
+                        {
+                            'site': site,
+                            'url': info.get('url_user'),
+                            'status': info.get('status'),
+                        }
+                        for site, info in data.items()
+                        # Status can be 'Claimed', 'Available', etc.
+                        if isinstance(info, dict) and info.get('status') == 'Claimed'
+                    ]
+                    return self._tool_result('maigret', 'Maigret', found, False,
+                                             sites_checked=len(data))
+            
+            if not found and not timed_out:
                 return SourceResult(
                     source='maigret',
                     success=False,
-                    error=str(e),
+                    error='No output file generated',
                 )
+            return self._tool_result('maigret', 'Maigret', found, timed_out)
     
     async def _run_sherlock(self, username: str) -> SourceResult:
         """Run Sherlock tool (400+ sites)."""
@@ -214,59 +313,25 @@ class UsernameModule(BaseModule):
                 '--output', str(output_file),
                 '--timeout', '10',
                 '--print-found',
+                '--no-color',
             ]
             
             try:
-                proc = await asyncio.create_subprocess_exec(
-                    *cmd,
-                    stdout=asyncio.subprocess.PIPE,
-                    stderr=asyncio.subprocess.PIPE,
-                    cwd=tmpdir,
-                )
-                stdout, stderr = await asyncio.wait_for(proc.communicate(), timeout=120)
-                
-                # Parse stdout for found sites
-                found = []
-                for line in stdout.decode().split('\n'):
-                    line = line.strip()
-                    if line.startswith('[+]') or 'http' in line.lower():
-                        # Extract URL
-                        if 'http' in line:
-                            import re
-                            urls = re.findall(r'https?://[^\s]+', line)
-                            for url in urls:
-                                site = url.split('/')[2]
-                                found.append({
-                                    'site': site,
-                                    'url': url,
-                                })
-                
-                return SourceResult(
-                    source='sherlock',
-                    success=True,
-                    data={
-                        'found_count': len(found),
-                        'found': found,
-                    },
-                )
-                
-            except asyncio.TimeoutError:
-                return SourceResult(
-                    source='sherlock',
-                    success=False,
-                    error='Sherlock timed out after 120s',
-                )
+                found, timed_out = await self._stream_tool('sherlock', cmd, cwd=tmpdir)
             except Exception as e:
                 return SourceResult(
                     source='sherlock',
                     success=False,
                     error=str(e),
                 )
+            
+            return self._tool_result('sherlock', 'Sherlock', found, timed_out)
     
     def _build_summary(self, result: ModuleResult) -> Dict[str, Any]:
         """Build summary from all source results."""
         all_found: Set[str] = set()
         all_urls: Dict[str, str] = {}
+        site_tags: Dict[str, List[str]] = {}
         
         for source, res in result.sources.items():
             if not res.success:
@@ -280,12 +345,13 @@ class UsernameModule(BaseModule):
                     if details and 'url' in details:
                         all_urls[platform] = details['url']
             
-            elif source in ('maigret', 'sherlock'):
+            elif source in ('sites', 'maigret', 'sherlock'):
                 for site_info in data.get('found', []):
                     site = site_info.get('site', '').lower()
                     url = site_info.get('url')
                     if site:
                         all_found.add(site)
+                        site_tags.setdefault(site, site_info.get('tags', []))
                     if url:
                         all_urls[site] = url
         
@@ -310,6 +376,14 @@ class UsernameModule(BaseModule):
                     categorized[cat].append(site)
                     found_cat = True
                     break
+            if not found_cat:
+                # Fall back to the manifest's tags (Maigret's tag names too)
+                for tag in site_tags.get(site, []):
+                    cat = self.TAG_CATEGORIES.get(tag, tag)
+                    if cat in categorized:
+                        categorized[cat].append(site)
+                        found_cat = True
+                        break
             if not found_cat:
                 other.append(site)
         
@@ -0,0 +1,211 @@
+"""Lookalike domain generation.
+
+Produces the names a typosquatter or phisher would register in place of a
+domain: typos, homoglyphs, bit flips, hyphen and dot insertions and other
+public suffixes. Only the label left of the public suffix is permuted, so
+``shop.example.co.uk`` yields ``exampel.co.uk``, ``examp1e.co.uk``,
+``example.com`` and so on.
+
+Candidates are generated lazily and de-duplicated across fuzzers (the first
+fuzzer to produce a name is the one reported), so they can be fed straight
+into bulk resolution:
+
+    for fuzzer, name in permutations('example.com'):
+        ...
+"""
+
+import string
+from typing import Iterable, Iterator, NamedTuple, Optional, Sequence
+
+from .psl import get_public_suffix_list
+
+_VALID = frozenset(string.ascii_lowercase + string.digits + '-')
+
+KEYBOARD = {
+    '1': '2q', '2': '3wq1', '3': '4ew2', '4': '5re3', '5': '6tr4', '6': '7yt5',
+    '7': '8uy6', '8': '9iu7', '9': '0oi8', '0': 'po9',
+    'q': '12wa', 'w': '3esaq2', 'e': '4rdsw3', 'r': '5tfde4', 't': '6ygfr5',
+    'y': '7uhgt6', 'u': '8ijhy7', 'i': '9okju8', 'o': '0plki9', 'p': 'lo0',
+    'a': 'qwsz', 's': 'edxzaw', 'd': 'rfcxse', 'f': 'tgvcdr', 'g': 'yhbvft',
+    'h': 'ujnbgy', 'j': 'ikmnhu', 'k': 'olmji', 'l': 'kop',
+    'z': 'asx', 'x': 'zsdc', 'c': 'xdfv', 'v': 'cfgb', 'b': 'vghn', 'n': 'bhjm', 'm': 'njk',
+}
+
+# Look-alike replacements within ASCII, including multi-character ones
+ASCII_HOMOGLYPHS = {
+    'a': ('4',), 'b': ('6', 'lb'), 'd': ('cl', 'b'), 'e': ('3',), 'g': ('9', 'q'),
+    'i': ('1', 'l', 'j'), 'l': ('1', 'i'), 'm': ('rn', 'nn'), 'n': ('m', 'r'),
+    'o': ('0',), 'q': ('g',), 's': ('5',), 't': ('7',), 'u': ('v',),
+    'v': ('u',), 'w': ('vv',), 'z': ('2', 's'),
+    '0': ('o',), '1': ('l', 'i'), 'rn': ('m',), 'cl': ('d',), 'vv': ('w',),
+}
+
+# Non-Latin letters drawn like Latin ones (registered as punycode)
+IDN_HOMOGLYPHS = {
+    'a': 'аɑ', 'c': 'сϲ', 'd': 'ԁ', 'e': 'еė', 'h': 'һ', 'i': 'іı', 'j': 'ј',
+    'k': 'κ', 'l': 'ӏ', 'n': 'ո', 'o': 'оο', 'p': 'р', 'q': 'ԛ', 's': 'ѕ',
+    'u': 'υ', 'v': 'ѵ', 'w': 'ԝ', 'x': 'х', 'y': 'уý',
+}
+
+VOWELS = 'aeiouy'
+
+# Public suffixes tried in place of the domain's own
+SUFFIX_SWAPS = (
+    'com', 'net', 'org', 'info', 'biz', 'co', 'io', 'app', 'dev', 'online', 'site',
+    'xyz', 'top', 'shop', 'store', 'live', 'club', 'cc', 'me', 'us', 'uk', 'co.uk',
+    'de', 'fr', 'in', 'co.in', 'ru', 'cn', 'com.cn', 'br', 'com.br', 'au', 'com.au',
+)
+
+
+class Permutation(NamedTuple):
+    fuzzer: str
+    domain: str
+
+
+def _addition(name: str) -> Iterator[str]:
+    for c in string.ascii_lowercase + string.digits:
+        yield name + c
+
+
+def _bitsquatting(name: str) -> Iterator[str]:
+    for i, c in enumerate(name):
+        code = ord(c)
+        for bit in range(8):
+            flipped = chr(code ^ (1 << bit))
+            if flipped in _VALID:
+                yield name[:i] + flipped + name[i + 1:]
+
+
+def _homoglyph(name: str) -> Iterator[str]:
+    for glyph, replacements in ASCII_HOMOGLYPHS.items():
+        start = name.find(glyph)
+        while start != -1:
+            for replacement in replacements:
+                yield name[:start] + replacement + name[start + len(glyph):]
+            start = name.find(glyph, start + 1)
+    for i, c in enumerate(name):
+        for replacement in IDN_HOMOGLYPHS.get(c, ''):
+            yield name[:i] + replacement + name[i + 1:]
+
+
+def _hyphenation(name: str) -> Iterator[str]:
+    for i in range(1, len(name)):
+        yield name[:i] + '-' + name[i:]
+
+
+def _insertion(name: str) -> Iterator[str]:
+    for i, c in enumerate(name):
+        for key in KEYBOARD.get(c, ''):
+            yield name[:i] + key + name[i:]
+            yield name[:i + 1] + key + name[i + 1:]
+
+
+def _omission(name: str) -> Iterator[str]:
+    for i in range(len(name)):
+        yield name[:i] + name[i + 1:]
+
+
+def _repetition(name: str) -> Iterator[str]:
+    for i, c in enumerate(name):
+        yield name[:i] + c + name[i:]
+
+
+def _replacement(name: str) -> Iterator[str]:
+    for i, c in enumerate(name):
+        for key in KEYBOARD.get(c, ''):
+            yield name[:i] + key + name[i + 1:]
+
+
+def _subdomain(name: str) -> Iterator[str]:
+    for i in range(1, len(name)):
+        if name[i - 1] != '-' and name[i] != '-':
+            yield name[:i] + '.' + name[i:]
+
+
+def _transposition(name: str) -> Iterator[str]:
+    for i in range(len(name) - 1):
+        if name[i] != name[i + 1]:
+            yield name[:i] + name[i + 1] + name[i] + name[i + 2:]
+
+
+def _vowel_swap(name: str) -> Iterator[str]:
+    for i, c in enumerate(name):
+        if c in VOWELS:
+            for vowel in VOWELS:
+                yield name[:i] + vowel + name[i + 1:]
+
+
+FUZZERS = {
+    'omission': _omission,
+    'transposition': _transposition,
+    'replacement': _replacement,
+    'repetition': _repetition,
+    'insertion': _insertion,
+    'homoglyph': _homoglyph,
+    'bitsquatting': _bitsquatting,
+    'vowel_swap': _vowel_swap,
+    'hyphenation': _hyphenation,
+    'addition': _addition,
+    'subdomain': _subdomain,
+}
+
+
+def _valid_label(label: str) -> bool:
+    return (
+        0 < len(label) <= 63
+        and label[0] != '-' and label[-1] != '-'
+        and _VALID.issuperset(label)
+    )
+
+
+def _to_ascii(name: str) -> Optional[str]:
+    """Punycode form of a permuted name, or None if it is not a valid host name."""
+    if not name.isascii():
+        try:
+            name = name.encode('idna').decode('ascii')
+        except UnicodeError:
+            return None
+    return name if all(_valid_label(label) for label in name.split('.')) else None
+
+
+def permutations(domain: str, fuzzers: Optional[Iterable[str]] = None,
+                 suffixes: Sequence[str] = SUFFIX_SWAPS) -> Iterator[Permutation]:
+    """
+    Yield lookalikes of a domain's registrable name, each name once.
+
+    Args:
+        domain: Host or registrable domain to imitate
+        fuzzers: FUZZERS to run (default: all), plus 'tld_swap' for
+            other public suffixes
+        suffixes: Suffixes tried by 'tld_swap'
+
+    Raises:
+        ValueError: if domain has no registrable part (an IP or a bare suffix)
+    """
+    psl = get_public_suffix_list()
+    registrable = psl.registrable_domain(domain)
+    if registrable is None:
+        raise ValueError(f'No registrable domain in {domain!r}')
+    suffix = psl.public_suffix(registrable)
+    name = registrable[:-len(suffix) - 1]
+
+    selected = list(fuzzers) if fuzzers is not None else [*FUZZERS, 'tld_swap']
+    seen = {registrable}
+
+    for fuzzer in selected:
+        if fuzzer == 'tld_swap':
+            generated: Iterable[str] = (f'{name}.{other}' for other in suffixes)
+        else:
+            generated = (f'{variant}.{suffix}' for variant in FUZZERS[fuzzer](name))
+        for candidate in generated:
+            if candidate in seen:
+                continue
+            seen.add(candidate)
+            ascii_name = _to_ascii(candidate)
+            if ascii_name is None:
+                continue
+            if ascii_name != candidate:
+                if ascii_name in seen:
+                    continue
+                seen.add(ascii_name)
+            yield Permutation(fuzzer, ascii_name)
@@ -0,0 +1,157 @@
+"""Public suffix lookups.
+
+Reduces host names to their registrable domain ("eTLD+1") using the Public
+Suffix List, so that ``a.example.co.uk``, ``b.example.co.uk`` and
+``https://example.co.uk/x`` are recognised as one organisation's domain.
+The list ships with the package (``data/public_suffix_list.dat``, MPL 2.0);
+``PUBLIC_SUFFIX_LIST`` points at a newer copy. It is compiled once per
+process into a trie keyed by label from the right, so a lookup costs one
+dict step per label.
+
+    registrable_domain('a.b.example.co.uk')   # 'example.co.uk'
+    group_by_registrable(['a.example.com', 'b.example.com', 'example.org'])
+    # {'example.com': ['a.example.com', 'b.example.com'], 'example.org': ['example.org']}
+"""
+
+import ipaddress
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Union
+
+from .config import Config, get_config
+
+BUNDLED_LIST = Path(__file__).parent / 'data' / 'public_suffix_list.dat'
+
+# Trie key marking the end of a rule: True for a rule, False for an
+# exception ("!"). Labels are never empty, so it cannot clash.
+_END = ''
+
+
+class PublicSuffixList:
+    """
+    Compiled Public Suffix List.
+
+    Args:
+        rules: Rule lines ('com', '*.ck', '!www.ck'); comments and blank
+            lines are skipped
+        private: Include the PRIVATE section (blogspot.com, github.io, ...),
+            which treats each customer of those services as a separate
+            registrant
+    """
+
+    def __init__(self, rules: Iterable[str], private: bool = True):
+        self._root: dict = {}
+        self.rule_count = 0
+        for line in rules:
+            if '===BEGIN PRIVATE DOMAINS===' in line and not private:
+                break
+            rule = line.strip().split(' ', 1)[0].lower()
+            if rule and not rule.startswith('//'):
+                self._add(rule)
+
+    @classmethod
+    def from_file(cls, path: Union[str, Path], private: bool = True) -> 'PublicSuffixList':
+        with open(path, encoding='utf-8') as f:
+            return cls(f, private=private)
+
+    def _add(self, rule: str) -> None:
+        exception = rule.startswith('!')
+        node = self._root
+        for label in reversed(_to_ascii(rule.lstrip('!')).split('.')):
+            node = node.setdefault(label, {})
+        node[_END] = not exception
+        self.rule_count += 1
+
+    def _suffix_length(self, labels: List[str]) -> int:
+        """Number of trailing labels forming the public suffix."""
+        node = self._root
+        length = 1  # Unlisted TLDs are public suffixes (the implicit "*" rule)
+        for depth, label in enumerate(reversed(labels), 1):
+            exact = node.get(label)
+            if exact is not None and exact.get(_END) is False:
+                return depth - 1
+            if exact is not None and exact.get(_END):
+                length = depth
+            else:
+                wildcard = node.get('*')
+                if wildcard is not None and wildcard.get(_END):
+                    length = depth
+            if exact is None:
+                break
+            node = exact
+        return length
+
+    def public_suffix(self, host: str) -> Optional[str]:
+        """The public suffix of host ('co.uk' for 'a.example.co.uk'), or None for IPs."""
+        labels = _labels(host)
+        if not labels:
+            return None
+        return '.'.join(labels[-self._suffix_length(labels):])
+
+    def registrable_domain(self, host: str) -> Optional[str]:
+        """
+        The registrable domain of host: its public suffix plus one label.
+
+        Returns None for IP addresses, empty names and names that are
+        themselves public suffixes ('co.uk').
+        """
+        labels = _labels(host)
+        if not labels:
+            return None
+        length = self._suffix_length(labels) + 1
+        if len(labels) < length:
+            return None
+        return '.'.join(labels[-length:])
+
+
+def _to_ascii(name: str) -> str:
+    """Punycode form of an internationalised name (unchanged if already ASCII)."""
+    if name.isascii():
+        return name
+    try:
+        return name.encode('idna').decode('ascii')
+    except UnicodeError:
+        return name
+
+
+def _labels(host: str) -> List[str]:
+    """Lower-case ASCII labels of a host name, or [] for IPs and empty names."""
+    host = host.strip().rstrip('.').lower()
+    if ':' in host or host[-1:].isdigit():
+        try:
+            ipaddress.ip_address(host.strip('[]'))
+            return []
+        except ValueError:
+            pass
+    labels = _to_ascii(host).split('.')
+    return [] if '' in labels else labels
+
+
+_list: Optional[PublicSuffixList] = None
+
+
+def get_public_suffix_list(config: Optional[Config] = None) -> PublicSuffixList:
+    """Return the process-wide list, compiling it on first use."""
+    global _list
+    if _list is None:
+        config = config or get_config()
+        _list = PublicSuffixList.from_file(config.public_suffix_list or BUNDLED_LIST)
+    return _list
+
+
+def registrable_domain(host: str) -> Optional[str]:
+    """Registrable domain of host using the process-wide list (see PublicSuffixList)."""
+    return get_public_suffix_list().registrable_domain(host)
+
+
+def group_by_registrable(hosts: Iterable[str]) -> Dict[str, List[str]]:
+    """
+    Group host names by registrable domain, in first-seen order.
+
+    Hosts without one (IPs, bare public suffixes) form groups of their own,
+    keyed by the host itself.
+    """
+    psl = get_public_suffix_list()
+    groups: Dict[str, List[str]] = {}
+    for host in hosts:
+        groups.setdefault(psl.registrable_domain(host) or host, []).append(host)
+    return groups
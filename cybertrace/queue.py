@@ -0,0 +1,457 @@
+"""Durable job queue for distributed investigations.
+
+Jobs are leased rather than popped: a worker that takes a job owns it until
+its lease expires. Workers extend the lease while they run (heartbeat) and
+acknowledge it when done. A job whose lease runs out becomes visible again
+and is retried, up to ``max_attempts`` times. Available jobs are leased in
+priority order (see ``cybertrace.scheduler``), oldest first within a class.
+
+Backends:
+- SQLite (default) - a single database file, fine for one host or a shared
+  volume with proper locking
+- Redis - any Redis-compatible server (redis, KeyDB, Valkey), for workers
+  spread across hosts. Requires ``pip install redis``.
+"""
+
+import json
+import sqlite3
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Optional, Union
+
+from .scheduler import NORMAL, PRIORITIES
+
+
+@dataclass
+class Job:
+    """A single queued investigation."""
+    target: str
+    input_type: str = 'auto'
+    options: Dict[str, Any] = field(default_factory=dict)
+    max_attempts: int = 3
+    priority: int = NORMAL
+    id: str = field(default_factory=lambda: uuid.uuid4().hex)
+    status: str = 'queued'
+    attempts: int = 0
+    lease_token: Optional[str] = None
+    lease_expires: Optional[float] = None
+    error: Optional[str] = None
+    created_at: float = field(default_factory=time.time)
+
+    def to_dict(self) -> dict:
+        return {
+            'id': self.id,
+            'target': self.target,
+            'input_type': self.input_type,
+            'options': self.options,
+            'max_attempts': self.max_attempts,
+            'priority': self.priority,
+            'status': self.status,
+            'attempts': self.attempts,
+            'lease_token': self.lease_token,
+            'lease_expires': self.lease_expires,
+            'error': self.error,
+            'created_at': self.created_at,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> 'Job':
+        return cls(**{k: data.get(k) for k in cls.__dataclass_fields__ if k in data})
+
+
+class LeaseLost(Exception):
+    """Raised when a worker touches a job it no longer holds the lease for."""
+
+
+class JobQueue(ABC):
+    """Interface for queue backends."""
+
+    @abstractmethod
+    def put(self, job: Job) -> str:
+        """Enqueue a job and return its id."""
+
+    @abstractmethod
+    def lease(self, visibility_timeout: float) -> Optional[Job]:
+        """Lease the next available job, or return None if the queue is idle."""
+
+    @abstractmethod
+    def extend(self, job: Job, visibility_timeout: float) -> None:
+        """Push the lease deadline of a running job forward."""
+
+    @abstractmethod
+    def ack(self, job: Job) -> None:
+        """Mark a leased job as finished."""
+
+    @abstractmethod
+    def fail(self, job: Job, error: str, retry_delay: float = 0.0) -> None:
+        """
+        Release a leased job after an error.
+
+        The job is retried after retry_delay seconds, or marked failed once
+        it has used up max_attempts.
+        """
+
+    @abstractmethod
+    def get(self, job_id: str) -> Optional[Job]:
+        """Look up a job by id."""
+
+    @abstractmethod
+    def stats(self) -> Dict[str, int]:
+        """Return job counts by status."""
+
+    def close(self) -> None:
+        pass
+
+
+class SQLiteQueue(JobQueue):
+    """Queue stored in a single SQLite database."""
+
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS jobs (
+        id TEXT PRIMARY KEY,
+        target TEXT NOT NULL,
+        input_type TEXT NOT NULL,
+        options TEXT NOT NULL,
+        max_attempts INTEGER NOT NULL,
+        priority INTEGER NOT NULL,
+        status TEXT NOT NULL,
+        attempts INTEGER NOT NULL DEFAULT 0,
+        available_at REAL NOT NULL,
+        lease_token TEXT,
+        lease_expires REAL,
+        error TEXT,
+        created_at REAL NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS jobs_ready ON jobs(status, priority, available_at);
+    """
+
+    def __init__(self, path: Union[str, Path]):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.executescript(self.SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            # isolation_level=None so we control BEGIN IMMEDIATE ourselves
+            conn = sqlite3.connect(str(self.path), timeout=30, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.row_factory = sqlite3.Row
+            self._local.conn = conn
+        return conn
+
+    def _row_to_job(self, row: sqlite3.Row) -> Job:
+        return Job(
+            id=row['id'],
+            target=row['target'],
+            input_type=row['input_type'],
+            options=json.loads(row['options']),
+            max_attempts=row['max_attempts'],
+            priority=row['priority'],
+            status=row['status'],
+            attempts=row['attempts'],
+            lease_token=row['lease_token'],
+            lease_expires=row['lease_expires'],
+            error=row['error'],
+            created_at=row['created_at'],
+        )
+
+    def put(self, job: Job) -> str:
+        self._connect().execute(
+            'INSERT INTO jobs (id, target, input_type, options, max_attempts, '
+            'priority, status, attempts, available_at, created_at) '
+            "VALUES (?, ?, ?, ?, ?, ?, 'queued', 0, ?, ?)",
+            (job.id, job.target, job.input_type, json.dumps(job.options),
+             job.max_attempts, job.priority, job.created_at, job.created_at),
+        )
+        return job.id
+
+    def lease(self, visibility_timeout: float) -> Optional[Job]:
+        conn = self._connect()
+        now = time.time()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            # Expired leases that used their last attempt are dead
+            conn.execute(
+                "UPDATE jobs SET status = 'failed', lease_token = NULL, "
+                "error = COALESCE(error, 'lease expired') "
+                "WHERE status = 'leased' AND lease_expires <= ? AND attempts >= max_attempts",
+                (now,),
+            )
+            row = conn.execute(
+                "SELECT * FROM jobs WHERE "
+                "(status = 'queued' AND available_at <= ?) OR "
+                "(status = 'leased' AND lease_expires <= ?) "
+                "ORDER BY priority, available_at LIMIT 1",
+                (now, now),
+            ).fetchone()
+            if row is None:
+                conn.execute('COMMIT')
+                return None
+
+            token = uuid.uuid4().hex
+            expires = now + visibility_timeout
+            conn.execute(
+                "UPDATE jobs SET status = 'leased', attempts = attempts + 1, "
+                "lease_token = ?, lease_expires = ? WHERE id = ?",
+                (token, expires, row['id']),
+            )
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+
+        job = self._row_to_job(row)
+        job.status = 'leased'
+        job.attempts += 1
+        job.lease_token = token
+        job.lease_expires = expires
+        return job
+
+    def _update_leased(self, job: Job, sql: str, params: tuple) -> None:
+        cur = self._connect().execute(
+            sql + " WHERE id = ? AND lease_token = ? AND status = 'leased'",
+            params + (job.id, job.lease_token),
+        )
+        if cur.rowcount == 0:
+            raise LeaseLost(f"Lease on job {job.id} was lost")
+
+    def extend(self, job: Job, visibility_timeout: float) -> None:
+        expires = time.time() + visibility_timeout
+        self._update_leased(job, 'UPDATE jobs SET lease_expires = ?', (expires,))
+        job.lease_expires = expires
+
+    def ack(self, job: Job) -> None:
+        self._update_leased(
+            job, "UPDATE jobs SET status = 'done', lease_token = NULL, error = NULL", ()
+        )
+        job.status = 'done'
+
+    def fail(self, job: Job, error: str, retry_delay: float = 0.0) -> None:
+        if job.attempts >= job.max_attempts:
+            self._update_leased(
+                job, "UPDATE jobs SET status = 'failed', lease_token = NULL, error = ?",
+                (error,),
+            )
+            job.status = 'failed'
+        else:
+            self._update_leased(
+                job, "UPDATE jobs SET status = 'queued', lease_token = NULL, "
+                "error = ?, available_at = ?",
+                (error, time.time() + retry_delay),
+            )
+            job.status = 'queued'
+        job.error = error
+
+    def get(self, job_id: str) -> Optional[Job]:
+        row = self._connect().execute('SELECT * FROM jobs WHERE id = ?', (job_id,)).fetchone()
+        return self._row_to_job(row) if row else None
+
+    def stats(self) -> Dict[str, int]:
+        rows = self._connect().execute('SELECT status, COUNT(*) FROM jobs GROUP BY status')
+        return {status: count for status, count in rows}
+
+    def close(self) -> None:
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+
+class RedisQueue(JobQueue):
+    """
+    Queue stored in a Redis-compatible server.
+
+    Layout (all keys under ``prefix``):
+    - ``job:<id>``   hash with the job fields
+    - ``ready:<p>``  sorted set of job ids at priority p, scored by available_at
+    - ``leased``     sorted set of job ids scored by lease_expires
+    """
+
+    # Reclaim expired leases, then move the earliest ready job to leased.
+    LEASE_SCRIPT = """
+    local prefix = KEYS[1]
+    local now = tonumber(ARGV[1])
+    local expires = tonumber(ARGV[2])
+    local token = ARGV[3]
+
+    for _, id in ipairs(redis.call('ZRANGEBYSCORE', prefix .. 'leased', '-inf', now)) do
+        local key = prefix .. 'job:' .. id
+        redis.call('ZREM', prefix .. 'leased', id)
+        local attempts = tonumber(redis.call('HGET', key, 'attempts'))
+        local max_attempts = tonumber(redis.call('HGET', key, 'max_attempts'))
+        if attempts >= max_attempts then
+            redis.call('HSET', key, 'status', 'failed', 'lease_token', '', 'error', 'lease expired')
+        else
+            redis.call('HSET', key, 'status', 'queued', 'lease_token', '')
+            redis.call('ZADD', prefix .. 'ready:' .. redis.call('HGET', key, 'priority'), now, id)
+        end
+    end
+
+    local id = nil
+    local ready = nil
+    for i = 4, #ARGV do
+        ready = prefix .. 'ready:' .. ARGV[i]
+        local ids = redis.call('ZRANGEBYSCORE', ready, '-inf', now, 'LIMIT', 0, 1)
+        if #ids > 0 then
+            id = ids[1]
+            break
+        end
+    end
+    if id == nil then
+        return nil
+    end
+    local key = prefix .. 'job:' .. id
+    redis.call('ZREM', ready, id)
+    redis.call('ZADD', prefix .. 'leased', expires, id)
+    redis.call('HINCRBY', key, 'attempts', 1)
+    redis.call('HSET', key, 'status', 'leased', 'lease_token', token, 'lease_expires', expires)
+    return id
+    """
+
+    def __init__(self, url: str, prefix: str = 'cybertrace:'):
+        try:
+            import redis
+        except ImportError:
+            raise RuntimeError('redis not installed. Run: pip install redis')
+
+        self.prefix = prefix
+        self.client = redis.Redis.from_url(url, decode_responses=True)
+        self._lease = self.client.register_script(self.LEASE_SCRIPT)
+
+    def _key(self, job_id: str) -> str:
+        return f'{self.prefix}job:{job_id}'
+
+    def _ready(self, job: Job) -> str:
+        return f'{self.prefix}ready:{job.priority}'
+
+    def _to_hash(self, job: Job) -> Dict[str, str]:
+        return {
+            'id': job.id,
+            'target': job.target,
+            'input_type': job.input_type,
+            'options': json.dumps(job.options),
+            'max_attempts': str(job.max_attempts),
+            'priority': str(job.priority),
+            'status': job.status,
+            'attempts': str(job.attempts),
+            'lease_token': job.lease_token or '',
+            'lease_expires': str(job.lease_expires or ''),
+            'error': job.error or '',
+            'created_at': str(job.created_at),
+        }
+
+    def _from_hash(self, data: Dict[str, str]) -> Job:
+        return Job(
+            id=data['id'],
+            target=data['target'],
+            input_type=data['input_type'],
+            options=json.loads(data['options']),
+            max_attempts=int(data['max_attempts']),
+            priority=int(data.get('priority', NORMAL)),
+            status=data['status'],
+            attempts=int(data['attempts']),
+            lease_token=data.get('lease_token') or None,
+            lease_expires=float(data['lease_expires']) if data.get('lease_expires') else None,
+            error=data.get('error') or None,
+            created_at=float(data['created_at']),
+        )
+
+    def put(self, job: Job) -> str:
+        pipe = self.client.pipeline()
+        pipe.hset(self._key(job.id), mapping=self._to_hash(job))
+        pipe.zadd(self._ready(job), {job.id: job.created_at})
+        pipe.execute()
+        return job.id
+
+    def lease(self, visibility_timeout: float) -> Optional[Job]:
+        now = time.time()
+        token = uuid.uuid4().hex
+        levels = sorted(PRIORITIES.values())
+        job_id = self._lease(keys=[self.prefix], args=[now, now + visibility_timeout, token] + levels)
+        if job_id is None:
+            return None
+        return self.get(job_id)
+
+    def _leased_pipeline(self, job: Job):
+        """Start a transaction that aborts if the job's lease changes under us."""
+        pipe = self.client.pipeline()
+        pipe.watch(self._key(job.id))
+        if pipe.hget(self._key(job.id), 'lease_token') != job.lease_token:
+            pipe.reset()
+            raise LeaseLost(f"Lease on job {job.id} was lost")
+        pipe.multi()
+        return pipe
+
+    def _execute(self, job: Job, pipe) -> None:
+        from redis.exceptions import WatchError
+        try:
+            pipe.execute()
+        except WatchError:
+            raise LeaseLost(f"Lease on job {job.id} was lost")
+
+    def extend(self, job: Job, visibility_timeout: float) -> None:
+        expires = time.time() + visibility_timeout
+        pipe = self._leased_pipeline(job)
+        pipe.zadd(f'{self.prefix}leased', {job.id: expires})
+        pipe.hset(self._key(job.id), 'lease_expires', expires)
+        self._execute(job, pipe)
+        job.lease_expires = expires
+
+    def ack(self, job: Job) -> None:
+        pipe = self._leased_pipeline(job)
+        pipe.zrem(f'{self.prefix}leased', job.id)
+        pipe.hset(self._key(job.id), mapping={'status': 'done', 'lease_token': '', 'error': ''})
+        self._execute(job, pipe)
+        job.status = 'done'
+
+    def fail(self, job: Job, error: str, retry_delay: float = 0.0) -> None:
+        status = 'failed' if job.attempts >= job.max_attempts else 'queued'
+        pipe = self._leased_pipeline(job)
+        pipe.zrem(f'{self.prefix}leased', job.id)
+        if status == 'queued':
+            pipe.zadd(self._ready(job), {job.id: time.time() + retry_delay})
+        pipe.hset(self._key(job.id), mapping={
+            'status': status, 'lease_token': '', 'error': error,
+        })
+        self._execute(job, pipe)
+        job.status = status
+        job.error = error
+
+    def get(self, job_id: str) -> Optional[Job]:
+        data = self.client.hgetall(self._key(job_id))
+        return self._from_hash(data) if data else None
+
+    def stats(self) -> Dict[str, int]:
+        counts: Dict[str, int] = {}
+        for key in self.client.scan_iter(f'{self.prefix}job:*'):
+            status = self.client.hget(key, 'status')
+            counts[status] = counts.get(status, 0) + 1
+        return counts
+
+    def close(self) -> None:
+        self.client.close()
+
+
+def open_queue(url: str) -> JobQueue:
+    """
+    Open a queue backend from a URL.
+
+    Examples:
+        sqlite:///data/queue.db, data/queue.db, redis://localhost:6379/0
+    """
+    if url.startswith(('redis://', 'rediss://', 'unix://')):
+        return RedisQueue(url)
+    if url.startswith('sqlite://'):
+        url = url[len('sqlite://'):]
+        if url.startswith('/') and not url.startswith('//'):
+            url = url[1:]  # sqlite:///rel/path -> rel/path
+        elif url.startswith('//'):
+            url = url[1:]  # sqlite:////abs/path -> /abs/path
+    return SQLiteQueue(url)
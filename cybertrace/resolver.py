@@ -0,0 +1,651 @@
+"""Asynchronous DNS resolution.
+
+All DNS lookups go through one process-wide resolver built on
+``dns.asyncresolver``, so queries never block the event loop and the record
+types for a name are fetched concurrently. Nameservers, timeouts and UDP vs
+TCP come from config (``DNS_NAMESERVERS``, ``DNS_TIMEOUT``, ``DNS_LIFETIME``,
+``DNS_TCP``); by default the system resolver configuration is used.
+
+    resolver = get_resolver()
+    answers = await resolver.resolve_many('example.com', ['A', 'MX'])
+
+Large name sets (e.g. subdomains from certificate logs) go through
+resolve_hosts(), which runs ``DNS_CONCURRENCY`` lookups at a time and paces
+them to ``DNS_QPS`` queries per second. Both limits belong to the resolver,
+so concurrent calls on the process-wide one share them. Over UDP these are pipelined on one
+socket with a minimal A/AAAA/CNAME codec, as dnspython's per-query socket
+and message handling would otherwise cap throughput at a few thousand
+queries per second of CPU.
+
+Answers are kept in one process-wide DNSCache for as long as their TTLs
+allow, so batches that share domains, parents or mail and name servers only
+resolve each name once. NXDOMAIN and empty answers are cached for the SOA
+minimum (RFC 2308); failures are never cached. With ``DNS_CACHE_PERSIST``
+the cache is saved to the cache directory and reused by later runs.
+"""
+
+import asyncio
+import atexit
+import ipaddress
+import json
+import os
+import secrets
+import socket
+import struct
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from .config import Config, get_config
+from .scheduler import PriorityScheduler
+
+# (rcode, records, remaining TTL) of one query; records maps record type to
+# values, with the CNAME chain under 'CNAME'
+Reply = Tuple[int, Dict[str, List[str]], int]
+
+
+class DNSResolver:
+    """
+    Non-blocking DNS resolver.
+
+    Args:
+        nameservers: Nameserver IPs to query (None or empty for the system
+            configuration)
+        timeout: Seconds to wait for one nameserver before trying the next
+        lifetime: Seconds a whole query may take, across nameservers
+        tcp: Query over TCP instead of UDP
+        concurrency: Lookups in flight at once across resolve_hosts() calls
+        qps: Queries per second across resolve_hosts() calls (0 for unlimited)
+        cache: DNSCache to answer from and fill (None to always query)
+    """
+
+    def __init__(self, nameservers: Optional[List[str]] = None, timeout: float = 5.0,
+                 lifetime: float = 10.0, tcp: bool = False, concurrency: int = 100,
+                 qps: float = 0.0, cache: Optional['DNSCache'] = None):
+        self.nameservers = list(nameservers or [])
+        self.timeout = timeout
+        self.lifetime = lifetime
+        self.tcp = tcp
+        self.concurrency = concurrency
+        self.qps = qps
+        self.cache = cache
+        self._resolver = None
+        self._pacer = _Pacer(qps)
+        self._slots = PriorityScheduler(max_concurrent=max(1, concurrency))
+
+    @classmethod
+    def from_config(cls, config: Config) -> 'DNSResolver':
+        return cls(
+            nameservers=config.dns_nameservers,
+            timeout=config.dns_timeout,
+            lifetime=config.dns_lifetime,
+            tcp=config.dns_tcp,
+            concurrency=config.dns_concurrency,
+            qps=config.dns_qps,
+            cache=get_dns_cache(config),
+        )
+
+    @property
+    def resolver(self):
+        """The underlying dns.asyncresolver.Resolver, created on first use."""
+        if self._resolver is None:
+            import dns.asyncresolver
+            resolver = dns.asyncresolver.Resolver(configure=not self.nameservers)
+            if self.nameservers:
+                resolver.nameservers = self.nameservers
+            resolver.timeout = self.timeout
+            resolver.lifetime = self.lifetime
+            self._resolver = resolver
+        return self._resolver
+
+    async def resolve(self, name: str, rdtype: str):
+        """
+        Resolve one record type.
+
+        Returns the records as a dns.rrset.RRset, or None if the name does
+        not exist or has no records of that type. Timeouts and server
+        failures raise (dns.exception.DNSException).
+        """
+        import dns.rrset
+        rdtype = rdtype.upper()
+        _, records, ttl = await self._query(name, rdtype)
+        if not records.get(rdtype):
+            return None
+        return dns.rrset.from_text_list(name, ttl, 'IN', rdtype, records[rdtype])
+
+    async def resolve_many(self, name: str, rdtypes: Iterable[str]) -> Dict[str, object]:
+        """
+        Resolve several record types for a name concurrently.
+
+        Returns {rdtype: RRset} for the types that have records. A type
+        whose lookup fails (timeout, SERVFAIL) is left out rather than
+        failing the others.
+        """
+        rdtypes = list(rdtypes)
+        answers = await asyncio.gather(
+            *(self.resolve(name, rdtype) for rdtype in rdtypes),
+            return_exceptions=True,
+        )
+        return {
+            rdtype: answer
+            for rdtype, answer in zip(rdtypes, answers)
+            if answer is not None and not isinstance(answer, BaseException)
+        }
+
+    async def resolve_ptr(self, ip: str) -> List[str]:
+        """
+        Host names an IP address points back to (its PTR records).
+
+        Returns [] if there are none; timeouts and server failures raise
+        like resolve().
+        """
+        import dns.reversename
+        answer = await self.resolve(dns.reversename.from_address(ip).to_text(), 'PTR')
+        if answer is None:
+            return []
+        return [str(rdata.target).rstrip('.').lower() for rdata in answer]
+
+    async def _query(self, name: str, rdtype: str, pacer: Optional['_Pacer'] = None) -> Reply:
+        """
+        One query through dnspython, answered from the cache when possible.
+
+        NXDOMAIN and empty answers are replies, not errors; timeouts and
+        server failures raise (dns.exception.DNSException).
+        """
+        import dns.name
+        import dns.resolver
+
+        name = name.rstrip('.').lower()
+        if self.cache is not None:
+            hit = self.cache.get(name, rdtype)
+            if hit is not None:
+                return hit
+        if pacer is not None:
+            await pacer.wait()
+
+        rcode = NOERROR
+        try:
+            response = (await self.resolver.resolve(name, rdtype, tcp=self.tcp)).response
+        except dns.resolver.NXDOMAIN as e:
+            rcode = NXDOMAIN
+            response = e.kwargs.get('responses', {}).get(dns.name.from_text(name))
+        except dns.resolver.NoAnswer as e:
+            response = e.kwargs.get('response')
+        if response is None:
+            return rcode, {}, 0
+        records, ttl = _message_records(response, rdtype)
+        if self.cache is not None and ttl:
+            self.cache.put(name, rdtype, rcode, records, ttl)
+        return rcode, records, ttl or 0
+
+    async def resolve_host(self, name: str, pacer: Optional['_Pacer'] = None
+                           ) -> Optional[Dict[str, List[str]]]:
+        """
+        Resolve a host name's A and AAAA records and its CNAME chain.
+
+        Returns {'A': [...], 'AAAA': [...], 'CNAME': [...]} with the types
+        that have records, or None if the name does not exist or has no
+        records. CNAMEs come from the address answers, so they cost no
+        extra query, and AAAA is skipped for names that do not exist.
+        """
+        return await self._host_records(name, self._query, pacer)
+
+    async def _host_records(self, name: str, query, pacer: Optional['_Pacer']
+                            ) -> Optional[Dict[str, List[str]]]:
+        """resolve_host() over query(name, rdtype, pacer), which returns a Reply."""
+        import dns.exception
+
+        records: Dict[str, List[str]] = {}
+        for rdtype in ('A', 'AAAA'):
+            try:
+                rcode, found, _ = await query(name, rdtype, pacer)
+            except (dns.exception.DNSException, ValueError):
+                continue
+            if rcode == NXDOMAIN:
+                return None
+            if found.get(rdtype):
+                records[rdtype] = found[rdtype]
+            if 'CNAME' not in records and found.get('CNAME'):
+                records['CNAME'] = found['CNAME']
+        return records or None
+
+    async def resolve_hosts(self, names: Iterable[str]) -> Dict[str, Dict[str, List[str]]]:
+        """
+        Resolve many host names concurrently, at bounded rate.
+
+        The concurrency and rate limits hold across every call on this
+        resolver, with interactive lookups served first. Returns {name: records} (see resolve_host) for the names that exist.
+        Cached answers cost no query and do not count against the rate.
+        """
+        results: Dict[str, Dict[str, List[str]]] = {}
+        pending = iter(names)
+        pipeline = None if self.tcp else await _UDPPipeline.open(self)
+        query = pipeline.query if pipeline is not None else self._query
+
+        async def worker():
+            for name in pending:
+                # Slots and pacing are shared with other calls on this resolver
+                await self._slots.acquire('dns')
+                try:
+                    records = await self._host_records(name, query, self._pacer)
+                finally:
+                    self._slots.release()
+                if records:
+                    results[name] = records
+
+        try:
+            await asyncio.gather(*(worker() for _ in range(max(1, self.concurrency))))
+        finally:
+            if pipeline is not None:
+                pipeline.close()
+        return results
+
+    async def wildcard_addresses(self, zones: Iterable[str], samples: int = 2) -> Dict[str, Set[str]]:
+        """
+        Find zones with wildcard records.
+
+        Resolves random labels under each zone (through resolve_hosts, so
+        probes share its limits) and returns {zone: values} for the zones
+        that answered, with the addresses and CNAME targets seen.
+        """
+        probes = {
+            f'{secrets.token_hex(8)}.{zone}': zone
+            for zone in set(zones)
+            for _ in range(samples)
+        }
+        wildcards: Dict[str, Set[str]] = {}
+        for probe, records in (await self.resolve_hosts(probes)).items():
+            values = wildcards.setdefault(probes[probe], set())
+            for rdtype in ('A', 'AAAA', 'CNAME'):
+                values.update(records.get(rdtype, []))
+        return wildcards
+
+
+def _message_records(response, rdtype: str) -> Tuple[Dict[str, List[str]], Optional[int]]:
+    """
+    Records in a dnspython response's answer section, and how long the
+    reply may be cached (see _cache_ttl).
+    """
+    import dns.rdatatype
+
+    records: Dict[str, List[str]] = {}
+    answer_ttl = None
+    for rrset in response.answer:
+        if rrset.rdtype == dns.rdatatype.CNAME:
+            values = [str(rdata.target).rstrip('.').lower() for rdata in rrset]
+        else:
+            values = [rdata.to_text() for rdata in rrset]
+        records.setdefault(dns.rdatatype.to_text(rrset.rdtype), []).extend(values)
+        answer_ttl = rrset.ttl if answer_ttl is None else min(answer_ttl, rrset.ttl)
+    negative_ttl = None
+    for rrset in response.authority:
+        if rrset.rdtype == dns.rdatatype.SOA:
+            negative_ttl = min(rrset.ttl, rrset[0].minimum)
+    return records, _cache_ttl(records, rdtype, answer_ttl, negative_ttl)
+
+
+def _cache_ttl(records: Dict[str, List[str]], rdtype: Optional[str],
+               answer_ttl: Optional[int], negative_ttl: Optional[int]) -> Optional[int]:
+    """
+    Seconds a reply may be cached: the smallest answer TTL, or for NXDOMAIN
+    and empty answers the SOA minimum (RFC 2308). None if a negative reply
+    carries no SOA, as it must then not be cached.
+    """
+    if records.get(rdtype):
+        return answer_ttl
+    if negative_ttl is None:
+        return None
+    return negative_ttl if answer_ttl is None else min(answer_ttl, negative_ttl)
+
+
+RDTYPE_CODES = {'A': 1, 'CNAME': 5, 'AAAA': 28}
+_RDTYPE_NAMES = {code: name for name, code in RDTYPE_CODES.items()}
+_CLASS_IN = b'\x00\x01'
+_HEADER = struct.Struct('!HHHHHH')
+_RR = struct.Struct('!HHIH')
+
+NOERROR = 0
+NXDOMAIN = 3
+
+
+def encode_question(name: str, rdtype: str) -> bytes:
+    """Wire-format question section for name and rdtype."""
+    wire = bytearray()
+    for label in name.rstrip('.').encode('idna').split(b'.'):
+        if not 0 < len(label) < 64:
+            raise ValueError(f'Invalid DNS name: {name!r}')
+        wire.append(len(label))
+        wire += label
+    wire.append(0)
+    return bytes(wire) + RDTYPE_CODES[rdtype].to_bytes(2, 'big') + _CLASS_IN
+
+
+def _read_name(data: bytes, offset: int) -> Tuple[str, int]:
+    """Decode a (possibly compressed) name, lower-cased. Returns (name, next offset)."""
+    labels = []
+    end = None
+    for _ in range(128):
+        length = data[offset]
+        if length >= 0xC0:
+            if end is None:
+                end = offset + 2
+            offset = ((length & 0x3F) << 8) | data[offset + 1]
+            continue
+        offset += 1
+        if length == 0:
+            return '.'.join(labels), end if end is not None else offset
+        labels.append(data[offset:offset + length].decode('ascii', 'replace').lower())
+        offset += length
+    raise ValueError('DNS name compression loop')
+
+
+def decode_response(data: bytes, question: bytes
+                    ) -> Tuple[int, bool, Dict[str, List[str]], Optional[int]]:
+    """
+    Decode a response to a single-question query.
+
+    Returns (rcode, truncated, records, ttl) where records holds A, AAAA
+    and CNAME values in answer order and ttl is how long the reply may be
+    cached (None if it must not be; see _cache_ttl).
+    """
+    _, flags, qdcount, ancount, nscount, _ = _HEADER.unpack_from(data)
+    if qdcount != 1 or data[12:12 + len(question)].lower() != question.lower():
+        raise ValueError('Response does not match the question')
+    records: Dict[str, List[str]] = {}
+    answer_ttl = None
+    offset = 12 + len(question)
+    for _ in range(ancount):
+        _, offset = _read_name(data, offset)
+        rtype, _, ttl, rdlength = _RR.unpack_from(data, offset)
+        offset += _RR.size
+        rdata = data[offset:offset + rdlength]
+        if rtype == 1 and rdlength == 4:
+            records.setdefault('A', []).append(socket.inet_ntop(socket.AF_INET, rdata))
+        elif rtype == 28 and rdlength == 16:
+            records.setdefault('AAAA', []).append(socket.inet_ntop(socket.AF_INET6, rdata))
+        elif rtype == 5:
+            records.setdefault('CNAME', []).append(_read_name(data, offset)[0])
+        answer_ttl = ttl if answer_ttl is None else min(answer_ttl, ttl)
+        offset += rdlength
+    negative_ttl = None
+    for _ in range(nscount):
+        _, offset = _read_name(data, offset)
+        rtype, _, ttl, rdlength = _RR.unpack_from(data, offset)
+        offset += _RR.size
+        if rtype == 6 and rdlength >= 22:
+            # SOA: mname, rname, serial, refresh, retry, expire, minimum
+            negative_ttl = min(ttl, int.from_bytes(data[offset + rdlength - 4:offset + rdlength], 'big'))
+        offset += rdlength
+    rdtype = _RDTYPE_NAMES.get(int.from_bytes(question[-4:-2], 'big'))
+    ttl = _cache_ttl(records, rdtype, answer_ttl, negative_ttl)
+    return flags & 0x0F, bool(flags & 0x0200), records, ttl
+
+
+class _UDPPipeline(asyncio.DatagramProtocol):
+    """
+    Many DNS queries in flight over one UDP socket, matched by query ID.
+
+    Used by resolve_hosts() for throughput. Only answers from the queried
+    nameserver that echo the question are accepted; truncated answers are
+    retried through dnspython, which falls back to TCP.
+    """
+
+    def __init__(self, owner: 'DNSResolver', servers: List[Tuple[str, int]]):
+        self.owner = owner
+        self.servers = servers
+        self.attempts = max(1, int(owner.lifetime // owner.timeout)) if owner.timeout else 1
+        self.transport = None
+        self._pending: Dict[int, Tuple[bytes, Tuple[str, int], asyncio.Future]] = {}
+
+    @classmethod
+    async def open(cls, owner: 'DNSResolver') -> Optional['_UDPPipeline']:
+        """A pipeline to owner's nameservers, or None if none are plain IPv4/IPv6."""
+        port = owner.resolver.port
+        servers = []
+        for server in owner.resolver.nameservers:
+            try:
+                servers.append((str(ipaddress.ip_address(server)), port))
+            except ValueError:
+                continue  # DNS-over-HTTPS and friends
+        if not servers:
+            return None
+        family = socket.AF_INET6 if ':' in servers[0][0] else socket.AF_INET
+        servers = [s for s in servers if (':' in s[0]) == (family == socket.AF_INET6)]
+        loop = asyncio.get_running_loop()
+        _, pipeline = await loop.create_datagram_endpoint(
+            lambda: cls(owner, servers), family=family,
+            local_addr=('::' if family == socket.AF_INET6 else '0.0.0.0', 0),
+        )
+        return pipeline
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def datagram_received(self, data: bytes, addr) -> None:
+        if len(data) < 12:
+            return
+        entry = self._pending.get(int.from_bytes(data[:2], 'big'))
+        if entry is None:
+            return
+        question, server, fut = entry
+        if tuple(addr[:2]) != server or fut.done():
+            return
+        try:
+            fut.set_result(decode_response(data, question))
+        except (ValueError, IndexError, struct.error):
+            pass  # Malformed or spoofed; the query times out and is retried
+
+    def close(self) -> None:
+        self.transport.close()
+        for *_, fut in self._pending.values():
+            if not fut.done():
+                fut.cancel()
+
+    async def _send(self, question: bytes) -> Optional[Tuple[int, bool, Dict[str, List[str]], Optional[int]]]:
+        """Send one query, retrying across nameservers. Returns None on timeout."""
+        loop = asyncio.get_running_loop()
+        for attempt in range(self.attempts):
+            server = self.servers[attempt % len(self.servers)]
+            qid = secrets.randbits(16)
+            while qid in self._pending:
+                qid = secrets.randbits(16)
+            fut = loop.create_future()
+            self._pending[qid] = (question, server, fut)
+            timer = loop.call_later(self.owner.timeout, _expire, fut)
+            try:
+                self.transport.sendto(_HEADER.pack(qid, 0x0100, 1, 0, 0, 0) + question, server)
+                return await fut
+            except asyncio.TimeoutError:
+                continue
+            finally:
+                timer.cancel()
+                del self._pending[qid]
+        return None
+
+    async def query(self, name: str, rdtype: str, pacer: '_Pacer') -> Reply:
+        """Same result as DNSResolver._query(), over the pipeline."""
+        import dns.exception
+
+        name = name.rstrip('.').lower()
+        cache = self.owner.cache
+        if cache is not None:
+            hit = cache.get(name, rdtype)
+            if hit is not None:
+                return hit
+        question = encode_question(name, rdtype)
+        await pacer.wait()
+        reply = await self._send(question)
+        if reply is None:
+            raise dns.exception.Timeout()
+        rcode, truncated, records, ttl = reply
+        if truncated:
+            return await self.owner._query(name, rdtype)
+        if rcode not in (NOERROR, NXDOMAIN):
+            raise dns.exception.DNSException(f'{name} {rdtype}: rcode {rcode}')
+        if cache is not None and ttl:
+            cache.put(name, rdtype, rcode, records, ttl)
+        return rcode, records, ttl or 0
+
+
+def _expire(fut: asyncio.Future) -> None:
+    if not fut.done():
+        fut.set_exception(asyncio.TimeoutError())
+
+
+class _Pacer:
+    """Spaces calls to wait() so they run at most rate times per second."""
+
+    def __init__(self, rate: float):
+        self.interval = 1.0 / rate if rate else 0.0
+        self._next = 0.0
+
+    async def wait(self) -> None:
+        if not self.interval:
+            return
+        now = asyncio.get_running_loop().time()
+        slot = max(now, self._next)
+        self._next = slot + self.interval
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+
+class DNSCache:
+    """
+    TTL-aware cache of DNS replies, shared by every resolver in the process.
+
+    Entries are keyed by (name, record type); an NXDOMAIN reply is stored
+    once for the name and answers every type. Expiry uses wall-clock time
+    so a saved cache stays valid across runs.
+
+    Args:
+        max_entries: Least recently used entries beyond this are dropped
+        max_ttl: Cap on how long any reply is kept, in seconds
+        path: JSON file to load from and save to (None for memory only)
+    """
+
+    SAVE_INTERVAL = 60  # seconds between automatic saves
+
+    def __init__(self, max_entries: int = 100000, max_ttl: int = 86400,
+                 path: Optional[Path] = None):
+        self.max_entries = max_entries
+        self.max_ttl = max_ttl
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self._entries: 'OrderedDict[Tuple[str, str], Tuple[float, int, Dict[str, List[str]]]]' = OrderedDict()
+        self._saved_at = time.time()
+        self._dirty = False
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, name: str, rdtype: str) -> Optional[Reply]:
+        """The cached reply for name and rdtype, or None."""
+        now = time.time()
+        for key in ((name, ''), (name, rdtype)):
+            entry = self._entries.get(key)
+            if entry is None:
+                continue
+            expires, rcode, records = entry
+            if expires <= now:
+                del self._entries[key]
+                continue
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return rcode, records, int(expires - now)
+        self.misses += 1
+        return None
+
+    def put(self, name: str, rdtype: str, rcode: int, records: Dict[str, List[str]],
+            ttl: int) -> None:
+        """Cache a reply for ttl seconds (capped at max_ttl)."""
+        ttl = min(ttl, self.max_ttl)
+        if ttl <= 0:
+            return
+        key = (name, '' if rcode == NXDOMAIN else rdtype)
+        self._entries[key] = (time.time() + ttl, rcode, records)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        self._dirty = True
+        if self.path is not None and time.time() - self._saved_at >= self.SAVE_INTERVAL:
+            self.save()
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._dirty = True
+
+    def load(self) -> None:
+        """Add the unexpired entries saved at path."""
+        if self.path is None:
+            return
+        try:
+            with open(self.path) as f:
+                saved = json.load(f)
+        except (OSError, ValueError):
+            return
+        now = time.time()
+        for name, rdtype, expires, rcode, records in saved.get('entries', []):
+            if expires > now:
+                self._entries[(name, rdtype)] = (expires, rcode, records)
+
+    def save(self) -> None:
+        """Write the unexpired entries to path, if anything changed."""
+        self._saved_at = time.time()
+        if self.path is None or not self._dirty:
+            return
+        entries = [
+            [name, rdtype, expires, rcode, records]
+            for (name, rdtype), (expires, rcode, records) in self._entries.items()
+            if expires > self._saved_at
+        ]
+        try:
+            tmp = self.path.with_suffix('.tmp')
+            with open(tmp, 'w') as f:
+                json.dump({'entries': entries}, f)
+            os.replace(tmp, self.path)
+            self._dirty = False
+        except OSError:
+            pass  # A read-only cache directory only costs the warm start
+
+
+_cache: Optional[DNSCache] = None
+
+
+def get_dns_cache(config: Optional[Config] = None) -> Optional[DNSCache]:
+    """
+    Return the process-wide DNS cache, or None if ``DNS_CACHE`` is off.
+
+    With ``DNS_CACHE_PERSIST`` the cache is loaded from the cache directory
+    on first use and saved periodically and at exit.
+    """
+    global _cache
+    config = config or get_config()
+    if not config.dns_cache:
+        return None
+    if _cache is None:
+        path = config.cache_path('dns_cache.json') if config.dns_cache_persist else None
+        _cache = DNSCache(max_entries=config.dns_cache_size, path=path)
+        if path is not None:
+            _cache.load()
+            atexit.register(_cache.save)
+    return _cache
+
+
+_resolver: Optional[DNSResolver] = None
+
+
+def get_resolver(config: Optional[Config] = None) -> DNSResolver:
+    """
+    Return the process-wide resolver, creating it from config on first use.
+
+    A config other than the shared one gets a resolver (and so bulk
+    resolution limits) of its own.
+    """
+    global _resolver
+    if config is not None and config is not get_config():
+        return DNSResolver.from_config(config)
+    if _resolver is None:
+        _resolver = DNSResolver.from_config(get_config())
+    return _resolver
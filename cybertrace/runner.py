@@ -0,0 +1,227 @@
+"""Shared helpers for running investigations outside the CLI."""
+
+import asyncio
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
+import aiohttp
+
+from .config import get_config
+from .detector import Candidate, detect_candidates, detect_input_type, normalize_input
+from .modules import TYPE_TO_MODULE, get_module
+from .modules.base import BaseModule, ModuleResult, create_session, event_listener
+from .scheduler import current_priority, parse_priority
+
+
+class UnsupportedTargetError(ValueError):
+    """Raised when no module can handle a target."""
+
+
+def resolve_target(target: str, input_type: str = 'auto',
+                   validate: bool = True) -> Tuple[str, str, str]:
+    """
+    Detect and normalize a target.
+
+    Args:
+        validate: Reject targets that fail their type's checksum
+
+    Returns:
+        Tuple of (normalized_target, specific_type, module_type)
+
+    Raises:
+        InvalidInputError: if validate and the checksum fails
+    """
+    if input_type == 'auto':
+        specific_type, module_type = detect_input_type(target)
+    else:
+        specific_type = module_type = input_type
+
+    return normalize_input(target, module_type, strict=validate), specific_type, module_type
+
+
+class Engine:
+    """
+    Long-lived investigation runtime.
+
+    Keeps one HTTP session (connection pool, keep-alive, DNS cache) and one
+    instance of each module alive across investigations, so repeated
+    lookups in a server or worker process skip the cold start. Module
+    instances hold no per-search state and are safe to share between
+    concurrent searches.
+
+    Usage:
+        async with Engine() as engine:
+            result = await engine.investigate('example.com')
+    """
+
+    def __init__(self, cfg=None):
+        self.config = cfg or get_config()
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._modules: Dict[str, BaseModule] = {}
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, *args):
+        await self.close()
+
+    async def start(self) -> None:
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.config.max_concurrent * 10,
+                ttl_dns_cache=300,
+            )
+            self._session = create_session(self.config, connector=connector)
+
+    async def close(self) -> None:
+        if self._session and not self._session.closed:
+            await self._session.close()
+        self._modules.clear()
+
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        if self._session is None:
+            raise RuntimeError("Engine not started. Use 'async with' context.")
+        return self._session
+
+    def get_module(self, module_type: str) -> Optional[BaseModule]:
+        """Return the warm module instance for a module type."""
+        module_name = TYPE_TO_MODULE.get(module_type, module_type)
+        module = self._modules.get(module_name)
+        if module is None:
+            module = get_module(module_name, session=self.session, config=self.config)
+            if module is None:
+                return None
+            self._modules[module_name] = module
+        return module
+
+    async def investigate(
+        self,
+        target: str,
+        input_type: str = 'auto',
+        listener: Optional[Callable[[str, Dict[str, Any]], None]] = None,
+        priority: Optional[Union[str, int]] = None,
+        validate: bool = True,
+        **options
+    ) -> ModuleResult:
+        """
+        Run the matching module against a target.
+
+        Args:
+            listener: Called with (event, payload) as sources start and finish
+            priority: Scheduling class for this investigation's requests
+                (interactive, normal, bulk); defaults to the caller's
+            validate: Reject targets that fail their checksum before any
+                request is made
+
+        Raises:
+            UnsupportedTargetError: if no module handles the detected type
+            InvalidInputError: if validate and the target fails its checksum
+        """
+        normalized, _, module_type = resolve_target(target, input_type, validate)
+
+        module = self.get_module(module_type)
+        if not module:
+            raise UnsupportedTargetError(f"No module available for type: {module_type}")
+
+        token = event_listener.set(listener)
+        prio_token = current_priority.set(
+            parse_priority(priority) if priority is not None else current_priority.get()
+        )
+        try:
+            return await module.search(normalized, **options)
+        finally:
+            current_priority.reset(prio_token)
+            event_listener.reset(token)
+
+    async def investigate_many(
+        self,
+        targets: List[str],
+        input_type: str = 'auto',
+        priority: Optional[Union[str, int]] = None,
+        validate: bool = True,
+        **options
+    ) -> List[Union[ModuleResult, Exception]]:
+        """
+        Investigate several targets, letting modules share work between them.
+        
+        Targets are handed to each module's search_many() together, so
+        e.g. hosts of one registrable domain get a single WHOIS and crt.sh
+        lookup. Returns one result per target, in order; a target that
+        could not be resolved or whose search failed gets the exception.
+        """
+        results: List[Any] = [None] * len(targets)
+        by_module: Dict[str, Tuple[BaseModule, List[int], List[str]]] = {}
+        for index, target in enumerate(targets):
+            try:
+                normalized, _, module_type = resolve_target(target, input_type, validate)
+                module = self.get_module(module_type)
+                if not module:
+                    raise UnsupportedTargetError(f"No module available for type: {module_type}")
+            except Exception as e:
+                results[index] = e
+                continue
+            _, indexes, normalized_targets = by_module.setdefault(module.name, (module, [], []))
+            indexes.append(index)
+            normalized_targets.append(normalized)
+
+        prio_token = current_priority.set(
+            parse_priority(priority) if priority is not None else current_priority.get()
+        )
+        try:
+            found = await asyncio.gather(*(
+                module.search_many(normalized_targets, **options)
+                for module, _, normalized_targets in by_module.values()
+            ))
+        finally:
+            current_priority.reset(prio_token)
+
+        for (_, indexes, _), module_results in zip(by_module.values(), found):
+            for index, result in zip(indexes, module_results):
+                results[index] = result
+        return results
+
+    async def investigate_candidates(
+        self,
+        target: str,
+        top: int = 2,
+        min_confidence: float = 0.25,
+        **kwargs
+    ) -> List[Tuple[Candidate, ModuleResult]]:
+        """
+        Run the most likely readings of an ambiguous target concurrently.
+
+        Candidates come from detect_candidates; readings handled by the
+        same module are run once, and readings without a module are
+        skipped. Other arguments are passed to investigate().
+
+        Args:
+            top: Maximum number of modules to run
+            min_confidence: Skip readings scoring below this
+
+        Returns:
+            (candidate, result) pairs, most likely first
+        """
+        chosen: List[Candidate] = []
+        seen = set()
+        for candidate in detect_candidates(target, min_confidence=min_confidence):
+            module_name = TYPE_TO_MODULE.get(candidate.module_type, candidate.module_type)
+            if module_name in seen or self.get_module(candidate.module_type) is None:
+                continue
+            seen.add(module_name)
+            chosen.append(candidate)
+            if len(chosen) >= top:
+                break
+
+        # Candidates are already ranked with checksums in mind
+        kwargs['validate'] = False
+        results = await asyncio.gather(*(
+            self.investigate(target, candidate.module_type, **kwargs) for candidate in chosen
+        ))
+        return list(zip(chosen, results))
+
+
+async def investigate(target: str, input_type: str = 'auto', **options) -> ModuleResult:
+    """Run a single investigation with a throwaway Engine."""
+    async with Engine() as engine:
+        return await engine.investigate(target, input_type, **options)
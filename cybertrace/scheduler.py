@@ -0,0 +1,199 @@
+"""Priority scheduling of outbound HTTP requests.
+
+Every request a module makes goes through one process-wide scheduler that
+enforces the shared concurrency limit (``MAX_CONCURRENT``) and an optional
+per-host rate limit (``HOST_RATE_LIMIT`` requests/second). When requests
+queue up, the ones with the most urgent priority class get the next free
+slot or rate-limit token, so an analyst's interactive lookup is not stuck
+behind thousands of bulk targets running in the same process.
+
+The priority travels with the asyncio task via a context variable:
+
+    with priority('bulk'):
+        await engine.investigate(target)
+"""
+
+import asyncio
+import heapq
+import itertools
+import time
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Tuple, Union
+from urllib.parse import urlparse
+
+from .config import get_config
+
+INTERACTIVE = 0
+NORMAL = 1
+BULK = 2
+
+PRIORITIES: Dict[str, int] = {
+    'interactive': INTERACTIVE,
+    'normal': NORMAL,
+    'bulk': BULK,
+}
+
+current_priority: ContextVar[int] = ContextVar('cybertrace_priority', default=NORMAL)
+
+
+def parse_priority(value: Union[str, int]) -> int:
+    """Convert a priority class name (or number) to its numeric level."""
+    if isinstance(value, int):
+        if value not in PRIORITIES.values():
+            raise ValueError(f"Unknown priority: {value}")
+        return value
+    try:
+        return PRIORITIES[value.lower()]
+    except KeyError:
+        raise ValueError(f"Unknown priority: {value} (expected one of {', '.join(PRIORITIES)})")
+
+
+@contextmanager
+def priority(value: Union[str, int]):
+    """Run the enclosed code (and tasks it starts) at the given priority."""
+    token = current_priority.set(parse_priority(value))
+    try:
+        yield
+    finally:
+        current_priority.reset(token)
+
+
+class _TokenBucket:
+    """Per-host rate limiter state."""
+
+    __slots__ = ('tokens', 'updated')
+
+    def __init__(self, capacity: float, now: float):
+        self.tokens = capacity
+        self.updated = now
+
+
+class PriorityScheduler:
+    """
+    Admit requests by priority under a concurrency cap and per-host rate.
+
+    Args:
+        max_concurrent: Requests allowed in flight at once
+        host_rate: Requests per second per host (None or 0 for unlimited)
+        host_burst: Requests a host may receive back-to-back before the
+            rate applies
+    """
+
+    def __init__(
+        self,
+        max_concurrent: int = 10,
+        host_rate: Optional[float] = None,
+        host_burst: int = 1,
+    ):
+        self.max_concurrent = max_concurrent
+        self.host_rate = host_rate or None
+        self.host_burst = max(1, host_burst)
+        self._active = 0
+        self._waiters: List[Tuple[int, int, str, asyncio.Future]] = []
+        self._buckets: Dict[str, _TokenBucket] = {}
+        self._seq = itertools.count()
+        self._timer: Optional[asyncio.TimerHandle] = None
+
+    @property
+    def active(self) -> int:
+        return self._active
+
+    @property
+    def waiting(self) -> int:
+        return sum(1 for *_, fut in self._waiters if not fut.done())
+
+    def _take_token(self, host: str, now: float) -> float:
+        """Consume a token for host. Returns 0 on success, else seconds to wait."""
+        if self.host_rate is None:
+            return 0.0
+        bucket = self._buckets.get(host)
+        if bucket is None:
+            bucket = self._buckets[host] = _TokenBucket(self.host_burst, now)
+        else:
+            bucket.tokens = min(
+                self.host_burst, bucket.tokens + (now - bucket.updated) * self.host_rate
+            )
+            bucket.updated = now
+        if bucket.tokens >= 1:
+            bucket.tokens -= 1
+            return 0.0
+        return (1 - bucket.tokens) / self.host_rate
+
+    def _dispatch(self) -> None:
+        """Grant slots to waiters in priority order."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        now = time.monotonic()
+        deferred = []
+        next_token = None
+
+        while self._waiters and self._active < self.max_concurrent:
+            item = heapq.heappop(self._waiters)
+            fut = item[3]
+            if fut.done() or fut.get_loop().is_closed():
+                continue
+            wait = self._take_token(item[2], now)
+            if wait:
+                # This host is out of tokens; let other hosts go meanwhile
+                deferred.append(item)
+                next_token = wait if next_token is None else min(next_token, wait)
+                continue
+            self._active += 1
+            fut.set_result(None)
+
+        for item in deferred:
+            heapq.heappush(self._waiters, item)
+
+        if next_token is not None:
+            loop = asyncio.get_running_loop()
+            self._timer = loop.call_later(next_token, self._dispatch)
+
+    async def acquire(self, host: str, level: Optional[int] = None) -> None:
+        """Wait for a request slot for host at the given (or current) priority."""
+        if level is None:
+            level = current_priority.get()
+
+        fut = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (level, next(self._seq), host, fut))
+        self._dispatch()
+
+        try:
+            await fut
+        except asyncio.CancelledError:
+            # Granted and cancelled in the same tick - give the slot back
+            if fut.done() and not fut.cancelled():
+                self.release()
+            raise
+
+    def release(self) -> None:
+        """Return a slot taken by acquire()."""
+        self._active -= 1
+        self._dispatch()
+
+    @asynccontextmanager
+    async def slot(self, url: str, level: Optional[int] = None):
+        """Hold a request slot for the duration of the block."""
+        host = urlparse(url).hostname or url
+        await self.acquire(host, level)
+        try:
+            yield
+        finally:
+            self.release()
+
+
+_scheduler: Optional[PriorityScheduler] = None
+
+
+def get_scheduler() -> PriorityScheduler:
+    """Return the process-wide scheduler, creating it from config on first use."""
+    global _scheduler
+    if _scheduler is None:
+        config = get_config()
+        _scheduler = PriorityScheduler(
+            max_concurrent=config.max_concurrent,
+            host_rate=config.host_rate_limit,
+            host_burst=config.host_rate_burst,
+        )
+    return _scheduler
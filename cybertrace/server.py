@@ -0,0 +1,298 @@
+"""HTTP API server - keeps an Engine warm across requests.
+
+Endpoints:
+    GET  /health                    liveness check
+    GET  /modules                   available modules
+    POST /search                    run an investigation and return the result
+    POST /investigations            start an investigation in the background
+    GET  /investigations/{id}       status (and result once finished)
+    GET  /investigations/{id}/events  Server-Sent Events stream
+    GET  /investigations/{id}/ws      the same events over a WebSocket
+
+Streaming events (in order):
+    started         investigation accepted, with the target
+    source_start    a source began running
+    source_partial  a long-running source found more, with its SourceResult so far
+    source_result   a source finished, with its SourceResult
+    summary         summary rebuilt from the sources finished so far
+    related         a newly discovered related target
+    done / error    the investigation finished
+
+Every event carries an increasing id. Reconnecting clients send the last id
+they saw (``Last-Event-ID`` header, or ``?last_event_id=`` for WebSockets)
+and the stream resumes after it.
+
+Request body for POST endpoints:
+    {"target": "example.com", "type": "auto", "priority": "normal",
+     "options": {"deep": false}}
+
+``priority`` is one of interactive, normal or bulk. It defaults to
+interactive for /search and normal for /investigations. ``options`` may
+only hold the module options in MODULE_OPTIONS; anything else is a 400.
+"""
+
+import asyncio
+import json
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, AsyncIterator, Dict, List, Optional, Set, Tuple
+
+from aiohttp import web
+
+from .detector import InvalidInputError
+from .modules import list_modules
+from .modules.base import ModuleResult
+from .runner import Engine, UnsupportedTargetError
+from .scheduler import INTERACTIVE, NORMAL, parse_priority
+
+# Module options a request may set, with their accepted types
+MODULE_OPTIONS = {
+    'deep': (bool,),
+    'tor': (bool,),
+    'permutations': (bool,),
+    'timeout': (int, float),
+}
+
+
+class Investigation:
+    """A background investigation tracked by the server."""
+
+    def __init__(self, target: str, input_type: str, options: Dict[str, Any],
+                 priority: int = NORMAL):
+        self.id = uuid.uuid4().hex
+        self.target = target
+        self.input_type = input_type
+        self.options = options
+        self.priority = priority
+        self.status = 'running'
+        self.result: Optional[ModuleResult] = None
+        self.error: Optional[str] = None
+        self.created_at = time.time()
+        self.task: Optional[asyncio.Task] = None
+        self.events: List[Tuple[int, str, Dict[str, Any]]] = []
+        self._related_seen: Set[str] = set()
+        self._wakeup = asyncio.Event()
+
+    @property
+    def finished(self) -> bool:
+        return self.status != 'running'
+
+    def publish(self, event: str, payload: Dict[str, Any]) -> None:
+        """Append an event to the log and wake up subscribers."""
+        if event == 'summary':
+            related = payload.get('related', [])
+            payload = {'summary': payload.get('summary', {})}
+        else:
+            related = []
+
+        self._append(event, payload)
+        for target in related:
+            if target not in self._related_seen:
+                self._related_seen.add(target)
+                self._append('related', {'target': target})
+
+        self._wakeup.set()
+        self._wakeup = asyncio.Event()
+
+    def _append(self, event: str, payload: Dict[str, Any]) -> None:
+        self.events.append((len(self.events) + 1, event, payload))
+
+    async def subscribe(
+        self, last_id: int = 0, keepalive: Optional[float] = None
+    ) -> AsyncIterator[Optional[Tuple[int, str, Dict[str, Any]]]]:
+        """
+        Yield events after last_id, waiting for new ones until finished.
+
+        With keepalive set, yields None whenever that many seconds pass
+        without an event.
+        """
+        while True:
+            while last_id < len(self.events):
+                yield self.events[last_id]
+                last_id += 1
+            if self.finished:
+                return
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), keepalive)
+            except asyncio.TimeoutError:
+                yield None
+
+    def to_dict(self) -> dict:
+        data = {
+            'id': self.id,
+            'target': self.target,
+            'type': self.input_type,
+            'status': self.status,
+            'created_at': self.created_at,
+        }
+        if self.error:
+            data['error'] = self.error
+        if self.result is not None:
+            data['result'] = self.result.to_dict()
+        return data
+
+
+class Server:
+    """aiohttp application wrapping a shared Engine."""
+
+    def __init__(self, engine: Optional[Engine] = None, max_finished: int = 1000):
+        self.engine = engine or Engine()
+        self.max_finished = max_finished
+        self.investigations: 'OrderedDict[str, Investigation]' = OrderedDict()
+
+    def make_app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_get('/health', self.health)
+        app.router.add_get('/modules', self.modules)
+        app.router.add_post('/search', self.search)
+        app.router.add_post('/investigations', self.create_investigation)
+        app.router.add_get('/investigations/{id}', self.get_investigation)
+        app.router.add_get('/investigations/{id}/events', self.stream_events)
+        app.router.add_get('/investigations/{id}/ws', self.stream_websocket)
+        app.on_startup.append(self._on_startup)
+        app.on_cleanup.append(self._on_cleanup)
+        return app
+
+    async def _on_startup(self, app: web.Application) -> None:
+        await self.engine.start()
+
+    async def _on_cleanup(self, app: web.Application) -> None:
+        for inv in self.investigations.values():
+            if inv.task and not inv.task.done():
+                inv.task.cancel()
+        await self.engine.close()
+
+    async def _parse_request(self, request: web.Request, default_priority: int):
+        try:
+            body = await request.json()
+        except Exception:
+            raise web.HTTPBadRequest(text='Body must be JSON')
+        if not isinstance(body, dict) or not body.get('target'):
+            raise web.HTTPBadRequest(text='Missing "target"')
+        options = body.get('options') or {}
+        if not isinstance(options, dict):
+            raise web.HTTPBadRequest(text='"options" must be an object')
+        for key, value in options.items():
+            if key not in MODULE_OPTIONS:
+                raise web.HTTPBadRequest(text=f'Unknown option: {key}')
+            types = MODULE_OPTIONS[key]
+            if not isinstance(value, types) or (isinstance(value, bool) and bool not in types):
+                raise web.HTTPBadRequest(text=f'Invalid value for option: {key}')
+        try:
+            level = parse_priority(body.get('priority', default_priority))
+        except (ValueError, AttributeError) as e:
+            raise web.HTTPBadRequest(text=str(e))
+        return str(body['target']), str(body.get('type', 'auto')), options, level
+
+    def _prune(self) -> None:
+        """Drop the oldest finished investigations beyond max_finished."""
+        finished = [i for i, inv in self.investigations.items() if inv.status != 'running']
+        for inv_id in finished[:max(0, len(finished) - self.max_finished)]:
+            del self.investigations[inv_id]
+
+    async def health(self, request: web.Request) -> web.Response:
+        running = sum(1 for inv in self.investigations.values() if inv.status == 'running')
+        return web.json_response({'status': 'ok', 'running': running})
+
+    async def modules(self, request: web.Request) -> web.Response:
+        return web.json_response(list_modules())
+
+    async def search(self, request: web.Request) -> web.Response:
+        target, input_type, options, level = await self._parse_request(request, INTERACTIVE)
+        try:
+            result = await self.engine.investigate(target, input_type, priority=level, **options)
+        except (UnsupportedTargetError, InvalidInputError) as e:
+            raise web.HTTPBadRequest(text=str(e))
+        return web.json_response(result.to_dict(), dumps=_dumps)
+
+    async def create_investigation(self, request: web.Request) -> web.Response:
+        target, input_type, options, level = await self._parse_request(request, NORMAL)
+        inv = Investigation(target, input_type, options, level)
+        self.investigations[inv.id] = inv
+        inv.task = asyncio.ensure_future(self._run(inv))
+        self._prune()
+        return web.json_response(inv.to_dict(), status=202)
+
+    def _lookup(self, request: web.Request) -> Investigation:
+        inv = self.investigations.get(request.match_info['id'])
+        if inv is None:
+            raise web.HTTPNotFound(text='Unknown investigation')
+        return inv
+
+    async def get_investigation(self, request: web.Request) -> web.Response:
+        return web.json_response(self._lookup(request).to_dict(), dumps=_dumps)
+
+    def _last_event_id(self, request: web.Request) -> int:
+        raw = request.headers.get('Last-Event-ID') or request.query.get('last_event_id') or '0'
+        try:
+            return max(0, int(raw))
+        except ValueError:
+            raise web.HTTPBadRequest(text='Invalid last event id')
+
+    async def stream_events(self, request: web.Request) -> web.StreamResponse:
+        inv = self._lookup(request)
+        last_id = self._last_event_id(request)
+
+        resp = web.StreamResponse(headers={
+            'Content-Type': 'text/event-stream',
+            'Cache-Control': 'no-cache',
+            'X-Accel-Buffering': 'no',
+        })
+        await resp.prepare(request)
+
+        async for item in inv.subscribe(last_id, keepalive=15):
+            if item is None:
+                # Comment line as keep-alive so proxies don't drop idle streams
+                await resp.write(b': keep-alive\n\n')
+                continue
+            event_id, event, payload = item
+            message = f'id: {event_id}\nevent: {event}\ndata: {_dumps(payload)}\n\n'
+            await resp.write(message.encode())
+
+        return resp
+
+    async def stream_websocket(self, request: web.Request) -> web.WebSocketResponse:
+        inv = self._lookup(request)
+        last_id = self._last_event_id(request)
+
+        ws = web.WebSocketResponse(heartbeat=15)
+        await ws.prepare(request)
+
+        async for event_id, event, payload in inv.subscribe(last_id):
+            if ws.closed:
+                break
+            await ws.send_str(_dumps({'id': event_id, 'event': event, 'data': payload}))
+
+        await ws.close()
+        return ws
+
+    async def _run(self, inv: Investigation) -> None:
+        inv.publish('started', {'target': inv.target, 'type': inv.input_type})
+        try:
+            inv.result = await self.engine.investigate(
+                inv.target, inv.input_type, listener=inv.publish,
+                priority=inv.priority, **inv.options
+            )
+        except asyncio.CancelledError:
+            inv.status = 'cancelled'
+            inv.publish('error', {'error': 'cancelled'})
+            raise
+        except Exception as e:
+            inv.status = 'error'
+            inv.error = str(e)
+            inv.publish('error', {'error': inv.error})
+            return
+
+        inv.publish('summary', {'summary': inv.result.summary, 'related': inv.result.related})
+        inv.status = 'done'
+        inv.publish('done', {'result': inv.result.to_dict()})
+
+
+def _dumps(obj) -> str:
+    return json.dumps(obj, default=str)
+
+
+def run_server(host: str = '127.0.0.1', port: int = 8080) -> None:
+    """Run the API server until interrupted."""
+    web.run_app(Server().make_app(), host=host, port=port, print=None)
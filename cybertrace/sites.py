@@ -0,0 +1,385 @@
+"""Username checks driven by a site manifest.
+
+Each site in the manifest says where a profile lives and how to tell an
+existing profile from a missing one:
+
+    "GitHub": {
+        "url": "https://github.com/{username}",
+        "check": "status",
+        "regex": "^[a-zA-Z0-9-]{1,39}$",
+        "tags": ["developer"]
+    }
+
+Checks are ``status`` (a 2xx answer means the profile exists),
+``redirect`` (as status, but a redirect means it does not) and ``message``
+(the page must not contain any ``absent`` string, and must contain one of
+the ``present`` strings if any are given). A status check may also list
+``absent_status`` codes that mean a missing profile even among 2xx answers.
+``probe`` is fetched instead of
+``url`` when a site has a cheaper or more reliable endpoint, and
+``headers`` are sent with the request.
+
+The bundled manifest covers common sites. ``USERNAME_SITES`` can point to a
+larger one, in this format or in Sherlock's or Maigret's ``data.json``
+format (thousands of sites). Detection rules are compiled once, when the
+manifest is first loaded, and message checks stop reading a page as soon as
+the answer is known.
+
+    found = await SiteChecker(session).check_all('hackerman123')
+"""
+
+import asyncio
+import json
+import re
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, FrozenSet, Iterable, List, Optional, Pattern, Tuple
+from urllib.parse import quote
+
+import aiohttp
+
+from .config import Config, get_config
+from .scheduler import PriorityScheduler
+
+BUNDLED_MANIFEST = Path(__file__).parent / 'data' / 'sites.json'
+
+CHECKS = ('status', 'redirect', 'message')
+MAX_BODY_BYTES = 256 * 1024
+CHUNK_SIZE = 8192
+
+# Answers that say nothing about the profile
+_UNKNOWN_STATUSES = frozenset({403, 429})
+
+_SHERLOCK_CHECKS = {'status_code': 'status', 'response_url': 'redirect', 'message': 'message'}
+
+
+class ManifestError(ValueError):
+    """A site manifest could not be read or has an invalid entry."""
+
+
+def _markers(strings: Iterable[str]) -> Tuple[Optional[Pattern[bytes]], int]:
+    """One regex matching any of strings in a body, and the longest length."""
+    encoded = sorted({s.encode('utf-8') for s in strings if s}, key=len, reverse=True)
+    if not encoded:
+        return None, 0
+    return re.compile(b'|'.join(re.escape(s) for s in encoded)), len(encoded[0])
+
+
+@dataclass(frozen=True)
+class Site:
+    """A manifest entry with its detection rule compiled."""
+    name: str
+    url: str
+    probe: Optional[str] = None
+    method: str = 'GET'
+    check: str = 'status'
+    absent: Optional[Pattern[bytes]] = None
+    present: Optional[Pattern[bytes]] = None
+    marker_length: int = 0
+    absent_statuses: FrozenSet[int] = frozenset()
+    pattern: Optional[Pattern[str]] = None
+    headers: Optional[Dict[str, str]] = None
+    tags: Tuple[str, ...] = ()
+
+    @classmethod
+    def compile(cls, name: str, entry: Dict[str, Any]) -> 'Site':
+        """
+        Compile a manifest entry.
+
+        Raises:
+            ManifestError: if the entry has no URL or an unknown check
+        """
+        url = entry.get('url')
+        if not isinstance(url, str) or '{username}' not in url:
+            raise ManifestError(f'{name}: url must contain {{username}}')
+        check = entry.get('check', 'status')
+        if check not in CHECKS:
+            raise ManifestError(f'{name}: unknown check {check!r}')
+
+        absent, absent_length = _markers(entry.get('absent', ()))
+        present, present_length = _markers(entry.get('present', ()))
+        if check == 'message' and absent is None and present is None:
+            raise ManifestError(f'{name}: message check without absent or present strings')
+
+        try:
+            pattern = re.compile(entry['regex']) if entry.get('regex') else None
+        except re.error as e:
+            raise ManifestError(f'{name}: bad regex: {e}') from None
+
+        return cls(
+            name=name,
+            url=url,
+            probe=entry.get('probe'),
+            method=entry.get('method', 'GET').upper(),
+            check=check,
+            absent=absent,
+            present=present,
+            marker_length=max(absent_length, present_length),
+            absent_statuses=frozenset(entry.get('absent_status', ())),
+            pattern=pattern,
+            headers=entry.get('headers') or None,
+            tags=tuple(entry.get('tags', ())),
+        )
+
+    def accepts(self, username: str) -> bool:
+        """Whether username is valid on this site (checking it would be wasted)."""
+        return self.pattern is None or self.pattern.search(username) is not None
+
+    def profile_url(self, username: str) -> str:
+        return self.url.replace('{username}', quote(username, safe='@.'))
+
+    def request_url(self, username: str) -> str:
+        return (self.probe or self.url).replace('{username}', quote(username, safe='@.'))
+
+
+def _from_sherlock(entry: Dict[str, Any]) -> Dict[str, Any]:
+    """A Sherlock data.json entry in manifest form."""
+    error_type = entry.get('errorType', 'status_code')
+    if isinstance(error_type, list):
+        error_type = 'message' if 'message' in error_type else error_type[0]
+    messages = entry.get('errorMsg', [])
+    codes = entry.get('errorCode', [])
+    converted = {
+        'url': entry.get('url', '').replace('{}', '{username}'),
+        'check': _SHERLOCK_CHECKS.get(error_type, error_type),
+        'absent': [messages] if isinstance(messages, str) else messages,
+        'absent_status': [codes] if isinstance(codes, int) else codes,
+        'regex': entry.get('regexCheck'),
+        'headers': entry.get('headers'),
+        'method': entry.get('request_method', 'GET'),
+    }
+    if entry.get('urlProbe'):
+        converted['probe'] = entry['urlProbe'].replace('{}', '{username}')
+    return converted
+
+
+def _from_maigret(entry: Dict[str, Any], engines: Dict[str, Any]) -> Dict[str, Any]:
+    """A Maigret data.json entry in manifest form, with its engine's defaults."""
+    engine = engines.get(entry.get('engine', ''), {}).get('site', {})
+    entry = {**engine, **entry}
+
+    def expand(template: str) -> str:
+        return (template.replace('{urlMain}', entry.get('urlMain', '').rstrip('/'))
+                .replace('{urlSubpath}', entry.get('urlSubpath', '')))
+
+    converted = {
+        'url': expand(entry.get('url', '')),
+        'check': _SHERLOCK_CHECKS.get(entry.get('checkType', 'status_code'), entry.get('checkType')),
+        'absent': entry.get('absenceStrs', []),
+        'present': entry.get('presenseStrs', []),
+        'regex': entry.get('regexCheck'),
+        'headers': entry.get('headers'),
+        'method': 'HEAD' if entry.get('requestHeadOnly') else 'GET',
+        'tags': entry.get('tags', []),
+    }
+    if entry.get('urlProbe'):
+        converted['probe'] = expand(entry['urlProbe'])
+    return converted
+
+
+class SiteManifest:
+    """The compiled sites of a manifest file."""
+
+    def __init__(self, sites: List[Site], skipped: int = 0, path: Optional[Path] = None):
+        self.sites = sites
+        self.skipped = skipped
+        self.path = path
+
+    def __len__(self) -> int:
+        return len(self.sites)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any], path: Optional[Path] = None) -> 'SiteManifest':
+        """
+        Compile a manifest in CyberTrace, Sherlock or Maigret format.
+
+        Disabled sites, sites that need a request body and entries that do
+        not compile are skipped (and counted), so one bad entry in a large
+        third-party manifest does not lose the rest.
+        """
+        if not isinstance(data, dict):
+            raise ManifestError('Manifest must be a JSON object')
+        if isinstance(data.get('sites'), dict):
+            entries = data['sites']
+            engines = data.get('engines') or {}
+            is_maigret = any(
+                isinstance(e, dict) and ('checkType' in e or 'engine' in e) for e in entries.values()
+            )
+        else:
+            # Sherlock: sites at the top level, plus a $schema key
+            entries = {k: v for k, v in data.items() if not k.startswith('$')}
+            engines = {}
+            is_maigret = False
+
+        sites = []
+        skipped = 0
+        for name, entry in entries.items():
+            if not isinstance(entry, dict) or entry.get('disabled') or entry.get('request_payload'):
+                skipped += 1
+                continue
+            if is_maigret:
+                entry = _from_maigret(entry, engines)
+            elif 'check' not in entry and 'errorType' in entry:
+                entry = _from_sherlock(entry)
+            try:
+                sites.append(Site.compile(name, entry))
+            except ManifestError:
+                skipped += 1
+
+        return cls(sites, skipped, path)
+
+    @classmethod
+    def load(cls, path: Path) -> 'SiteManifest':
+        """
+        Read and compile a manifest file.
+
+        Raises:
+            ManifestError: if the file cannot be read or is not a manifest
+        """
+        try:
+            with open(path, encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            raise ManifestError(f'Cannot read site manifest {path}: {e}') from None
+        return cls.from_dict(data, Path(path))
+
+
+_manifest: Optional[SiteManifest] = None
+
+
+def get_site_manifest(config: Optional[Config] = None) -> SiteManifest:
+    """Return the process-wide manifest (USERNAME_SITES, else the bundled one)."""
+    global _manifest
+    config = config or get_config()
+    path = config.username_sites or BUNDLED_MANIFEST
+    if _manifest is None or _manifest.path != Path(path):
+        _manifest = SiteManifest.load(path)
+    return _manifest
+
+
+_scheduler: Optional[PriorityScheduler] = None
+
+
+def _make_scheduler(config: Config) -> PriorityScheduler:
+    return PriorityScheduler(
+        max_concurrent=config.username_concurrency,
+        host_rate=config.username_host_rate,
+    )
+
+
+def get_username_scheduler(config: Optional[Config] = None) -> PriorityScheduler:
+    """
+    Return the process-wide username-check scheduler (pool size and per-host rate).
+
+    A config other than the shared one gets a scheduler of its own.
+    """
+    global _scheduler
+    if config is not None and config is not get_config():
+        return _make_scheduler(config)
+    if _scheduler is None:
+        _scheduler = _make_scheduler(get_config())
+    return _scheduler
+
+
+async def _scan(response: aiohttp.ClientResponse, site: Site) -> Tuple[bool, bool]:
+    """
+    Read the body until an absent string shows up or the budget runs out.
+
+    Returns (absent string seen, present string seen).
+    """
+    body = b''
+    present_seen = False
+    while len(body) < MAX_BODY_BYTES:
+        chunk = await response.content.read(CHUNK_SIZE)
+        if not chunk:
+            break
+        # Markers may straddle a chunk boundary
+        start = max(0, len(body) - site.marker_length)
+        body += chunk
+        if site.absent is not None and site.absent.search(body, start):
+            return True, present_seen
+        if site.present is not None and not present_seen:
+            present_seen = site.present.search(body, start) is not None
+            if present_seen and site.absent is None:
+                break
+    return False, present_seen
+
+
+class SiteChecker:
+    """
+    Check a username against every site of a manifest, concurrently.
+
+    Args:
+        session: aiohttp session to make requests with
+        manifest: Sites to check (default: the process-wide manifest)
+        config: Configuration to use (default: the shared config)
+    """
+
+    def __init__(self, session: aiohttp.ClientSession, manifest: Optional[SiteManifest] = None,
+                 config: Optional[Config] = None):
+        self.session = session
+        self.config = config or get_config()
+        self.manifest = manifest or get_site_manifest(self.config)
+        self.timeout = aiohttp.ClientTimeout(total=self.config.username_timeout)
+        self.scheduler = get_username_scheduler(self.config)
+
+    async def check(self, site: Site, username: str) -> bool:
+        """
+        Whether username has a profile on site.
+
+        Raises aiohttp.ClientError or asyncio.TimeoutError if the site did
+        not answer, and ValueError if its answer says nothing either way
+        (rate limited, blocked or a server error).
+        """
+        url = site.request_url(username)
+        async with self.scheduler.slot(url):
+            async with self.session.request(site.method, url, headers=site.headers,
+                                            allow_redirects=site.check != 'redirect',
+                                            timeout=self.timeout) as resp:
+                if resp.status in _UNKNOWN_STATUSES or resp.status >= 500:
+                    raise ValueError(f'HTTP {resp.status}')
+                if site.check == 'message':
+                    absent, present = await _scan(resp, site)
+                    found = not absent and (site.present is None or present)
+                else:
+                    # As in Sherlock, a listed code or any non-2xx answer means missing
+                    found = 200 <= resp.status < 300 and resp.status not in site.absent_statuses
+                # Drop the connection instead of draining the rest of the body
+                resp.close()
+                return found
+
+    async def check_all(self, username: str, exclude: Iterable[str] = ()) -> Dict[str, Any]:
+        """
+        Check username on every site that accepts it.
+
+        Sites named in exclude (compared case-insensitively) are left out,
+        for callers that check them another way.
+
+        Returns {'found': [{'site', 'url', 'tags'}], 'sites_checked',
+        'found_count', 'errors': {site: error}}.
+        """
+        excluded = {name.lower() for name in exclude}
+        sites = [
+            site for site in self.manifest.sites
+            if site.name.lower() not in excluded and site.accepts(username)
+        ]
+        errors: Dict[str, str] = {}
+
+        async def one(site: Site) -> bool:
+            try:
+                return await self.check(site, username)
+            except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
+                errors[site.name] = str(e) or type(e).__name__
+                return False
+
+        results = await asyncio.gather(*(one(site) for site in sites))
+        found = [
+            {'site': site.name, 'url': site.profile_url(username), 'tags': list(site.tags)}
+            for site, exists in zip(sites, results) if exists
+        ]
+        return {
+            'found': found,
+            'found_count': len(found),
+            'sites_checked': len(sites),
+            'errors': errors,
+        }
@@ -0,0 +1,159 @@
+"""Shared result store for investigations run by workers and batches."""
+
+import ipaddress
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Set, Union
+
+from .modules.base import ModuleResult
+
+
+class ResultStore:
+    """
+    SQLite-backed store of finished investigations.
+
+    Results are keyed by the job id (or any caller-chosen key). Saving the
+    same key twice replaces the earlier row, so retried writes are harmless.
+    Every IP address appearing in a result is indexed, so find_ip() can
+    list the investigations that saw an address.
+    """
+
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS results (
+        key TEXT PRIMARY KEY,
+        target TEXT NOT NULL,
+        target_type TEXT,
+        module TEXT,
+        created_at REAL NOT NULL,
+        result TEXT NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS results_target ON results(target);
+    CREATE TABLE IF NOT EXISTS result_ips (
+        ip TEXT NOT NULL,
+        key TEXT NOT NULL,
+        PRIMARY KEY (ip, key)
+    ) WITHOUT ROWID;
+    CREATE INDEX IF NOT EXISTS result_ips_key ON result_ips(key);
+    """
+
+    def __init__(self, path: Union[str, Path]):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.executescript(self.SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(str(self.path), timeout=30)
+            conn.execute('PRAGMA journal_mode=WAL')
+            self._local.conn = conn
+        return conn
+
+    def save(self, key: str, result: Union[ModuleResult, Dict[str, Any]]) -> None:
+        """Save (or replace) a result under key."""
+        data = result.to_dict() if isinstance(result, ModuleResult) else result
+        with self._connect() as conn:
+            conn.execute(
+                'INSERT OR REPLACE INTO results '
+                '(key, target, target_type, module, created_at, result) '
+                'VALUES (?, ?, ?, ?, ?, ?)',
+                (
+                    key,
+                    data.get('target', ''),
+                    data.get('target_type'),
+                    data.get('module'),
+                    time.time(),
+                    json.dumps(data, default=str),
+                ),
+            )
+            conn.execute('DELETE FROM result_ips WHERE key = ?', (key,))
+            conn.executemany(
+                'INSERT OR IGNORE INTO result_ips (ip, key) VALUES (?, ?)',
+                ((ip, key) for ip in _find_ips(data)),
+            )
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return the stored result dict for key, or None."""
+        row = self._connect().execute(
+            'SELECT result FROM results WHERE key = ?', (key,)
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def has(self, key: str) -> bool:
+        row = self._connect().execute(
+            'SELECT 1 FROM results WHERE key = ?', (key,)
+        ).fetchone()
+        return row is not None
+
+    def find(self, target: str) -> Iterator[Dict[str, Any]]:
+        """Yield stored results for a target, newest first."""
+        rows = self._connect().execute(
+            'SELECT result FROM results WHERE target = ? ORDER BY created_at DESC',
+            (target,),
+        )
+        for (raw,) in rows:
+            yield json.loads(raw)
+
+    def find_ip(self, ip: str, limit: int = 100) -> List[Dict[str, Any]]:
+        """
+        Results that mention an IP address, newest first.
+
+        Returns the key, target, target type, module and save time of each,
+        not the full results (get() fetches those).
+        """
+        rows = self._connect().execute(
+            'SELECT r.key, r.target, r.target_type, r.module, r.created_at '
+            'FROM result_ips i JOIN results r ON r.key = i.key '
+            'WHERE i.ip = ? ORDER BY r.created_at DESC LIMIT ?',
+            (_canonical_ip(ip) or ip, limit),
+        )
+        return [
+            {'key': key, 'target': target, 'target_type': target_type,
+             'module': module, 'created_at': created_at}
+            for key, target, target_type, module, created_at in rows
+        ]
+
+    def count(self) -> int:
+        return self._connect().execute('SELECT COUNT(*) FROM results').fetchone()[0]
+
+    def close(self) -> None:
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+
+_IP_CHARS = frozenset('0123456789abcdefABCDEF.:')
+
+
+def _canonical_ip(value: str) -> Optional[str]:
+    """Canonical text of an IP address, or None if value is not one."""
+    if not 2 <= len(value) <= 45 or not _IP_CHARS.issuperset(value):
+        return None
+    try:
+        return str(ipaddress.ip_address(value))
+    except ValueError:
+        return None
+
+
+def _find_ips(data: Any) -> Set[str]:
+    """Every IP address among the strings (values and keys) of a result dict."""
+    found: Set[str] = set()
+    stack = [data]
+    while stack:
+        value = stack.pop()
+        if isinstance(value, str):
+            ip = _canonical_ip(value)
+            if ip:
+                found.add(ip)
+        elif isinstance(value, dict):
+            stack.extend(value.values())
+            stack.extend(key for key in value if isinstance(key, str))
+        elif isinstance(value, (list, tuple)):
+            stack.extend(value)
+    return found
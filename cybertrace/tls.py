@@ -0,0 +1,280 @@
+"""TLS certificate harvesting.
+
+Connects to hosts on port 443, completes the TLS handshake with SNI and
+reads the server certificate, then closes the connection: no HTTP request
+is sent and no body is downloaded. Certificates are not verified (expired,
+self-signed and mismatched ones are exactly what an investigation wants to
+see) and are decoded with a minimal DER reader, so only the standard
+library is needed.
+
+    harvester = TLSHarvester(concurrency=50, timeout=5)
+    certs = await harvester.harvest([('www.example.com', '93.184.215.14')])
+
+Handshakes run ``TLS_CONCURRENCY`` at a time across the whole process
+(concurrent domain searches and batches share the pool, interactive
+lookups first), each bounded by ``TLS_TIMEOUT`` seconds.
+"""
+
+import asyncio
+import hashlib
+import ipaddress
+import ssl
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from .config import Config, get_config
+from .scheduler import PriorityScheduler
+
+TLS_PORT = 443
+
+_OID_COMMON_NAME = bytes.fromhex('550403')
+_OID_ORGANIZATION = bytes.fromhex('55040a')
+_OID_SUBJECT_ALT_NAME = bytes.fromhex('551d11')
+
+_SEQUENCE = 0x30
+_OID = 0x06
+_OCTET_STRING = 0x04
+_UTC_TIME = 0x17
+_GENERALIZED_TIME = 0x18
+_EXTENSIONS = 0xa3    # [3] EXPLICIT in TBSCertificate
+_VERSION = 0xa0       # [0] EXPLICIT in TBSCertificate
+_SAN_DNS_NAME = 0x82  # dNSName [2] IMPLICIT IA5String
+_SAN_IP_ADDRESS = 0x87
+
+
+class CertificateError(ValueError):
+    """Certificate bytes are not a DER X.509 certificate this reader understands."""
+
+
+def _tlv(data: bytes, offset: int) -> Tuple[int, int, int]:
+    """(tag, value start, value end) of the DER element at offset."""
+    try:
+        tag = data[offset]
+        length = data[offset + 1]
+        start = offset + 2
+        if length & 0x80:
+            size = length & 0x7f
+            if not 0 < size <= 4:
+                raise CertificateError('Unsupported DER length')
+            length = int.from_bytes(data[start:start + size], 'big')
+            start += size
+    except IndexError:
+        raise CertificateError('Truncated DER') from None
+    end = start + length
+    if end > len(data):
+        raise CertificateError('Truncated DER')
+    return tag, start, end
+
+
+def _children(data: bytes, start: int, end: int) -> List[Tuple[int, int, int]]:
+    """The elements inside a constructed value."""
+    elements = []
+    while start < end:
+        element = _tlv(data, start)
+        elements.append(element)
+        start = element[2]
+    return elements
+
+
+def _name(data: bytes, start: int, end: int) -> Dict[str, str]:
+    """Common name and organization of an X.501 Name."""
+    fields = {}
+    for _, set_start, set_end in _children(data, start, end):
+        for _, attr_start, attr_end in _children(data, set_start, set_end):
+            attr = _children(data, attr_start, attr_end)
+            if len(attr) < 2 or attr[0][0] != _OID:
+                continue
+            oid = data[attr[0][1]:attr[0][2]]
+            value = data[attr[1][1]:attr[1][2]].decode('utf-8', 'replace')
+            if oid == _OID_COMMON_NAME:
+                fields.setdefault('cn', value)
+            elif oid == _OID_ORGANIZATION:
+                fields.setdefault('o', value)
+    return fields
+
+
+def _time(data: bytes, element: Tuple[int, int, int]) -> Optional[str]:
+    """
+    UTCTime or GeneralizedTime as 'YYYY-MM-DDTHH:MM:SS' (UTC).
+
+    Raises:
+        CertificateError: if the time is not made of digits
+    """
+    tag, start, end = element
+    text = data[start:end].decode('ascii', 'replace').rstrip('Z')
+    if tag == _UTC_TIME and len(text) >= 12:
+        if not text[:12].isdigit():
+            raise CertificateError('Malformed UTCTime')
+        year = int(text[:2])
+        text = ('19' if year >= 50 else '20') + text  # RFC 5280 4.1.2.5.1
+    elif tag != _GENERALIZED_TIME or len(text) < 14:
+        return None
+    elif not text[:14].isdigit():
+        raise CertificateError('Malformed GeneralizedTime')
+    return f'{text[:4]}-{text[4:6]}-{text[6:8]}T{text[8:10]}:{text[10:12]}:{text[12:14]}'
+
+
+def parse_certificate(der: bytes) -> Dict[str, Any]:
+    """
+    Decode the fields an investigation needs from a DER certificate.
+
+    Returns subject and issuer (common name and organization), validity,
+    serial number, subject alternative names (DNS names and IPs) and the
+    SHA-256 fingerprint.
+
+    Raises:
+        CertificateError: if der is not a certificate
+    """
+    tag, start, end = _tlv(der, 0)
+    if tag != _SEQUENCE:
+        raise CertificateError('Not a certificate')
+    tag, tbs_start, tbs_end = _tlv(der, start)
+    if tag != _SEQUENCE:
+        raise CertificateError('Not a certificate')
+
+    fields = _children(der, tbs_start, tbs_end)
+    if fields and fields[0][0] == _VERSION:
+        fields = fields[1:]
+    if len(fields) < 6:
+        raise CertificateError('Truncated TBSCertificate')
+    serial, _, issuer, validity, subject = fields[:5]
+
+    times = _children(der, validity[1], validity[2])
+    subject_name = _name(der, subject[1], subject[2])
+    issuer_name = _name(der, issuer[1], issuer[2])
+
+    dns_names: List[str] = []
+    ip_addresses: List[str] = []
+    for ext_tag, ext_start, ext_end in fields[5:]:
+        if ext_tag != _EXTENSIONS:
+            continue
+        _, seq_start, seq_end = _tlv(der, ext_start)
+        for _, item_start, item_end in _children(der, seq_start, seq_end):
+            parts = _children(der, item_start, item_end)
+            if not parts or der[parts[0][1]:parts[0][2]] != _OID_SUBJECT_ALT_NAME:
+                continue
+            value = parts[-1]
+            if value[0] != _OCTET_STRING:
+                continue
+            _, names_start, names_end = _tlv(der, value[1])
+            for name_tag, name_start, name_end in _children(der, names_start, names_end):
+                raw = der[name_start:name_end]
+                if name_tag == _SAN_DNS_NAME:
+                    dns_names.append(raw.decode('ascii', 'replace').lower())
+                elif name_tag == _SAN_IP_ADDRESS and len(raw) in (4, 16):
+                    ip_addresses.append(str(ipaddress.ip_address(raw)))
+
+    not_before = _time(der, times[0]) if len(times) > 0 else None
+    not_after = _time(der, times[1]) if len(times) > 1 else None
+    now = datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%S')
+    return {
+        'subject_cn': subject_name.get('cn'),
+        'subject_org': subject_name.get('o'),
+        'issuer': issuer_name.get('o') or issuer_name.get('cn'),
+        'issuer_cn': issuer_name.get('cn'),
+        'not_before': not_before,
+        'not_after': not_after,
+        'expired': bool(not_after and not_after < now),
+        'serial': der[serial[1]:serial[2]].hex(),
+        'san': dns_names,
+        'san_ips': ip_addresses,
+        'self_signed': bool(subject_name) and subject_name == issuer_name,
+        'sha256': hashlib.sha256(der).hexdigest(),
+    }
+
+
+_scheduler: Optional[PriorityScheduler] = None
+
+
+def get_tls_scheduler(config: Optional[Config] = None) -> PriorityScheduler:
+    """
+    Return the process-wide handshake scheduler (TLS_CONCURRENCY in flight).
+
+    A config other than the shared one gets a scheduler of its own.
+    """
+    global _scheduler
+    if config is not None and config is not get_config():
+        return PriorityScheduler(max_concurrent=config.tls_concurrency)
+    if _scheduler is None:
+        _scheduler = PriorityScheduler(max_concurrent=get_config().tls_concurrency)
+    return _scheduler
+
+
+def _client_context() -> ssl.SSLContext:
+    context = ssl.SSLContext(ssl.PROTOCOL_TLS_CLIENT)
+    context.check_hostname = False
+    context.verify_mode = ssl.CERT_NONE
+    return context
+
+
+class TLSHarvester:
+    """
+    Fetch server certificates from many hosts concurrently.
+
+    Args:
+        concurrency: Handshakes in flight at once, for a harvester with a
+            pool of its own
+        timeout: Seconds allowed for connecting and the handshake
+        port: Port to connect to (tests use a local server)
+        scheduler: Pool to share instead (from_config uses the
+            process-wide one)
+    """
+
+    def __init__(self, concurrency: int = 50, timeout: float = 5.0, port: int = TLS_PORT,
+                 scheduler: Optional[PriorityScheduler] = None):
+        self.scheduler = scheduler or PriorityScheduler(max_concurrent=max(1, concurrency))
+        self.timeout = timeout
+        self.port = port
+        self._context = _client_context()
+
+    @classmethod
+    def from_config(cls, config: Optional[Config] = None) -> 'TLSHarvester':
+        config = config or get_config()
+        return cls(timeout=config.tls_timeout, scheduler=get_tls_scheduler(config))
+
+    async def fetch(self, host: str, ip: Optional[str] = None) -> bytes:
+        """
+        DER certificate presented for host (sent as SNI) at ip.
+
+        Raises OSError, asyncio.TimeoutError or ssl.SSLError on failure.
+        """
+        async def handshake() -> bytes:
+            _, writer = await asyncio.open_connection(
+                ip or host, self.port, ssl=self._context, server_hostname=host,
+            )
+            try:
+                der = writer.get_extra_info('ssl_object').getpeercert(binary_form=True)
+            finally:
+                writer.close()
+            if not der:
+                raise ssl.SSLError('No certificate presented')
+            return der
+
+        return await asyncio.wait_for(handshake(), self.timeout)
+
+    async def harvest(self, targets: Iterable[Tuple[str, Optional[str]]]) -> Dict[str, Any]:
+        """
+        Fetch and decode the certificates of (host, ip) pairs.
+
+        Returns {'certificates': [...], 'errors': {...}}. Certificates are
+        listed once per fingerprint, with the 'endpoints' ("host@ip")
+        that presented them; errors are keyed by endpoint.
+        """
+        certificates: Dict[str, Dict[str, Any]] = {}
+        errors: Dict[str, str] = {}
+
+        async def one(host: str, ip: Optional[str]) -> None:
+            endpoint = f'{host}@{ip}' if ip else host
+            await self.scheduler.acquire(ip or host)
+            try:
+                cert = parse_certificate(await self.fetch(host, ip))
+            except (OSError, asyncio.TimeoutError, ssl.SSLError, CertificateError) as e:
+                errors[endpoint] = str(e) or type(e).__name__
+                return
+            finally:
+                self.scheduler.release()
+            entry = certificates.setdefault(cert['sha256'], {**cert, 'endpoints': []})
+            entry['endpoints'].append(endpoint)
+
+        await asyncio.gather(*(one(host, ip) for host, ip in dict.fromkeys(targets)))
+        return {'certificates': list(certificates.values()), 'errors': errors}
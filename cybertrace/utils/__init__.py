@@ -1,8 +1,10 @@
 """Utility functions for CyberTrace."""
 
+import codecs
+import json
 import re
 import socket
-from typing import Optional
+from typing import Any, List, Optional
 from urllib.parse import urlparse
 
 
@@ -73,6 +75,67 @@ def mask_sensitive(text: str, visible_chars: int = 4) -> str:
     return text[:visible_chars] + '*' * (len(text) - visible_chars * 2) + text[-visible_chars:]
 
 
+class JSONArrayDecoder:
+    """
+    Incrementally decode a top-level JSON array, one element at a time.
+    
+    Feed it response chunks as they arrive; each call returns the elements
+    completed so far. Only the unparsed tail is buffered, so arbitrarily
+    large arrays decode in memory proportional to their largest element.
+    
+        decoder = JSONArrayDecoder()
+        async for chunk in resp.content.iter_chunked(65536):
+            for item in decoder.feed(chunk):
+                ...
+        decoder.close()
+    """
+    
+    _SKIP = re.compile(r'[\s,]*')
+    
+    def __init__(self):
+        self._text = codecs.getincrementaldecoder('utf-8')(errors='replace')
+        self._json = json.JSONDecoder()
+        self._buf = ''
+        self._started = False
+        self.done = False
+    
+    def feed(self, data: bytes) -> List[Any]:
+        """Add a chunk; return the array elements it completed."""
+        self._buf += self._text.decode(data)
+        items = []
+        pos = 0
+        buf = self._buf
+        while not self.done:
+            pos = self._SKIP.match(buf, pos).end()
+            if pos >= len(buf):
+                break
+            if not self._started:
+                if buf[pos] != '[':
+                    raise ValueError(f'Expected a JSON array, got {buf[pos:pos + 20]!r}')
+                self._started = True
+                pos += 1
+                continue
+            if buf[pos] == ']':
+                self.done = True
+                pos += 1
+                break
+            try:
+                item, end = self._json.raw_decode(buf, pos)
+            except json.JSONDecodeError:
+                break  # Element continues in the next chunk
+            if end == len(buf) and not isinstance(item, (dict, list, str)):
+                break  # A number or literal may continue in the next chunk
+            items.append(item)
+            pos = end
+        self._buf = buf[pos:]
+        return items
+    
+    def close(self) -> None:
+        """Check that the array was complete."""
+        if not self.done:
+            raise ValueError('Truncated JSON array')
+
+
 __all__ = [
     'is_valid_email',
     'is_valid_domain',
@@ -82,4 +145,5 @@ __all__ = [
     'truncate',
     'format_bytes',
     'mask_sensitive',
+    'JSONArrayDecoder',
 ]
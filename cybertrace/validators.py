@@ -0,0 +1,333 @@
+"""Offline checksum validation for detected identifiers.
+
+Shape regexes in the detector accept plenty of inputs that cannot be real:
+a Base58 address with a typo, a GSTIN with the wrong check character, an
+Aadhaar number failing Verhoeff. Catching those locally saves every API
+call a module run would otherwise make for them.
+
+Each check returns a Validation; ``valid`` is None for identifier types
+that carry no checksum (usernames, domains, vehicle numbers, ...).
+"""
+
+import base64
+import hashlib
+import re
+from typing import Callable, Dict, NamedTuple, Optional
+
+
+class Validation(NamedTuple):
+    """Validity verdict for an identifier."""
+    valid: Optional[bool]  # None when the type has no checksum to verify
+    reason: str = ''
+
+    def __bool__(self) -> bool:
+        return self.valid is not False
+
+
+VALID = Validation(True)
+UNCHECKED = Validation(None)
+
+
+# Bitcoin: Base58Check (P2PKH / P2SH)
+
+BASE58_ALPHABET = '123456789ABCDEFGHJKLMNPQRSTUVWXYZabcdefghijkmnopqrstuvwxyz'
+_BASE58_INDEX = {c: i for i, c in enumerate(BASE58_ALPHABET)}
+
+
+def base58_decode(value: str) -> bytes:
+    """Decode a Base58 string (raises ValueError on invalid characters)."""
+    num = 0
+    for char in value:
+        try:
+            num = num * 58 + _BASE58_INDEX[char]
+        except KeyError:
+            raise ValueError(f"Invalid Base58 character: {char!r}")
+    pad = len(value) - len(value.lstrip('1'))
+    return b'\x00' * pad + num.to_bytes((num.bit_length() + 7) // 8, 'big')
+
+
+def check_base58_address(address: str) -> Validation:
+    """Validate a legacy (P2PKH/P2SH) Bitcoin address."""
+    try:
+        raw = base58_decode(address)
+    except ValueError as e:
+        return Validation(False, str(e))
+    if len(raw) != 25:
+        return Validation(False, 'Base58 payload is not 25 bytes')
+    payload, checksum = raw[:-4], raw[-4:]
+    if hashlib.sha256(hashlib.sha256(payload).digest()).digest()[:4] != checksum:
+        return Validation(False, 'Base58Check checksum mismatch')
+    if payload[0] not in (0x00, 0x05):
+        return Validation(False, f'Not a mainnet address (version byte {payload[0]:#04x})')
+    return VALID
+
+
+# Bitcoin: bech32 / bech32m segwit addresses (BIP-173, BIP-350)
+
+BECH32_CHARSET = 'qpzry9x8gf2tvdw0s3jn54khce6mua7l'
+_BECH32_CONST = 1
+_BECH32M_CONST = 0x2BC830A3
+
+
+def _bech32_polymod(values) -> int:
+    generator = (0x3B6A57B2, 0x26508E6D, 0x1EA119FA, 0x3D4233DD, 0x2A1462B3)
+    chk = 1
+    for value in values:
+        top = chk >> 25
+        chk = (chk & 0x1FFFFFF) << 5 ^ value
+        for i in range(5):
+            if (top >> i) & 1:
+                chk ^= generator[i]
+    return chk
+
+
+def _convert_bits(data, from_bits: int, to_bits: int) -> Optional[bytes]:
+    """Regroup 5-bit words into bytes, rejecting non-zero padding."""
+    acc = bits = 0
+    out = bytearray()
+    for value in data:
+        acc = (acc << from_bits) | value
+        bits += from_bits
+        while bits >= to_bits:
+            bits -= to_bits
+            out.append((acc >> bits) & ((1 << to_bits) - 1))
+    if bits >= from_bits or (acc << (to_bits - bits)) & ((1 << to_bits) - 1):
+        return None
+    return bytes(out)
+
+
+def check_bech32_address(address: str, hrp: str = 'bc') -> Validation:
+    """Validate a segwit address (bech32 for v0, bech32m for v1+)."""
+    if address.lower() != address and address.upper() != address:
+        return Validation(False, 'Mixed-case bech32 address')
+    address = address.lower()
+    pos = address.rfind('1')
+    if address[:pos] != hrp or len(address) - pos - 1 < 7:
+        return Validation(False, f'Expected the "{hrp}" prefix')
+    try:
+        data = [BECH32_CHARSET.index(c) for c in address[pos + 1:]]
+    except ValueError:
+        return Validation(False, 'Invalid bech32 character')
+
+    expanded = [ord(c) >> 5 for c in hrp] + [0] + [ord(c) & 31 for c in hrp]
+    const = _bech32_polymod(expanded + data)
+    version = data[0]
+    if const != (_BECH32_CONST if version == 0 else _BECH32M_CONST):
+        return Validation(False, 'bech32 checksum mismatch')
+
+    program = _convert_bits(data[1:-6], 5, 8)
+    if version > 16 or program is None or not 2 <= len(program) <= 40:
+        return Validation(False, 'Invalid witness program')
+    if version == 0 and len(program) not in (20, 32):
+        return Validation(False, 'Invalid v0 witness program length')
+    return VALID
+
+
+# Ethereum: EIP-55 mixed-case checksum
+
+_KECCAK_ROUND_CONSTANTS = [
+    0x0000000000000001, 0x0000000000008082, 0x800000000000808A, 0x8000000080008000,
+    0x000000000000808B, 0x0000000080000001, 0x8000000080008081, 0x8000000000008009,
+    0x000000000000008A, 0x0000000000000088, 0x0000000080008009, 0x000000008000000A,
+    0x000000008000808B, 0x800000000000008B, 0x8000000000008089, 0x8000000000008003,
+    0x8000000000008002, 0x8000000000000080, 0x000000000000800A, 0x800000008000000A,
+    0x8000000080008081, 0x8000000000008080, 0x0000000080000001, 0x8000000080008008,
+]
+_KECCAK_ROTATIONS = [
+    [0, 36, 3, 41, 18], [1, 44, 10, 45, 2], [62, 6, 43, 15, 61],
+    [28, 55, 25, 21, 56], [27, 20, 39, 8, 14],
+]
+_MASK64 = (1 << 64) - 1
+
+
+def _keccak_f(state) -> None:
+    for rc in _KECCAK_ROUND_CONSTANTS:
+        c = [state[x][0] ^ state[x][1] ^ state[x][2] ^ state[x][3] ^ state[x][4] for x in range(5)]
+        d = [c[(x - 1) % 5] ^ ((c[(x + 1) % 5] << 1 | c[(x + 1) % 5] >> 63) & _MASK64)
+             for x in range(5)]
+        for x in range(5):
+            for y in range(5):
+                state[x][y] ^= d[x]
+        b = [[0] * 5 for _ in range(5)]
+        for x in range(5):
+            for y in range(5):
+                r = _KECCAK_ROTATIONS[x][y]
+                b[y][(2 * x + 3 * y) % 5] = (state[x][y] << r | state[x][y] >> (64 - r)) & _MASK64
+        for x in range(5):
+            for y in range(5):
+                state[x][y] = b[x][y] ^ (~b[(x + 1) % 5][y] & b[(x + 2) % 5][y])
+        state[0][0] ^= rc
+
+
+def keccak256(data: bytes) -> bytes:
+    """Keccak-256 as used by Ethereum (original padding, not SHA3-256)."""
+    rate = 136
+    padded = bytearray(data) + b'\x01' + b'\x00' * (-(len(data) + 1) % rate)
+    padded[-1] |= 0x80
+    state = [[0] * 5 for _ in range(5)]
+    for offset in range(0, len(padded), rate):
+        block = padded[offset:offset + rate]
+        for i in range(rate // 8):
+            state[i % 5][i // 5] ^= int.from_bytes(block[8 * i:8 * i + 8], 'little')
+        _keccak_f(state)
+    return b''.join(state[i % 5][i // 5].to_bytes(8, 'little') for i in range(4))
+
+
+def to_checksum_address(address: str) -> str:
+    """Return the EIP-55 checksummed form of an Ethereum address."""
+    hex_part = address[2:].lower()
+    digest = keccak256(hex_part.encode()).hex()
+    return '0x' + ''.join(
+        c.upper() if int(digest[i], 16) >= 8 else c for i, c in enumerate(hex_part)
+    )
+
+
+def check_eip55_address(address: str) -> Validation:
+    """Validate the EIP-55 checksum of a mixed-case Ethereum address."""
+    hex_part = address[2:]
+    if hex_part == hex_part.lower() or hex_part == hex_part.upper():
+        return UNCHECKED  # Single-case addresses carry no checksum
+    if to_checksum_address(address) != address:
+        return Validation(False, 'EIP-55 checksum mismatch')
+    return VALID
+
+
+# Tor: v3 onion addresses
+
+def check_onion_address(address: str) -> Validation:
+    """Validate a v3 onion address (checksum and version byte)."""
+    label = address.lower()
+    if label.endswith('.onion'):
+        label = label[:-len('.onion')]
+    label = label.rsplit('.', 1)[-1]
+    if len(label) == 16:
+        return Validation(False, 'v2 onion addresses are no longer reachable on Tor')
+    if len(label) != 56:
+        return Validation(False, 'Onion address must have 56 characters')
+    try:
+        raw = base64.b32decode(label.upper())
+    except ValueError:
+        return Validation(False, 'Invalid base32 in onion address')
+    pubkey, checksum, version = raw[:32], raw[32:34], raw[34:]
+    if version != b'\x03':
+        return Validation(False, 'Unknown onion address version')
+    expected = hashlib.sha3_256(b'.onion checksum' + pubkey + version).digest()[:2]
+    if checksum != expected:
+        return Validation(False, 'Onion address checksum mismatch')
+    return VALID
+
+
+# India: GSTIN, PAN, Aadhaar
+
+_GSTIN_CHARS = '0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ'
+
+
+def gstin_check_char(first14: str) -> str:
+    """Compute the GSTIN check character (mod-36, alternating weights 1/2)."""
+    total = 0
+    for i, char in enumerate(first14):
+        product = _GSTIN_CHARS.index(char) * (2 if i % 2 else 1)
+        total += product // 36 + product % 36
+    return _GSTIN_CHARS[(36 - total % 36) % 36]
+
+
+def check_gstin(gstin: str) -> Validation:
+    """Validate a GSTIN's state code, embedded PAN and check character."""
+    gstin = gstin.upper()
+    if not 1 <= int(gstin[:2]) <= 38 and gstin[:2] != '97':
+        return Validation(False, f'Unknown state code {gstin[:2]}')
+    if not check_pan(gstin[2:12]):
+        return Validation(False, 'Embedded PAN is invalid')
+    if gstin_check_char(gstin[:14]) != gstin[14]:
+        return Validation(False, 'GSTIN check character mismatch')
+    return VALID
+
+
+# Fourth PAN character: holder type (person, company, HUF, firm, LLP, ...)
+PAN_HOLDER_TYPES = 'PCHFATBLJGE'
+
+
+def check_pan(pan: str) -> Validation:
+    """Validate the PAN holder-type character."""
+    if pan[3].upper() not in PAN_HOLDER_TYPES:
+        return Validation(False, f'Unknown PAN holder type {pan[3].upper()!r}')
+    return VALID
+
+
+_VERHOEFF_D = [
+    [0, 1, 2, 3, 4, 5, 6, 7, 8, 9], [1, 2, 3, 4, 0, 6, 7, 8, 9, 5],
+    [2, 3, 4, 0, 1, 7, 8, 9, 5, 6], [3, 4, 0, 1, 2, 8, 9, 5, 6, 7],
+    [4, 0, 1, 2, 3, 9, 5, 6, 7, 8], [5, 9, 8, 7, 6, 0, 4, 3, 2, 1],
+    [6, 5, 9, 8, 7, 1, 0, 4, 3, 2], [7, 6, 5, 9, 8, 2, 1, 0, 4, 3],
+    [8, 7, 6, 5, 9, 3, 2, 1, 0, 4], [9, 8, 7, 6, 5, 4, 3, 2, 1, 0],
+]
+_VERHOEFF_P = [
+    [0, 1, 2, 3, 4, 5, 6, 7, 8, 9], [1, 5, 7, 6, 2, 8, 3, 0, 9, 4],
+    [5, 8, 0, 3, 7, 9, 6, 1, 4, 2], [8, 9, 1, 6, 0, 4, 3, 5, 2, 7],
+    [9, 4, 5, 3, 1, 2, 6, 8, 7, 0], [4, 2, 8, 6, 5, 7, 3, 9, 0, 1],
+    [2, 7, 9, 3, 8, 0, 6, 4, 1, 5], [7, 0, 4, 6, 9, 1, 3, 2, 5, 8],
+]
+
+
+def verhoeff_valid(number: str) -> bool:
+    """Check a number whose last digit is a Verhoeff check digit."""
+    c = 0
+    for i, digit in enumerate(reversed(number)):
+        c = _VERHOEFF_D[c][_VERHOEFF_P[i % 8][int(digit)]]
+    return c == 0
+
+
+def check_aadhaar(aadhaar: str) -> Validation:
+    """Validate an Aadhaar number (leading digit and Verhoeff check digit)."""
+    digits = re.sub(r'\s', '', aadhaar)
+    if not digits.isascii() or not digits.isdigit() or len(digits) != 12:
+        return Validation(False, 'Aadhaar must be 12 digits')
+    if digits[0] in '01':
+        return Validation(False, 'Aadhaar numbers never start with 0 or 1')
+    if not verhoeff_valid(digits):
+        return Validation(False, 'Aadhaar Verhoeff check digit mismatch')
+    return VALID
+
+
+# Bitcoin and Ethereum addresses are both handled by the bitcoin module
+_SAME_MODULE = {'ethereum': 'bitcoin'}
+
+VALIDATORS: Dict[str, Callable[[str], Validation]] = {
+    'btc_legacy': check_base58_address,
+    'btc_bech32': check_bech32_address,
+    'ethereum': check_eip55_address,
+    'onion': check_onion_address,
+    'gstin': check_gstin,
+    'pan_indian': check_pan,
+    'aadhaar': check_aadhaar,
+}
+
+
+def validate_input(value: str, input_type: str) -> Validation:
+    """
+    Check an identifier's checksum.
+
+    Args:
+        value: The identifier (as detected or normalized)
+        input_type: A specific type from the detector (e.g. 'btc_legacy')
+            or a module type ('bitcoin', 'indian', ...), in which case the
+            specific type is detected from the value's shape
+
+    Returns:
+        Validation verdict; ``valid`` is None when there is nothing to check
+    """
+    check = VALIDATORS.get(input_type)
+    if check is None:
+        # A module type: validate as whatever specific type the value looks
+        # like, as long as that type belongs to the same module
+        from .detector import detect_input_type
+        specific_type, module_type = detect_input_type(value)
+        if _SAME_MODULE.get(module_type, module_type) != _SAME_MODULE.get(input_type, input_type):
+            return UNCHECKED
+        check = VALIDATORS.get(specific_type)
+        if check is None:
+            return UNCHECKED
+    try:
+        return check(value.strip())
+    except (ValueError, IndexError) as e:
+        return Validation(False, str(e))
@@ -0,0 +1,471 @@
+"""Asynchronous WHOIS and RDAP lookups.
+
+RDAP is preferred: the registry's RDAP service is found through the IANA
+bootstrap file (cached on disk for ``CACHE_TTL_HOURS``) and answers in
+JSON. TLDs without RDAP fall back to WHOIS over port 43: the TLD's server
+comes from whois.iana.org (cached on disk), and referrals to the
+registrar's server are followed.
+
+IP networks are looked up over RDAP the same way, through the IPv4 and
+IPv6 bootstrap files that map address blocks to regional registries.
+
+WHOIS servers ban clients that query too fast, so every port-43 query goes
+through a scheduler of its own that allows ``WHOIS_RATE_LIMIT`` queries per
+second to each server, interactive lookups first.
+
+    data = await WhoisClient().lookup('example.com')
+"""
+
+import asyncio
+import ipaddress
+import json
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple, Union
+
+from .config import Config, get_config
+from .scheduler import PriorityScheduler
+
+WHOIS_PORT = 43
+IANA_WHOIS_SERVER = 'whois.iana.org'
+RDAP_BOOTSTRAP_URL = 'https://data.iana.org/rdap/dns.json'
+RDAP_IP_BOOTSTRAP_URLS = (
+    ('https://data.iana.org/rdap/ipv4.json', 'rdap_ipv4.json'),
+    ('https://data.iana.org/rdap/ipv6.json', 'rdap_ipv6.json'),
+)
+
+MAX_RESPONSE = 1024 * 1024
+MAX_REFERRALS = 2
+
+# WHOIS keys seen across registries, per field (compared lower-cased)
+WHOIS_FIELDS = {
+    'domain_name': ('domain name', 'domain'),
+    'registrar': ('registrar', 'sponsoring registrar', 'registrar name'),
+    'creation_date': ('creation date', 'created', 'created on', 'registered on',
+                      'registration time', 'domain registration date'),
+    'expiration_date': ('registry expiry date', 'registrar registration expiration date',
+                        'expiration date', 'expiry date', 'expires', 'expires on',
+                        'paid-till', 'expiration time'),
+    'updated_date': ('updated date', 'last updated', 'last modified', 'changed', 'modified'),
+    'name_servers': ('name server', 'nserver', 'nameserver', 'name servers'),
+    'status': ('domain status', 'status', 'state'),
+    'dnssec': ('dnssec',),
+    'registrant_name': ('registrant name', 'registrant'),
+    'registrant_organization': ('registrant organization', 'registrant organisation', 'org'),
+    'registrant_country': ('registrant country', 'country'),
+    'registrant_state': ('registrant state/province', 'state/province'),
+}
+LIST_FIELDS = ('name_servers', 'status')
+REFERRAL_KEYS = ('refer', 'whois', 'registrar whois server', 'referralserver')
+
+_KEY_TO_FIELD = {key: name for name, keys in WHOIS_FIELDS.items() for key in keys}
+
+
+class WhoisError(Exception):
+    """A WHOIS server could not be found or queried."""
+
+
+_scheduler: Optional[PriorityScheduler] = None
+
+
+def get_whois_scheduler() -> PriorityScheduler:
+    """Return the process-wide WHOIS scheduler (per-server rate limits)."""
+    global _scheduler
+    if _scheduler is None:
+        config = get_config()
+        _scheduler = PriorityScheduler(
+            max_concurrent=config.max_concurrent,
+            host_rate=config.whois_rate_limit,
+        )
+    return _scheduler
+
+
+def parse_whois(text: str) -> Dict[str, Any]:
+    """
+    Parse a WHOIS response into the fields of WHOIS_FIELDS.
+
+    The first value wins for single fields; list fields collect every value.
+    The referral server, if any, is returned as 'referral'.
+    """
+    data: Dict[str, Any] = {}
+    for line in text.splitlines():
+        line = line.strip()
+        if not line or line[0] in '%#>' or ':' not in line:
+            continue
+        key, _, value = line.partition(':')
+        key = key.strip().lower()
+        value = value.strip()
+        if not value:
+            continue
+
+        if key in REFERRAL_KEYS and 'referral' not in data:
+            server = value.split('://', 1)[-1].split('/')[0].split(':')[0].strip().lower()
+            if server:
+                data['referral'] = server
+            continue
+
+        name = _KEY_TO_FIELD.get(key)
+        if name is None:
+            continue
+        if name in LIST_FIELDS:
+            # Status lines often carry a URL after the code
+            value = value.split()[0] if name == 'status' else value.lower().rstrip('.')
+            values = data.setdefault(name, [])
+            if value not in values:
+                values.append(value)
+        elif name not in data:
+            data[name] = value
+    return data
+
+
+def _shape(parsed: Dict[str, Any]) -> Dict[str, Any]:
+    """Arrange parsed fields like the domain module's whois source."""
+    data = {
+        name: parsed[name]
+        for name in ('domain_name', 'registrar', 'creation_date', 'expiration_date',
+                     'updated_date', 'name_servers', 'status', 'dnssec')
+        if name in parsed
+    }
+    registrant = {
+        key: parsed[f'registrant_{key}']
+        for key in ('name', 'organization', 'country', 'state')
+        if f'registrant_{key}' in parsed
+    }
+    if registrant:
+        data['registrant'] = registrant
+    return data
+
+
+class WhoisClient:
+    """
+    Port-43 WHOIS client with referral following.
+
+    Args:
+        config: Configuration to use (default: the shared config)
+        port: Port to query (tests use a local server)
+        servers: Initial {tld: server} map, e.g. to skip the IANA lookup
+    """
+
+    _servers: Dict[str, str] = {}  # Shared TLD -> server cache
+    _servers_loaded = False
+
+    def __init__(self, config: Optional[Config] = None, port: int = WHOIS_PORT,
+                 servers: Optional[Dict[str, str]] = None):
+        self.config = config or get_config()
+        self.port = port
+        self.servers = servers
+
+    async def query(self, server: str, query: str) -> str:
+        """Send one query to a WHOIS server and return the response text."""
+        async with get_whois_scheduler().slot(f'whois://{server}'):
+            try:
+                return await asyncio.wait_for(
+                    self._exchange(server, query), self.config.request_timeout
+                )
+            except (OSError, asyncio.TimeoutError) as e:
+                raise WhoisError(f'{server}: {e or "timed out"}') from e
+
+    async def _exchange(self, server: str, query: str) -> str:
+        reader, writer = await asyncio.open_connection(server, self.port)
+        try:
+            writer.write(query.encode('idna') + b'\r\n')
+            await writer.drain()
+            chunks: List[bytes] = []
+            size = 0
+            while size < MAX_RESPONSE:
+                chunk = await reader.read(65536)
+                if not chunk:
+                    break
+                chunks.append(chunk)
+                size += len(chunk)
+        finally:
+            writer.close()
+        return b''.join(chunks).decode('utf-8', 'replace')
+
+    def _server_cache(self) -> Dict[str, str]:
+        if self.servers is not None:
+            return self.servers
+        cls = type(self)
+        if not cls._servers_loaded:
+            cls._servers_loaded = True
+            try:
+                cls._servers.update(json.loads((self.config.cache_dir / 'whois_servers.json').read_text()))
+            except (OSError, ValueError):
+                pass
+        return cls._servers
+
+    async def server_for(self, domain: str) -> str:
+        """The WHOIS server of a domain's TLD, asked of IANA once and cached."""
+        tld = domain.rsplit('.', 1)[-1].lower()
+        servers = self._server_cache()
+        if tld not in servers:
+            parsed = parse_whois(await self.query(IANA_WHOIS_SERVER, tld))
+            if 'referral' not in parsed:
+                raise WhoisError(f'No WHOIS server for .{tld}')
+            servers[tld] = parsed['referral']
+            if self.servers is None:
+                try:
+                    self.config.cache_path('whois_servers.json').write_text(json.dumps(servers))
+                except OSError:
+                    pass
+        return servers[tld]
+
+    async def lookup(self, domain: str) -> Dict[str, Any]:
+        """
+        Look up a domain, following referrals to the registrar's server.
+
+        Fields from the registrar's answer take precedence over the
+        registry's. Raises WhoisError if the registry cannot be queried; a
+        failing referral keeps the registry's answer.
+        """
+        server = await self.server_for(domain)
+        parsed = parse_whois(await self.query(server, domain))
+        seen = {server}
+
+        for _ in range(MAX_REFERRALS):
+            referral = parsed.pop('referral', None)
+            if not referral or referral in seen:
+                break
+            seen.add(referral)
+            try:
+                referred = parse_whois(await self.query(referral, domain))
+            except WhoisError:
+                break
+            server = referral
+            parsed = {**parsed, **referred}
+
+        parsed.pop('referral', None)
+        data = _shape(parsed)
+        data['whois_server'] = server
+        return data
+
+
+FetchJSON = Callable[..., Awaitable[Optional[dict]]]
+IPNetwork = Union[ipaddress.IPv4Network, ipaddress.IPv6Network]
+
+
+class RDAPClient:
+    """
+    RDAP client using the IANA bootstrap registry.
+
+    Args:
+        fetch_json: Coroutine fetching a URL as JSON, returning None on
+            failure (a module's fetch_json, so requests are scheduled)
+        config: Configuration to use (default: the shared config)
+    """
+
+    _bootstrap: Optional[Dict[str, str]] = None  # Shared TLD -> base URL map
+    _bootstrap_loaded_at = 0.0
+    _ip_bootstrap: Optional[List[Tuple[IPNetwork, str]]] = None  # Shared network -> base URL list
+    _ip_bootstrap_loaded_at = 0.0
+
+    def __init__(self, fetch_json: FetchJSON, config: Optional[Config] = None):
+        self.fetch_json = fetch_json
+        self.config = config or get_config()
+
+    @staticmethod
+    def parse_bootstrap(data: dict) -> Dict[str, str]:
+        """Map each entry (TLD or IP prefix) of an IANA bootstrap file to its first base URL."""
+        services = {}
+        for tlds, urls in data.get('services', []):
+            https = [url for url in urls if url.startswith('https://')] or urls
+            if not https:
+                continue
+            base = https[0] if https[0].endswith('/') else https[0] + '/'
+            for tld in tlds:
+                services[tld.lower()] = base
+        return services
+
+    async def _bootstrap_file(self, url: str, name: str) -> Optional[dict]:
+        """An IANA bootstrap file, from disk if fresh, else fetched (and saved)."""
+        path = self.config.cache_dir / name
+        try:
+            if time.time() - path.stat().st_mtime < self.config.cache_ttl_hours * 3600:
+                return json.loads(path.read_text())
+        except (OSError, ValueError):
+            pass
+
+        data = await self.fetch_json(url)
+        if data is not None:
+            try:
+                # The cache directory is only created once there is something to write
+                self.config.cache_path(name).write_text(json.dumps(data))
+            except OSError:
+                pass
+        return data
+
+    async def bootstrap(self) -> Dict[str, str]:
+        """The TLD -> RDAP base URL map, from memory, disk or IANA."""
+        cls = type(self)
+        max_age = self.config.cache_ttl_hours * 3600
+        if cls._bootstrap is not None and time.time() - cls._bootstrap_loaded_at < max_age:
+            return cls._bootstrap
+
+        data = await self._bootstrap_file(RDAP_BOOTSTRAP_URL, 'rdap_dns.json')
+        if data is None:
+            # Keep serving a stale map rather than none at all
+            return cls._bootstrap or {}
+
+        cls._bootstrap = self.parse_bootstrap(data)
+        cls._bootstrap_loaded_at = time.time()
+        return cls._bootstrap
+
+    async def ip_bootstrap(self) -> List[Tuple[IPNetwork, str]]:
+        """(network, RDAP base URL) pairs for IPv4 and IPv6, most specific first."""
+        cls = type(self)
+        max_age = self.config.cache_ttl_hours * 3600
+        if cls._ip_bootstrap is not None and time.time() - cls._ip_bootstrap_loaded_at < max_age:
+            return cls._ip_bootstrap
+
+        networks = []
+        for url, name in RDAP_IP_BOOTSTRAP_URLS:
+            data = await self._bootstrap_file(url, name)
+            if data is None:
+                return cls._ip_bootstrap or []
+            for prefix, base in self.parse_bootstrap(data).items():
+                try:
+                    networks.append((ipaddress.ip_network(prefix, strict=False), base))
+                except ValueError:
+                    continue
+
+        networks.sort(key=lambda entry: -entry[0].prefixlen)
+        cls._ip_bootstrap = networks
+        cls._ip_bootstrap_loaded_at = time.time()
+        return networks
+
+    async def base_url(self, domain: str) -> Optional[str]:
+        """RDAP base URL for a domain's TLD, or None if it has no RDAP service."""
+        return (await self.bootstrap()).get(domain.rsplit('.', 1)[-1].lower())
+
+    async def lookup(self, domain: str) -> Optional[Dict[str, Any]]:
+        """Look up a domain. Returns None if there is no RDAP service or answer."""
+        base = await self.base_url(domain)
+        if base is None:
+            return None
+        data = await self.fetch_json(f'{base}domain/{domain}',
+                                     headers={'Accept': 'application/rdap+json'})
+        if not data or data.get('objectClassName') != 'domain':
+            return None
+        parsed = self.parse_domain(data)
+        parsed['rdap_server'] = base
+        return parsed
+
+    async def ip_base_url(self, ip: str) -> Optional[str]:
+        """RDAP base URL of the registry (RIR) an IP address was delegated to."""
+        address = ipaddress.ip_address(ip)
+        for network, base in await self.ip_bootstrap():
+            if address.version == network.version and address in network:
+                return base
+        return None
+
+    async def lookup_ip(self, ip: str) -> Optional[Dict[str, Any]]:
+        """
+        Look up the network an IP address belongs to.
+
+        Returns None if no registry serves the address or it has no answer.
+        """
+        base = await self.ip_base_url(ip)
+        if base is None:
+            return None
+        data = await self.fetch_json(f'{base}ip/{ip}',
+                                     headers={'Accept': 'application/rdap+json'})
+        if not data or data.get('objectClassName') != 'ip network':
+            return None
+        parsed = self.parse_ip_network(data)
+        parsed['rdap_server'] = base
+        return parsed
+
+    @staticmethod
+    def parse_domain(data: dict) -> Dict[str, Any]:
+        """Arrange an RDAP domain object like the domain module's whois source."""
+        events = {event.get('eventAction'): event.get('eventDate') for event in data.get('events', [])}
+        parsed: Dict[str, Any] = {
+            'domain_name': (data.get('ldhName') or '').lower() or None,
+            'creation_date': events.get('registration'),
+            'expiration_date': events.get('expiration'),
+            'updated_date': events.get('last changed'),
+            'name_servers': [
+                ns['ldhName'].lower() for ns in data.get('nameservers', []) if ns.get('ldhName')
+            ],
+            'status': data.get('status', []),
+        }
+        secure = data.get('secureDNS', {})
+        if 'delegationSigned' in secure:
+            parsed['dnssec'] = 'signedDelegation' if secure['delegationSigned'] else 'unsigned'
+
+        for entity in data.get('entities', []):
+            roles = entity.get('roles', [])
+            card = _vcard(entity)
+            if 'registrar' in roles and card.get('fn'):
+                parsed['registrar'] = card['fn']
+            elif 'registrant' in roles:
+                registrant = {
+                    'name': card.get('fn'),
+                    'organization': card.get('org'),
+                    'country': card.get('country'),
+                    'state': card.get('region'),
+                }
+                registrant = {k: v for k, v in registrant.items() if v}
+                if registrant:
+                    parsed['registrant'] = registrant
+
+        return {k: v for k, v in parsed.items() if v not in (None, [])}
+
+    @staticmethod
+    def parse_ip_network(data: dict) -> Dict[str, Any]:
+        """Pick the range, owner and abuse contact out of an RDAP ip network object."""
+        events = {event.get('eventAction'): event.get('eventDate') for event in data.get('events', [])}
+        parsed: Dict[str, Any] = {
+            'handle': data.get('handle'),
+            'name': data.get('name'),
+            'type': data.get('type'),
+            'country': data.get('country'),
+            'start_address': data.get('startAddress'),
+            'end_address': data.get('endAddress'),
+            'cidr': [
+                f"{cidr.get('v4prefix') or cidr.get('v6prefix')}/{cidr['length']}"
+                for cidr in data.get('cidr0_cidrs', [])
+                if (cidr.get('v4prefix') or cidr.get('v6prefix')) and 'length' in cidr
+            ],
+            'parent_handle': data.get('parentHandle'),
+            'registration_date': events.get('registration'),
+            'updated_date': events.get('last changed'),
+        }
+
+        # Abuse contacts are often nested inside the registrant entity
+        entities = list(data.get('entities', []))
+        while entities:
+            entity = entities.pop(0)
+            entities.extend(entity.get('entities', []))
+            roles = entity.get('roles', [])
+            card = _vcard(entity)
+            if 'registrant' in roles and 'organization' not in parsed:
+                organization = card.get('org') or card.get('fn')
+                if organization:
+                    parsed['organization'] = organization
+            if 'abuse' in roles and 'abuse_email' not in parsed and card.get('email'):
+                parsed['abuse_email'] = card['email']
+
+        return {k: v for k, v in parsed.items() if v not in (None, [])}
+
+
+def _vcard(entity: dict) -> Dict[str, str]:
+    """Pick fn, org, email, country and region out of an entity's jCard."""
+    card: Dict[str, str] = {}
+    vcard = entity.get('vcardArray')
+    if not isinstance(vcard, list) or len(vcard) < 2:
+        return card
+    for prop in vcard[1]:
+        if len(prop) < 4:
+            continue
+        name, params, _, value = prop[:4]
+        if name in ('fn', 'org', 'email') and isinstance(value, str) and value:
+            card.setdefault(name, value)
+        elif name == 'adr':
+            if isinstance(value, list) and len(value) >= 7:
+                if value[4]:
+                    card['region'] = value[4]
+                if value[6]:
+                    card['country'] = value[6]
+            if isinstance(params, dict) and params.get('cc'):
+                card.setdefault('country', params['cc'])
+    return card
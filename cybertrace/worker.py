@@ -0,0 +1,155 @@
+"""Queue worker - pulls jobs and runs investigations."""
+
+import asyncio
+import logging
+import os
+import socket
+from typing import Optional
+
+from .detector import InvalidInputError
+from .queue import Job, JobQueue, LeaseLost
+from .runner import Engine, UnsupportedTargetError
+from .store import ResultStore
+
+logger = logging.getLogger(__name__)
+
+
+class Worker:
+    """
+    Run investigations from a JobQueue and write results to a ResultStore.
+
+    Each running job holds a lease that is extended every third of the
+    visibility timeout. If the worker dies, the lease expires and another
+    worker picks the job up again.
+    """
+
+    def __init__(
+        self,
+        queue: JobQueue,
+        store: ResultStore,
+        concurrency: int = 1,
+        visibility_timeout: float = 300.0,
+        poll_interval: float = 1.0,
+        retry_delay: float = 30.0,
+        worker_id: Optional[str] = None,
+    ):
+        self.queue = queue
+        self.store = store
+        self.concurrency = concurrency
+        self.visibility_timeout = visibility_timeout
+        self.poll_interval = poll_interval
+        self.retry_delay = retry_delay
+        self.worker_id = worker_id or f'{socket.gethostname()}:{os.getpid()}'
+        self.processed = 0
+        self.failed = 0
+        self._stopping = False
+        self._engine: Optional[Engine] = None
+
+    def stop(self) -> None:
+        """Finish running jobs and stop leasing new ones."""
+        self._stopping = True
+
+    async def _call(self, func, *args):
+        """Run a blocking queue/store call off the event loop."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, func, *args)
+
+    async def run(self, burst: bool = False, max_jobs: Optional[int] = None) -> None:
+        """
+        Process jobs until stopped.
+
+        Args:
+            burst: exit once the queue has no available jobs
+            max_jobs: exit after leasing this many jobs
+        """
+        async with Engine() as engine:
+            self._engine = engine
+            try:
+                await self._loop(burst, max_jobs)
+            finally:
+                self._engine = None
+
+    async def _loop(self, burst: bool, max_jobs: Optional[int]) -> None:
+        leased = 0
+        running = set()
+
+        while not self._stopping:
+            running = {task for task in running if not task.done()}
+
+            if max_jobs is not None and leased >= max_jobs:
+                break
+
+            if len(running) >= self.concurrency:
+                _, running = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+                continue
+
+            job = await self._call(self.queue.lease, self.visibility_timeout)
+            if job is None:
+                if burst and not running:
+                    break
+                await asyncio.sleep(self.poll_interval)
+                continue
+
+            leased += 1
+            running.add(asyncio.ensure_future(self._process(job)))
+
+        if running:
+            await asyncio.wait(running)
+
+    async def _heartbeat(self, job: Job) -> None:
+        interval = self.visibility_timeout / 3
+        while True:
+            await asyncio.sleep(interval)
+            await self._call(self.queue.extend, job, self.visibility_timeout)
+
+    async def _process(self, job: Job) -> None:
+        logger.info('[%s] job %s: %s (attempt %d/%d)', self.worker_id, job.id,
+                    job.target, job.attempts, job.max_attempts)
+
+        heartbeat = asyncio.ensure_future(self._heartbeat(job))
+        work = asyncio.ensure_future(
+            self._engine.investigate(job.target, job.input_type,
+                                     priority=job.priority, **job.options)
+        )
+
+        try:
+            done, _ = await asyncio.wait({heartbeat, work}, return_when=asyncio.FIRST_COMPLETED)
+            if work not in done:
+                # Heartbeat stopped first, so the lease is gone
+                work.cancel()
+                heartbeat.result()
+            result = work.result()
+        except LeaseLost:
+            logger.warning('[%s] job %s: lease lost, abandoning', self.worker_id, job.id)
+            return
+        except (UnsupportedTargetError, InvalidInputError) as e:
+            # Retrying will not help
+            job.attempts = job.max_attempts
+            await self._fail(job, str(e))
+            return
+        except Exception as e:
+            await self._fail(job, f'{type(e).__name__}: {e}')
+            return
+        finally:
+            heartbeat.cancel()
+
+        try:
+            await self._call(self.store.save, job.id, result)
+            await self._call(self.queue.ack, job)
+        except LeaseLost:
+            # Another worker owns it now; its write replaces ours
+            logger.warning('[%s] job %s: lease lost before ack', self.worker_id, job.id)
+            return
+
+        self.processed += 1
+        logger.info('[%s] job %s: done (%d/%d sources)', self.worker_id, job.id,
+                    result.success_count, result.total_count)
+
+    async def _fail(self, job: Job, error: str) -> None:
+        self.failed += 1
+        delay = self.retry_delay * (2 ** (job.attempts - 1))
+        logger.warning('[%s] job %s: %s', self.worker_id, job.id, error)
+        try:
+            await self._call(self.queue.fail, job, error, delay)
+        except LeaseLost:
+            pass
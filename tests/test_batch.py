@@ -0,0 +1,170 @@
+"""Tests for journaled batch runs."""
+
+import asyncio
+import json
+
+import pytest
+from cybertrace.batch import BatchRunner, JournalError
+from cybertrace.modules.base import ModuleResult, SourceResult
+from cybertrace.modules.domain_module import DomainModule
+from cybertrace.runner import Engine
+from cybertrace.store import ResultStore
+
+
+@pytest.fixture
+def calls(monkeypatch):
+    """Replace network investigations with a local stub and record targets."""
+    seen = []
+
+    async def fake_investigate(self, target, input_type='auto', **options):
+        seen.append(target)
+        if target == 'explode':
+            raise RuntimeError('boom')
+        return ModuleResult(target=target, target_type='fake', module='fake')
+
+    monkeypatch.setattr(Engine, 'investigate', fake_investigate)
+    return seen
+
+
+def read_output(path):
+    return [json.loads(line) for line in path.read_text().splitlines()]
+
+
+class TestBatchRunner:
+    """Test journaling, resume and exactly-once output."""
+
+    def test_full_run(self, tmp_path, calls):
+        out = tmp_path / 'out.jsonl'
+        runner = BatchRunner(out, concurrency=2)
+        assert runner.start(['a.com', 'b.com', 'c.com']) == 3
+        stats = asyncio.run(runner.run())
+        runner.close()
+
+        assert stats == {'done': 3}
+        assert sorted(r['input'] for r in read_output(out)) == ['a.com', 'b.com', 'c.com']
+
+    def test_failures_are_journaled(self, tmp_path, calls):
+        out = tmp_path / 'out.jsonl'
+        runner = BatchRunner(out)
+        runner.start(['a.com', 'explode'])
+        stats = asyncio.run(runner.run())
+        runner.close()
+
+        assert stats == {'done': 1, 'failed': 1}
+        assert [r['input'] for r in read_output(out)] == ['a.com']
+
+    def test_start_refuses_existing_journal(self, tmp_path, calls):
+        out = tmp_path / 'out.jsonl'
+        runner = BatchRunner(out)
+        runner.start(['a.com'])
+        runner.close()
+
+        with pytest.raises(JournalError):
+            BatchRunner(out).start(['a.com'])
+
+    def test_resume_without_journal(self, tmp_path):
+        with pytest.raises(JournalError):
+            BatchRunner(tmp_path / 'out.jsonl').resume()
+
+    def test_resume_after_crash_writes_each_result_once(self, tmp_path, calls):
+        out = tmp_path / 'out.jsonl'
+        store = ResultStore(tmp_path / 'results.db')
+        runner = BatchRunner(out, store=store, concurrency=1)
+        runner.start(['a.com', 'b.com', 'c.com'])
+        asyncio.run(runner.run())
+
+        # Simulate a crash while c.com was being written: its line made it
+        # to disk but the journal commit did not
+        journal = runner.journal
+        journal.conn.execute("UPDATE targets SET status = 'running' WHERE target = 'c.com'")
+        committed = len(out.read_bytes()) - len(out.read_text().splitlines(True)[-1])
+        journal.set_meta('output_offset', str(committed))
+        with open(out, 'a') as f:
+            f.write('{"partial": ')
+        runner.close()
+        calls.clear()
+
+        runner = BatchRunner(out, store=store)
+        assert runner.resume() == {'done': 2, 'running': 1}
+        stats = asyncio.run(runner.run())
+        runner.close()
+
+        assert calls == ['c.com']
+        assert stats == {'done': 3}
+        assert sorted(r['input'] for r in read_output(out)) == ['a.com', 'b.com', 'c.com']
+        assert store.count() == 3
+        store.close()
+
+
+class TestBatchPlanning:
+    """Test grouping of targets that share work."""
+
+    def test_hosts_of_a_domain_run_together(self, tmp_path, monkeypatch):
+        whois = []
+
+        async def fake_whois(self, domain):
+            whois.append(domain)
+            return SourceResult(source='whois', success=True, data={'registrar': 'Example'})
+
+        async def fake_source(self, domain):
+            return SourceResult(source='stub', success=False, error='offline')
+
+        monkeypatch.setattr(DomainModule, '_get_whois', fake_whois)
+        monkeypatch.setattr(DomainModule, '_check_crtsh', fake_source)
+        monkeypatch.setattr(DomainModule, '_get_dns_records', fake_source)
+
+        out = tmp_path / 'out.jsonl'
+        runner = BatchRunner(out, concurrency=2)
+        runner.start(['a.example.com', 'https://b.example.com/login', 'example.org', 'c.example.com'])
+        stats = asyncio.run(runner.run())
+        runner.close()
+
+        assert stats == {'done': 4}
+        assert sorted(whois) == ['example.com', 'example.org']
+        rows = {r['input']: r for r in read_output(out)}
+        assert rows['https://b.example.com/login']['summary']['registrar'] == 'Example'
+        assert rows['c.example.com']['target'] == 'c.example.com'
+
+    def test_group_fan_out_is_capped(self, tmp_path, monkeypatch):
+        active, peak = [0], [0]
+
+        async def fake_dns(self, domain):
+            active[0] += 1
+            peak[0] = max(peak[0], active[0])
+            await asyncio.sleep(0.01)
+            active[0] -= 1
+            return SourceResult(source='dns_records', success=False, error='offline')
+
+        async def fake_source(self, domain):
+            return SourceResult(source='stub', success=False, error='offline')
+
+        monkeypatch.setattr(DomainModule, '_get_whois', fake_source)
+        monkeypatch.setattr(DomainModule, '_check_crtsh', fake_source)
+        monkeypatch.setattr(DomainModule, '_get_dns_records', fake_dns)
+
+        out = tmp_path / 'out.jsonl'
+        runner = BatchRunner(out, concurrency=1)
+        runner.start([f'h{i}.example.com' for i in range(50)])
+        stats = asyncio.run(runner.run())
+        runner.close()
+
+        assert stats == {'done': 50}
+        assert peak[0] == DomainModule.MAX_GROUP_CONCURRENCY
+
+    def test_search_many_raising_fails_the_unit(self, tmp_path, monkeypatch, calls):
+        async def broken(self, targets, input_type='auto', **options):
+            raise RuntimeError('plugin bug')
+
+        monkeypatch.setattr(Engine, 'investigate_many', broken)
+
+        out = tmp_path / 'out.jsonl'
+        runner = BatchRunner(out, concurrency=1)
+        runner.start(['a.example.com', 'b.example.com', 'example.org'])
+        stats = asyncio.run(runner.run())
+        rows = runner.journal.conn.execute('SELECT status, error FROM targets ORDER BY seq').fetchall()
+        runner.close()
+
+        # Nothing left stuck in 'running'; the lone target ran normally
+        assert stats == {'failed': 2, 'done': 1}
+        assert calls == ['example.org']
+        assert rows[0] == ('failed', 'RuntimeError: plugin bug')
@@ -0,0 +1,43 @@
+"""Tests for configuration loading."""
+
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+from cybertrace.config import Config, get_config
+from cybertrace.modules import get_module
+from cybertrace.runner import Engine
+
+PACKAGE_ROOT = str(Path(__file__).resolve().parent.parent)
+
+
+class TestConfig:
+    """Test lazy, side-effect-free configuration."""
+
+    def test_import_has_no_side_effects(self, tmp_path):
+        code = (
+            "import os, sys; import cybertrace, cybertrace.cli; "
+            "print('dotenv' in sys.modules, os.listdir('.'))"
+        )
+        env = dict(os.environ, PYTHONPATH=PACKAGE_ROOT)
+        out = subprocess.run([sys.executable, '-c', code], cwd=tmp_path, env=env,
+                             capture_output=True, text=True, check=True)
+        assert out.stdout.strip() == 'False []'
+
+    def test_directories_created_on_write(self, tmp_path):
+        cfg = Config(data_dir=tmp_path / 'data', cache_dir=tmp_path / 'data' / 'cache')
+        assert not cfg.cache_dir.exists()
+
+        path = cfg.cache_path('x.json')
+        assert path == cfg.cache_dir / 'x.json'
+        assert cfg.cache_dir.is_dir()
+
+    def test_shared_config_is_cached(self):
+        assert get_config() is get_config()
+
+    def test_explicit_config_reaches_modules(self, tmp_path):
+        cfg = Config(data_dir=tmp_path, cache_dir=tmp_path, request_timeout=5)
+        assert get_module('email', config=cfg).config is cfg
+        assert get_module('email').config is get_config()
+        assert Engine(cfg).config is cfg
@@ -1,7 +1,40 @@
 """Tests for input type detection."""
 
+import re
+
 import pytest
-from cybertrace.detector import detect_input_type, normalize_input
+from cybertrace.detector import (
+    DETECTION_ORDER,
+    PATTERNS,
+    detect_candidates,
+    detect_input_type,
+    detect_many,
+    normalize_input,
+)
+
+
+def reference_detect(input_str):
+    """The straightforward pattern-by-pattern detector the fast path must match."""
+    cleaned = input_str.strip()
+    phone_cleaned = re.sub(r'[\s\-\.\(\)]+', '', cleaned)
+    for pattern_name, module_type in DETECTION_ORDER:
+        test_str = phone_cleaned if 'phone' in pattern_name else cleaned
+        if PATTERNS[pattern_name].match(test_str):
+            return (pattern_name, module_type)
+    return ('username', 'username')
+
+
+TRICKY_INPUTS = [
+    '', '   ', 'a', 'a.b', 'a.bc', 'x@y.zz', 'http://a', 'https://a.b/c d',
+    '(987) 654-3210', ' -9876543210', '98765 43210', '+1 415 555 2671', '091-9876543210',
+    '1234 5678 9012', '123456789012', '1234\t5678 9012', '255.255.255.255', '256.1.1.1',
+    '2001:db8:0:0:0:0:2:1', 'fe80:0:0:0:0:0:0:1', 'abcdefghijklmnop.onion',
+    'ABCDEFGHIJKLMNOP.onion', 'mh12ab1234', 'abcde1234f', '22aaaaa0000a1z5',
+    '0x' + 'a' * 40, '0x' + 'a' * 39, 'bc1' + 'q' * 39, 'bc1' + 'q' * 60,
+    '3J98t1WpEZ73CNmQviecrnyiWrnqRhWNLy', '1' * 26, 'a' * 80 + '.com', 'a' * 200,
+    '\u0662\u0662AAAAA0000A1Z5', '\u017fBCDE1234F', '\u212aA12AB1234', 'user name',
+    '\u00e9xample.com', 'test@\u00e9xample.com', 'h' * 8,
+]
 
 
 class TestDetectInputType:
@@ -75,7 +108,14 @@ class TestDetectInputType:
     def test_ipv4_detection(self):
         specific, module = detect_input_type("192.168.1.1")
         assert specific == "ipv4"
-        assert module == "domain"
+        assert module == "ip"
+
+    def test_ipv6_detection(self):
+        for value in ("2001:db8:0:0:0:0:0:1", "2001:db8::1", "::1", "fe80::",
+                      "1:2:3:4:5:6:7::", "::2:3:4:5:6:7:8", "1:2:3::5:6:7:8"):
+            assert detect_input_type(value) == ("ipv6", "ip")
+        for value in ("1::2::3", "12:30", "1:2:3:4:5:6:7:8:9", "1:2:3:4::5:6:7:8"):
+            assert detect_input_type(value)[1] != "ip"
 
     def test_url_detection(self):
         specific, module = detect_input_type("https://example.com/path")
@@ -102,6 +142,10 @@ class TestNormalizeInput:
         result = normalize_input("919876543210", "phone")
         assert result == "+919876543210"
 
+    def test_normalize_ipv6(self):
+        result = normalize_input("[2001:DB8:0:0:0:0:0:1]", "ip")
+        assert result == "2001:db8::1"
+
     def test_normalize_indian_vehicle(self):
         result = normalize_input("mh 12 ab 1234", "indian")
         assert result == "MH12AB1234"
@@ -117,3 +161,43 @@ class TestNormalizeInput:
     def test_normalize_preserves_username(self):
         result = normalize_input("  hackerman123  ", "username")
         assert result == "hackerman123"
+
+
+class TestDetectMany:
+    """Test the compiled detector and its bulk API."""
+
+    @pytest.mark.parametrize('value', TRICKY_INPUTS)
+    def test_matches_reference(self, value):
+        assert detect_input_type(value) == reference_detect(value)
+
+    def test_detect_many_matches_single(self):
+        assert list(detect_many(TRICKY_INPUTS)) == [detect_input_type(v) for v in TRICKY_INPUTS]
+
+    def test_detect_many_is_lazy(self):
+        results = detect_many(iter(['test@example.com', 'example.com']))
+        assert next(results) == ('email', 'email')
+        assert next(results) == ('domain', 'domain')
+
+
+class TestDetectCandidates:
+    """Test ranked multi-label detection."""
+
+    def test_ambiguous_domain_or_username(self):
+        candidates = detect_candidates('abc.io')
+        assert [c.module_type for c in candidates] == ['domain', 'username']
+        assert candidates[0].confidence > candidates[1].confidence
+
+    def test_unknown_tld_scores_lower(self):
+        assert detect_candidates('abc.zz')[0].confidence < detect_candidates('abc.io')[0].confidence
+
+    def test_failed_checksum_is_down_ranked(self):
+        valid = detect_candidates('1A1zP1eP5QGefi2DMPTfTL5SLmv7DivfNa')
+        typo = detect_candidates('1A1zP1eP5QGefi2DMPTfTL5SLmv7DivfNb')
+        assert valid[0].specific_type == 'btc_legacy'
+        assert typo[0].specific_type == 'username'
+
+    def test_plain_username(self):
+        assert detect_candidates('hackerman123') == [('username', 'username', 0.9)]
+
+    def test_min_confidence(self):
+        assert [c.module_type for c in detect_candidates('9876543210', min_confidence=0.25)] == ['phone']
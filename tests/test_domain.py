@@ -0,0 +1,229 @@
+"""Tests for the domain module's certificate log ingestion and grouping."""
+
+import asyncio
+import json
+
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+from cybertrace.config import Config
+from cybertrace.modules.base import SourceResult
+from cybertrace.modules.domain_module import CertificateStats, DomainModule
+from cybertrace.utils import JSONArrayDecoder
+
+from .test_resolver import start_stub, stub_resolver
+
+
+def make_certs(count: int):
+    for i in range(count):
+        yield {
+            'id': i,
+            'issuer_name': 'C=US, O=Let\'s Encrypt, CN=R3' if i % 3 else 'C=BE, O=GlobalSign nv-sa, CN=GS',
+            'common_name': f'host{i % 500}.example.com',
+            'name_value': f'host{i % 500}.example.com\n*.dev{i % 7}.example.com\nother.test',
+            'not_before': f'2020-01-01T00:00:{i % 60:02d}' if i != count - 1 else '2024-06-01T00:00:00',
+            'not_after': '2099-01-01T00:00:00' if i % 2 else '2021-01-01T00:00:00',
+        }
+
+
+class TestJSONArrayDecoder:
+    """Test incremental array decoding."""
+
+    def test_any_chunking(self):
+        items = [{'a': i, 's': '],}[{"'} for i in range(200)] + [12345, 'x', None]
+        raw = json.dumps(items, ensure_ascii=False).encode()
+        for size in (1, 3, 64, len(raw)):
+            decoder = JSONArrayDecoder()
+            decoded = []
+            for start in range(0, len(raw), size):
+                decoded += decoder.feed(raw[start:start + size])
+            decoder.close()
+            assert decoded == items
+
+    def test_truncated(self):
+        decoder = JSONArrayDecoder()
+        assert decoder.feed(b'[{"a": 1}, {"b"') == [{'a': 1}]
+        with pytest.raises(ValueError):
+            decoder.close()
+
+
+class TestCertificateStats:
+    """Test aggregation of certificate entries."""
+
+    def test_aggregates(self):
+        stats = CertificateStats('example.com')
+        for cert in make_certs(3000):
+            stats.add(cert)
+        data = stats.to_dict()
+
+        assert data['certificate_count'] == 3000
+        assert data['subdomain_count'] == 507
+        assert 'other.test' not in data['subdomains']
+        assert data['wildcard_roots'] == [f'dev{i}.example.com' for i in range(7)]
+        assert data['issuers'] == {"Let's Encrypt": 2000, 'GlobalSign nv-sa': 1000}
+        assert data['validity']['currently_valid'] == 1500
+        assert data['validity']['last_expiry'] == '2099-01-01T00:00:00'
+        assert len(data['recent_certs']) == 10
+        assert data['recent_certs'][0]['not_before'] == '2024-06-01T00:00:00'
+
+
+class TestCrtshSource:
+    """Test streaming a crt.sh response into the source result."""
+
+    def run_source(self, handler):
+        async def check():
+            app = web.Application()
+            app.router.add_get('/', handler)
+            server = TestServer(app)
+            await server.start_server()
+            try:
+                async with DomainModule(config=Config()) as module:
+                    module.CRTSH_URL = str(server.make_url('/')) + '?q={domain}'
+                    return await module._check_crtsh('example.com')
+            finally:
+                await server.close()
+
+        return asyncio.run(check())
+
+    def test_streamed_response(self):
+        async def handler(request):
+            resp = web.StreamResponse()
+            await resp.prepare(request)
+            await resp.write(b'[')
+            for i, cert in enumerate(make_certs(20000)):
+                await resp.write((b',' if i else b'') + json.dumps(cert).encode())
+            await resp.write(b']')
+            return resp
+
+        result = self.run_source(handler)
+        assert result.success
+        assert result.data['certificate_count'] == 20000
+        assert result.data['subdomain_count'] == 507
+        assert 'partial' not in result.data
+
+    def test_cut_off_response_keeps_partial_data(self):
+        async def handler(request):
+            body = json.dumps(list(make_certs(100))).encode()
+            resp = web.StreamResponse()
+            await resp.prepare(request)
+            await resp.write(body[:len(body) // 2])
+            return resp
+
+        result = self.run_source(handler)
+        assert result.success
+        assert result.data['partial']
+        assert 0 < result.data['certificate_count'] < 100
+
+    def test_http_error(self):
+        async def handler(request):
+            return web.Response(status=502)
+
+        result = self.run_source(handler)
+        assert not result.success
+        assert '502' in result.error
+
+
+@pytest.fixture
+def source_calls(monkeypatch):
+    """Replace the domain module's network sources with recording stubs."""
+    calls = []
+
+    def stub(source):
+        async def run(self, domain, *args):
+            calls.append((source, domain))
+            await asyncio.sleep(0.01)
+            return SourceResult(source=source, success=True, data={'subdomains': [], 'domain': domain})
+        return run
+
+    for source, method in [('dns_records', '_get_dns_records'), ('crtsh', '_check_crtsh'),
+                           ('whois', '_get_whois')]:
+        monkeypatch.setattr(DomainModule, method, stub(source))
+    return calls
+
+
+class TestRegistrableGrouping:
+    """Test that shared sources run once per registrable domain."""
+
+    def test_search_many_shares_sources(self, source_calls):
+        targets = ['a.example.co.uk', 'https://b.example.co.uk/x', 'example.co.uk', 'other.org', 'a.example.co.uk']
+        results = asyncio.run(DomainModule(config=Config()).search_many(targets))
+
+        assert [r.target for r in results] == [
+            'a.example.co.uk', 'b.example.co.uk', 'example.co.uk', 'other.org', 'a.example.co.uk'
+        ]
+        assert sorted(c for c in source_calls if c[0] != 'dns_records') == [
+            ('crtsh', 'example.co.uk'), ('crtsh', 'other.org'),
+            ('whois', 'example.co.uk'), ('whois', 'other.org'),
+        ]
+        assert sorted(d for s, d in source_calls if s == 'dns_records') == [
+            'a.example.co.uk', 'b.example.co.uk', 'example.co.uk', 'other.org'
+        ]
+        assert results[1].sources['whois'] is results[0].sources['whois']
+        assert list(results[1].sources) == ['dns_records', 'crtsh', 'whois']
+        assert results[1].summary['registrable_domain'] == 'example.co.uk'
+
+    def test_single_search_uses_registrable_domain(self, source_calls):
+        result = asyncio.run(DomainModule(config=Config()).search('www.example.com'))
+        assert ('whois', 'example.com') in source_calls
+        assert ('dns_records', 'www.example.com') in source_calls
+        assert result.summary['domain'] == 'www.example.com'
+
+
+class TestDeepScan:
+    """Test that only a deep scan connects to the target's hosts."""
+
+    def test_tls_and_fingerprint_need_deep(self, source_calls, monkeypatch):
+        async def dns_records(self, domain):
+            return SourceResult(source='dns_records', success=True, data={'A': ['192.0.2.1']})
+
+        def stub(source):
+            async def run(self, *args):
+                source_calls.append((source, args[-1]))
+                return SourceResult(source=source, success=True, data={'subdomains': {}})
+            return run
+
+        monkeypatch.setattr(DomainModule, '_get_dns_records', dns_records)
+        for source, method in [('subdomain_dns', '_resolve_subdomains'),
+                               ('tls_certs', '_harvest_certificates'),
+                               ('http_fingerprint', '_fingerprint_hosts')]:
+            monkeypatch.setattr(DomainModule, method, stub(source))
+
+        async def search(**options):
+            return await DomainModule(config=Config()).search('example.com', **options)
+
+        result = asyncio.run(search())
+        assert 'tls_certs' not in result.sources and 'http_fingerprint' not in result.sources
+        assert not [c for c in source_calls if c[0] in ('tls_certs', 'http_fingerprint')]
+
+        result = asyncio.run(search(deep=True))
+        assert result.sources['tls_certs'].success and result.sources['http_fingerprint'].success
+        assert ('tls_certs', [('example.com', '192.0.2.1')]) in source_calls
+        assert ('http_fingerprint', ['example.com']) in source_calls
+
+
+class TestPermutations:
+    """Test finding registered lookalikes through bulk resolution."""
+
+    def test_registered_lookalikes(self, source_calls, monkeypatch):
+        async def check():
+            transport, stub, port = await start_stub()
+            resolver = stub_resolver(port, qps=0)
+            monkeypatch.setattr('cybertrace.resolver.get_resolver', lambda config=None: resolver)
+            try:
+                return await DomainModule(config=Config())._check_permutations('www.example.test')
+            finally:
+                transport.close()
+
+        result = asyncio.run(check())
+        registered = result.data['registered']
+
+        assert result.success
+        assert result.data['checked_count'] > 200
+        # exam.ple.test only answers through the *.ple.test wildcard
+        assert sorted(registered) == ['examp1e.test', 'exarnple.test']
+        assert registered['exarnple.test']['fuzzer'] == 'homoglyph'
+        assert registered['examp1e.test']['AAAA'] == ['2001:db8::61']
+        assert 'ple.test' in result.data['wildcard_zones']
+        # Only the hits get the regular sources
+        assert sorted(d for s, d in source_calls if s == 'whois') == ['examp1e.test', 'exarnple.test']
+        assert registered['exarnple.test']['summary']['domain'] == 'exarnple.test'
@@ -0,0 +1,130 @@
+"""Tests for indicator extraction."""
+
+import io
+import json
+
+from click.testing import CliRunner
+from cybertrace.cli import cli
+from cybertrace.detector import detect_input_type
+from cybertrace.extractor import extract_file, extract_files, extract_stream, extract_text
+from cybertrace.modules.base import ModuleResult
+from cybertrace.runner import Engine
+
+SAMPLE = """\
+2024-01-01 login admin@example.com from 192.168.1.1 (see https://evil.example.org/a?b=1).
+Send 0.5 BTC to 1A1zP1eP5QGefi2DMPTfTL5SLmv7DivfNa, not 1A1zP1eP5QGefi2DMPTfTL5SLmv7DivfNb.
+ETH 0x5aAeb6053F3E94C9b9A09f33669435E7Ef1BeAed; mirror at
+duckduckgogg42xjoc72x3sjasowoarfbgcmvfimaftt6twagswzczad.onion
+Call +91 98765 43210 or +14155552671. GSTIN 27AAPFU0939F1ZV, Aadhaar 2341 2341 2346.
+Car MH12AB1234, not XX12AB1234. Attached: notes.txt, again ADMIN@EXAMPLE.COM and 09876543210.
+"""
+
+
+def found(indicators):
+    return [(i.specific_type, i.value) for i in indicators]
+
+
+class TestExtractText:
+    """Test what is extracted from free text."""
+
+    def test_sample(self):
+        assert found(extract_text(SAMPLE)) == [
+            ('email', 'admin@example.com'),
+            ('ipv4', '192.168.1.1'),
+            ('url', 'https://evil.example.org/a?b=1'),
+            ('btc_legacy', '1A1zP1eP5QGefi2DMPTfTL5SLmv7DivfNa'),
+            ('ethereum', '0x5aAeb6053F3E94C9b9A09f33669435E7Ef1BeAed'),
+            ('onion', 'duckduckgogg42xjoc72x3sjasowoarfbgcmvfimaftt6twagswzczad.onion'),
+            ('phone_indian', '+91 98765 43210'),
+            ('phone_intl', '+14155552671'),
+            ('gstin', '27AAPFU0939F1ZV'),
+            ('aadhaar', '2341 2341 2346'),
+            ('vehicle_indian', 'MH12AB1234'),
+        ]
+
+    def test_no_validate_keeps_bad_checksums(self):
+        values = [i.value for i in extract_text(SAMPLE, validate=False)]
+        assert '1A1zP1eP5QGefi2DMPTfTL5SLmv7DivfNb' in values
+
+    def test_no_dedupe_keeps_repeats(self):
+        emails = [i.value for i in extract_text(SAMPLE, dedupe=False) if i.module_type == 'email']
+        assert emails == ['admin@example.com', 'ADMIN@EXAMPLE.COM']
+
+    def test_non_ascii_url(self):
+        # UTF-8 in a URL must not abort the extraction
+        assert found(extract_text('visit https://exämple.com/path now 8.8.8.8')) == [
+            ('url', 'https://exämple.com/path'), ('ipv4', '8.8.8.8'),
+        ]
+        assert found(extract_text(b'bad https://x\xff\xfe.com/ then 8.8.8.8')) == [('ipv4', '8.8.8.8')]
+
+    def test_compressed_ipv6(self):
+        text = 'hosts 2001:db8::1, ::1 and 1:2:3:4:5:6:7:: but not std::vector or 12:30:45'
+        assert found(extract_text(text)) == [
+            ('ipv6', '2001:db8::1'), ('ipv6', '::1'), ('ipv6', '1:2:3:4:5:6:7::'),
+        ]
+
+    def test_values_redetect_as_extracted(self):
+        for indicator in extract_text(SAMPLE):
+            assert detect_input_type(indicator.value, validate=True) == (
+                indicator.specific_type, indicator.module_type
+            )
+
+
+class TestChunking:
+    """Test that chunked and mapped scans match a single in-memory pass."""
+
+    def corpus(self):
+        lines = [f'user{i}@host{i % 50}.example.com 10.0.{i % 256}.{i % 7} '
+                 f'https://site{i}.example.net/x.y/z ' for i in range(400)]
+        return ''.join(lines).encode()
+
+    def test_stream_chunk_boundaries(self):
+        data = self.corpus()
+        expected = list(extract_text(data, dedupe=False))
+        # Sizes just over MAX_TOKEN leave less than the lookbehind context
+        # before the first cut
+        for chunk_size in (1, 100, 1000, 2050, 2053, 2064, 2500, 4097, 10000):
+            assert list(extract_stream(io.BytesIO(data), dedupe=False, chunk_size=chunk_size)) == expected
+
+    def test_mapped_file_windows(self, tmp_path):
+        data = self.corpus()
+        path = tmp_path / 'dump.txt'
+        path.write_bytes(data)
+        assert list(extract_file(path, dedupe=False, chunk_size=3000)) == list(
+            extract_text(data, dedupe=False)
+        )
+
+    def test_dedupe_across_files(self, tmp_path):
+        first, second, empty = tmp_path / 'a.txt', tmp_path / 'b.txt', tmp_path / 'c.txt'
+        first.write_text('a@example.com b@example.com')
+        second.write_text('B@example.com c@example.com')
+        empty.write_text('')
+        assert [i.value for i in extract_files([first, empty, second])] == [
+            'a@example.com', 'b@example.com', 'c@example.com'
+        ]
+
+
+class TestExtractCommand:
+    """Test the extract CLI command."""
+
+    def test_json_output_with_type_filter(self, tmp_path):
+        path = tmp_path / 'dump.txt'
+        path.write_text(SAMPLE)
+        result = CliRunner().invoke(cli, ['extract', str(path), '-t', 'phone', '-o', 'json'])
+        assert result.exit_code == 0, result.output
+        rows = [json.loads(line) for line in result.output.splitlines()]
+        assert [row['value'] for row in rows] == ['+91 98765 43210', '+14155552671']
+
+    def test_batch(self, tmp_path, monkeypatch):
+        async def fake_investigate(self, target, input_type='auto', **options):
+            return ModuleResult(target=target, target_type='fake', module='fake')
+
+        monkeypatch.setattr(Engine, 'investigate', fake_investigate)
+        out = tmp_path / 'out.jsonl'
+        result = CliRunner().invoke(
+            cli, ['extract', '-', '-t', 'email', '--batch', str(out), '-q'], input=SAMPLE
+        )
+        assert result.exit_code == 0, result.output
+        assert [json.loads(line)['input'] for line in out.read_text().splitlines()] == [
+            'admin@example.com'
+        ]
@@ -0,0 +1,144 @@
+"""Tests for HTTP fingerprinting."""
+
+import asyncio
+
+import aiohttp
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+from cybertrace import fingerprint
+from cybertrace.config import Config
+from cybertrace.fingerprint import HTTPFingerprinter, favicon_hash, murmur3_32, parse_head
+
+ICON = bytes(range(256)) * 4
+BIG_ICON = bytes(range(256)) * 40
+
+
+class TestHelpers:
+    """Test hashing and head parsing."""
+
+    def test_murmur3_matches_mmh3(self):
+        assert murmur3_32(b'') == 0
+        assert murmur3_32(b'foo') == -156908512
+        assert murmur3_32(b'hello world') == 1586663183
+
+    def test_favicon_hash_uses_base64_lines(self):
+        import base64
+        assert favicon_hash(ICON) == murmur3_32(base64.encodebytes(ICON))
+
+    def test_parse_head(self):
+        head = (b'<html><head><meta charset="iso-8859-1"><TITLE>\n Caf\xe9 &amp;\n Bar </TITLE>'
+                b"<link rel='shortcut icon' href=/static/i.png></head>")
+        assert parse_head(head) == {'title': 'Café & Bar', 'icon': '/static/i.png'}
+        assert parse_head(b'<html><body>no title') == {'title': None, 'icon': None}
+
+
+@pytest.fixture
+def site():
+    """A local site with a redirect, a title early in a large page and a favicon."""
+    streamed = []
+
+    async def root(request):
+        raise web.HTTPFound('/home')
+
+    async def home(request):
+        resp = web.StreamResponse(headers={'Server': 'nginx/1.25', 'Content-Type': 'text/html'})
+        await resp.prepare(request)
+        await resp.write(b'<html><head><title>Example Home</title>')
+        await resp.write(b'<link rel="icon" href="/icon.png"></head><body>')
+        try:
+            for _ in range(1000):
+                await resp.write(b'x' * 1024)
+                streamed.append(1)
+                await asyncio.sleep(0)
+        except (ConnectionError, asyncio.CancelledError):
+            pass
+        return resp
+
+    async def icon(request):
+        # Sent in small writes, so the client sees it arrive in pieces
+        resp = web.StreamResponse(headers={'Content-Type': 'image/png'})
+        await resp.prepare(request)
+        for i in range(0, len(BIG_ICON), 1024):
+            await resp.write(BIG_ICON[i:i + 1024])
+            await asyncio.sleep(0.01)
+        return resp
+
+    async def small_icon(request):
+        return web.Response(body=ICON, content_type='image/png')
+
+    async def huge_icon(request):
+        return web.Response(body=b'\0' * (fingerprint.MAX_FAVICON_BYTES + 1), content_type='image/png')
+
+    app = web.Application()
+    app.router.add_get('/', root)
+    app.router.add_get('/home', home)
+    app.router.add_get('/icon.png', icon)
+    app.router.add_get('/small.ico', small_icon)
+    app.router.add_get('/huge.ico', huge_icon)
+    return app, streamed
+
+
+class TestHTTPFingerprinter:
+    """Test fingerprints against a local server."""
+
+    def test_pool_follows_config(self, monkeypatch):
+        monkeypatch.setattr(fingerprint, '_scheduler', None)
+        config = Config(fingerprint_concurrency=7, fingerprint_host_rate=0)
+        fingerprinter = HTTPFingerprinter(None, config)
+        assert fingerprinter.scheduler.max_concurrent == 7
+        assert fingerprinter.scheduler.host_rate is None
+        # Without a config of its own, a fingerprinter shares the process-wide pool
+        assert HTTPFingerprinter(None).scheduler is fingerprint.get_fingerprint_scheduler()
+
+    def test_fingerprint(self, site):
+        app, streamed = site
+
+        async def check():
+            server = TestServer(app)
+            await server.start_server()
+            try:
+                async with aiohttp.ClientSession() as session:
+                    fingerprinter = HTTPFingerprinter(session, Config(fingerprint_timeout=5, fingerprint_host_rate=0))
+                    return await fingerprinter.fingerprint_many(
+                        [f'127.0.0.1:{server.port}', '127.0.0.1:1']
+                    )
+            finally:
+                await server.close()
+
+        results = asyncio.run(check())
+        fp = [value for host, value in results.items() if not host.endswith(':1')][0]
+
+        # HTTPS fails against the plain server, so HTTP is used
+        assert fp['url'].startswith('http://') and fp['url'].endswith('/home')
+        assert fp['redirects'][0]['status'] == 302
+        assert fp['status'] == 200
+        assert fp['server'] == 'nginx/1.25'
+        assert fp['title'] == 'Example Home'
+        assert fp['favicon_hash'] == favicon_hash(BIG_ICON)
+        assert fp['favicon_url'].endswith('/icon.png')
+        # Reading stopped after the title, long before the page ended
+        assert fp['bytes_read'] < 8192
+        assert len(streamed) < 1000
+        assert 'error' in results['127.0.0.1:1']
+
+    def test_favicon_is_read_whole(self, site):
+        app, _ = site
+
+        async def check():
+            server = TestServer(app)
+            await server.start_server()
+            try:
+                async with aiohttp.ClientSession() as session:
+                    fingerprinter = HTTPFingerprinter(session, Config(fingerprint_timeout=5, fingerprint_host_rate=0))
+                    base = f'http://127.0.0.1:{server.port}'
+                    return [await fingerprinter._favicon(base + path)
+                            for path in ('/icon.png', '/small.ico', '/huge.ico')]
+            finally:
+                await server.close()
+
+        streamed, small, huge = asyncio.run(check())
+        assert streamed['favicon_hash'] == favicon_hash(BIG_ICON)
+        assert small['favicon_hash'] == favicon_hash(ICON)
+        # Too large to hash in full, so no hash rather than a wrong one
+        assert huge == {}
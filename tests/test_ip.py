@@ -0,0 +1,116 @@
+"""Tests for the IP module and the result store's IP index."""
+
+import asyncio
+
+import pytest
+from cybertrace import ipasn
+from cybertrace.config import Config
+from cybertrace.modules import get_module
+from cybertrace.modules.base import ModuleResult, SourceResult
+from cybertrace.modules.ip_module import IPModule
+from cybertrace.store import ResultStore
+from cybertrace.whois_client import RDAPClient
+
+from .test_resolver import start_stub, stub_resolver
+
+
+def domain_result(target: str, ips) -> ModuleResult:
+    result = ModuleResult(target=target, target_type='domain', module='domain')
+    result.sources['dns_records'] = SourceResult(
+        source='dns_records', success=True, data={'A': list(ips)}
+    )
+    return result
+
+
+class TestResultStoreIPIndex:
+    """Test finding stored results by the IP addresses they mention."""
+
+    def test_find_ip(self, tmp_path):
+        store = ResultStore(tmp_path / 'results.db')
+        store.save('a', domain_result('a.example', ['192.0.2.1', '2001:DB8::0:1']))
+        store.save('b', domain_result('b.example', ['192.0.2.1']))
+        store.save('c', domain_result('c.example', ['not-an-ip', '999.1.1.1']))
+
+        assert {hit['target'] for hit in store.find_ip('192.0.2.1')} == {'a.example', 'b.example'}
+        assert [hit['key'] for hit in store.find_ip('2001:db8::1')] == ['a']
+        assert store.find_ip('999.1.1.1') == []
+
+        # Replacing a result replaces its index entries
+        store.save('b', domain_result('b.example', ['192.0.2.9']))
+        assert [hit['key'] for hit in store.find_ip('192.0.2.1')] == ['a']
+        store.close()
+
+
+class TestIPModule:
+    """Test the IP module's sources against local stand-ins."""
+
+    @pytest.fixture
+    def module(self, tmp_path, monkeypatch):
+        config = Config(data_dir=tmp_path, cache_dir=tmp_path / 'cache', ipasn_db=tmp_path / 'none.db')
+        monkeypatch.setattr(ipasn, '_db', None)
+        monkeypatch.setattr(RDAPClient, '_ip_bootstrap', None)
+
+        store = ResultStore(tmp_path / 'results.db')
+        store.save('job-1', domain_result('example.test', ['192.0.2.1']))
+        store.close()
+
+        module = IPModule(config=config)
+        self.fetched = []
+
+        async def fetch_json(url, **kwargs):
+            self.fetched.append(url)
+            if url.endswith('/ipv4.json'):
+                return {'services': [[['8.0.0.0/8'], ['https://rdap.example/']]]}
+            if url.endswith('/ipv6.json'):
+                return {'services': []}
+            if url == 'https://rdap.example/ip/8.8.8.8':
+                return {'objectClassName': 'ip network', 'handle': 'NET-8-8-8-0-2',
+                        'name': 'GOGL', 'country': 'US',
+                        'cidr0_cidrs': [{'v4prefix': '8.8.8.0', 'length': 24}]}
+            return None
+
+        monkeypatch.setattr(module, 'fetch_json', fetch_json)
+        return module
+
+    def search(self, module, monkeypatch, target):
+        async def check():
+            transport, stub, port = await start_stub()
+            resolver = stub_resolver(port)
+            monkeypatch.setattr('cybertrace.resolver.get_resolver', lambda config=None: resolver)
+            try:
+                return await module.search(target)
+            finally:
+                transport.close()
+
+        return asyncio.run(check())
+
+    def test_registry_routes_ips_here(self):
+        assert isinstance(get_module('ipv4'), IPModule)
+        assert isinstance(get_module('ipv6'), IPModule)
+
+    def test_reserved_address(self, module, monkeypatch):
+        result = self.search(module, monkeypatch, '192.0.2.1')
+        summary = result.summary
+
+        assert summary['is_private']
+        assert 'rdap' not in result.sources  # Documentation space is in no registry
+        assert summary['ptr'] == ['example.test']
+        assert summary['forward_confirmed'] == ['example.test']
+        assert summary['seen_in'] == [{'target': 'example.test', 'module': 'domain'}]
+        assert result.related == ['example.test']
+
+    def test_unconfirmed_ptr(self, module, monkeypatch):
+        result = self.search(module, monkeypatch, '192.0.2.9')
+        assert sorted(result.summary['ptr']) == ['example.test', 'spoofed.example.test']
+        assert result.summary['forward_confirmed'] == []
+        assert not result.sources['stored_results'].success
+
+    def test_public_address(self, module, monkeypatch):
+        result = self.search(module, monkeypatch, '8.8.8.8')
+        summary = result.summary
+
+        assert not summary['is_private']
+        assert summary['network'] == {'handle': 'NET-8-8-8-0-2', 'name': 'GOGL', 'cidr': ['8.8.8.0/24']}
+        assert summary['country'] == 'US'
+        assert not result.sources['reverse_dns'].success
+        assert 'ip_asn' not in result.sources
@@ -0,0 +1,96 @@
+"""Tests for the offline IP-to-ASN table."""
+
+import asyncio
+import gzip
+
+import pytest
+from click.testing import CliRunner
+from cybertrace import ipasn
+from cybertrace.cli import cli
+from cybertrace.config import Config
+from cybertrace.ipasn import IPASNDatabase, compile_database
+from cybertrace.modules.base import ModuleResult, SourceResult
+from cybertrace.modules.domain_module import DomainModule
+
+TSV = """\
+1.0.0.0\t1.0.0.255\t13335\tUS\tCLOUDFLARENET
+1.0.1.0\t1.0.3.255\t0\tNone\tNot routed
+8.8.8.0\t8.8.8.127\t15169\tUS\tGOOGLE
+8.8.8.128\t8.8.8.255\t15169\tUS\tGOOGLE
+2001:db8::\t2001:db8:0:ffff:ffff:ffff:ffff:ffff\t64500\tDE\tEXAMPLE-V6
+2001:db8:1::\t2001:db8:1::ff\t64501\tFR\tTINY-V6
+2001:db8:1::100\t2001:db8:1::1ff\t64502\tFR\tTINY-V6-B
+"""
+
+U32 = "3232235520\t3232301055\t64496\tIN\tPRIVATE-TEST\n"  # 192.168.0.0-192.168.255.255
+
+
+@pytest.fixture
+def db(tmp_path):
+    (tmp_path / 'ip2asn.tsv').write_text(TSV)
+    with gzip.open(tmp_path / 'ip2asn-v4-u32.tsv.gz', 'wt') as f:
+        f.write(U32)
+    counts = compile_database([tmp_path / 'ip2asn.tsv', tmp_path / 'ip2asn-v4-u32.tsv.gz'], tmp_path / 'ipasn.db')
+    assert counts == {'ipv4_ranges': 3, 'ipv6_ranges': 3, 'as_records': 6}
+    database = IPASNDatabase(tmp_path / 'ipasn.db')
+    yield database
+    database.close()
+
+
+class TestIPASNDatabase:
+    """Test compiling and range lookups."""
+
+    def test_ipv4(self, db):
+        assert db.lookup('1.0.0.1') == {
+            'asn': 13335, 'as_name': 'CLOUDFLARENET', 'country': 'US', 'range': '1.0.0.0-1.0.0.255'
+        }
+        # Adjacent ranges of one AS are merged
+        assert db.lookup('8.8.8.200')['range'] == '8.8.8.0-8.8.8.255'
+        assert db.lookup('192.168.10.1')['country'] == 'IN'
+        assert db.lookup('::ffff:1.0.0.1')['asn'] == 13335
+
+    def test_ipv6(self, db):
+        assert db.lookup('2001:db8::1')['asn'] == 64500
+        assert db.lookup('2001:db8:1::80')['asn'] == 64501
+        assert db.lookup('2001:db8:1::180')['asn'] == 64502
+        assert db.lookup('2001:db8:1::2ff') is None
+
+    def test_misses(self, db):
+        assert db.lookup('1.0.2.1') is None  # Not routed
+        assert db.lookup('0.0.0.1') is None
+        assert db.lookup('255.255.255.255') is None
+        assert db.lookup('not-an-ip') is None
+
+    def test_rejects_other_files(self, tmp_path):
+        (tmp_path / 'bogus.db').write_bytes(b'\0' * 64)
+        with pytest.raises(ValueError):
+            IPASNDatabase(tmp_path / 'bogus.db')
+
+    def test_cli_compile(self, tmp_path):
+        (tmp_path / 'ip2asn.tsv').write_text(TSV)
+        result = CliRunner().invoke(cli, ['ipdb', 'compile', str(tmp_path / 'ip2asn.tsv'),
+                                          '-o', str(tmp_path / 'out.db')])
+        assert result.exit_code == 0, result.output
+        assert '2 IPv4 and 3 IPv6 ranges' in result.output
+
+
+class TestDomainEnrichment:
+    """Test annotation of the IPs in a domain result."""
+
+    def test_ips_are_annotated(self, db, monkeypatch):
+        monkeypatch.setattr(ipasn, '_db', db)
+        module = DomainModule(config=Config())
+        result = ModuleResult(target='example.test', target_type='domain', module='domain')
+        result.sources['dns_records'] = SourceResult(
+            source='dns_records', success=True,
+            data={'A': ['8.8.8.8', '1.0.0.1', '203.0.113.9'], 'AAAA': ['2001:db8::1']},
+        )
+
+        source = asyncio.run(module._get_ip_asn(result))
+        assert sorted(source.data['ips']) == ['1.0.0.1', '2001:db8::1', '8.8.8.8']
+        assert [entry['asn'] for entry in source.data['asns']] == [15169, 13335, 64500]
+
+        result.sources['ip_asn'] = source
+        summary = module._build_summary(result)
+        assert summary['asns'][0] == 'AS15169 GOOGLE'
+        assert summary['countries'] == ['DE', 'US']
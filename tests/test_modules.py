@@ -1,9 +1,15 @@
 """Tests for OSINT modules."""
 
+import asyncio
+import os
+import subprocess
+import sys
+
 import pytest
 from cybertrace.modules import (
     get_module,
     list_modules,
+    BUILTIN_MODULES,
     MODULE_REGISTRY,
     TYPE_TO_MODULE,
     BitcoinModule,
@@ -13,7 +19,7 @@ from cybertrace.modules import (
     DarkwebModule,
     IndianModule,
 )
-from cybertrace.modules.base import ModuleResult, SourceResult
+from cybertrace.modules.base import ModuleResult, SourceResult, event_listener
 
 
 class TestModuleRegistry:
@@ -47,6 +53,46 @@ class TestModuleRegistry:
         assert 'bitcoin' in modules
         assert 'domain' in modules
 
+    def test_builtin_specs_match_classes(self):
+        for name, spec in BUILTIN_MODULES.items():
+            cls = MODULE_REGISTRY[name]
+            assert spec.description == cls.description
+            assert spec.supported_types == frozenset(cls.supported_types)
+
+    def test_list_modules_is_import_free(self):
+        code = (
+            "import sys; import cybertrace.cli; from cybertrace.modules import list_modules; "
+            "list_modules(); print('aiohttp' in sys.modules)"
+        )
+        out = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True)
+        assert out.stdout.strip() == 'False'
+
+    def test_entry_point_plugins_are_cached(self, tmp_path, monkeypatch):
+        import cybertrace.modules as registry
+        from cybertrace.config import config
+
+        class FakeEntryPoint:
+            name = 'fakeplugin'
+            value = 'cybertrace.modules.email_module:EmailModule'
+            dist = None
+            loads = 0
+
+            def load(self):
+                FakeEntryPoint.loads += 1
+                return EmailModule
+
+        monkeypatch.setattr(config, 'cache_dir', tmp_path)
+        monkeypatch.setattr(registry, '_iter_entry_points',
+                            lambda: iter([(FakeEntryPoint(), 'fake==1.0')]))
+        monkeypatch.setattr(registry, '_plugins', None)
+
+        assert registry.discover_plugins()['fakeplugin'].description == EmailModule.description
+        assert registry.discover_plugins(refresh=False) is registry.discover_plugins()
+        registry._plugins = None
+        assert 'fakeplugin' in list_modules()
+        assert FakeEntryPoint.loads == 1  # Second discovery came from the manifest
+        assert isinstance(get_module('fakeplugin'), EmailModule)
+
 
 class TestBitcoinModule:
     """Test Bitcoin module."""
@@ -87,6 +133,93 @@ class TestUsernameModule:
         assert 'twitter' in module.KEY_PLATFORMS
         assert 'reddit' in module.KEY_PLATFORMS
 
+    def test_parse_found_line(self):
+        parse = UsernameModule._parse_found_line
+        assert parse('[+] GitHub: https://github.com/alice\n') == {
+            'site': 'GitHub', 'url': 'https://github.com/alice',
+        }
+        assert parse('\x1b[1m[+]\x1b[0m Reddit: https://www.reddit.com/user/alice') == {
+            'site': 'Reddit', 'url': 'https://www.reddit.com/user/alice',
+        }
+        assert parse('[*] Checking username alice on:') is None
+        assert parse('[-] Twitter: Not Found!') is None
+
+
+@pytest.fixture
+def fake_tool(tmp_path, monkeypatch):
+    """Install an executable that prints the given lines, then hangs."""
+    monkeypatch.setenv('PATH', str(tmp_path) + os.pathsep + os.environ.get('PATH', ''))
+
+    def install(name, lines, hang=True):
+        script = tmp_path / name
+        script.write_text(
+            f'#!{sys.executable}\n'
+            'import sys, time\n'
+            f'for line in {lines!r}:\n'
+            '    print(line, flush=True)\n'
+            '    time.sleep(0.05)\n'
+            + ('time.sleep(60)\n' if hang else '')
+        )
+        script.chmod(0o755)
+
+    return install
+
+
+class TestUsernameTools:
+    """Test streaming Maigret/Sherlock output."""
+
+    def run(self, module, coro_fn, username='alice'):
+        events = []
+
+        async def run():
+            token = event_listener.set(lambda event, payload: events.append((event, payload)))
+            try:
+                return await coro_fn(module, username)
+            finally:
+                event_listener.reset(token)
+
+        return asyncio.run(run()), events
+
+    def test_timeout_keeps_partial_results(self, fake_tool, monkeypatch):
+        fake_tool('maigret', [
+            '[*] Checking username alice on:',
+            '[+] GitHub: https://github.com/alice',
+            '[-] Twitter: Not Found!',
+            '[+] Reddit: https://www.reddit.com/user/alice',
+        ])
+        monkeypatch.setattr(UsernameModule, 'TOOL_TIMEOUT', 1)
+
+        result, events = self.run(UsernameModule(), UsernameModule._run_maigret)
+
+        assert result.success
+        assert result.data['partial'] is True
+        assert [site['site'] for site in result.data['found']] == ['GitHub', 'Reddit']
+        # Each find was streamed as it arrived
+        partial = [payload for event, payload in events if event == 'source_partial']
+        assert [p['result']['data']['found_count'] for p in partial] == [1, 2]
+        assert partial[0]['source'] == 'maigret'
+
+    def test_timeout_without_finds(self, fake_tool, monkeypatch):
+        fake_tool('sherlock', ['[*] Checking username alice on:'])
+        monkeypatch.setattr(UsernameModule, 'TOOL_TIMEOUT', 0.5)
+
+        result, _ = self.run(UsernameModule(), UsernameModule._run_sherlock)
+
+        assert not result.success
+        assert 'timed out' in result.error
+
+    def test_sherlock_completes(self, fake_tool):
+        fake_tool('sherlock', [
+            '[+] GitHub: https://github.com/alice',
+            '[+] GitHub: https://github.com/alice',
+        ], hang=False)
+
+        result, _ = self.run(UsernameModule(), UsernameModule._run_sherlock)
+
+        assert result.success
+        assert 'partial' not in result.data
+        assert result.data['found'] == [{'site': 'GitHub', 'url': 'https://github.com/alice'}]
+
 
 class TestDomainModule:
     """Test Domain module."""
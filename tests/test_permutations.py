@@ -0,0 +1,40 @@
+"""Tests for lookalike domain generation."""
+
+import pytest
+from cybertrace.permutations import FUZZERS, permutations
+
+
+class TestPermutations:
+    """Test the permutation generator."""
+
+    def test_fuzzers(self):
+        found = {p.domain: p.fuzzer for p in permutations('shop.example.co.uk')}
+
+        assert found['exmaple.co.uk'] == 'transposition'
+        assert found['exampe.co.uk'] == 'omission'
+        assert found['examp1e.co.uk'] == 'homoglyph'
+        assert found['exarnple.co.uk'] == 'homoglyph'
+        assert found['exa-mple.co.uk'] == 'hyphenation'
+        assert found['ex.ample.co.uk'] == 'subdomain'
+        assert found['example.com'] == 'tld_swap'
+        assert 'example.co.uk' not in found
+        # Non-Latin look-alikes come out as punycode
+        assert 'xn--xample-2of.co.uk' in found
+
+    def test_unique_valid_names(self):
+        names = [p.domain for p in permutations('example.com')]
+        assert len(names) == len(set(names))
+        for name in names:
+            assert name.isascii() and name == name.lower()
+            assert all(label and not label.startswith('-') and not label.endswith('-')
+                       for label in name.split('.'))
+
+    def test_selected_fuzzers(self):
+        fuzzers = {p.fuzzer for p in permutations('example.com', fuzzers=['omission', 'tld_swap'],
+                                                  suffixes=['net'])}
+        assert fuzzers == {'omission', 'tld_swap'}
+        assert set(FUZZERS) > {'omission', 'bitsquatting', 'homoglyph'}
+
+    def test_no_registrable_domain(self):
+        with pytest.raises(ValueError):
+            list(permutations('192.0.2.1'))
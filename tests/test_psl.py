@@ -0,0 +1,66 @@
+"""Tests for public suffix lookups."""
+
+from cybertrace.psl import PublicSuffixList, get_public_suffix_list, group_by_registrable
+
+RULES = """\
+// ===BEGIN ICANN DOMAINS===
+com
+uk
+co.uk
+*.ck
+!www.ck
+jp
+kawasaki.jp
+*.kawasaki.jp
+!city.kawasaki.jp
+// ===END ICANN DOMAINS===
+// ===BEGIN PRIVATE DOMAINS===
+github.io
+// ===END PRIVATE DOMAINS===
+""".splitlines()
+
+
+class TestPublicSuffixList:
+    """Test rule matching."""
+
+    def test_rules(self):
+        psl = PublicSuffixList(RULES)
+        assert psl.registrable_domain('a.b.example.co.uk') == 'example.co.uk'
+        assert psl.registrable_domain('EXAMPLE.COM.') == 'example.com'
+        assert psl.registrable_domain('co.uk') is None
+        assert psl.public_suffix('foo.unlisted') == 'unlisted'
+
+    def test_wildcards_and_exceptions(self):
+        psl = PublicSuffixList(RULES)
+        assert psl.registrable_domain('a.b.foo.ck') == 'b.foo.ck'
+        assert psl.registrable_domain('foo.ck') is None
+        assert psl.registrable_domain('a.www.ck') == 'www.ck'
+        assert psl.registrable_domain('x.city.kawasaki.jp') == 'city.kawasaki.jp'
+        assert psl.registrable_domain('x.other.kawasaki.jp') == 'x.other.kawasaki.jp'
+
+    def test_private_section(self):
+        assert PublicSuffixList(RULES).registrable_domain('a.user.github.io') == 'user.github.io'
+        assert PublicSuffixList(RULES, private=False).registrable_domain('a.user.github.io') == 'github.io'
+
+    def test_addresses_have_none(self):
+        psl = PublicSuffixList(RULES)
+        assert psl.registrable_domain('192.0.2.1') is None
+        assert psl.registrable_domain('[2001:db8::1]') is None
+        assert psl.registrable_domain('a..com') is None
+
+
+class TestBundledList:
+    """Test the list shipped with the package."""
+
+    def test_bundled_list(self):
+        psl = get_public_suffix_list()
+        assert psl.rule_count > 5000
+        assert psl.registrable_domain('www.bbc.co.uk') == 'bbc.co.uk'
+        assert psl.registrable_domain('münchen.de') == 'xn--mnchen-3ya.de'
+
+    def test_grouping(self):
+        assert group_by_registrable(['a.example.com', '192.0.2.1', 'b.example.com', 'example.org']) == {
+            'example.com': ['a.example.com', 'b.example.com'],
+            '192.0.2.1': ['192.0.2.1'],
+            'example.org': ['example.org'],
+        }
@@ -0,0 +1,217 @@
+"""Tests for the job queue, result store and worker."""
+
+import asyncio
+
+import pytest
+from cybertrace.modules.base import ModuleResult
+from cybertrace.queue import Job, LeaseLost, SQLiteQueue, open_queue
+from cybertrace.runner import Engine
+from cybertrace.scheduler import BULK, INTERACTIVE, NORMAL
+from cybertrace.store import ResultStore
+from cybertrace.worker import Worker
+
+
+@pytest.fixture
+def queue(tmp_path):
+    q = SQLiteQueue(tmp_path / 'queue.db')
+    yield q
+    q.close()
+
+
+@pytest.fixture
+def store(tmp_path):
+    s = ResultStore(tmp_path / 'results.db')
+    yield s
+    s.close()
+
+
+@pytest.fixture
+def investigate(monkeypatch):
+    """Replace network investigations with a stub that takes `delay` seconds."""
+    state = {'delay': 0.0, 'targets': []}
+
+    async def fake_investigate(self, target, input_type='auto', **options):
+        state['targets'].append(target)
+        await asyncio.sleep(state['delay'])
+        return ModuleResult(target=target, target_type='fake', module='fake')
+
+    monkeypatch.setattr(Engine, 'investigate', fake_investigate)
+    return state
+
+
+class TestSQLiteQueue:
+    """Test lease, ack and retry semantics."""
+
+    def test_lease_empty_queue(self, queue):
+        assert queue.lease(60) is None
+
+    def test_put_and_lease(self, queue):
+        job_id = queue.put(Job(target='example.com'))
+        job = queue.lease(60)
+        assert job.id == job_id
+        assert job.status == 'leased'
+        assert job.attempts == 1
+        assert queue.lease(60) is None
+
+    def test_ack(self, queue):
+        queue.put(Job(target='example.com'))
+        job = queue.lease(60)
+        queue.ack(job)
+        assert queue.get(job.id).status == 'done'
+        assert queue.stats() == {'done': 1}
+
+    def test_expired_lease_is_released(self, queue):
+        queue.put(Job(target='example.com'))
+        first = queue.lease(0)
+        second = queue.lease(60)
+        assert second.id == first.id
+        assert second.attempts == 2
+        with pytest.raises(LeaseLost):
+            queue.ack(first)
+
+    def test_expired_lease_on_last_attempt_fails(self, queue):
+        queue.put(Job(target='example.com', max_attempts=1))
+        queue.lease(0)
+        assert queue.lease(60) is None
+        assert queue.stats() == {'failed': 1}
+
+    def test_fail_retries_then_gives_up(self, queue):
+        queue.put(Job(target='example.com', max_attempts=2))
+        job = queue.lease(60)
+        queue.fail(job, 'boom')
+        assert queue.get(job.id).status == 'queued'
+
+        job = queue.lease(60)
+        queue.fail(job, 'boom again')
+        stored = queue.get(job.id)
+        assert stored.status == 'failed'
+        assert stored.error == 'boom again'
+
+    def test_retry_delay(self, queue):
+        queue.put(Job(target='example.com'))
+        job = queue.lease(60)
+        queue.fail(job, 'boom', retry_delay=60)
+        assert queue.lease(60) is None
+
+    def test_extend(self, queue):
+        queue.put(Job(target='example.com'))
+        job = queue.lease(1)
+        before = job.lease_expires
+        queue.extend(job, 60)
+        assert job.lease_expires > before
+
+    def test_lease_by_priority(self, queue):
+        queue.put(Job(target='bulk.com', priority=BULK))
+        queue.put(Job(target='normal.com', priority=NORMAL))
+        queue.put(Job(target='urgent.com', priority=INTERACTIVE))
+        leased = [queue.lease(60).target for _ in range(3)]
+        assert leased == ['urgent.com', 'normal.com', 'bulk.com']
+
+    def test_options_round_trip(self, queue):
+        queue.put(Job(target='example.com', options={'deep': True}))
+        assert queue.lease(60).options == {'deep': True}
+
+    def test_open_queue_sqlite_url(self, tmp_path):
+        q = open_queue(f'sqlite:///{tmp_path}/q.db')
+        assert isinstance(q, SQLiteQueue)
+        assert q.path == tmp_path / 'q.db'
+        q.close()
+
+
+class TestResultStore:
+    """Test result persistence."""
+
+    def test_save_and_get(self, store):
+        store.save('job1', {'target': 'example.com', 'module': 'domain'})
+        assert store.get('job1')['target'] == 'example.com'
+        assert store.has('job1')
+        assert store.get('missing') is None
+
+    def test_save_replaces(self, store):
+        store.save('job1', {'target': 'a.com'})
+        store.save('job1', {'target': 'b.com'})
+        assert store.count() == 1
+        assert store.get('job1')['target'] == 'b.com'
+
+    def test_find_by_target(self, store):
+        store.save('job1', {'target': 'example.com'})
+        store.save('job2', {'target': 'other.com'})
+        assert [r['target'] for r in store.find('example.com')] == ['example.com']
+
+
+class TestWorker:
+    """Test worker job handling without network access."""
+
+    def test_unsupported_target_fails_without_retry(self, queue, store):
+        queue.put(Job(target='whatever', input_type='nonexistent', max_attempts=3))
+        worker = Worker(queue, store, poll_interval=0)
+        asyncio.run(worker.run(burst=True))
+
+        assert queue.stats() == {'failed': 1}
+        assert worker.failed == 1
+        assert store.count() == 0
+
+    def test_success_is_stored_and_acked(self, queue, store, investigate):
+        job_id = queue.put(Job(target='example.com'))
+        worker = Worker(queue, store, poll_interval=0)
+        asyncio.run(worker.run(burst=True))
+
+        assert investigate['targets'] == ['example.com']
+        assert queue.stats() == {'done': 1}
+        assert worker.processed == 1 and worker.failed == 0
+        assert store.get(job_id)['target'] == 'example.com'
+
+    def test_heartbeat_extends_lease(self, queue, store, investigate, monkeypatch):
+        extended = []
+        extend = queue.extend
+
+        def record_extend(job, seconds):
+            extended.append(job.id)
+            extend(job, seconds)
+
+        monkeypatch.setattr(queue, 'extend', record_extend)
+        # The job outlives its visibility timeout several times over
+        investigate['delay'] = 0.5
+        job_id = queue.put(Job(target='example.com'))
+        worker = Worker(queue, store, visibility_timeout=0.15, poll_interval=0)
+        asyncio.run(worker.run(burst=True))
+
+        assert len(extended) >= 3 and set(extended) == {job_id}
+        assert queue.get(job_id).attempts == 1
+        assert queue.stats() == {'done': 1}
+        assert store.has(job_id)
+
+    def test_lost_lease_is_abandoned(self, queue, store, investigate):
+        investigate['delay'] = 0.5
+        job_id = queue.put(Job(target='example.com'))
+        worker = Worker(queue, store, visibility_timeout=0.15, poll_interval=0)
+
+        async def run():
+            task = asyncio.ensure_future(worker.run(burst=True))
+            await asyncio.sleep(0.02)
+            # Expire the worker's lease and let another worker take the job
+            queue.extend(queue.get(job_id), -1)
+            other = queue.lease(60)
+            await task
+            return other
+
+        other = asyncio.run(run())
+        assert other.id == job_id and other.attempts == 2
+        assert worker.processed == 0 and worker.failed == 0
+        assert not store.has(job_id)
+        # The new owner still holds the job
+        assert queue.get(job_id).lease_token == other.lease_token
+        queue.ack(other)
+        assert queue.stats() == {'done': 1}
+
+    def test_expired_lease_is_requeued_to_worker(self, queue, store, investigate):
+        job_id = queue.put(Job(target='example.com', max_attempts=2))
+        # A previous worker leased the job and died
+        queue.lease(0)
+        worker = Worker(queue, store, poll_interval=0)
+        asyncio.run(worker.run(burst=True))
+
+        assert queue.get(job_id).attempts == 2
+        assert queue.stats() == {'done': 1}
+        assert worker.processed == 1
+        assert store.has(job_id)
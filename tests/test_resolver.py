@@ -0,0 +1,408 @@
+"""Tests for asynchronous DNS resolution."""
+
+import asyncio
+import time
+
+import dns.message
+import dns.rcode
+import dns.rdatatype
+import dns.rrset
+import pytest
+from cybertrace.config import Config
+from cybertrace.modules.domain_module import DomainModule
+from cybertrace.resolver import DNSCache, DNSResolver, decode_response, encode_question
+
+ZONE = {
+    ('example.test', 'A'): ['192.0.2.1', '192.0.2.2'],
+    ('example.test', 'MX'): ['10 mail.example.test.'],
+    ('example.test', 'TXT'): ['"v=spf1 -all"'],
+    ('example.test', 'SOA'): ['ns1.example.test. admin.example.test. 7 3600 600 86400 300'],
+    ('www.example.test', 'CNAME'): ['example.test.'],
+    ('api.example.test', 'AAAA'): ['2001:db8::10'],
+    ('*.wild.example.test', 'A'): ['192.0.2.99'],
+    ('real.wild.example.test', 'A'): ['192.0.2.50'],
+    ('*.bulk.test', 'A'): ['192.0.2.200'],
+    ('exarnple.test', 'A'): ['192.0.2.60'],
+    ('examp1e.test', 'AAAA'): ['2001:db8::61'],
+    ('*.ple.test', 'A'): ['192.0.2.77'],
+    ('1.2.0.192.in-addr.arpa', 'PTR'): ['example.test.'],
+    ('9.2.0.192.in-addr.arpa', 'PTR'): ['spoofed.example.test.', 'example.test.'],
+}
+
+
+def zone_owner(name: str):
+    """The ZONE owner name answering for name, following wildcards."""
+    for owner in (name, '*.' + name.split('.', 1)[-1]):
+        if any(key[0] == owner for key in ZONE):
+            return owner
+    return None
+
+
+class StubDNS(asyncio.DatagramProtocol):
+    """Local DNS server answering from ZONE after a fixed delay."""
+
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.queries = []
+        self.in_flight = 0
+        self.peak = 0
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def datagram_received(self, data, addr):
+        asyncio.get_running_loop().create_task(self._answer(data, addr))
+
+    async def _answer(self, data, addr):
+        query = dns.message.from_wire(data)
+        question = query.question[0]
+        name = question.name.to_text().rstrip('.')
+        rdtype = dns.rdatatype.to_text(question.rdtype)
+        self.queries.append((name, rdtype))
+        self.in_flight += 1
+        self.peak = max(self.peak, self.in_flight)
+        await asyncio.sleep(self.delay)
+        self.in_flight -= 1
+
+        response = dns.message.make_response(query)
+        owner = zone_owner(name)
+        if owner is None:
+            response.set_rcode(dns.rcode.NXDOMAIN)
+        elif (owner, 'CNAME') in ZONE and rdtype != 'CNAME':
+            target = ZONE[(owner, 'CNAME')][0]
+            response.answer.append(dns.rrset.from_text_list(name + '.', 300, 'IN', 'CNAME', [target]))
+            if (target.rstrip('.'), rdtype) in ZONE:
+                response.answer.append(dns.rrset.from_text_list(
+                    target, 300, 'IN', rdtype, ZONE[(target.rstrip('.'), rdtype)]
+                ))
+        elif (owner, rdtype) in ZONE:
+            response.answer.append(
+                dns.rrset.from_text_list(name + '.', 300, 'IN', rdtype, ZONE[(owner, rdtype)])
+            )
+        answered = any(rrset.rdtype == question.rdtype for rrset in response.answer)
+        if not answered and name.endswith('example.test'):
+            # Negative answers carry the zone's SOA, whose minimum is 300
+            response.authority.append(dns.rrset.from_text_list(
+                'example.test.', 3600, 'IN', 'SOA', ZONE[('example.test', 'SOA')]
+            ))
+        self.transport.sendto(response.to_wire(), addr)
+
+
+async def start_stub(delay: float = 0.0):
+    loop = asyncio.get_running_loop()
+    transport, stub = await loop.create_datagram_endpoint(
+        lambda: StubDNS(delay), local_addr=('127.0.0.1', 0)
+    )
+    return transport, stub, transport.get_extra_info('sockname')[1]
+
+
+def stub_resolver(port: int, **kwargs) -> DNSResolver:
+    resolver = DNSResolver(nameservers=['127.0.0.1'], **kwargs)
+    resolver.resolver.port = port
+    return resolver
+
+
+class TestDNSResolver:
+    """Test lookups against a local stub server."""
+
+    def test_resolve_and_missing(self):
+        async def check():
+            transport, stub, port = await start_stub()
+            try:
+                resolver = stub_resolver(port)
+                answer = await resolver.resolve('example.test', 'A')
+                assert sorted(r.to_text() for r in answer) == ['192.0.2.1', '192.0.2.2']
+                assert await resolver.resolve('example.test', 'AAAA') is None
+                assert await resolver.resolve('missing.test', 'A') is None
+            finally:
+                transport.close()
+
+        asyncio.run(check())
+
+    def test_record_types_are_concurrent(self):
+        async def check():
+            transport, stub, port = await start_stub(delay=0.3)
+            try:
+                start = time.perf_counter()
+                answers = await stub_resolver(port).resolve_many(
+                    'example.test', ['A', 'AAAA', 'MX', 'NS', 'TXT', 'CNAME', 'SOA']
+                )
+                elapsed = time.perf_counter() - start
+            finally:
+                transport.close()
+            assert sorted(answers) == ['A', 'MX', 'SOA', 'TXT']
+            assert elapsed < 1.0
+
+        asyncio.run(check())
+
+    def test_timeout_leaves_type_out(self):
+        async def check():
+            transport, stub, port = await start_stub(delay=5)
+            try:
+                answers = await stub_resolver(port, timeout=0.2, lifetime=0.3).resolve_many(
+                    'example.test', ['A']
+                )
+            finally:
+                transport.close()
+            assert answers == {}
+
+        asyncio.run(check())
+
+    def test_from_config(self):
+        config = Config(dns_nameservers=['192.0.2.53'], dns_timeout=1.5, dns_tcp=True)
+        resolver = DNSResolver.from_config(config)
+        assert resolver.resolver.nameservers == ['192.0.2.53']
+        assert resolver.resolver.timeout == 1.5
+        assert resolver.tcp
+
+
+class TestBulkResolution:
+    """Test host resolution of large name sets."""
+
+    def test_resolve_host_follows_cname(self):
+        async def check():
+            transport, stub, port = await start_stub()
+            try:
+                resolver = stub_resolver(port)
+                return (
+                    await resolver.resolve_host('www.example.test'),
+                    await resolver.resolve_host('api.example.test'),
+                    await resolver.resolve_host('dead.example.test'),
+                    stub.queries,
+                )
+            finally:
+                transport.close()
+
+        www, api, dead, queries = asyncio.run(check())
+        assert sorted(www['A']) == ['192.0.2.1', '192.0.2.2']
+        assert www['CNAME'] == ['example.test']
+        assert api == {'AAAA': ['2001:db8::10']}
+        assert dead is None
+        # No AAAA query for a name that does not exist
+        assert queries.count(('dead.example.test', 'AAAA')) == 0
+
+    def test_wildcard_detection(self):
+        async def check():
+            transport, stub, port = await start_stub()
+            try:
+                return await stub_resolver(port).wildcard_addresses(
+                    ['wild.example.test', 'example.test', 'wild.example.test']
+                )
+            finally:
+                transport.close()
+
+        assert asyncio.run(check()) == {'wild.example.test': {'192.0.2.99'}}
+
+    def test_codec_matches_dnspython(self):
+        question = encode_question('www.Example.test', 'A')
+        query = dns.message.make_query('www.Example.test', 'A')
+        assert query.to_wire()[12:] == question
+
+        response = dns.message.make_response(query)
+        response.answer.append(dns.rrset.from_text_list('www.Example.test.', 60, 'IN', 'CNAME', ['example.test.']))
+        response.answer.append(dns.rrset.from_text_list('example.test.', 60, 'IN', 'A', ['192.0.2.1']))
+        assert decode_response(response.to_wire(), question) == (
+            0, False, {'CNAME': ['example.test'], 'A': ['192.0.2.1']}, 60
+        )
+
+        missing = dns.message.make_response(query)
+        missing.set_rcode(dns.rcode.NXDOMAIN)
+        missing.authority.append(dns.rrset.from_text_list(
+            'example.test.', 3600, 'IN', 'SOA', ['ns1.example.test. admin.example.test. 7 3600 600 86400 300']
+        ))
+        assert decode_response(missing.to_wire(), question) == (3, False, {}, 300)
+
+        other = dns.message.make_response(dns.message.make_query('evil.test', 'A'))
+        with pytest.raises(ValueError):
+            decode_response(other.to_wire(), question)
+
+    def test_many_names_bounded_rate(self):
+        names = [f'host{i}.bulk.test' for i in range(1000)] + ['gone.example.test']
+
+        async def check(**kwargs):
+            transport, stub, port = await start_stub()
+            try:
+                start = time.perf_counter()
+                results = await stub_resolver(port, **kwargs).resolve_hosts(names)
+                return results, time.perf_counter() - start
+            finally:
+                transport.close()
+
+        results, elapsed = asyncio.run(check(concurrency=50))
+        assert len(results) == 1000
+        assert results['host7.bulk.test'] == {'A': ['192.0.2.200']}
+        assert elapsed < 10
+
+        # 20 names, two queries each, at 100 queries/second
+        names = names[-21:]
+        results, elapsed = asyncio.run(check(concurrency=50, qps=100))
+        assert len(results) == 20
+        assert elapsed >= 0.35
+
+
+    def test_limits_are_shared_across_calls(self):
+        batches = [[f'h{i}-{j}.bulk.test' for j in range(10)] for i in range(4)]
+
+        async def check(**kwargs):
+            transport, stub, port = await start_stub(delay=0.02)
+            try:
+                resolver = stub_resolver(port, **kwargs)
+                start = time.perf_counter()
+                found = await asyncio.gather(*(resolver.resolve_hosts(names) for names in batches))
+                return found, stub.peak, time.perf_counter() - start
+            finally:
+                transport.close()
+
+        found, peak, _ = asyncio.run(check(concurrency=3))
+        assert [len(results) for results in found] == [10, 10, 10, 10]
+        assert peak <= 3
+
+        # 80 queries from four calls at 200 queries/second, not 200 each
+        found, _, elapsed = asyncio.run(check(concurrency=50, qps=200))
+        assert [len(results) for results in found] == [10, 10, 10, 10]
+        assert elapsed >= 0.35
+
+
+class TestDNSCache:
+    """Test caching of answers by TTL."""
+
+    def test_expiry_and_negative_entries(self, monkeypatch):
+        now = [1000.0]
+        monkeypatch.setattr('cybertrace.resolver.time.time', lambda: now[0])
+        cache = DNSCache()
+        cache.put('a.test', 'A', 0, {'A': ['192.0.2.1']}, 60)
+        cache.put('gone.test', 'AAAA', 3, {}, 30)
+        cache.put('zero.test', 'A', 0, {'A': ['192.0.2.2']}, 0)
+
+        assert cache.get('a.test', 'A') == (0, {'A': ['192.0.2.1']}, 60)
+        assert cache.get('gone.test', 'MX') == (3, {}, 30)
+        assert cache.get('zero.test', 'A') is None
+        now[0] += 45
+        assert cache.get('a.test', 'A')[2] == 15
+        assert cache.get('gone.test', 'A') is None
+        now[0] += 30
+        assert cache.get('a.test', 'A') is None
+        assert len(cache) == 0
+
+    def test_size_bound_and_persistence(self, tmp_path):
+        cache = DNSCache(max_entries=2, path=tmp_path / 'dns.json')
+        for i in range(3):
+            cache.put(f'h{i}.test', 'A', 0, {'A': [f'192.0.2.{i}']}, 300)
+        cache.save()
+
+        loaded = DNSCache(path=tmp_path / 'dns.json')
+        loaded.load()
+        assert len(loaded) == 2
+        assert loaded.get('h0.test', 'A') is None
+        assert loaded.get('h2.test', 'A')[1] == {'A': ['192.0.2.2']}
+
+    def test_resolvers_answer_from_cache(self):
+        async def check():
+            transport, stub, port = await start_stub()
+            try:
+                resolver = stub_resolver(port, cache=DNSCache())
+                await resolver.resolve_host('www.example.test')
+                await resolver.resolve_host('dead.example.test')
+                queried = len(stub.queries)
+                first = await resolver.resolve_hosts(['www.example.test', 'dead.example.test', 'api.example.test'])
+                answers = await resolver.resolve_many('www.example.test', ['A', 'AAAA', 'MX'])
+                await resolver.resolve_many('dead.example.test', ['A', 'MX', 'TXT'])
+                return queried, first, answers, stub.queries
+            finally:
+                transport.close()
+
+        queried, results, answers, queries = asyncio.run(check())
+        # dead.example.test is negatively cached for every type after one query
+        assert queried == 3
+        assert queries[queried:] == [
+            ('api.example.test', 'A'), ('api.example.test', 'AAAA'), ('www.example.test', 'MX'),
+        ]
+        assert sorted(results) == ['api.example.test', 'www.example.test']
+        assert sorted(r.to_text() for r in answers['A']) == ['192.0.2.1', '192.0.2.2']
+        assert answers['A'].ttl <= 300
+        assert 'AAAA' not in answers
+
+    def test_negative_answer_without_soa_is_not_cached(self):
+        async def check():
+            transport, stub, port = await start_stub()
+            try:
+                resolver = stub_resolver(port, cache=DNSCache())
+                for _ in range(2):
+                    assert await resolver.resolve('missing.invalid', 'A') is None
+                return stub.queries
+            finally:
+                transport.close()
+
+        assert asyncio.run(check()) == [('missing.invalid', 'A')] * 2
+
+
+class TestDomainDNS:
+    """Test the domain module's DNS source."""
+
+    def test_records_are_formatted(self, monkeypatch):
+        async def check():
+            transport, stub, port = await start_stub(delay=0.2)
+            resolver = stub_resolver(port)
+            monkeypatch.setattr('cybertrace.resolver.get_resolver', lambda config=None: resolver)
+            try:
+                module = DomainModule(config=Config())
+                result = await module._get_dns_records('example.test')
+            finally:
+                transport.close()
+            return result
+
+        result = asyncio.run(check())
+        assert result.success
+        assert sorted(result.data['ip_addresses']) == ['192.0.2.1', '192.0.2.2']
+        assert result.data['MX'] == [{'priority': 10, 'host': 'mail.example.test'}]
+        assert result.data['TXT'] == ['v=spf1 -all']
+        assert result.data['SOA'][0]['serial'] == 7
+
+    def test_event_loop_is_not_blocked(self, monkeypatch):
+        async def check():
+            transport, stub, port = await start_stub(delay=0.5)
+            resolver = stub_resolver(port)
+            monkeypatch.setattr('cybertrace.resolver.get_resolver', lambda config=None: resolver)
+            ticks = 0
+
+            async def ticker():
+                nonlocal ticks
+                while True:
+                    await asyncio.sleep(0.05)
+                    ticks += 1
+
+            task = asyncio.ensure_future(ticker())
+            try:
+                await DomainModule(config=Config())._get_dns_records('example.test')
+            finally:
+                task.cancel()
+                transport.close()
+            return ticks
+
+        assert asyncio.run(check()) >= 5
+
+
+    def test_deep_scan_resolves_subdomains(self, monkeypatch):
+        async def check():
+            transport, stub, port = await start_stub()
+            resolver = stub_resolver(port)
+            monkeypatch.setattr('cybertrace.resolver.get_resolver', lambda config=None: resolver)
+            try:
+                module = DomainModule(config=Config())
+                return await module._resolve_subdomains('example.test', [
+                    'example.test', 'www.example.test', 'api.example.test', 'dead.example.test',
+                    'real.wild.example.test', 'ghost.wild.example.test', 'other.invalid',
+                ])
+            finally:
+                transport.close()
+
+        result = asyncio.run(check())
+        data = result.data
+        assert data['checked_count'] == 5
+        assert data['wildcard_zones'] == ['wild.example.test']
+        assert sorted(data['subdomains']) == [
+            'api.example.test', 'ghost.wild.example.test', 'real.wild.example.test', 'www.example.test'
+        ]
+        assert data['subdomains']['ghost.wild.example.test']['wildcard']
+        assert 'wildcard' not in data['subdomains']['real.wild.example.test']
+        assert data['live_count'] == 3
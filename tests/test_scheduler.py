@@ -0,0 +1,121 @@
+"""Tests for the priority request scheduler."""
+
+import asyncio
+import time
+
+import pytest
+from cybertrace.scheduler import (
+    BULK,
+    INTERACTIVE,
+    NORMAL,
+    PriorityScheduler,
+    current_priority,
+    parse_priority,
+    priority,
+)
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+class TestPriority:
+    """Test priority class parsing and propagation."""
+
+    def test_parse_priority(self):
+        assert parse_priority('interactive') == INTERACTIVE
+        assert parse_priority('BULK') == BULK
+        assert parse_priority(NORMAL) == NORMAL
+
+    def test_parse_priority_invalid(self):
+        with pytest.raises(ValueError):
+            parse_priority('urgent')
+        with pytest.raises(ValueError):
+            parse_priority(7)
+
+    def test_priority_context(self):
+        assert current_priority.get() == NORMAL
+        with priority('bulk'):
+            assert current_priority.get() == BULK
+        assert current_priority.get() == NORMAL
+
+
+class TestPriorityScheduler:
+    """Test admission order and rate limiting."""
+
+    def test_higher_priority_admitted_first(self):
+        async def check():
+            scheduler = PriorityScheduler(max_concurrent=1)
+            order = []
+
+            async def request(name, level):
+                async with scheduler.slot(f'https://{name}.example/', level):
+                    order.append(name)
+                    await asyncio.sleep(0)
+
+            await scheduler.acquire('blocker')
+            tasks = [
+                asyncio.ensure_future(request('bulk1', BULK)),
+                asyncio.ensure_future(request('bulk2', BULK)),
+                asyncio.ensure_future(request('normal', NORMAL)),
+                asyncio.ensure_future(request('interactive', INTERACTIVE)),
+            ]
+            await asyncio.sleep(0)
+            assert scheduler.waiting == 4
+            scheduler.release()
+            await asyncio.gather(*tasks)
+            return order
+
+        assert run(check()) == ['interactive', 'normal', 'bulk1', 'bulk2']
+
+    def test_concurrency_limit(self):
+        async def check():
+            scheduler = PriorityScheduler(max_concurrent=2)
+            peak = 0
+
+            async def request(i):
+                nonlocal peak
+                async with scheduler.slot(f'https://host{i}.example/'):
+                    peak = max(peak, scheduler.active)
+                    await asyncio.sleep(0.01)
+
+            await asyncio.gather(*(request(i) for i in range(6)))
+            return peak, scheduler.active
+
+        assert run(check()) == (2, 0)
+
+    def test_host_rate_limit(self):
+        async def check():
+            scheduler = PriorityScheduler(max_concurrent=10, host_rate=50)
+            start = time.monotonic()
+            for _ in range(4):
+                async with scheduler.slot('https://same.example/path'):
+                    pass
+            return time.monotonic() - start
+
+        # One burst token, then 3 more at 50/s
+        assert run(check()) >= 0.05
+
+    def test_rate_limit_is_per_host(self):
+        async def check():
+            scheduler = PriorityScheduler(max_concurrent=10, host_rate=1)
+            start = time.monotonic()
+            for i in range(5):
+                async with scheduler.slot(f'https://host{i}.example/'):
+                    pass
+            return time.monotonic() - start
+
+        assert run(check()) < 0.5
+
+    def test_cancelled_waiter_does_not_leak_slot(self):
+        async def check():
+            scheduler = PriorityScheduler(max_concurrent=1)
+            await scheduler.acquire('a')
+            waiter = asyncio.ensure_future(scheduler.acquire('b'))
+            await asyncio.sleep(0)
+            waiter.cancel()
+            scheduler.release()
+            await asyncio.sleep(0)
+            return scheduler.active
+
+        assert run(check()) == 0
@@ -0,0 +1,245 @@
+"""Tests for the warm Engine and the HTTP API server."""
+
+import asyncio
+
+from aiohttp.test_utils import TestClient, TestServer
+from cybertrace.modules.base import BaseModule, ModuleResult, SourceResult, event_listener
+from cybertrace.runner import Engine
+from cybertrace.server import Investigation, Server
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+class FakeModule(BaseModule):
+    """Module with two local sources, for exercising the event stream."""
+
+    name = 'fake'
+
+    async def search(self, target, **options):
+        result = ModuleResult(target=target, target_type='fake', module=self.name)
+        await self.run_sources([
+            ('first', self._source('first')),
+            ('second', self._source('second')),
+        ], result)
+        result.summary = self._build_summary(result)
+        return result
+
+    async def _source(self, name):
+        return SourceResult(source=name, success=True, data={'found': f'{name}.example.com'})
+
+    def _build_summary(self, result):
+        found = [res.data['found'] for res in result.sources.values()]
+        result.related.extend(found)
+        return {'found': found}
+
+
+async def _with_client(handler):
+    server = Server()
+    server.engine._modules['fake'] = FakeModule(session=object())
+    client = TestClient(TestServer(server.make_app()))
+    await client.start_server()
+    try:
+        return await handler(client, server)
+    finally:
+        await client.close()
+
+
+class TestEngine:
+    """Test module and session reuse."""
+
+    def test_module_instances_are_reused(self):
+        async def check():
+            async with Engine() as engine:
+                first = engine.get_module('domain')
+                second = engine.get_module('url')
+                assert first is second
+                assert first.session is engine.session
+
+        run(check())
+
+    def test_shared_session_survives_module_exit(self):
+        async def check():
+            async with Engine() as engine:
+                module = engine.get_module('email')
+                async with module:
+                    pass
+                assert not engine.session.closed
+
+        run(check())
+
+    def test_investigate_candidates_runs_top_modules(self):
+        calls = []
+
+        async def fake_investigate(target, input_type='auto', **kwargs):
+            calls.append((input_type, kwargs.get('validate')))
+            return ModuleResult(target=target, target_type=input_type, module=input_type)
+
+        async def check():
+            async with Engine() as engine:
+                engine.investigate = fake_investigate
+                return await engine.investigate_candidates('abc.io', top=2, min_confidence=0.2)
+
+        ranked = run(check())
+        assert [c.module_type for c, _ in ranked] == ['domain', 'username']
+        assert [r.module for _, r in ranked] == ['domain', 'username']
+        assert calls == [('domain', False), ('username', False)]
+
+    def test_unknown_module(self):
+        async def check():
+            async with Engine() as engine:
+                assert engine.get_module('nonexistent') is None
+
+        run(check())
+
+
+class TestEvents:
+    """Test event emission and the investigation event log."""
+
+    def test_run_sources_emits_events(self):
+        events = []
+
+        async def check():
+            token = event_listener.set(lambda event, payload: events.append((event, payload)))
+            try:
+                return await FakeModule(session=object()).search('x')
+            finally:
+                event_listener.reset(token)
+
+        result = run(check())
+        names = [event for event, _ in events]
+        assert names.count('source_start') == 2
+        assert names.count('source_result') == 2
+        assert names.count('summary') == 2
+        assert list(result.sources) == ['first', 'second']
+        # Partial summaries must not leak into the real result
+        assert result.related == ['first.example.com', 'second.example.com']
+
+    def test_related_targets_are_deduplicated(self):
+        async def check():
+            inv = Investigation('x', 'auto', {})
+            inv.publish('summary', {'summary': {}, 'related': ['a.com']})
+            inv.publish('summary', {'summary': {}, 'related': ['a.com', 'b.com']})
+            return [payload['target'] for _, event, payload in inv.events if event == 'related']
+
+        assert run(check()) == ['a.com', 'b.com']
+
+    def test_subscribe_resumes_after_last_id(self):
+        async def check():
+            inv = Investigation('x', 'auto', {})
+            for i in range(3):
+                inv.publish('source_start', {'source': str(i)})
+            inv.status = 'done'
+            return [event_id async for event_id, _, _ in inv.subscribe(last_id=1)]
+
+        assert run(check()) == [2, 3]
+
+
+class TestAPIServer:
+    """Test API endpoints that don't touch the network."""
+
+    def test_health(self):
+        async def check(client, server):
+            resp = await client.get('/health')
+            assert resp.status == 200
+            assert (await resp.json())['status'] == 'ok'
+
+        run(_with_client(check))
+
+    def test_modules(self):
+        async def check(client, server):
+            resp = await client.get('/modules')
+            assert 'domain' in await resp.json()
+
+        run(_with_client(check))
+
+    def test_search_requires_target(self):
+        async def check(client, server):
+            resp = await client.post('/search', json={})
+            assert resp.status == 400
+
+        run(_with_client(check))
+
+    def test_search_unsupported_type(self):
+        async def check(client, server):
+            resp = await client.post('/search', json={'target': 'x', 'type': 'nonexistent'})
+            assert resp.status == 400
+
+        run(_with_client(check))
+
+    def test_search_rejects_unknown_options(self):
+        async def check(client, server):
+            for options in ({'priority': 1}, {'input_type': 1}, {'listener': 1},
+                            {'validate': False}, {'proxy': 'x'}, {'deep': 'yes'},
+                            {'timeout': True}):
+                resp = await client.post('/search', json={
+                    'target': 'x', 'type': 'fake', 'options': options,
+                })
+                assert resp.status == 400, options
+            resp = await client.post('/investigations', json={
+                'target': 'x', 'type': 'fake', 'options': {'priority': 1},
+            })
+            assert resp.status == 400
+            assert not server.investigations
+
+            resp = await client.post('/search', json={
+                'target': 'x', 'type': 'fake', 'options': {'deep': True, 'timeout': 5},
+            })
+            assert resp.status == 200
+
+        run(_with_client(check))
+
+    def test_background_investigation_error(self):
+        async def check(client, server):
+            resp = await client.post('/investigations', json={'target': 'x', 'type': 'nonexistent'})
+            assert resp.status == 202
+            inv_id = (await resp.json())['id']
+            await server.investigations[inv_id].task
+
+            resp = await client.get(f'/investigations/{inv_id}')
+            data = await resp.json()
+            assert data['status'] == 'error'
+
+        run(_with_client(check))
+
+    def test_unknown_investigation(self):
+        async def check(client, server):
+            resp = await client.get('/investigations/missing')
+            assert resp.status == 404
+
+        run(_with_client(check))
+
+    def test_sse_stream_and_resume(self):
+        async def check(client, server):
+            resp = await client.post('/investigations', json={'target': 'x', 'type': 'fake'})
+            inv_id = (await resp.json())['id']
+
+            resp = await client.get(f'/investigations/{inv_id}/events')
+            assert resp.headers['Content-Type'] == 'text/event-stream'
+            body = await resp.text()
+            events = [line[len('event: '):] for line in body.splitlines() if line.startswith('event: ')]
+            assert events[0] == 'started'
+            assert events[-1] == 'done'
+            assert 'source_result' in events
+            assert events.count('related') == 2
+
+            resp = await client.get(f'/investigations/{inv_id}/events',
+                                    headers={'Last-Event-ID': str(len(events) - 1)})
+            body = await resp.text()
+            assert [line for line in body.splitlines() if line.startswith('event: ')] == ['event: done']
+
+        run(_with_client(check))
+
+    def test_websocket_stream(self):
+        async def check(client, server):
+            resp = await client.post('/investigations', json={'target': 'x', 'type': 'fake'})
+            inv_id = (await resp.json())['id']
+
+            ws = await client.ws_connect(f'/investigations/{inv_id}/ws')
+            messages = [msg.json() async for msg in ws]
+            assert messages[0]['event'] == 'started'
+            assert messages[-1]['event'] == 'done'
+            assert [m['id'] for m in messages] == list(range(1, len(messages) + 1))
+
+        run(_with_client(check))
@@ -0,0 +1,257 @@
+"""Tests for manifest-driven username checks."""
+
+import asyncio
+import json
+
+import aiohttp
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+from cybertrace import sites
+from cybertrace.config import Config
+from cybertrace.modules.username_module import UsernameModule
+from cybertrace.sites import BUNDLED_MANIFEST, ManifestError, Site, SiteChecker, SiteManifest
+
+
+class TestSiteManifest:
+    """Test loading and compiling manifests."""
+
+    def test_bundled_manifest_compiles(self):
+        manifest = SiteManifest.load(BUNDLED_MANIFEST)
+        assert len(manifest) > 40
+        assert manifest.skipped == 0
+        assert 'GitLab' in {site.name for site in manifest.sites}
+
+    def test_compile(self):
+        site = Site.compile('Forum', {
+            'url': 'https://forum.test/u/{username}',
+            'check': 'message',
+            'absent': ['Not found', 'No such member'],
+            'regex': '^[a-z]+$',
+            'tags': ['forum'],
+        })
+        assert site.absent.search(b'<p>No such member</p>')
+        assert site.marker_length == len('No such member')
+        assert site.accepts('alice') and not site.accepts('Alice_1')
+        assert site.profile_url('a b') == 'https://forum.test/u/a%20b'
+
+    def test_invalid_entries(self):
+        with pytest.raises(ManifestError):
+            Site.compile('x', {'url': 'https://x.test/'})
+        with pytest.raises(ManifestError):
+            Site.compile('x', {'url': 'https://x.test/{username}', 'check': 'magic'})
+        with pytest.raises(ManifestError):
+            Site.compile('x', {'url': 'https://x.test/{username}', 'check': 'message'})
+        # A bad entry is skipped, not fatal
+        manifest = SiteManifest.from_dict({'sites': {
+            'good': {'url': 'https://g.test/{username}'},
+            'bad': {'url': 'https://b.test/{username}', 'regex': '('},
+            'off': {'url': 'https://o.test/{username}', 'disabled': True},
+        }})
+        assert [site.name for site in manifest.sites] == ['good']
+        assert manifest.skipped == 2
+
+    def test_sherlock_format(self):
+        manifest = SiteManifest.from_dict({
+            '$schema': 'data.schema.json',
+            'Forum': {
+                'url': 'https://forum.test/u/{}', 'urlMain': 'https://forum.test/',
+                'errorType': 'message', 'errorMsg': 'Not found', 'regexCheck': '^[a-z]+$',
+            },
+            'Wiki': {
+                'url': 'https://wiki.test/{}', 'urlProbe': 'https://api.wiki.test/{}',
+                'errorType': 'status_code', 'errorCode': 410,
+            },
+            'Login': {'url': 'https://l.test/{}', 'errorType': 'response_url', 'errorUrl': 'https://l.test/'},
+        })
+        forum, wiki, login = manifest.sites
+        assert forum.url == 'https://forum.test/u/{username}'
+        assert forum.check == 'message' and forum.absent.search(b'Not found')
+        assert wiki.request_url('bob') == 'https://api.wiki.test/bob'
+        assert wiki.absent_statuses == {410}
+        assert login.check == 'redirect'
+
+    def test_maigret_format(self):
+        manifest = SiteManifest.from_dict({
+            'engines': {'XenForo': {'site': {
+                'absenceStrs': ['The specified member cannot be found'],
+                'checkType': 'message',
+                'url': '{urlMain}{urlSubpath}/members/?username={username}',
+            }}},
+            'sites': {
+                'Board': {'engine': 'XenForo', 'urlMain': 'https://board.test/', 'urlSubpath': '/forum'},
+                'Video': {'url': 'https://video.test/{username}', 'checkType': 'status_code',
+                          'tags': ['video'], 'requestHeadOnly': True},
+                'Gone': {'url': 'https://gone.test/{username}', 'checkType': 'status_code', 'disabled': True},
+            },
+        })
+        board, video = manifest.sites
+        assert board.url == 'https://board.test/forum/members/?username={username}'
+        assert board.check == 'message'
+        assert video.method == 'HEAD' and video.tags == ('video',)
+        assert manifest.skipped == 1
+
+
+@pytest.fixture
+def site_server():
+    """A local server standing in for several sites, counting body bytes sent."""
+    streamed = []
+
+    async def status(request):
+        if request.match_info['name'] == 'alice':
+            return web.Response(text='profile')
+        raise web.HTTPNotFound()
+
+    async def message(request):
+        # Always 200; the page says whether the user exists, early on
+        resp = web.StreamResponse(headers={'Content-Type': 'text/html'})
+        await resp.prepare(request)
+        if request.match_info['name'] != 'alice':
+            await resp.write(b'<h1>No such member</h1>')
+        try:
+            for _ in range(200):
+                await resp.write(b'x' * 4096)
+                streamed.append(1)
+                await asyncio.sleep(0)
+        except (ConnectionError, asyncio.CancelledError):
+            pass
+        return resp
+
+    async def login(request):
+        if request.match_info['name'] == 'alice':
+            return web.Response(text='profile')
+        raise web.HTTPFound('/login')
+
+    async def headers(request):
+        if request.headers.get('X-Token') != 'secret':
+            raise web.HTTPForbidden()
+        return web.Response(text='ok')
+
+    async def gone(request):
+        # Answers 410 for suspended accounts and 404 for unknown ones
+        if request.match_info['name'] == 'alice':
+            return web.Response(text='profile')
+        if request.match_info['name'] == 'banned':
+            raise web.HTTPGone()
+        raise web.HTTPNotFound()
+
+    async def limited(request):
+        raise web.HTTPTooManyRequests()
+
+    app = web.Application()
+    app.router.add_get('/status/{name}', status)
+    app.router.add_get('/message/{name}', message)
+    app.router.add_get('/redirect/{name}', login)
+    app.router.add_get('/headers/{name}', headers)
+    app.router.add_get('/gone/{name}', gone)
+    app.router.add_get('/limited/{name}', limited)
+    return app, streamed
+
+
+def _manifest(port: int) -> SiteManifest:
+    base = f'http://127.0.0.1:{port}'
+    return SiteManifest.from_dict({'sites': {
+        'Status': {'url': base + '/status/{username}', 'tags': ['social']},
+        'Message': {'url': base + '/message/{username}', 'check': 'message', 'absent': ['No such member']},
+        'Redirect': {'url': base + '/redirect/{username}', 'check': 'redirect'},
+        'Headers': {'url': base + '/headers/{username}', 'headers': {'X-Token': 'secret'}},
+        'Limited': {'url': base + '/limited/{username}'},
+        'Gone': {'url': base + '/gone/{username}', 'absent_status': [410]},
+        'Picky': {'url': base + '/status/{username}', 'regex': '^[0-9]+$'},
+    }})
+
+
+class TestSiteChecker:
+    """Test checks against a local server."""
+
+    def test_pool_follows_config(self, monkeypatch):
+        monkeypatch.setattr(sites, '_scheduler', None)
+        manifest = SiteManifest.from_dict({'sites': {}})
+        checker = SiteChecker(None, manifest, Config(username_concurrency=7, username_host_rate=0))
+        assert checker.scheduler.max_concurrent == 7
+        assert checker.scheduler.host_rate is None
+        # Without a config of its own, a checker shares the process-wide pool
+        assert SiteChecker(None, manifest).scheduler is sites.get_username_scheduler()
+
+    def check_all(self, app, username):
+        async def check():
+            server = TestServer(app)
+            await server.start_server()
+            try:
+                async with aiohttp.ClientSession() as session:
+                    checker = SiteChecker(session, _manifest(server.port), Config(username_timeout=5, username_host_rate=0))
+                    return await checker.check_all(username)
+            finally:
+                await server.close()
+
+        return asyncio.run(check())
+
+    def test_existing_user(self, site_server):
+        app, _ = site_server
+        result = self.check_all(app, 'alice')
+
+        assert sorted(found['site'] for found in result['found']) == [
+            'Gone', 'Headers', 'Message', 'Redirect', 'Status',
+        ]
+        # Picky only accepts digits, so it is never asked
+        assert result['sites_checked'] == 6
+        assert list(result['errors']) == ['Limited']
+        status = [found for found in result['found'] if found['site'] == 'Status'][0]
+        assert status['url'].endswith('/status/alice')
+        assert status['tags'] == ['social']
+
+    def test_missing_user(self, site_server):
+        app, streamed = site_server
+        result = self.check_all(app, 'mallory')
+
+        # Gone lists only 410, but its 404 is not a profile either
+        assert [found['site'] for found in result['found']] == ['Headers']
+        assert result['found_count'] == 1
+        assert 'Gone' not in result['errors']
+        # The absence message came first, so the page was not read to the end
+        assert len(streamed) < 200
+
+    def test_absent_status(self, site_server):
+        app, _ = site_server
+        result = self.check_all(app, 'banned')
+        assert 'Gone' not in [found['site'] for found in result['found']]
+        assert 'Gone' not in result['errors']
+
+
+class TestUsernameModuleSites:
+    """Test the username module's in-process site checks."""
+
+    def test_search_uses_manifest(self, site_server, tmp_path, monkeypatch):
+        app, _ = site_server
+
+        async def no_key_platforms(self, username):
+            return {}
+
+        monkeypatch.setattr(UsernameModule, '_check_key_platforms', no_key_platforms)
+
+        async def search():
+            server = TestServer(app)
+            await server.start_server()
+            try:
+                manifest = tmp_path / 'sites.json'
+                base = f'http://127.0.0.1:{server.port}'
+                manifest.write_text(json.dumps({'sites': {
+                    'Status': {'url': base + '/status/{username}', 'tags': ['coding']},
+                    'Redirect': {'url': base + '/redirect/{username}', 'check': 'redirect'},
+                    # Checked by key_platforms instead
+                    'GitHub': {'url': base + '/status/{username}'},
+                }}))
+                config = Config(username_sites=manifest, username_timeout=5, username_host_rate=0)
+                async with UsernameModule(config=config) as module:
+                    return await module.search('Alice')
+            finally:
+                await server.close()
+
+        result = asyncio.run(search())
+        assert result.sources['sites'].success
+        assert result.sources['sites'].data['sites_checked'] == 2
+        # External tools only run on a deep scan
+        assert 'maigret' not in result.sources and 'tools' not in result.sources
+        assert result.summary['found_sites'] == ['redirect', 'status']
+        assert result.summary['by_category']['developer'] == ['status']
+        assert result.summary['urls']['status'].endswith('/status/alice')
@@ -0,0 +1,99 @@
+"""Tests for offline checksum validation."""
+
+import asyncio
+
+import pytest
+from cybertrace.detector import InvalidInputError, detect_input_type, normalize_input
+from cybertrace.runner import Engine
+from cybertrace.validators import (
+    check_aadhaar,
+    check_base58_address,
+    check_bech32_address,
+    check_eip55_address,
+    check_gstin,
+    check_onion_address,
+    keccak256,
+    to_checksum_address,
+    validate_input,
+)
+
+
+class TestChecksums:
+    """Test each checksum against known-good values and one-character typos."""
+
+    def test_base58(self):
+        assert check_base58_address('1A1zP1eP5QGefi2DMPTfTL5SLmv7DivfNa').valid
+        assert check_base58_address('3J98t1WpEZ73CNmQviecrnyiWrnqRhWNLy').valid
+        assert not check_base58_address('1A1zP1eP5QGefi2DMPTfTL5SLmv7DivfNb').valid
+
+    def test_bech32(self):
+        assert check_bech32_address('bc1qar0srrr7xfkvy5l643lydnw9re59gtzzwf5mdq').valid
+        assert check_bech32_address('BC1QW508D6QEJXTDG4Y5R3ZARVARY0C5XW7KV8F3T4').valid
+        assert not check_bech32_address('bc1qar0srrr7xfkvy5l643lydnw9re59gtzzwf5mdp').valid
+
+    def test_bech32m(self):
+        assert check_bech32_address(
+            'bc1p5cyxnuxmeuwuvkwfem96lqzszd02n6xdcjrs20cac6yqjjwudpxqkedrcr'
+        ).valid
+        # A v1 program with a bech32 (not bech32m) checksum is invalid
+        assert not check_bech32_address(
+            'bc1pw508d6qejxtdg4y5r3zarvary0c5xw7kw508d6qejxtdg4y5r3zarvary0c5xw7k7grplx'
+        ).valid
+
+    def test_keccak256(self):
+        assert keccak256(b'').hex() == (
+            'c5d2460186f7233c927e7db2dcc703c0e500b653ca82273b7bfad8045d85a470'
+        )
+
+    def test_eip55(self):
+        address = '0x5aAeb6053F3E94C9b9A09f33669435E7Ef1BeAed'
+        assert to_checksum_address(address.lower()) == address
+        assert check_eip55_address(address).valid
+        assert check_eip55_address(address.lower()).valid is None
+        assert not check_eip55_address(address[:-1] + 'D').valid
+
+    def test_onion(self):
+        address = 'duckduckgogg42xjoc72x3sjasowoarfbgcmvfimaftt6twagswzczad.onion'
+        assert check_onion_address(address).valid
+        assert not check_onion_address(address.replace('duck', 'dock', 1)).valid
+        assert not check_onion_address('abcdefghijklmnop.onion').valid
+
+    def test_gstin(self):
+        assert check_gstin('27AAPFU0939F1ZV').valid
+        assert not check_gstin('27AAPFU0939F1ZW').valid
+
+    def test_aadhaar(self):
+        assert check_aadhaar('2341 2341 2346').valid
+        assert not check_aadhaar('2341 2341 2345').valid
+        assert not check_aadhaar('0341 2341 2346').valid
+
+
+class TestValidateInput:
+    """Test validation by specific and module type."""
+
+    def test_module_type_is_resolved(self):
+        assert validate_input('1A1zP1eP5QGefi2DMPTfTL5SLmv7DivfNb', 'bitcoin').valid is False
+        assert validate_input('234123412345', 'indian').valid is False
+        assert validate_input('MH12AB1234', 'indian').valid is None
+
+    def test_unrelated_type_is_unchecked(self):
+        assert validate_input('1A1zP1eP5QGefi2DMPTfTL5SLmv7DivfNb', 'username').valid is None
+        assert validate_input('example.com', 'domain').valid is None
+
+    def test_detect_down_ranks_invalid(self):
+        assert detect_input_type('234123412345') == ('aadhaar', 'indian')
+        assert detect_input_type('234123412345', validate=True) == ('username', 'username')
+        assert detect_input_type('27AAPFU0939F1ZV', validate=True) == ('gstin', 'indian')
+
+    def test_normalize_strict(self):
+        assert normalize_input('2341 2341 2346', 'indian', strict=True) == '234123412346'
+        with pytest.raises(InvalidInputError):
+            normalize_input('2341 2341 2345', 'indian', strict=True)
+
+    def test_engine_rejects_before_searching(self):
+        async def check():
+            async with Engine() as engine:
+                await engine.investigate('1A1zP1eP5QGefi2DMPTfTL5SLmv7DivfNb')
+
+        with pytest.raises(InvalidInputError):
+            asyncio.run(check())
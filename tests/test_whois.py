@@ -0,0 +1,242 @@
+"""Tests for WHOIS and RDAP lookups."""
+
+import asyncio
+import time
+
+import pytest
+from cybertrace import whois_client
+from cybertrace.config import Config
+from cybertrace.scheduler import PriorityScheduler
+from cybertrace.whois_client import RDAPClient, WhoisClient, WhoisError, parse_whois
+
+REGISTRY = """\
+   Domain Name: EXAMPLE.TEST
+   Registrar WHOIS Server: registrar.local
+   Updated Date: 2024-08-14T07:01:34Z
+   Creation Date: 1995-08-14T04:00:00Z
+   Registry Expiry Date: 2025-08-13T04:00:00Z
+   Registrar: RESERVED-Internet Assigned Numbers Authority
+   Domain Status: clientDeleteProhibited https://icann.org/epp#clientDeleteProhibited
+   Domain Status: clientTransferProhibited https://icann.org/epp#clientTransferProhibited
+   Name Server: A.IANA-SERVERS.NET
+   Name Server: B.IANA-SERVERS.NET
+   DNSSEC: signedDelegation
+>>> Last update of whois database: 2024-09-01T00:00:00Z <<<
+"""
+
+REGISTRAR = """\
+Domain Name: example.test
+Registrar WHOIS Server: registrar.local
+Registrar: Example Registrar, Inc.
+Registrant Organization: Example Org
+Registrant Country: US
+"""
+
+RESPONSES = {
+    ('registry.local', 'example.test'): REGISTRY,
+    ('registrar.local', 'example.test'): REGISTRAR,
+    ('whois.iana.org', 'test'): 'domain:       TEST\nrefer:        registry.local\n',
+}
+
+RDAP_DOMAIN = {
+    'objectClassName': 'domain',
+    'ldhName': 'EXAMPLE.COM',
+    'status': ['client delete prohibited'],
+    'events': [
+        {'eventAction': 'registration', 'eventDate': '1995-08-14T04:00:00Z'},
+        {'eventAction': 'expiration', 'eventDate': '2025-08-13T04:00:00Z'},
+    ],
+    'nameservers': [{'ldhName': 'A.IANA-SERVERS.NET'}],
+    'secureDNS': {'delegationSigned': True},
+    'entities': [
+        {'roles': ['registrar'],
+         'vcardArray': ['vcard', [['version', {}, 'text', '4.0'], ['fn', {}, 'text', 'RESERVED-IANA']]]},
+        {'roles': ['registrant'],
+         'vcardArray': ['vcard', [['org', {}, 'text', 'Example Org'],
+                                  ['adr', {'cc': 'US'}, 'text', ['', '', '', '', 'CA', '', '']]]]},
+    ],
+}
+
+RDAP_IP_NETWORK = {
+    'objectClassName': 'ip network',
+    'handle': 'NET-198-51-100-0-1',
+    'name': 'TEST-NET-2',
+    'startAddress': '198.51.100.0',
+    'endAddress': '198.51.100.255',
+    'country': 'US',
+    'cidr0_cidrs': [{'v4prefix': '198.51.100.0', 'length': 24}],
+    'entities': [
+        {'roles': ['registrant'],
+         'vcardArray': ['vcard', [['fn', {}, 'text', 'Example Hosting']]],
+         'entities': [
+             {'roles': ['abuse'],
+              'vcardArray': ['vcard', [['fn', {}, 'text', 'Abuse Desk'],
+                                       ['email', {}, 'text', 'abuse@hosting.example']]]},
+         ]},
+    ],
+}
+
+
+@pytest.fixture
+def whois_server(monkeypatch):
+    """Serve RESPONSES on a local port; every server name resolves to it."""
+    queries = []
+
+    async def handle(reader, writer):
+        query = (await reader.readline()).decode().strip()
+        queries.append(query)
+        name = queries_for.pop(0) if queries_for else None
+        writer.write(RESPONSES.get((name, query), 'No match\n').encode())
+        await writer.drain()
+        writer.close()
+
+    queries_for = []
+    real_open = asyncio.open_connection
+
+    async def open_connection(host, port):
+        queries_for.append(host)
+        return await real_open('127.0.0.1', port)
+
+    monkeypatch.setattr(asyncio, 'open_connection', open_connection)
+    monkeypatch.setattr(whois_client, '_scheduler', PriorityScheduler(max_concurrent=10))
+    monkeypatch.setattr(WhoisClient, '_servers', {})
+    monkeypatch.setattr(WhoisClient, '_servers_loaded', True)
+
+    async def start():
+        server = await asyncio.start_server(handle, '127.0.0.1', 0)
+        return server, server.sockets[0].getsockname()[1]
+
+    return start, queries
+
+
+class TestParseWhois:
+    """Test WHOIS text parsing."""
+
+    def test_registry_response(self):
+        data = parse_whois(REGISTRY)
+        assert data['domain_name'] == 'EXAMPLE.TEST'
+        assert data['referral'] == 'registrar.local'
+        assert data['creation_date'] == '1995-08-14T04:00:00Z'
+        assert data['status'] == ['clientDeleteProhibited', 'clientTransferProhibited']
+        assert data['name_servers'] == ['a.iana-servers.net', 'b.iana-servers.net']
+
+    def test_referral_url(self):
+        assert parse_whois('ReferralServer: whois://whois.arin.net:43\n')['referral'] == 'whois.arin.net'
+
+
+class TestWhoisClient:
+    """Test port-43 lookups against a local server."""
+
+    def test_iana_then_registry_then_registrar(self, whois_server, tmp_path):
+        start, queries = whois_server
+
+        async def check():
+            server, port = await start()
+            async with server:
+                return await WhoisClient(Config(cache_dir=tmp_path), port=port).lookup('example.test')
+
+        data = asyncio.run(check())
+        assert queries == ['test', 'example.test', 'example.test']
+        assert data['whois_server'] == 'registrar.local'
+        assert data['registrar'] == 'Example Registrar, Inc.'
+        assert data['expiration_date'] == '2025-08-13T04:00:00Z'
+        assert data['registrant'] == {'organization': 'Example Org', 'country': 'US'}
+        assert (tmp_path / 'whois_servers.json').exists()
+
+    def test_unreachable_server(self, monkeypatch):
+        monkeypatch.setattr(whois_client, '_scheduler', PriorityScheduler(max_concurrent=10))
+        client = WhoisClient(Config(), port=1, servers={'test': '127.0.0.1'})
+        with pytest.raises(WhoisError):
+            asyncio.run(client.lookup('example.test'))
+
+    def test_per_server_rate_limit(self, whois_server):
+        start, queries = whois_server
+        whois_client._scheduler = PriorityScheduler(max_concurrent=10, host_rate=10)
+
+        async def check():
+            server, port = await start()
+            client = WhoisClient(Config(), port=port, servers={})
+            async with server:
+                begin = time.perf_counter()
+                await asyncio.gather(*(client.query('registry.local', 'example.test') for _ in range(4)))
+                return time.perf_counter() - begin
+
+        assert asyncio.run(check()) >= 0.25
+
+
+class TestRDAPClient:
+    """Test RDAP bootstrap and parsing."""
+
+    def fetcher(self, calls):
+        async def fetch_json(url, **kwargs):
+            calls.append(url)
+            if url == whois_client.RDAP_BOOTSTRAP_URL:
+                return {'services': [[['com', 'net'], ['https://rdap.example/v1']]]}
+            if url == 'https://rdap.example/v1/domain/example.com':
+                return RDAP_DOMAIN
+            if url == whois_client.RDAP_IP_BOOTSTRAP_URLS[0][0]:
+                return {'services': [[['198.0.0.0/8'], ['https://rdap.example/v1']],
+                                     [['198.51.100.0/24'], ['https://rdap.nested/']]]}
+            if url == whois_client.RDAP_IP_BOOTSTRAP_URLS[1][0]:
+                return {'services': [[['2001:db8::/32'], ['https://rdap.example/v1']]]}
+            if url == 'https://rdap.nested/ip/198.51.100.7':
+                return RDAP_IP_NETWORK
+            return None
+        return fetch_json
+
+    def test_lookup_and_bootstrap_cache(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(RDAPClient, '_bootstrap', None)
+        calls = []
+        config = Config(cache_dir=tmp_path)
+
+        data = asyncio.run(RDAPClient(self.fetcher(calls), config).lookup('example.com'))
+        assert data['registrar'] == 'RESERVED-IANA'
+        assert data['creation_date'] == '1995-08-14T04:00:00Z'
+        assert data['name_servers'] == ['a.iana-servers.net']
+        assert data['dnssec'] == 'signedDelegation'
+        assert data['registrant'] == {'organization': 'Example Org', 'country': 'US', 'state': 'CA'}
+
+        # A new process reads the bootstrap file from disk
+        monkeypatch.setattr(RDAPClient, '_bootstrap', None)
+        calls.clear()
+        assert asyncio.run(RDAPClient(self.fetcher(calls), config).base_url('x.net')) == (
+            'https://rdap.example/v1/'
+        )
+        assert calls == []
+
+    def test_tld_without_rdap(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(RDAPClient, '_bootstrap', None)
+        calls = []
+        client = RDAPClient(self.fetcher(calls), Config(cache_dir=tmp_path))
+        assert asyncio.run(client.lookup('example.org')) is None
+        assert calls == [whois_client.RDAP_BOOTSTRAP_URL]
+
+    def test_reads_do_not_create_cache_dir(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(RDAPClient, '_bootstrap', None)
+        monkeypatch.setattr(WhoisClient, '_servers', {})
+        monkeypatch.setattr(WhoisClient, '_servers_loaded', False)
+        config = Config(cache_dir=tmp_path / 'cache')
+
+        async def fetch_nothing(url, **kwargs):
+            return None
+
+        assert asyncio.run(RDAPClient(fetch_nothing, config).lookup('example.com')) is None
+        assert WhoisClient(config)._server_cache() == {}
+        assert not config.cache_dir.exists()
+
+    def test_ip_network(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(RDAPClient, '_ip_bootstrap', None)
+        calls = []
+        client = RDAPClient(self.fetcher(calls), Config(cache_dir=tmp_path))
+
+        data = asyncio.run(client.lookup_ip('198.51.100.7'))
+        assert data['rdap_server'] == 'https://rdap.nested/'
+        assert data['cidr'] == ['198.51.100.0/24']
+        assert data['organization'] == 'Example Hosting'
+        assert data['abuse_email'] == 'abuse@hosting.example'
+
+        # The most specific block wins, and unlisted space has no server
+        assert asyncio.run(client.ip_base_url('198.1.2.3')) == 'https://rdap.example/v1/'
+        assert asyncio.run(client.ip_base_url('2001:db8::1')) == 'https://rdap.example/v1/'
+        assert asyncio.run(client.ip_base_url('203.0.113.1')) is None
+        assert (tmp_path / 'rdap_ipv4.json').exists()